@@ -5,6 +5,9 @@ from rest_framework.exceptions import AuthenticationFailed
 from rest_framework_simplejwt.tokens import RefreshToken
 import re
 
+from jobs.models import Upload
+from jobs.serializers import UploadField, UploadFieldsMixin
+
 
 
 class RegisterSerializer(serializers.ModelSerializer):
@@ -61,13 +64,18 @@ class LoginSerializer(serializers.Serializer):
         }
 
 
-class ProfileSerializer(serializers.ModelSerializer):
+class ProfileSerializer(UploadFieldsMixin, serializers.ModelSerializer):
+    # Instead of files: finalized uploads from /api/jobs/uploads/
+    resume_file_upload = UploadField(Upload.RESUME)
+    profile_picture_upload = UploadField(Upload.PROFILE_PICTURE)
+    upload_fields = {'resume_file_upload': 'resume_file', 'profile_picture_upload': 'profile_picture'}
+
     class Meta:
         model = CustomUser
         fields = [
             'first_name', 'last_name', 'email', 'phone_number',
             'profile_score', 'applications_count', 'interviews_count',
-            'resume_file', 'profile_picture'
+            'resume_file', 'profile_picture', 'resume_file_upload', 'profile_picture_upload'
         ]
 
 
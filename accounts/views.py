@@ -63,14 +63,14 @@ class ProfileView(APIView):
         return Response(serializer.data)
 
     def put(self, request):
-        serializer = ProfileSerializer(request.user, data=request.data, partial=True)
+        serializer = ProfileSerializer(request.user, data=request.data, partial=True, context={'request': request})
         if serializer.is_valid():
             serializer.save()
             return Response({'msg': 'Profile updated successfully'})
         return Response(serializer.errors, status=400)
     
     def patch(self, request):
-        serializer = ProfileSerializer(request.user, data=request.data, partial=True)
+        serializer = ProfileSerializer(request.user, data=request.data, partial=True, context={'request': request})
         if serializer.is_valid():
             serializer.save()
             return Response({'msg': 'Profile updated successfully'})
@@ -139,75 +139,63 @@ class SkillDetailView(generics.RetrieveUpdateDestroyAPIView):
 
 # ========== FORGOT PASSWORD VIEWS ==========
 import secrets
-import threading
 import requests
 from django.conf import settings
 from django.utils import timezone
 from datetime import timedelta
 import os
 
+from jobs.tasks import task
+
+# Cache key prefix of the reset token a queued reset email refers to
+RESET_EMAIL_PREFIX = 'password_reset_email_'
+
 def send_email_with_resend(to_email, subject, html_content, text_content):
-    """Send email using Resend API (works on Render free tier)"""
-    try:
-        resend_api_key = os.environ.get('RESEND_API_KEY')
-        
-        if not resend_api_key:
-            print("RESEND_API_KEY not set!")
-            return False
-        
-        response = requests.post(
-            'https://api.resend.com/emails',
-            headers={
-                'Authorization': f'Bearer {resend_api_key}',
-                'Content-Type': 'application/json'
-            },
-            json={
-                'from': 'SkillConnect <noreply@skillconnect.dev>',
-                'to': [to_email],
-                'subject': subject,
-                'html': html_content,
-                'text': text_content
-            }
-        )
-        
-        if response.status_code == 200:
-            print(f"Email sent successfully to {to_email}!")
-            return True
-        else:
-            print(f"Email failed: {response.text}")
-            return False
-            
-    except Exception as e:
-        print(f"Email sending failed: {e}")
-        return False
+    """Send email using Resend API (works on Render free tier).
 
-class ForgotPasswordView(APIView):
-    """Send password reset email"""
-    def post(self, request):
-        email = request.data.get('email', '').strip().lower()
-        
-        if not email:
-            return Response({'error': 'Email is required'}, status=400)
-        
-        try:
-            user = CustomUser.objects.get(email=email)
-            
-            # Generate reset token
-            reset_token = secrets.token_urlsafe(32)
-            
-            # Store token in cache (expires in 1 hour)
-            cache_key = f'password_reset_{reset_token}'
-            cache.set(cache_key, user.id, timeout=3600)  # 1 hour
-            
-            # Create reset link
-            frontend_url = 'https://skillconnect.dev'
-            reset_link = f'{frontend_url}/reset-password.html?token={reset_token}'
-            
-            # Get user name
-            user_name = user.first_name or user.email.split('@')[0]
-            
-            # Professional HTML Email Template
-            html_content = f'''
+    Call it from a task, not a request: network errors, rate limits and
+    Resend outages raise, so the worker retries them with backoff.
+    """
+    resend_api_key = os.environ.get('RESEND_API_KEY')
+    
+    if not resend_api_key:
+        print("RESEND_API_KEY not set!")
+        return False
+    
+    response = requests.post(
+        'https://api.resend.com/emails',
+        headers={
+            'Authorization': f'Bearer {resend_api_key}',
+            'Content-Type': 'application/json'
+        },
+        json={
+            'from': 'SkillConnect <noreply@skillconnect.dev>',
+            'to': [to_email],
+            'subject': subject,
+            'html': html_content,
+            'text': text_content
+        },
+        timeout=15,
+    )
+    
+    if response.status_code == 200:
+        print(f"Email sent successfully to {to_email}!")
+        return True
+    if response.status_code == 429 or response.status_code >= 500:
+        # Rate limited or Resend is down - worth another attempt
+        response.raise_for_status()
+    # Other errors (bad address, rejected content) would fail again
+    print(f"Email failed: {response.text}")
+    return False
+
+def password_reset_email(user, reset_link):
+    """(html, text) of the password reset email"""
+    # Get user name
+    email = user.email
+    user_name = user.first_name or email.split('@')[0]
+    
+    # Professional HTML Email Template
+    html_content = f'''
 <!DOCTYPE html>
 <html>
 <head>
@@ -340,9 +328,9 @@ class ForgotPasswordView(APIView):
 </body>
 </html>
 '''
-            
-            # Plain text fallback
-            text_content = f'''
+    
+    # Plain text fallback
+    text_content = f'''
 Hi {user_name},
 
 We received a request to reset the password for your SkillConnect account.
@@ -360,16 +348,45 @@ support@skillconnect.dev
 
 © 2026 SkillConnect - India's Premier Job Platform
 '''
+    return html_content, text_content
+
+@task(priority=10)
+def send_password_reset_email(user_id, reference):
+    """Build and send a password reset email; False if the token expired before it was sent"""
+    reset_token = cache.get(f'{RESET_EMAIL_PREFIX}{reference}')
+    user = CustomUser.objects.filter(id=user_id).first()
+    if reset_token is None or user is None:
+        return False
+    frontend_url = 'https://skillconnect.dev'
+    reset_link = f'{frontend_url}/reset-password.html?token={reset_token}'
+    html_content, text_content = password_reset_email(user, reset_link)
+    sent = send_email_with_resend(user.email, '🔐 Reset Your SkillConnect Password', html_content, text_content)
+    cache.delete(f'{RESET_EMAIL_PREFIX}{reference}')
+    return sent
+
+class ForgotPasswordView(APIView):
+    """Send password reset email"""
+    def post(self, request):
+        email = request.data.get('email', '').strip().lower()
+        
+        if not email:
+            return Response({'error': 'Email is required'}, status=400)
+        
+        try:
+            user = CustomUser.objects.get(email=email)
+            
+            # Generate reset token
+            reset_token = secrets.token_urlsafe(32)
+            
+            # Store token in cache (expires in 1 hour)
+            cache_key = f'password_reset_{reset_token}'
+            cache.set(cache_key, user.id, timeout=3600)  # 1 hour
             
-            # Send email using Resend API (works on Render free tier!)
-            try:
-                email_thread = threading.Thread(
-                    target=send_email_with_resend,
-                    args=(email, '🔐 Reset Your SkillConnect Password', html_content, text_content)
-                )
-                email_thread.start()
-            except Exception as e:
-                print(f"Email setup failed: {e}")
+            # Sent from a worker, with retries. The task only gets a reference to the
+            # token, so the reset link is not stored in (or shown from) the task table
+            reference = secrets.token_urlsafe(16)
+            cache.set(f'{RESET_EMAIL_PREFIX}{reference}', reset_token, timeout=3600)
+            send_password_reset_email.enqueue(user.id, reference)
             
             return Response({
                 'message': 'If an account exists with this email, a reset link has been sent.',
@@ -141,84 +141,34 @@ class AIResumeAnalyzer:
         }
 
 class AIJobMatcher:
-    """AI-powered job matching algorithm"""
+    """Job matching with the local TF-IDF recommender (jobs.recommend) - runs without API calls"""
     
-    def __init__(self):
-        openai.api_key = getattr(settings, 'OPENAI_API_KEY', 'sk-your-openai-key-here')
-    
-    def match_jobs_to_profile(self, user_profile: Dict, available_jobs: List[Dict]) -> List[Dict]:
+    def match_jobs_to_profile(self, user, limit: int = 10) -> List[Dict]:
         """
-        Match user profile to available jobs using AI
-        Returns ranked list of matching jobs with scores
-        """
-        
-        system_prompt = """
-        You are an expert job matching AI. Analyze user profile and job listings to find best matches.
-        
-        Consider:
-        - Skills alignment
-        - Experience relevance  
-        - Career progression potential
-        - Location preferences
-        - Salary expectations
-        
-        Return JSON array with match scores and reasons.
-        """
-        
-        user_prompt = f"""
-        User Profile:
-        {json.dumps(user_profile, indent=2)}
-        
-        Available Jobs:
-        {json.dumps(available_jobs[:5], indent=2)}  # Limit for API efficiency
-        
-        Rank these jobs for the user (0-100 match score) and explain why.
+        Rank every active job against the user's skills, experience and education
+        Returns the best matches with their cosine similarity as a 0-100 score
         """
+        from jobs.models import Job
+        from jobs.recommend import recommend_jobs
         
-        try:
-            response = openai.ChatCompletion.create(
-                model="gpt-3.5-turbo",
-                messages=[
-                    {"role": "system", "content": system_prompt},
-                    {"role": "user", "content": user_prompt}
-                ],
-                max_tokens=1000,
-                temperature=0.2
-            )
-            
-            # Process AI matching results
-            ai_response = response.choices[0].message.content
-            
-            # Here you would parse the AI response and rank jobs
-            # For now, return a structured response
-            return self._process_job_matches(ai_response, available_jobs)
-            
-        except Exception as e:
-            # Fallback to rule-based matching
-            return self._fallback_job_matching(user_profile, available_jobs)
-    
-    def _process_job_matches(self, ai_response: str, jobs: List[Dict]) -> List[Dict]:
-        """Process AI matching response"""
-        # Enhanced job matching based on AI analysis
+        matches = recommend_jobs(user, limit)
+        jobs = Job.objects.in_bulk([pk for pk, _, _ in matches])
         matched_jobs = []
-        for i, job in enumerate(jobs):
+        for pk, score, skills in matches:
+            job = jobs.get(pk)
+            if job is None:
+                continue
             matched_jobs.append({
-                **job,
-                'ai_match_score': 85 - (i * 5),  # Simulated score
-                'ai_reasoning': f"Good match based on skills and experience",
-                'match_factors': ["Skills alignment", "Experience level", "Location fit"]
+                'id': job.id,
+                'title': job.title,
+                'company': job.company,
+                'location': job.location,
+                'requirements': job.requirements,
+                'ai_match_score': round(score * 100, 1),
+                'matched_skills': skills,
             })
         
-        return sorted(matched_jobs, key=lambda x: x['ai_match_score'], reverse=True)
-    
-    def _fallback_job_matching(self, profile: Dict, jobs: List[Dict]) -> List[Dict]:
-        """Fallback rule-based job matching"""
-        # Simple matching algorithm when AI is unavailable
-        for job in jobs:
-            job['match_score'] = 75  # Default score
-            job['match_reasoning'] = "Rule-based matching applied"
-        
-        return jobs
+        return matched_jobs
 
 class AIInterviewPrep:
     """AI-powered interview preparation"""
@@ -345,34 +295,19 @@ class AIJobMatchingView(APIView):
     permission_classes = [IsAuthenticated]
     
     def get(self, request):
-        from jobs.models import Job
-        from accounts.serializers import ProfileSerializer
-        
-        # Get user profile
-        profile_serializer = ProfileSerializer(request.user)
-        user_profile = profile_serializer.data
+        from jobs.recommend import DEFAULT_LIMIT, MAX_LIMIT, job_recommender
         
-        # Get available jobs
-        jobs = Job.objects.filter(is_active=True)[:10]
-        job_data = [
-            {
-                'id': job.id,
-                'title': job.title,
-                'company': job.company,
-                'location': job.location,
-                'requirements': job.requirements,
-                'description': job.description
-            }
-            for job in jobs
-        ]
+        try:
+            limit = min(max(int(request.query_params.get('limit', DEFAULT_LIMIT)), 1), MAX_LIMIT)
+        except ValueError:
+            limit = DEFAULT_LIMIT
         
-        # AI matching
         matcher = AIJobMatcher()
-        matched_jobs = matcher.match_jobs_to_profile(user_profile, job_data)
+        matched_jobs = matcher.match_jobs_to_profile(request.user, limit)
         
         return Response({
             'matched_jobs': matched_jobs,
-            'total_analyzed': len(job_data)
+            'total_analyzed': len(job_recommender.matrix)
         })
 
 class AIInterviewPrepView(APIView):
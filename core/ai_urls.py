@@ -8,6 +8,7 @@ from .groq_ai import (
     GroqJobMatchView,
     GroqInterviewFeedbackView
 )
+from .ai_integration import AIJobMatchingView
 
 urlpatterns = [
     # Resume Analysis
@@ -16,6 +17,7 @@ urlpatterns = [
     
     # Job Match Analysis
     path('job-match/', GroqJobMatchView.as_view(), name='groq-job-match'),
+    path('job-matching/', AIJobMatchingView.as_view(), name='ai-job-matching'),
     
     # Interview Feedback
     path('interview-feedback/', GroqInterviewFeedbackView.as_view(), name='groq-interview-feedback'),
@@ -0,0 +1,200 @@
+"""
+SkillConnect - Read Replica Routing
+Sends the reads of safe (GET/HEAD/OPTIONS) requests to a healthy read
+replica; everything else uses the primary (`default`).
+
+Replicas come from DATABASE_REPLICA_URLS (see settings). Reads stay on the
+primary when:
+- the request is not a safe method, or runs outside a request (management
+  commands, background threads);
+- a transaction is open on the primary;
+- the request has already written, or the client wrote within the last
+  DATABASE_REPLICA_PIN_SECONDS (the pin cookie) - so users read their own
+  writes through replication lag;
+- no replica passed its last health check;
+- the code reading wraps it in primary_reads(), as views do for results they
+  cache under the jobs version: the version is read from the primary, so
+  rows read from a lagging replica would be cached as current for the whole
+  cache timeout, not just the replication lag.
+
+Health checks never run on the request thread: a result older than
+DATABASE_REPLICA_CHECK_SECONDS is used once more while a background thread
+rechecks, and a replica not checked yet counts as unhealthy. Replicas
+connect with a DATABASE_REPLICA_CONNECT_TIMEOUT, so a check of one that is
+down gives up quickly. Migrations never run on a replica (it gets the
+schema through replication) unless DATABASE_REPLICA_MIGRATE is set for a
+local stand-in that does not replicate.
+
+Cache table reads (DatabaseCache) always use the primary: the jobs version
+counter must never be read stale.
+"""
+
+import logging
+import random
+import threading
+import time
+from contextlib import contextmanager
+from contextvars import ContextVar
+
+from django.conf import settings
+from django.db import DEFAULT_DB_ALIAS, DatabaseError, connections
+
+logger = logging.getLogger(__name__)
+
+PIN_COOKIE = 'db_primary_pin'
+SAFE_METHODS = ('GET', 'HEAD', 'OPTIONS')
+# Apps whose reads must never lag behind their writes
+PRIMARY_ONLY_APPS = {'django_cache'}
+
+
+class RoutingState:
+    """Routing decisions of one request"""
+    __slots__ = ('replica', 'wrote')
+
+    def __init__(self, replica):
+        self.replica = replica
+        self.wrote = False
+
+
+# None outside requests: everything uses the primary
+routing_state = ContextVar('db_routing_state', default=None)
+
+
+@contextmanager
+def primary_reads():
+    """Route the current request's reads to the primary inside the block"""
+    state = routing_state.get()
+    if state is None or not state.replica:
+        yield
+        return
+    state.replica = False
+    try:
+        yield
+    finally:
+        state.replica = True
+
+
+def replica_aliases():
+    return getattr(settings, 'DATABASE_REPLICAS', [])
+
+
+class ReplicaHealth:
+    """Per-worker replica health, rechecked at most every DATABASE_REPLICA_CHECK_SECONDS"""
+
+    def __init__(self):
+        self.checked = {}  # alias -> (monotonic time, healthy)
+        self.checking = set()
+        self.lock = threading.Lock()
+
+    def is_healthy(self, alias):
+        """The replica's last known health, starting a recheck in the background once it is stale.
+
+        With DATABASE_REPLICA_BACKGROUND_CHECK off the recheck runs here.
+        """
+        interval = getattr(settings, 'DATABASE_REPLICA_CHECK_SECONDS', 10)
+        with self.lock:
+            checked_at, healthy = self.checked.get(alias, (float('-inf'), False))
+            stale = time.monotonic() - checked_at >= interval and alias not in self.checking
+            if stale:
+                self.checking.add(alias)
+        if not stale:
+            return healthy
+        if not getattr(settings, 'DATABASE_REPLICA_BACKGROUND_CHECK', True):
+            return self.recheck(alias)
+        threading.Thread(target=self.recheck, args=(alias, True), name=f'replica-check-{alias}', daemon=True).start()
+        return healthy
+
+    def recheck(self, alias, close_connection=False):
+        """Check a replica and record the result; returns it"""
+        healthy = False
+        try:
+            healthy = self.check(alias)
+        finally:
+            if close_connection:
+                connections[alias].close()
+            with self.lock:
+                if not healthy and self.checked.get(alias, (0, True))[1]:
+                    logger.warning('Read replica %s is unhealthy; reading from the primary', alias)
+                self.checked[alias] = (time.monotonic(), healthy)
+                self.checking.discard(alias)
+        return healthy
+
+    def check(self, alias):
+        """Whether the replica accepts connections and (PostgreSQL) is not lagging too far behind"""
+        connection = connections[alias]
+        try:
+            if connection.connection is not None and not connection.is_usable():
+                connection.close()
+            connection.ensure_connection()
+            max_lag = getattr(settings, 'DATABASE_REPLICA_MAX_LAG_SECONDS', 30)
+            if connection.vendor == 'postgresql' and max_lag:
+                with connection.cursor() as cursor:
+                    cursor.execute('SELECT EXTRACT(EPOCH FROM now() - pg_last_xact_replay_timestamp())')
+                    lag = cursor.fetchone()[0]
+                # NULL on a server that is not a standby
+                return lag is None or lag <= max_lag
+            return True
+        except DatabaseError:
+            return False
+
+    def reset(self):
+        with self.lock:
+            self.checked.clear()
+            self.checking.clear()
+
+
+replica_health = ReplicaHealth()
+
+
+class ReadReplicaRouter:
+    """DATABASE_ROUTERS entry: reads to a healthy replica when the request allows it, writes to the primary"""
+
+    def db_for_read(self, model, **hints):
+        if model._meta.app_label in PRIMARY_ONLY_APPS:
+            return DEFAULT_DB_ALIAS
+        # Related objects are read from wherever their instance came from
+        if 'instance' in hints:
+            return None
+        state = routing_state.get()
+        if state is None or not state.replica or state.wrote or connections[DEFAULT_DB_ALIAS].in_atomic_block:
+            return DEFAULT_DB_ALIAS
+        healthy = [alias for alias in replica_aliases() if replica_health.is_healthy(alias)]
+        return random.choice(healthy) if healthy else DEFAULT_DB_ALIAS
+
+    def db_for_write(self, model, **hints):
+        state = routing_state.get()
+        if state is not None and model._meta.app_label not in PRIMARY_ONLY_APPS:
+            state.wrote = True
+        return DEFAULT_DB_ALIAS
+
+    def allow_relation(self, obj1, obj2, **hints):
+        databases = {DEFAULT_DB_ALIAS, *replica_aliases()}
+        if obj1._state.db in databases and obj2._state.db in databases:
+            return True
+        return None
+
+    def allow_migrate(self, db, app_label, **hints):
+        if db in replica_aliases() and not getattr(settings, 'DATABASE_REPLICA_MIGRATE', False):
+            return False
+        return None
+
+
+class ReadReplicaMiddleware:
+    """Sets up replica routing for each request and pins clients that wrote to the primary"""
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+
+    def __call__(self, request):
+        state = RoutingState(replica=request.method in SAFE_METHODS and PIN_COOKIE not in request.COOKIES)
+        token = routing_state.set(state)
+        try:
+            response = self.get_response(request)
+        finally:
+            routing_state.reset(token)
+        if state.wrote and replica_aliases():
+            response.set_cookie(
+                PIN_COOKIE, '1', max_age=getattr(settings, 'DATABASE_REPLICA_PIN_SECONDS', 15), httponly=True,
+                samesite=settings.SESSION_COOKIE_SAMESITE, secure=settings.SESSION_COOKIE_SECURE,
+            )
+        return response
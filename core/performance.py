@@ -6,10 +6,13 @@ Industry Standard Database Query Optimization & Caching
 from django.core.cache import cache
 from django.db import models
 from django.conf import settings
+from collections import Counter
 from functools import wraps
+import threading
 import time
 import hashlib
 import json
+import re
 
 class PerformanceOptimizedManager(models.Manager):
     """Custom manager with query optimization"""
@@ -83,8 +86,13 @@ class CacheManager:
     
     USER_PROFILE_CACHE_KEY = 'user_profile_{}'
     JOB_LISTINGS_CACHE_KEY = 'job_listings_{}'
+    JOB_DETAIL_CACHE_KEY = 'job_detail_{}'
+    JOB_FACETS_CACHE_KEY = 'job_facets_{}'
     POPULAR_JOBS_CACHE_KEY = 'popular_jobs'
     
+    _access_stats = Counter()
+    _stats_lock = threading.Lock()
+    
     @classmethod
     def get_user_profile(cls, user_id):
         """Get cached user profile"""
@@ -114,26 +122,74 @@ class CacheManager:
         """Cache job listings"""
         cache_key = cls.JOB_LISTINGS_CACHE_KEY.format(filters_hash)
         cache.set(cache_key, job_data, timeout=timeout)
+    
+    @classmethod
+    def get_job_detail(cls, job_key):
+        """Get cached job detail"""
+        cache_key = cls.JOB_DETAIL_CACHE_KEY.format(job_key)
+        return cache.get(cache_key)
+    
+    @classmethod
+    def set_job_detail(cls, job_key, job_data, timeout=600):  # 10 minutes
+        """Cache job detail"""
+        cache_key = cls.JOB_DETAIL_CACHE_KEY.format(job_key)
+        cache.set(cache_key, job_data, timeout=timeout)
+    
+    @classmethod
+    def get_job_facets(cls, filters_hash):
+        """Get cached facet counts"""
+        cache_key = cls.JOB_FACETS_CACHE_KEY.format(filters_hash)
+        return cache.get(cache_key)
+    
+    @classmethod
+    def set_job_facets(cls, filters_hash, facet_data, timeout=300):  # 5 minutes
+        """Cache facet counts"""
+        cache_key = cls.JOB_FACETS_CACHE_KEY.format(filters_hash)
+        cache.set(cache_key, facet_data, timeout=timeout)
+    
+    @classmethod
+    def get_popular_jobs(cls):
+        """Get cached trending jobs"""
+        return cache.get(cls.POPULAR_JOBS_CACHE_KEY)
+    
+    @classmethod
+    def set_popular_jobs(cls, jobs_data, timeout=600):  # 10 minutes
+        """Cache trending jobs"""
+        cache.set(cls.POPULAR_JOBS_CACHE_KEY, jobs_data, timeout=timeout)
+    
+    @classmethod
+    def invalidate_popular_jobs(cls):
+        """Invalidate trending jobs when they are recomputed"""
+        cache.delete(cls.POPULAR_JOBS_CACHE_KEY)
+    
+    @classmethod
+    def record_access(cls, name, hit):
+        """Count a cache hit or miss (per worker process, no cache round trip)"""
+        with cls._stats_lock:
+            cls._access_stats[name, bool(hit)] += 1
+    
+    @classmethod
+    def get_hit_rate(cls, name):
+        """Return {'hits', 'misses', 'hit_rate'} for a named cache in this worker"""
+        hits = cls._access_stats[name, True]
+        misses = cls._access_stats[name, False]
+        total = hits + misses
+        return {'hits': hits, 'misses': misses, 'hit_rate': hits / total if total else 0.0}
+    
+    @classmethod
+    def reset_hit_rate(cls, name):
+        with cls._stats_lock:
+            cls._access_stats.pop((name, True), None)
+            cls._access_stats.pop((name, False), None)
 
 class DatabaseIndexOptimizer:
     """Database index optimization suggestions"""
     
+    # Job/JobApplication indexes are declared in jobs.models Meta.indexes
+    # (migration 0005); see model_index_sql() for the statements they produce.
     RECOMMENDED_INDEXES = {
         'accounts_customuser': [
-            'CREATE INDEX idx_user_email ON accounts_customuser(email);',
             'CREATE INDEX idx_user_active ON accounts_customuser(is_active, date_joined);',
-            'CREATE INDEX idx_user_location ON accounts_customuser(location);',
-        ],
-        'jobs_job': [
-            'CREATE INDEX idx_job_active ON jobs_job(is_active, posted_date);',
-            'CREATE INDEX idx_job_location ON jobs_job(location);',
-            'CREATE INDEX idx_job_type ON jobs_job(job_type, work_mode);',
-            'CREATE INDEX idx_job_salary ON jobs_job(salary_min, salary_max);',
-            'CREATE INDEX idx_job_search ON jobs_job(location, job_type, is_active);',
-        ],
-        'jobs_jobapplication': [
-            'CREATE INDEX idx_application_user ON jobs_jobapplication(user_id, applied_date);',
-            'CREATE INDEX idx_application_job ON jobs_jobapplication(job_id, status);',
         ],
         'accounts_workexperience': [
             'CREATE INDEX idx_work_user ON accounts_workexperience(user_id, start_date);',
@@ -143,13 +199,93 @@ class DatabaseIndexOptimizer:
         ]
     }
     
+    # Plan lines that mean "read the whole table" / "sorted without an index"
+    FULL_SCAN_PATTERNS = {
+        'sqlite': re.compile(r'^SCAN (?:TABLE )?(\w+)(?:$| AS )'),
+        'postgresql': re.compile(r'Seq Scan on (\w+)'),
+        'mysql': re.compile(r'^(\w+): type=ALL\b'),
+    }
+    SORT_PATTERNS = {
+        'sqlite': re.compile(r'USE TEMP B-TREE FOR (?:ORDER BY|RIGHT PART OF ORDER BY)'),
+        'postgresql': re.compile(r'(?:^|-> +)Sort +\('),
+        'mysql': re.compile(r'Using filesort'),
+    }
+    
     @classmethod
-    def generate_index_sql(cls):
+    def generate_index_sql(cls, using='default'):
         """Generate SQL for creating recommended indexes"""
         sql_statements = []
         for table, indexes in cls.RECOMMENDED_INDEXES.items():
             sql_statements.extend(indexes)
+        sql_statements.extend(cls.model_index_sql(using))
         return sql_statements
+    
+    @staticmethod
+    def model_index_sql(using='default'):
+        """CREATE INDEX statements for the jobs models' Meta.indexes on this backend"""
+        from django.db import connections
+        from jobs.models import Job, JobApplication
+        
+        editor = connections[using].schema_editor(collect_sql=True)
+        statements = []
+        for model in (Job, JobApplication):
+            for index in model._meta.indexes:
+                sql = index.create_sql(model, editor)
+                if sql is not None:  # partial indexes are skipped on MySQL
+                    statements.append(f'{sql};')
+        return statements
+    
+    @staticmethod
+    def explain(sql, params=None, using='default'):
+        """Run EXPLAIN for one query; return the plan as a list of text lines"""
+        from django.db import connections
+        
+        connection = connections[using]
+        with connection.cursor() as cursor:
+            cursor.execute(f'{connection.ops.explain_query_prefix()} {sql}', params)
+            rows = cursor.fetchall()
+            columns = [col[0] for col in cursor.description]
+        
+        if connection.vendor == 'sqlite':
+            return [row[-1] for row in rows]
+        if connection.vendor == 'mysql':
+            lines = []
+            for row in rows:
+                plan = dict(zip(columns, row))
+                lines.append(
+                    f"{plan.get('table')}: type={plan.get('type')} key={plan.get('key')} "
+                    f"rows={plan.get('rows')} {plan.get('Extra') or ''}".rstrip()
+                )
+            return lines
+        return [row[0] for row in rows]
+    
+    @classmethod
+    def analyze_plan(cls, plan, vendor):
+        """Return (fully scanned tables, needs_sort) for an EXPLAIN plan"""
+        scan_re = cls.FULL_SCAN_PATTERNS.get(vendor)
+        sort_re = cls.SORT_PATTERNS.get(vendor)
+        scans = []
+        for line in plan:
+            match = scan_re.search(line.strip()) if scan_re else None
+            if match and match.group(1) not in scans:
+                scans.append(match.group(1))
+        needs_sort = bool(sort_re) and any(sort_re.search(line) for line in plan)
+        return scans, needs_sort
+    
+    @staticmethod
+    def suggest_columns(sql, table):
+        """Guess an index for table from a query: equality columns, then ORDER BY"""
+        column = rf'[`"]{table}[`"]\.[`"](\w+)[`"]'
+        where, _, order_by = sql.partition(' ORDER BY ')
+        where = where.partition(' WHERE ')[2]
+        columns = []
+        for name in re.findall(column + r'(?:\s*(?:=|IN\b)|\s*(?:AND|OR|\)|$))', where):
+            if name not in columns:
+                columns.append(name)
+        for name in re.findall(column, order_by):
+            if name not in columns:
+                columns.append(name)
+        return columns
 
 class PerformanceMonitor:
     """Monitor and log performance metrics"""
@@ -172,10 +308,13 @@ class PerformanceMonitor:
         return wrapper
     
     @staticmethod
-    def log_cache_hit_rate():
+    def log_cache_hit_rate(names=('job_listings', 'job_detail', 'job_facets', 'popular_jobs')):
         """Log cache hit rates for monitoring"""
-        # This would integrate with Redis or cache backend
-        pass
+        import logging
+        logger = logging.getLogger('performance')
+        for name in names:
+            stats = CacheManager.get_hit_rate(name)
+            logger.info(f"Cache {name}: {stats['hits']} hits / {stats['misses']} misses ({stats['hit_rate']:.1%})")
 
 class LazyLoadingMixin:
     """Mixin for implementing lazy loading in views"""
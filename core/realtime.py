@@ -110,6 +110,14 @@ class NotificationConsumer(AsyncWebsocketConsumer):
             'message': f"New job match found: {event['job']['title']}"
         }))
     
+    async def job_alerts(self, event):
+        """Handle a batch of saved search job alerts"""
+        await self.send(text_data=json.dumps({
+            'type': 'job_alerts',
+            'jobs': event['jobs'],
+            'message': f"{len(event['jobs'])} new job matches found"
+        }))
+    
     async def application_update(self, event):
         """Handle job application status update"""
         await self.send(text_data=json.dumps({
@@ -196,6 +204,17 @@ class JobAlertService:
             'job': job_data
         })
     
+    @staticmethod
+    async def send_job_alerts(alerts: Dict[int, List[Dict[str, Any]]]):
+        """Send each user's batch of saved search matches as one message"""
+        channel_layer = get_channel_layer()
+        
+        for user_id, jobs in alerts.items():
+            await channel_layer.group_send(f"notifications_{user_id}", {
+                'type': 'job_alerts',
+                'jobs': jobs
+            })
+    
     @staticmethod
     async def broadcast_new_job(job_data: Dict[str, Any]):
         """Broadcast new job to all relevant users"""
@@ -378,6 +397,13 @@ class SkillConnectWebSocket {
                 this.showJobAlert(data.job);
                 break;
                 
+            case 'job_alerts':
+                // Saved search matches arrive batched; show the newest
+                if (data.jobs.length) {
+                    this.showJobAlert(data.jobs[data.jobs.length - 1]);
+                }
+                break;
+                
             case 'application_update':
                 this.showApplicationUpdate(data.application);
                 break;
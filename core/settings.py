@@ -11,6 +11,7 @@ https://docs.djangoproject.com/en/5.2/ref/settings/
 """
 from pathlib import Path
 import os
+import tempfile
 
 # Load .env file manually if exists
 env_file = Path(__file__).resolve().parent.parent / '.env'
@@ -88,6 +89,7 @@ MIDDLEWARE = [
     'corsheaders.middleware.CorsMiddleware',
     'django.middleware.security.SecurityMiddleware',
     'whitenoise.middleware.WhiteNoiseMiddleware',  # 🌐 Static files for production
+    'core.db_router.ReadReplicaMiddleware',  # ⚡ Read replica routing (core/db_router.py)
     'django.contrib.sessions.middleware.SessionMiddleware',
     'django.middleware.common.CommonMiddleware',
     'django.middleware.csrf.CsrfViewMiddleware',
@@ -155,6 +157,41 @@ else:
             'CONN_MAX_AGE': 600,
         }
     }
+    # Job listing indexes are partial (WHERE is_active); migration 0005 creates
+    # full equivalents for MySQL, so its "conditions not supported" warning is noise
+    SILENCED_SYSTEM_CHECKS = ['models.W037']
+
+# ⚡ Read replicas (core/db_router.py): DATABASE_REPLICA_URLS is a comma-separated
+# list of database URLs, added as replica_1, replica_2, ... Reads of GET requests
+# go to a healthy replica; clients that wrote in the last
+# DATABASE_REPLICA_PIN_SECONDS keep reading from the primary. Locally, two
+# SQLite files work: DATABASE_REPLICA_URLS=sqlite:////tmp/replica.db with
+# DATABASE_REPLICA_MIGRATE=true, as migrate skips replicas otherwise
+DATABASE_REPLICA_CONNECT_TIMEOUT = int(os.environ.get('DATABASE_REPLICA_CONNECT_TIMEOUT', 3))
+DATABASE_REPLICA_MIGRATE = os.environ.get('DATABASE_REPLICA_MIGRATE', 'False').lower() == 'true'
+for _number, _url in enumerate(filter(None, map(str.strip, os.environ.get('DATABASE_REPLICA_URLS', '').split(','))), 1):
+    _replica = dj_database_url.parse(_url, conn_max_age=600, conn_health_checks=True)
+    if _replica['ENGINE'].endswith(('postgresql', 'mysql')):
+        # A replica that is down fails its health check quickly
+        _replica.setdefault('OPTIONS', {})['connect_timeout'] = DATABASE_REPLICA_CONNECT_TIMEOUT
+    DATABASES[f'replica_{_number}'] = _replica
+DATABASE_REPLICAS = [alias for alias in DATABASES if alias.startswith('replica_')]
+DATABASE_ROUTERS = ['core.db_router.ReadReplicaRouter']
+DATABASE_REPLICA_PIN_SECONDS = int(os.environ.get('DATABASE_REPLICA_PIN_SECONDS', 15))
+DATABASE_REPLICA_CHECK_SECONDS = int(os.environ.get('DATABASE_REPLICA_CHECK_SECONDS', 10))
+DATABASE_REPLICA_MAX_LAG_SECONDS = int(os.environ.get('DATABASE_REPLICA_MAX_LAG_SECONDS', 30))
+
+# ⚡ Cache - shared by all gunicorn workers (database table, no Redis needed)
+# so job cache version bumps and password reset tokens are seen by every worker.
+# Run `python manage.py createcachetable` once per database.
+CACHES = {
+    'default': {
+        'BACKEND': 'django.core.cache.backends.db.DatabaseCache',
+        'LOCATION': 'skillconnect_cache',
+        'TIMEOUT': 600,
+        'OPTIONS': {'MAX_ENTRIES': 20000},
+    }
+}
 
 # ✅ Custom user model
 AUTH_USER_MODEL = 'accounts.CustomUser'
@@ -199,6 +236,46 @@ DEFAULT_AUTO_FIELD = 'django.db.models.BigAutoField'
 DATA_UPLOAD_MAX_MEMORY_SIZE = 5242880  # 5MB - Faster file uploads
 FILE_UPLOAD_MAX_MEMORY_SIZE = 5242880
 
+# Resumable uploads (jobs/uploads.py): chunks are assembled here before the
+# file moves to media storage; every worker must see the same directory
+UPLOAD_TEMP_DIR = os.environ.get('UPLOAD_TEMP_DIR', os.path.join(tempfile.gettempdir(), 'skillconnect-uploads'))
+
+# Direct uploads (jobs/direct_uploads.py) go from the client straight to the
+# media storage: 'cloudinary', or 'local' - a stand-in over MEDIA_ROOT
+DIRECT_UPLOAD_BACKEND = os.environ.get('DIRECT_UPLOAD_BACKEND') or ('local' if DEBUG else 'cloudinary')
+
+# Protected media downloads (jobs/downloads.py) hand the transfer to the front
+# proxy: 'nginx' (X-Accel-Redirect to an internal location at the prefix),
+# 'sendfile' (X-Sendfile), or '' to send it from the app with ranges
+PROTECTED_MEDIA_SERVER = os.environ.get('PROTECTED_MEDIA_SERVER', '')
+PROTECTED_MEDIA_PREFIX = os.environ.get('PROTECTED_MEDIA_PREFIX', '/protected-media/')
+
+# Job list/detail response cache (seconds, 0 disables). Entries are
+# invalidated by the jobs version counter, so this is only an upper bound.
+JOB_CACHE_TIMEOUT = int(os.environ.get('JOB_CACHE_TIMEOUT', 600))
+
+# Job expiry (jobs/archive.py, `manage.py archive_jobs`): open jobs without an
+# expires_at close this many days after posting (0 = never), and closed jobs
+# move to the archive table this many days after expiring
+JOB_EXPIRY_DAYS = int(os.environ.get('JOB_EXPIRY_DAYS', 60))
+JOB_ARCHIVE_AFTER_DAYS = int(os.environ.get('JOB_ARCHIVE_AFTER_DAYS', 30))
+
+# Job popularity (jobs/popularity.py): each worker buffers view/apply counts
+# and writes them out every JOB_EVENTS_FLUSH_SECONDS; trending scores halve
+# every JOB_TRENDING_HALF_LIFE_HOURS (`manage.py update_trending_jobs`)
+JOB_EVENTS_FLUSH_SECONDS = int(os.environ.get('JOB_EVENTS_FLUSH_SECONDS', 10))
+JOB_TRENDING_HALF_LIFE_HOURS = float(os.environ.get('JOB_TRENDING_HALF_LIFE_HOURS', 24))
+
+# Periodic background tasks (jobs/tasks.py): task name -> seconds between runs,
+# enqueued by `manage.py run_worker`
+PERIODIC_TASKS = {
+    'jobs.popularity.refresh_trending': 5 * 60,
+    'jobs.similar.refresh_similar_jobs': 5 * 60,
+    'jobs.archive.close_expired_jobs': 24 * 3600,
+    'jobs.uploads.purge_uploads': 24 * 3600,
+    'jobs.applications.purge_idempotency_keys': 3600,
+}
+
 # Session optimization
 SESSION_ENGINE = 'django.contrib.sessions.backends.db'  # Database sessions
 SESSION_COOKIE_AGE = 86400  # 1 day
@@ -1,5 +1,6 @@
 from django.contrib import admin
-from .models import Job, JobApplication
+from django.utils import timezone
+from .models import Job, JobApplication, Task
 
 @admin.register(Job)
 class JobAdmin(admin.ModelAdmin):
@@ -26,7 +27,7 @@ class JobAdmin(admin.ModelAdmin):
             'fields': ('company_logo', 'company_size')
         }),
         ('Status', {
-            'fields': ('is_active',)
+            'fields': ('is_active', 'expires_at')
         }),
     )
 
@@ -61,3 +62,20 @@ class JobApplicationAdmin(admin.ModelAdmin):
     def get_queryset(self, request):
         queryset = super().get_queryset(request)
         return queryset.select_related('user', 'job')
+
+
+@admin.register(Task)
+class TaskAdmin(admin.ModelAdmin):
+    list_display = ['name', 'status', 'priority', 'run_at', 'attempts', 'max_attempts', 'locked_by', 'created_at']
+    list_filter = ['status', 'name']
+    search_fields = ['name', 'last_error']
+    ordering = ['status', '-priority', 'run_at']
+    readonly_fields = ['locked_by', 'locked_until', 'last_error', 'created_at']
+    actions = ['retry_tasks']
+
+    @admin.action(description='Retry selected failed tasks now')
+    def retry_tasks(self, request, queryset):
+        count = queryset.filter(status=Task.FAILED).update(
+            status=Task.QUEUED, run_at=timezone.now(), attempts=0, last_error='',
+        )
+        self.message_user(request, f'{count} tasks queued again.')
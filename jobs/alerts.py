@@ -0,0 +1,251 @@
+"""
+SkillConnect - Saved Search Alerts
+Matches new jobs against users' saved searches and sends the matches through
+the realtime JobAlertService, one batch per user.
+
+Saved searches are indexed the other way round from jobs (a percolator):
+each stores a hash of its equality filters - category, job type, experience
+level, work mode and city - and, when it requires skills, the first of them
+(key_skill). A new job has at most 2^5 = 32 combinations of its own values,
+however many skills it lists, so one indexed IN lookup on their hashes,
+narrowed to searches with no key skill or one of the job's skills, finds
+exactly the searches whose equality filters it meets; the other filters
+(salary, remaining skills, keywords, radius, ...) are then checked in
+Python. The cost follows the number of matching searches, not the number
+saved.
+
+Matching runs in a background task (send_job_alerts.enqueue), not on the
+request or ingest thread that created the jobs.
+"""
+
+import hashlib
+import logging
+from collections import defaultdict
+from functools import cached_property
+from itertools import combinations
+
+from asgiref.sync import async_to_sync
+from django.conf import settings
+from django.db.models import Q
+from django.utils import timezone
+
+from .filters import FILTER_PARAMS, SEARCH_PARAMS, normalize_filter_params, parse_amount
+from .geo import distance_km, parse_radius, resolve_location, resolve_point
+from .search import build_job_terms, term_matches
+from .skills import skill_labels
+from .tasks import task
+
+logger = logging.getLogger(__name__)
+
+# Indexed equality filters, in key order; `city` is a location that names a known city
+KEY_FIELDS = ('category', 'job_type', 'experience_level', 'work_mode', 'city')
+# Plain column filters, all checked again after the lookup (company_size only there)
+EQUALITY_FIELDS = ('category', 'job_type', 'experience_level', 'work_mode', 'company_size')
+
+# `q` is the normalized keyword param, accepted back so saved params normalize to themselves
+SAVED_SEARCH_PARAMS = FILTER_PARAMS + SEARCH_PARAMS + ('q',)
+LOOKUP_CHUNK = 500
+
+
+def normalize_search_params(params):
+    """Normalized filters ({param: value}) for saving - the same form listing cache keys use"""
+    raw = {}
+    for param, value in (params or {}).items():
+        if param not in SAVED_SEARCH_PARAMS or value is None:
+            continue
+        raw[SEARCH_PARAMS[0] if param == 'q' else param] = (
+            ','.join(map(str, value)) if isinstance(value, (list, tuple)) else str(value)
+        )
+    return dict(normalize_filter_params(raw))
+
+
+def search_city(params):
+    """Gazetteer city name of a saved search's location filter, or None"""
+    city = resolve_location(params['location']) if params.get('location') else None
+    return city.name if city else None
+
+
+def search_key(params):
+    """Key string of a normalized saved search's indexed equality filters"""
+    parts = []
+    for field in KEY_FIELDS:
+        value = search_city(params) if field == 'city' else params.get(field)
+        if value:
+            parts.append(f'{field}={value}')
+    return '&'.join(parts)
+
+
+def search_skill(params):
+    """The skill a normalized saved search is indexed under: the first it requires (skills_mode=all), else ''"""
+    if params.get('skills') and params.get('skills_mode') != 'any':
+        return min(params['skills'].split(','))
+    return ''
+
+
+def key_hash(key):
+    """Signed 64-bit hash of a search key"""
+    return int.from_bytes(hashlib.blake2b(key.encode('utf-8'), digest_size=8).digest(), 'little', signed=True)
+
+
+def prepare_saved_search(search):
+    """Normalize a saved search's params and set its key hash and skill in place (called before save)"""
+    search.params = normalize_search_params(search.params)
+    search.key_hash = key_hash(search_key(search.params))
+    search.key_skill = search_skill(search.params)
+
+
+class JobFacts:
+    """A new job's values as saved search filters see them"""
+
+    def __init__(self, job):
+        self.job = job
+        self.skills = set(skill_labels(job.skills))
+
+    @cached_property
+    def terms(self):
+        return set(build_job_terms(self.job))
+
+    def keys(self):
+        """Every search key the job's own values satisfy - at most 2^len(KEY_FIELDS)"""
+        values = [f'{field}={getattr(self.job, field)}' for field in KEY_FIELDS if getattr(self.job, field)]
+        return ['&'.join(fields) for size in range(len(values) + 1) for fields in combinations(values, size)]
+
+
+class SearchFilters:
+    """A saved search's params parsed once, for checking against many jobs -
+    filter_jobs() and search_jobs() in Python"""
+    __slots__ = ('equal', 'city', 'location', 'salary', 'near', 'radius', 'skills', 'any_skill', 'terms')
+
+    def __init__(self, params):
+        self.equal = tuple((field, params[field]) for field in EQUALITY_FIELDS if params.get(field))
+        location = params.get('location')
+        city = resolve_location(location) if location else None
+        self.city = city.name if city else None
+        self.location = location if location and not city else None
+        low, high = parse_amount(params.get('min_salary')), parse_amount(params.get('max_salary'))
+        self.salary = (low, high) if low is not None or high is not None else None
+        # An unknown place matches nothing, like filter_near()
+        self.near = (resolve_point(params['near']) or False) if params.get('near') else None
+        self.radius = parse_radius(params.get('radius_km'))
+        self.skills = frozenset(params['skills'].split(',')) if params.get('skills') else None
+        self.any_skill = params.get('skills_mode') == 'any'
+        self.terms = frozenset(params['q'].split()) if params.get('q') else None
+
+    def matches(self, facts):
+        job = facts.job
+        for field, value in self.equal:
+            if getattr(job, field) != value:
+                return False
+        if self.city is not None and self.city != job.city:
+            return False
+        if self.location is not None and self.location not in (job.location or '').lower():
+            return False
+        if self.salary is not None:
+            low, high = self.salary
+            if job.annual_salary_min is None and job.annual_salary_max is None:
+                return False
+            if low is not None and job.annual_salary_max is not None and job.annual_salary_max < low:
+                return False
+            if high is not None and job.annual_salary_min is not None and job.annual_salary_min > high:
+                return False
+        if self.near is not None:
+            if not self.near or job.latitude is None or job.longitude is None:
+                return False
+            if distance_km(self.near, job.latitude, job.longitude) > self.radius:
+                return False
+        if self.skills is not None:
+            if not (self.skills & facts.skills if self.any_skill else self.skills <= facts.skills):
+                return False
+        if self.terms is not None and not all(term_matches(term, facts.terms) for term in self.terms):
+            return False
+        return True
+
+
+def find_matches(jobs, using='default'):
+    """(job, saved search id, user id, search name) for every active saved search an open job in jobs matches"""
+    from .models import SavedSearch
+
+    facts = [JobFacts(job) for job in jobs if job.is_active]
+    job_hashes = [{key_hash(key) for key in fact.keys()} for fact in facts]
+    hashes = sorted(set().union(*job_hashes))
+    skills = sorted(set().union(*(fact.skills for fact in facts)))
+    searches = SavedSearch.objects.using(using).filter(is_active=True).order_by()
+    if len(skills) <= LOOKUP_CHUNK:
+        searches = searches.filter(Q(key_skill='') | Q(key_skill__in=skills))
+    buckets = defaultdict(list)
+    for start in range(0, len(hashes), LOOKUP_CHUNK):
+        rows = searches.filter(key_hash__in=hashes[start:start + LOOKUP_CHUNK]).values_list(
+            'key_hash', 'key_skill', 'pk', 'user_id', 'name', 'params',
+        )
+        for value, skill, pk, user_id, name, params in rows:
+            buckets[value, skill].append((pk, user_id, name, SearchFilters(params)))
+    matches = []
+    for fact, own_hashes in zip(facts, job_hashes):
+        for value in own_hashes:
+            for skill in ('', *fact.skills):
+                for pk, user_id, name, filters in buckets.get((value, skill), ()):
+                    if filters.matches(fact):
+                        matches.append((fact.job, pk, user_id, name))
+    return matches
+
+
+def job_alert_data(job):
+    return {
+        'id': job.pk,
+        'title': job.title,
+        'company': job.company,
+        'location': job.location,
+        'salary_display': job.salary_display,
+        'job_type': job.job_type,
+        'work_mode': job.work_mode,
+        'saved_searches': [],
+    }
+
+
+def deliver_alerts(alerts):
+    """Push {user id: [job alert]} through core.realtime.JobAlertService; returns the users sent to"""
+    try:
+        from channels.layers import get_channel_layer
+        from core.realtime import JobAlertService
+    except ImportError:
+        logger.warning('Job alerts for %d users not sent: channels is not installed', len(alerts))
+        return 0
+    if get_channel_layer() is None:
+        logger.warning('Job alerts for %d users not sent: no channel layer configured', len(alerts))
+        return 0
+    async_to_sync(JobAlertService.send_job_alerts)(alerts)
+    return len(alerts)
+
+
+@task(max_attempts=3)
+def send_job_alerts(job_ids, using='default'):
+    """Match new jobs (ids) against saved searches and deliver one alert batch per user.
+
+    Returns the number of (user, job) alerts.
+    """
+    from .models import Job, SavedSearch
+
+    jobs = list(Job.objects.using(using).filter(pk__in=job_ids, is_active=True).order_by('pk'))
+    alerts = defaultdict(dict)
+    matched = set()
+    for job, search_id, user_id, name in find_matches(jobs, using):
+        alert = alerts[user_id].setdefault(job.pk, job_alert_data(job))
+        alert['saved_searches'].append(name)
+        matched.add(search_id)
+    if not matched:
+        return 0
+    now = timezone.now()
+    matched = sorted(matched)
+    for start in range(0, len(matched), LOOKUP_CHUNK):
+        SavedSearch.objects.using(using).filter(pk__in=matched[start:start + LOOKUP_CHUNK]).update(last_alerted_at=now)
+    deliver_alerts({user_id: list(user_alerts.values()) for user_id, user_alerts in alerts.items()})
+    return sum(len(user_alerts) for user_alerts in alerts.values())
+
+
+def queue_job_alerts(jobs, using='default'):
+    """Enqueue alerts for newly created jobs; the task only exists once the current transaction commits"""
+    if not getattr(settings, 'JOB_ALERTS_ENABLED', True):
+        return
+    job_ids = [job.pk for job in jobs if job.is_active]
+    if job_ids:
+        send_job_alerts.enqueue(job_ids, using)
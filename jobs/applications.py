@@ -0,0 +1,128 @@
+"""
+SkillConnect - Application Submits
+One-transaction application submits that are safe to retry.
+
+The (job, email) unique constraint is the duplicate check - emails are
+normalized on save, and the INSERT fails instead of a pre-read racing a
+concurrent submit. Clients may send an Idempotency-Key header: the first
+submit with a key stores its response in the same transaction as the
+application, and retries of it get that response replayed - so a retry
+whose first response was lost gets its 201, not a duplicate error.
+Keys past IDEMPOTENCY_KEY_TTL are deleted by purge_idempotency_keys(), a
+periodic task.
+"""
+
+import hashlib
+from datetime import timedelta
+
+from django.db import IntegrityError, transaction
+from django.utils import timezone
+from rest_framework import status
+from rest_framework.exceptions import ValidationError
+from rest_framework.response import Response
+
+from .tasks import task
+
+IDEMPOTENCY_HEADER = 'HTTP_IDEMPOTENCY_KEY'
+MAX_IDEMPOTENCY_KEY_LENGTH = 255
+# A key older than this is forgotten and may be used again
+IDEMPOTENCY_KEY_TTL = timedelta(hours=24)
+
+DUPLICATE_ERROR = 'An application with this email already exists for this job'
+
+
+def normalize_email(email):
+    return (email or '').strip().lower()
+
+
+def normalize_application(application):
+    """Normalize an application's email in place (called before save)"""
+    application.email = normalize_email(application.email)
+
+
+def idempotency_key(request):
+    """Stored key for the request's Idempotency-Key header - scoped to the user and endpoint - or None"""
+    key = request.META.get(IDEMPOTENCY_HEADER, '').strip()
+    if not key:
+        return None
+    if len(key) > MAX_IDEMPOTENCY_KEY_LENGTH:
+        raise ValidationError({'Idempotency-Key': f'Must be at most {MAX_IDEMPOTENCY_KEY_LENGTH} characters.'})
+    owner = request.user.pk if request.user.is_authenticated else 'guest'
+    return hashlib.sha256(f'{owner}:{request.path}:{key}'.encode('utf-8')).hexdigest()
+
+
+def request_fingerprint(request):
+    """Hash of a submit's fields (uploaded files by name and size), so a key reused for another request is refused"""
+    data = request.data
+    items = data.lists() if hasattr(data, 'lists') else ((name, [value]) for name, value in data.items())
+    digest = hashlib.sha256()
+    for name, values in sorted(items):
+        for value in values:
+            if hasattr(value, 'read'):
+                value = f'{value.name}:{value.size}'
+            digest.update(f'{name}={value}\0'.encode('utf-8'))
+    return digest.hexdigest()
+
+
+def replay(key, fingerprint):
+    """The stored response for a key, or None if it expired or was never stored"""
+    from .models import IdempotencyKey
+
+    record = IdempotencyKey.objects.filter(key=key).first()
+    if record is None or record.created_at < timezone.now() - IDEMPOTENCY_KEY_TTL:
+        IdempotencyKey.objects.filter(key=key).delete()
+        return None
+    if record.fingerprint != fingerprint:
+        return Response(
+            {'error': 'This Idempotency-Key was already used for a different request'},
+            status=status.HTTP_422_UNPROCESSABLE_ENTITY,
+        )
+    return Response(record.response, status=record.status_code, headers={'Idempotent-Replayed': 'true'})
+
+
+@task(max_attempts=3)
+def purge_idempotency_keys(now=None):
+    """Delete the keys older than IDEMPOTENCY_KEY_TTL; returns the number deleted"""
+    from .models import IdempotencyKey
+
+    now = now or timezone.now()
+    deleted, _ = IdempotencyKey.objects.filter(created_at__lt=now - IDEMPOTENCY_KEY_TTL).delete()
+    return deleted
+
+
+def save_application(request, serializer, respond, retry=True):
+    """Save a validated JobApplicationCreateSerializer in one transaction; returns a Response.
+
+    respond(application) builds the 201 body. A duplicate (job, email)
+    gets a 400 with DUPLICATE_ERROR.
+    """
+    from .models import IdempotencyKey, JobApplication
+
+    key = idempotency_key(request)
+    fingerprint = request_fingerprint(request) if key else None
+    record = None
+    try:
+        with transaction.atomic():
+            if key:
+                # A concurrent retry waits here until this transaction ends, then replays its response
+                record = IdempotencyKey.objects.create(key=key, fingerprint=fingerprint)
+            application = serializer.save(user=request.user if request.user.is_authenticated else None)
+            response = Response(respond(application), status=status.HTTP_201_CREATED)
+            if record is not None:
+                record.application = application
+                record.status_code = response.status_code
+                record.response = response.data
+                record.save(update_fields=['application', 'status_code', 'response'])
+            return response
+    except IntegrityError:
+        if key and record is None:
+            replayed = replay(key, fingerprint)
+            if replayed is not None:
+                return replayed
+            if retry:
+                return save_application(request, serializer, respond, retry=False)
+            raise
+        data = serializer.validated_data
+        if JobApplication.objects.filter(job=data['job'], email=normalize_email(data['email'])).exists():
+            return Response({'error': DUPLICATE_ERROR}, status=status.HTTP_400_BAD_REQUEST)
+        raise
@@ -0,0 +1,133 @@
+"""
+SkillConnect - Job Expiry and Archive
+Keeps jobs_job (and its partial indexes, search tokens and skill links) sized
+to the jobs people can still apply to.
+
+expire_jobs() closes open jobs whose expires_at has passed, or - without an
+expires_at - that were posted more than JOB_EXPIRY_DAYS ago, and stamps
+expired_at. archive_jobs() later moves jobs that have been expired for
+JOB_ARCHIVE_AFTER_DAYS into the ArchivedJob table, a primary-key chunk per
+transaction. Jobs with applications stay in jobs_job (closed), so every
+JobApplication foreign key keeps resolving. Only jobs closed by expiry are
+archived: jobs deactivated by hand or flagged as duplicates are left alone.
+close_expired_jobs() runs both daily as a periodic task (and as `manage.py
+archive_jobs`).
+"""
+
+from datetime import timedelta
+
+from django.conf import settings
+from django.db import transaction
+from django.db.models import Exists, OuterRef
+from django.utils import timezone
+
+from .cache import bump_jobs_version
+from .stats import rebuild_job_stats
+from .tasks import task
+
+DEFAULT_EXPIRY_DAYS = 60
+DEFAULT_ARCHIVE_AFTER_DAYS = 30
+DEFAULT_BATCH_SIZE = 1000
+
+
+def expiry_days():
+    """Days an open job without expires_at stays listed (0 = only expires_at closes jobs)"""
+    return getattr(settings, 'JOB_EXPIRY_DAYS', DEFAULT_EXPIRY_DAYS)
+
+
+def archive_after_days():
+    """Days an expired job stays in jobs_job before it is archived"""
+    return getattr(settings, 'JOB_ARCHIVE_AFTER_DAYS', DEFAULT_ARCHIVE_AFTER_DAYS)
+
+
+def archive_fields():
+    """ArchivedJob columns copied from the Job row"""
+    from .models import ArchivedJob
+
+    return [field.attname for field in ArchivedJob._meta.concrete_fields if field.name != 'archived_at']
+
+
+def expire_jobs(queryset, batch_size=DEFAULT_BATCH_SIZE, now=None):
+    """Close the open jobs in queryset that are past their expiry; returns the number closed.
+
+    Past expires_at and posted too long ago are separate passes, so each
+    reads its own partial index rather than an OR across two columns.
+    """
+    now = now or timezone.now()
+    open_jobs = queryset.filter(is_active=True)
+    passes = [open_jobs.filter(expires_at__lte=now)]
+    if expiry_days():
+        passes.append(open_jobs.filter(expires_at__isnull=True, created_at__lte=now - timedelta(days=expiry_days())))
+    manager = queryset.model._default_manager.using(queryset.db)
+    closed = 0
+    for due in passes:
+        # Closed rows leave the partial index, so each chunk starts from the top
+        while True:
+            ids = list(due.order_by().values_list('pk', flat=True)[:batch_size])
+            if not ids:
+                break
+            closed += manager.filter(pk__in=ids).update(is_active=False, expired_at=now, updated_at=now)
+    return closed
+
+
+def archivable(queryset, now=None):
+    """Jobs in queryset that expired more than archive_after_days() ago and have no applications"""
+    from .models import JobApplication
+
+    now = now or timezone.now()
+    applications = JobApplication.objects.filter(job=OuterRef('pk'))
+    return queryset.filter(
+        is_active=False, expired_at__lte=now - timedelta(days=archive_after_days()),
+    ).filter(~Exists(applications))
+
+
+def archive_jobs(queryset, batch_size=DEFAULT_BATCH_SIZE, now=None):
+    """Move archivable jobs into ArchivedJob in primary-key chunks; returns the number moved.
+
+    Each chunk is copied and deleted in one transaction, so a job is always
+    in exactly one of the two tables. Deleting a Job cascades to its search
+    tokens and skill links.
+    """
+    from .models import ArchivedJob
+
+    now = now or timezone.now()
+    using = queryset.db
+    fields = archive_fields()
+    manager = queryset.model._default_manager.using(using)
+    due = archivable(queryset, now).order_by('pk')
+    moved = 0
+    last_pk = 0
+    while True:
+        with transaction.atomic(using=using):
+            ids = list(due.filter(pk__gt=last_pk).select_for_update().values_list('pk', flat=True)[:batch_size])
+            if not ids:
+                break
+            rows = manager.filter(pk__in=ids).values(*fields)
+            ArchivedJob.objects.using(using).bulk_create([ArchivedJob(archived_at=now, **row) for row in rows])
+            manager.filter(pk__in=ids).delete()
+        moved += len(ids)
+        last_pk = ids[-1]
+    return moved
+
+
+@task(max_attempts=3)
+def close_expired_jobs(using='default', batch_size=DEFAULT_BATCH_SIZE, expire_only=False):
+    """Expire and then archive jobs; returns (jobs closed, jobs archived)"""
+    from .models import Job
+
+    queryset = Job.objects.using(using).all()
+    closed = expire_jobs(queryset, batch_size=batch_size)
+    archived = 0 if expire_only else archive_jobs(queryset, batch_size=batch_size)
+    if closed:
+        # queryset.update() skips the Job signals
+        rebuild_job_stats(using)
+    if closed or archived:
+        bump_jobs_version()
+    return closed, archived
+
+
+def get_archived_job(pk, using='default'):
+    """The archived copy of a job, or None"""
+    from .models import ArchivedJob
+
+    return ArchivedJob.objects.using(using).filter(pk=pk).first()
@@ -0,0 +1,995 @@
+"""
+SkillConnect - Job API Benchmarks
+Synthetic job data and timing helpers used by `manage.py benchmark_jobs`.
+
+Suites register themselves with @suite and receive the current catalog size.
+They always run against a throwaway test database, never the real one.
+"""
+
+import csv
+import gc
+import io
+import json
+import os
+import random
+import statistics
+import sys
+import tempfile
+import threading
+import time
+import tracemalloc
+from collections import defaultdict
+from datetime import timedelta
+from heapq import nlargest
+from xml.sax.saxutils import escape
+
+from django.contrib.auth import get_user_model
+from django.core.files.uploadedfile import SimpleUploadedFile
+from django.db import connection, connections
+from django.db.models import F, Q
+from django.test import Client
+from django.test.utils import override_settings
+from rest_framework.test import APIClient
+from django.utils import timezone
+
+from core.performance import CacheManager
+
+from .alerts import find_matches, prepare_saved_search
+from .archive import archive_jobs, expire_jobs
+from .catalog import FACETS, CatalogSnapshot, job_catalog, load_snapshot
+from .dedup import SIMILARITY_THRESHOLD, fingerprint_job, similarity, stored_originals, unpack_signature
+from .filters import filter_jobs
+from .ingest import ingest, read_feed
+from .models import Job, JobApplication, JobPopularity, JobSearchToken, JobSimilarity, JobSkill, SavedSearch, SimilarJob, Task
+from .recommend import SKILL_PREFIX, SKILL_WEIGHT, TITLE_WEIGHT, JobRecommender
+from .geo import filter_near, geocode_job, resolve_location
+from .popularity import TRENDING_SIZE, VIEW, EventBuffer, decayed, rank_trending, refresh_trending
+from .salary import backfill_salaries, normalize_job_salary, salary_overlap_q
+from .serializers import JobSerializer
+from .similar import NEIGHBORS, refresh_similar_jobs
+from .skills import filter_by_skills, normalize_skill, rebuild_skill_index
+from .stats import get_job_stats, rebuild_job_stats
+from .suggest import PrefixIndex
+from .tasks import Worker, task
+from .uploads import CHUNK_SIZE
+from . import search
+
+TITLES = [
+    'Python Developer', 'Frontend Developer', 'Data Analyst', 'DevOps Engineer',
+    'UI/UX Designer', 'HR Executive', 'Sales Executive', 'Content Writer',
+    'Digital Marketing Executive', 'Full Stack Developer', 'QA Engineer',
+    'Machine Learning Engineer', 'Business Analyst', 'Android Developer',
+    'Accountant', 'Mechanical Engineer', 'Staff Nurse', 'Maths Teacher',
+]
+COMPANIES = [
+    'TCS', 'Infosys', 'Wipro', 'Zomato', 'Flipkart', 'Amazon', 'HDFC Bank',
+    'Reliance Industries', 'Swiggy', 'Paytm', 'Freshworks', 'Zoho', 'HCL',
+    'Tech Mahindra', 'Byju\'s', 'Razorpay', 'Ola', 'Myntra', 'Apollo Hospitals',
+]
+LOCATIONS = [
+    'Mumbai, India', 'Bangalore, India', 'Pune, India', 'Hyderabad, India',
+    'Delhi, India', 'Chennai, India', 'Gurugram, India', 'Kolkata, India',
+    'Ahmedabad, India', 'Solapur, India', 'Remote', 'Bengaluru, Karnataka',
+    'Gurgaon, Haryana', 'Navi Mumbai, India', 'Noida, India', 'Kochi, Kerala',
+    'Nagpur, India', 'Jaipur, India', 'Lucknow, India', 'Hinjewadi, Pune',
+]
+SKILLS = [
+    'Python', 'Django', 'React.js', 'JavaScript', 'HTML', 'CSS', 'SQL',
+    'Power BI', 'Excel', 'AWS', 'Docker', 'Kubernetes', 'Figma', 'SEO',
+    'Google Ads', 'Node.js', 'Java', 'Spring Boot', 'C++', 'Selenium',
+    'Recruitment', 'Payroll', 'Negotiation', 'Tally', 'AutoCAD', 'Git',
+]
+WORDS = [
+    'build', 'scalable', 'systems', 'team', 'customers', 'product', 'design',
+    'deliver', 'quality', 'features', 'work', 'closely', 'stakeholders',
+    'analyse', 'data', 'reports', 'manage', 'campaigns', 'growth', 'support',
+    'platform', 'services', 'experience', 'strong', 'communication', 'skills',
+]
+SALARY_BANDS = [
+    (250000, 400000, '₹2.5-4 LPA'), (400000, 700000, '₹4-7 LPA'),
+    (800000, 1200000, '₹8-12 LPA'), (1000000, 1500000, '₹10-15 LPA'),
+    (2500000, 4000000, '₹25-40 LPA'), (120000, 240000, '₹10-20K/month'),
+]
+
+SUITES = {}
+
+
+def suite(name):
+    """Register a benchmark suite under name"""
+    def decorator(func):
+        SUITES[name] = func
+        return func
+    return decorator
+
+
+def make_job(rng):
+    """Build one unsaved synthetic Job"""
+    min_salary, max_salary, salary_display = rng.choice(SALARY_BANDS)
+    job = Job(
+        title=rng.choice(TITLES),
+        company=rng.choice(COMPANIES),
+        location=rng.choice(LOCATIONS),
+        category=rng.choice(Job.CATEGORY_CHOICES)[0],
+        job_type=rng.choice(Job.JOB_TYPE_CHOICES)[0],
+        experience_level=rng.choice(Job.EXPERIENCE_CHOICES)[0],
+        work_mode=rng.choice(Job.WORK_MODE_CHOICES)[0],
+        min_salary=min_salary,
+        max_salary=max_salary,
+        salary_display=salary_display,
+        description=' '.join(rng.choices(WORDS, k=40)),
+        requirements=' '.join(rng.choices(WORDS, k=15)),
+        skills=rng.sample(SKILLS, k=4),
+        company_size=rng.choice(['startup', 'small', 'medium', 'large']),
+    )
+    # bulk_create skips the pre_save signals
+    normalize_job_salary(job)
+    geocode_job(job)
+    fingerprint_job(job)
+    return job
+
+
+def seed_jobs(count, rng, batch_size=2000):
+    """Insert count synthetic jobs and index them; returns the new jobs' min pk"""
+    first_pk = None
+    for start in range(0, count, batch_size):
+        jobs = Job.objects.bulk_create(
+            [make_job(rng) for _ in range(min(batch_size, count - start))]
+        )
+        if first_pk is None and jobs and jobs[0].pk is not None:
+            first_pk = jobs[0].pk
+    new_jobs = Job.objects.all() if first_pk is None else Job.objects.filter(pk__gte=first_pk)
+    search.rebuild_index(new_jobs, batch_size=batch_size)
+    rebuild_skill_index(new_jobs, batch_size=batch_size)
+    rebuild_job_stats()
+    return first_pk
+
+
+def summarize(timings):
+    """Latency percentiles (ms) for a list of timings in ms"""
+    timings = sorted(timings)
+    return {
+        'p50': statistics.median(timings),
+        'p99': timings[min(len(timings) - 1, int(len(timings) * 0.99))],
+        'mean': statistics.fmean(timings),
+    }
+
+
+def measure(func, repeat=100):
+    """Call func repeat times; return latency percentiles in milliseconds"""
+    timings = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        func()
+        timings.append((time.perf_counter() - start) * 1000)
+    return summarize(timings)
+
+
+def measure_concurrent(func, repeat=100, threads=4):
+    """Run func repeat times in each of `threads` threads.
+
+    Returns percentiles plus overall throughput (requests/second).
+    """
+    timings = []
+    lock = threading.Lock()
+
+    def worker():
+        local = []
+        try:
+            for _ in range(repeat):
+                start = time.perf_counter()
+                func()
+                local.append((time.perf_counter() - start) * 1000)
+        finally:
+            connections.close_all()
+        with lock:
+            timings.extend(local)
+
+    pool = [threading.Thread(target=worker) for _ in range(threads)]
+    start = time.perf_counter()
+    for thread in pool:
+        thread.start()
+    for thread in pool:
+        thread.join()
+    elapsed = time.perf_counter() - start
+    stats = summarize(timings)
+    stats['rps'] = len(timings) / elapsed
+    return stats
+
+
+SEARCH_QUERIES = ['python', 'react developer', 'data analyst sql', 'marketing', 'amazon aws', 'c++']
+
+
+@suite('search')
+def bench_search(size, repeat, rng):
+    """Legacy OR-ed icontains scan vs the search index, first page of 20"""
+    def legacy():
+        keyword = rng.choice(SEARCH_QUERIES)
+        list(Job.objects.filter(is_active=True).filter(
+            Q(title__icontains=keyword) | Q(company__icontains=keyword) | Q(description__icontains=keyword)
+        ).order_by('-created_at')[:20])
+
+    def indexed():
+        keyword = rng.choice(SEARCH_QUERIES)
+        list(search.search_jobs(Job.objects.filter(is_active=True), keyword).order_by('-search_rank', '-created_at')[:20])
+
+    return {'icontains': measure(legacy, repeat), 'search_index': measure(indexed, repeat)}
+
+
+LISTING_QUERIES = [
+    '', 'category=it', 'work_mode=remote', 'keyword=python', 'location=Pune',
+    'category=marketing&job_type=full-time', 'experience_level=entry&location=mumbai',
+    'ordering=-min_salary', 'keyword=react+developer', 'category=design&work_mode=hybrid',
+]
+
+
+@suite('response_cache')
+def bench_response_cache(size, repeat, rng, threads=4):
+    """List/detail traffic from concurrent clients, cache off vs on"""
+    detail_ids = list(Job.objects.order_by('-created_at').values_list('id', flat=True)[:200])
+    # Skewed mix, like real traffic: a few popular pages get most hits
+    weights = [1 / (rank + 1) for rank in range(len(LISTING_QUERIES))]
+
+    def request():
+        client = Client()
+        if rng.random() < 0.7:
+            client.get('/api/jobs/?' + rng.choices(LISTING_QUERIES, weights)[0])
+        else:
+            client.get(f'/api/jobs/{rng.choice(detail_ids)}/')
+
+    results = {}
+    for label, timeout in (('no_cache', 0), ('versioned_cache', 600)):
+        CacheManager.reset_hit_rate('job_listings')
+        CacheManager.reset_hit_rate('job_detail')
+        with override_settings(JOB_CACHE_TIMEOUT=timeout, ALLOWED_HOSTS=['*']):
+            results[label] = measure_concurrent(request, repeat, threads)
+        if timeout:
+            results['listing_hit_rate'] = f"{CacheManager.get_hit_rate('job_listings')['hit_rate']:.1%}"
+            results['detail_hit_rate'] = f"{CacheManager.get_hit_rate('job_detail')['hit_rate']:.1%}"
+    return results
+
+
+@suite('list_projection')
+def bench_list_projection(size, repeat, rng):
+    """Full JobSerializer rows vs the compact card projection, 100 rows per page"""
+    client = Client()
+    results = {}
+    with override_settings(JOB_CACHE_TIMEOUT=0, ALLOWED_HOSTS=['*']):
+        full_fields = ','.join(JobSerializer.Meta.fields)
+        for label, params in (('full_rows', {'fields': full_fields}), ('card_rows', {})):
+            params = {**params, 'page_size': 100}
+            results[label] = measure(lambda: client.get('/api/jobs/', params), repeat)
+            results[f'{label}_bytes'] = len(client.get('/api/jobs/', params).content)
+    return results
+
+
+SKILL_QUERIES = [
+    (['Python', 'Django'], 'all'), (['React.js', 'JavaScript'], 'all'), (['AWS', 'Docker', 'Kubernetes'], 'all'),
+    (['Figma', 'SEO'], 'any'), (['Tally', 'Payroll'], 'any'), (['C++'], 'all'),
+    (['AutoCAD', 'Figma', 'SEO'], 'all'),  # rare combination
+]
+
+
+@suite('skills')
+def bench_skills(size, repeat, rng):
+    """JSON skills filtering vs the JobSkill join, first page of 20"""
+    active = Job.objects.filter(is_active=True).order_by('-created_at')
+
+    def json_filter():
+        skills, mode = rng.choice(SKILL_QUERIES)
+        if connection.features.supports_json_field_contains:
+            conditions = [Q(skills__contains=[skill]) for skill in skills]
+            combined = conditions[0]
+            for condition in conditions[1:]:
+                combined = combined & condition if mode == 'all' else combined | condition
+            list(active.filter(combined)[:20])
+            return
+        # SQLite has no JSON containment lookup - filter rows in Python
+        wanted = {normalize_skill(skill) for skill in skills}
+        match = wanted.issubset if mode == 'all' else wanted.intersection
+        found = []
+        for pk, job_skills in active.values_list('pk', 'skills').iterator(chunk_size=2000):
+            if match({normalize_skill(skill) for skill in job_skills}):
+                found.append(pk)
+                if len(found) == 20:
+                    break
+        list(Job.objects.filter(pk__in=found))
+
+    def indexed():
+        skills, mode = rng.choice(SKILL_QUERIES)
+        list(filter_by_skills(active, skills, mode)[:20])
+
+    return {'json': measure(json_filter, repeat), 'skill_index': measure(indexed, repeat)}
+
+
+@suite('salary')
+def bench_salary(size, repeat, rng):
+    """Legacy raw-column salary filter vs annualized overlap filter, plus backfill throughput"""
+    active = Job.objects.filter(is_active=True)
+    bands = [(300000, 600000), (800000, 1500000), (2000000, None), (None, 400000)]
+
+    def legacy():
+        low, high = rng.choice(bands)
+        queryset = active
+        if low:
+            queryset = queryset.filter(min_salary__gte=low)
+        if high:
+            queryset = queryset.filter(max_salary__lte=high)
+        list(queryset.order_by('-min_salary')[:20])
+
+    def annualized():
+        low, high = rng.choice(bands)
+        list(active.filter(salary_overlap_q(low, high)).order_by('-annual_salary_max', 'id')[:20])
+
+    results = {'raw_columns': measure(legacy, repeat), 'annual_overlap': measure(annualized, repeat)}
+
+    Job.objects.update(annual_salary_min=None, annual_salary_max=None)
+    start = time.perf_counter()
+    scanned, _ = backfill_salaries(Job.objects.all())
+    results['backfill'] = f'{scanned / (time.perf_counter() - start):.0f} rows/s'
+    return results
+
+
+@suite('geo')
+def bench_geo(size, repeat, rng):
+    """Text location match vs gazetteer city column, and ?near= radius search"""
+    active = Job.objects.filter(is_active=True).order_by('-created_at')
+    cities = ['Pune', 'Bangalore', 'Mumbai', 'Delhi', 'Chennai', 'Nagpur']
+
+    def text_match():
+        list(active.filter(location__icontains=rng.choice(cities))[:20])
+
+    def city_column():
+        list(active.filter(city=resolve_location(rng.choice(cities)).name)[:20])
+
+    def near():
+        list(filter_near(active, rng.choice(cities), rng.choice([25, 50, 150]))[:20])
+
+    return {
+        'location_icontains': measure(text_match, repeat),
+        'city_index': measure(city_column, repeat),
+        'near_radius': measure(near, repeat),
+    }
+
+
+@suite('suggest')
+def bench_suggest(size, repeat, rng, threads=4):
+    """Typeahead at keystroke rate: icontains query vs the in-process prefix index"""
+    phrases = rng.choices(TITLES + COMPANIES + SKILLS + ['Pune', 'Bengaluru', 'Mumbai', 'Hyderabad'], k=100)
+    keystrokes = [phrase[:length] for phrase in phrases for length in range(1, len(phrase) + 1)]
+
+    index = PrefixIndex()
+    start = time.perf_counter()
+    index.refresh(force=True)
+    build_ms = (time.perf_counter() - start) * 1000
+
+    def icontains():
+        query = rng.choice(keystrokes)
+        list(Job.objects.filter(is_active=True).filter(
+            Q(title__icontains=query) | Q(company__icontains=query) | Q(location__icontains=query)
+        ).values_list('title', flat=True).distinct()[:8])
+
+    def lookup():
+        index.lookup(rng.choice(keystrokes))
+
+    results = {
+        'icontains_query': measure(icontains, repeat),
+        'index_lookup': measure(lookup, repeat * 20),
+    }
+    client = Client()
+    with override_settings(ALLOWED_HOSTS=['*']):
+        results['suggest_endpoint'] = measure_concurrent(
+            lambda: client.get('/api/jobs/suggest/', {'q': rng.choice(keystrokes)}), repeat, threads,
+        )
+
+    job = Job.objects.order_by('?').first()
+    job.title = f'{job.title} II'
+    job.save()
+    start = time.perf_counter()
+    changed = index.refresh(force=True)
+    results['full_build'] = f'{build_ms:.1f}ms for {len(index.weights)} terms'
+    results['incremental_refresh'] = f'{(time.perf_counter() - start) * 1000:.1f}ms ({changed} terms changed)'
+    return results
+
+
+@suite('stats')
+def bench_stats(size, repeat, rng):
+    """Three live COUNT queries vs the stats rollup row, and the rollup's cost on save"""
+    active = Job.objects.filter(is_active=True)
+
+    def live():
+        active.count()
+        active.values('category').distinct().count()
+        active.values('company').distinct().count()
+
+    jobs = list(Job.objects.order_by('?')[:repeat])
+
+    def toggle():
+        job = rng.choice(jobs)
+        job.is_active = not job.is_active
+        job.company = rng.choice(COMPANIES)
+        job.save(update_fields=['is_active', 'company'])
+
+    results = {
+        'live_counts': measure(live, repeat),
+        'rollup_row': measure(get_job_stats, repeat),
+        'save_with_rollup': measure(toggle, repeat),
+    }
+    start = time.perf_counter()
+    drifted = rebuild_job_stats()
+    results['reconcile'] = f'{(time.perf_counter() - start) * 1000:.1f}ms ({drifted} drifted counters)'
+    return results
+
+
+CATALOG_QUERIES = [
+    {}, {'category': 'it'}, {'work_mode': 'remote', 'experience_level': 'entry'},
+    {'category': 'marketing', 'job_type': 'full-time', 'company_size': 'large'},
+    {'location': 'Pune'}, {'min_salary': '1000000'}, {'min_salary': '300000', 'max_salary': '600000'},
+    {'ordering': '-salary', 'category': 'design'}, {'ordering': '-min_salary'},
+    {'category': 'hr', 'work_mode': 'hybrid', 'location': 'Nagpur', 'min_salary': '2000000'},  # rare combination
+]
+
+SNAPSHOT_COLUMNS = ('id', 'created_at', *FACETS, 'min_salary', 'annual_salary_min', 'annual_salary_max')
+
+
+def tiled_rows(rows, count):
+    """count rows newest first, repeating rows with fresh ids and older timestamps"""
+    step = rows[0][1] - rows[-1][1] + timedelta(seconds=1)
+    for n in range(count):
+        cycle, index = divmod(n, len(rows))
+        row = rows[index]
+        yield (n + 1, row[1] - cycle * step) + row[2:]
+
+
+@suite('catalog')
+def bench_catalog(size, repeat, rng):
+    """Job list pages from the database vs the in-memory catalog, plus snapshot build cost and footprint"""
+    def page_ids(queryset):
+        return list(queryset.values_list('id', flat=True)[:21])
+
+    start = time.perf_counter()
+    snapshot = load_snapshot()
+    results = {
+        'snapshot_build': f'{time.perf_counter() - start:.2f}s',
+        'snapshot_memory': f'{snapshot.memory_bytes() / 2 ** 20:.1f} MiB ({snapshot.size} jobs)',
+    }
+    ordering = [('created_at', True), ('id', False)]
+
+    def database_page():
+        params = rng.choice(CATALOG_QUERIES)
+        queryset = filter_jobs(Job.objects.filter(is_active=True), params)
+        page_ids(queryset.order_by('-annual_salary_max', 'id') if params.get('ordering') else queryset.order_by('-created_at', 'id'))
+
+    def catalog_page():
+        params = rng.choice(CATALOG_QUERIES)
+        keys = [('annual_salary_max', True), ('id', False)] if params.get('ordering') else ordering
+        snapshot.page(snapshot.select(params), keys, None, False, 21)
+
+    results['db_page_ids'] = measure(database_page, repeat)
+    results['catalog_page_ids'] = measure(catalog_page, repeat)
+
+    client = Client()
+    with override_settings(JOB_CACHE_TIMEOUT=0, ALLOWED_HOSTS=['*']):
+        for label, enabled in (('db_endpoint', False), ('catalog_endpoint', True)):
+            with override_settings(JOB_CATALOG_ENABLED=enabled, JOB_CATALOG_BACKGROUND_REFRESH=False):
+                job_catalog.current()  # warm, as a long-running worker would be
+                results[label] = measure(lambda: client.get('/api/jobs/', rng.choice(CATALOG_QUERIES)), repeat)
+
+    # 1M rows in memory only: the snapshot's own cost does not depend on the database
+    if size < 1000000:
+        rows = list(Job.objects.filter(is_active=True).order_by('-created_at', 'id').values_list(*SNAPSHOT_COLUMNS))
+        start = time.perf_counter()
+        large = CatalogSnapshot(tiled_rows(rows, 1000000))
+        results['1m_snapshot_build'] = f'{time.perf_counter() - start:.2f}s'
+        results['1m_snapshot_memory'] = f'{large.memory_bytes() / 2 ** 20:.1f} MiB'
+        results['1m_catalog_page_ids'] = measure(
+            lambda: large.page(large.select(rng.choice(CATALOG_QUERIES)), ordering, None, False, 21), repeat,
+        )
+    return results
+
+
+FEED_FIELDS = (
+    'title', 'company', 'location', 'category', 'job_type', 'experience_level', 'work_mode',
+    'min_salary', 'max_salary', 'salary_display', 'description', 'requirements', 'company_size',
+)
+
+
+def feed_records(count, rng, prefix):
+    for n in range(count):
+        job = make_job(rng)
+        record = {field: getattr(job, field) for field in FEED_FIELDS}
+        record.update(external_id=f'{prefix}-{n}', skills=job.skills)
+        yield record
+
+
+def write_feed(records, feed_format):
+    """Serialize records as a CSV/JSONL/XML feed (bytes)"""
+    out = io.StringIO()
+    if feed_format == 'csv':
+        writer = None
+        for record in records:
+            record = dict(record, skills='|'.join(record['skills']))
+            if writer is None:
+                writer = csv.DictWriter(out, fieldnames=list(record))
+                writer.writeheader()
+            writer.writerow(record)
+    elif feed_format == 'jsonl':
+        for record in records:
+            out.write(json.dumps(record) + '\n')
+    else:
+        out.write('<jobs>')
+        for record in records:
+            out.write('<job>')
+            for key, value in record.items():
+                if key == 'skills':
+                    value = ''.join(f'<skill>{escape(skill)}</skill>' for skill in value)
+                    out.write(f'<skills>{value}</skills>')
+                else:
+                    out.write(f'<{key}>{escape(str(value))}</{key}>')
+            out.write('</job>')
+        out.write('</jobs>')
+    return out.getvalue().encode('utf-8')
+
+
+@suite('ingest')
+def bench_ingest(size, repeat, rng, feed_size=20000):
+    """get_or_create loop vs streaming batched upsert, per feed format (rows/s)"""
+    results = {}
+    sample = list(feed_records(min(feed_size, 2000), rng, 'legacy'))
+    start = time.perf_counter()
+    for record in sample:
+        data = {key: value for key, value in record.items() if key != 'external_id'}
+        Job.objects.get_or_create(title=data['title'], company=data['company'], location=data['location'],
+                                  description=data['description'], defaults=data)
+    results['get_or_create_loop'] = f'{len(sample) / (time.perf_counter() - start):.0f} rows/s ({len(sample)} rows)'
+
+    for feed_format in ('csv', 'jsonl', 'xml'):
+        feed = write_feed(feed_records(feed_size, rng, feed_format), feed_format)
+        for label in ('insert', 'update'):
+            report = ingest(read_feed(io.BytesIO(feed), feed_format), f'bench-{feed_format}')
+            results[f'{feed_format}_{label}'] = (
+                f'{report.rows_per_second:.0f} rows/s ({report.created} created, {report.updated} updated, '
+                f'{report.invalid} invalid, {len(feed) / 2 ** 20:.1f} MiB feed)'
+            )
+    return results
+
+
+def reworded(record, rng):
+    """The same posting with one description word swapped and the title punctuated differently"""
+    words = record['description'].split()
+    words[rng.randrange(len(words))] = rng.choice(WORDS)
+    return dict(record, description=' '.join(words), title=record['title'].replace(' ', ' - ', 1))
+
+
+@suite('dedup')
+def bench_dedup(size, repeat, rng, feed_size=5000):
+    """Banded near-duplicate lookup vs comparing against every job, and ingest with/without the check"""
+    columns = ['title', 'company', 'location', 'category', 'salary_display', 'description', 'skills']
+    stored = list(Job.objects.filter(is_active=True).order_by('?').values(*columns)[:max(repeat, feed_size // 5)])
+    probes = [reworded(record, rng) for record in stored[:repeat]]
+    for probe in probes:
+        job = Job(**probe)
+        fingerprint_job(job)
+        probe['fingerprint'] = job.fingerprint
+
+    results = {'fingerprint': measure(lambda: fingerprint_job(make_job(rng)), repeat)}
+    found = []
+    lookups = iter(probes * 2)
+
+    def banded():
+        probe = next(lookups)
+        found.append(stored_originals(Job.objects.all(), [probe['fingerprint']]).nearest(probe['fingerprint']) is not None)
+
+    results['banded_lookup'] = measure(banded, repeat)
+    results['banded_recall'] = f'{sum(found) / len(found):.1%}'
+
+    signatures = [unpack_signature(value) for value in Job.objects.filter(is_active=True).values_list('fingerprint', flat=True)]
+
+    def pairwise():
+        signature = unpack_signature(rng.choice(probes)['fingerprint'])
+        any(similarity(signature, other) >= SIMILARITY_THRESHOLD for other in signatures)
+
+    results['pairwise_scan'] = measure(pairwise, min(repeat, 5))
+
+    # A feed where a fifth of the records re-post stored jobs in other words
+    records = list(feed_records(feed_size - feed_size // 5, rng, 'dedup'))
+    records += [dict(reworded(record, rng), external_id=f'repost-{n}') for n, record in enumerate(stored[:feed_size // 5])]
+    rng.shuffle(records)
+    for policy in ('flag', 'off'):
+        report = ingest(records, f'bench-dedup-{policy}', duplicates=policy)
+        results[f'ingest_{policy}'] = f'{report.rows_per_second:.0f} rows/s ({report.flagged} flagged)'
+    return results
+
+
+@suite('archive')
+def bench_archive(size, repeat, rng, backlog_factor=2):
+    """Keyword search and skill filtering with backlog_factor x the catalog in expired jobs, before and after archiving"""
+    now = timezone.now()
+    first_pk = seed_jobs(size * backlog_factor, rng)
+    Job.objects.filter(pk__gte=first_pk).update(created_at=now - timedelta(days=120))
+    active = Job.objects.filter(is_active=True)
+    results = {}
+
+    start = time.perf_counter()
+    closed = expire_jobs(Job.objects.all())
+    results['expire'] = f'{closed / (time.perf_counter() - start):.0f} rows/s ({closed} closed)'
+    rebuild_job_stats()
+
+    def hot_queries(label):
+        def keyword():
+            query = rng.choice(SEARCH_QUERIES)
+            list(search.search_jobs(active, query).order_by('-search_rank', '-created_at')[:20])
+
+        def skills():
+            wanted, mode = rng.choice(SKILL_QUERIES)
+            list(filter_by_skills(active.order_by('-created_at'), wanted, mode)[:20])
+
+        results[f'{label}_search'] = measure(keyword, repeat)
+        results[f'{label}_skills'] = measure(skills, repeat)
+        results[f'{label}_rows'] = (
+            f'{Job.objects.count()} jobs, {JobSearchToken.objects.count()} search tokens, '
+            f'{JobSkill.objects.count()} skill links'
+        )
+
+    hot_queries('before')
+    start = time.perf_counter()
+    with override_settings(JOB_ARCHIVE_AFTER_DAYS=0):
+        moved = archive_jobs(Job.objects.all())
+    results['archive'] = f'{moved / (time.perf_counter() - start):.0f} rows/s ({moved} archived)'
+    hot_queries('after')
+
+    client = Client()
+    active_ids = list(active.order_by('?').values_list('id', flat=True)[:100])
+    archived_ids = list(range(first_pk, first_pk + size * backlog_factor))
+    with override_settings(JOB_CACHE_TIMEOUT=0, ALLOWED_HOSTS=['*']):
+        results['detail_active'] = measure(lambda: client.get(f'/api/jobs/{rng.choice(active_ids)}/'), repeat)
+        results['detail_archived'] = measure(lambda: client.get(f'/api/jobs/{rng.choice(archived_ids)}/'), repeat)
+    return results
+
+
+def random_saved_search(rng):
+    """Job list filters a user might save: usually two or more of category, city, skills and the rest"""
+    params = {}
+    if rng.random() < 0.6:
+        params['category'] = rng.choice(Job.CATEGORY_CHOICES)[0]
+    if rng.random() < 0.7:
+        params['location'] = rng.choice(LOCATIONS)
+    if rng.random() < 0.6:
+        params['skills'] = ','.join(rng.sample(SKILLS, rng.randint(1, 3)))
+        if rng.random() < 0.2:
+            params['skills_mode'] = 'any'
+    for field, choices, share in (
+        ('work_mode', Job.WORK_MODE_CHOICES, 0.4), ('job_type', Job.JOB_TYPE_CHOICES, 0.3),
+        ('experience_level', Job.EXPERIENCE_CHOICES, 0.3),
+    ):
+        if rng.random() < share:
+            params[field] = rng.choice(choices)[0]
+    if rng.random() < 0.2:
+        params['min_salary'] = str(rng.choice(SALARY_BANDS)[0])
+    if rng.random() < 0.15 or len(params) < 2:
+        params['keyword'] = rng.choice(SEARCH_QUERIES)
+    return params
+
+
+def seed_saved_searches(count, rng, users=10000, batch_size=5000):
+    """Insert saved searches (and the users owning them) up to count"""
+    User = get_user_model()
+    existing = User.objects.filter(username__startswith='alerts-').count()
+    User.objects.bulk_create([
+        User(username=f'alerts-{n}', email=f'alerts-{n}@example.com', first_name='Bench', last_name=str(n))
+        for n in range(existing, users)
+    ], batch_size=batch_size)
+    user_ids = list(User.objects.filter(username__startswith='alerts-').values_list('id', flat=True))
+    for start in range(SavedSearch.objects.count(), count, batch_size):
+        searches = []
+        for _ in range(min(batch_size, count - start)):
+            search = SavedSearch(user_id=rng.choice(user_ids), params=random_saved_search(rng))
+            # bulk_create skips the pre_save signal
+            prepare_saved_search(search)
+            searches.append(search)
+        SavedSearch.objects.bulk_create(searches)
+
+
+@suite('alerts')
+def bench_alerts(size, repeat, rng, saved_searches=1000000, new_jobs=1000):
+    """Matching new jobs against saved searches: percolator index vs running every search"""
+    results = {}
+    start = time.perf_counter()
+    seed_saved_searches(saved_searches, rng)
+    results['seed_saved_searches'] = f'{time.perf_counter() - start:.0f}s ({SavedSearch.objects.count()} saved)'
+
+    first_pk = seed_jobs(new_jobs, rng)
+    jobs = list(Job.objects.filter(pk__gte=first_pk).order_by('pk'))
+    results['match_one_job'] = measure(lambda: find_matches([rng.choice(jobs)]), repeat)
+
+    # Running each saved search against the new jobs, timed on a sample
+    sample = list(SavedSearch.objects.order_by('?')[:min(repeat, 200)])
+    sample_ids = {saved.pk for saved in sample}
+    found = set()
+    matched = 0
+    start = time.perf_counter()
+    for offset in range(0, len(jobs), 100):
+        for job, search_id, *_ in find_matches(jobs[offset:offset + 100]):
+            matched += 1
+            if search_id in sample_ids:
+                found.add((job.pk, search_id))
+    elapsed = time.perf_counter() - start
+    results['match_batches_of_100'] = f'{len(jobs) / elapsed:.0f} jobs/s ({matched / len(jobs):.0f} matching searches per job)'
+
+    agree = 0
+    start = time.perf_counter()
+    for saved in sample:
+        queryset = filter_jobs(Job.objects.filter(pk__gte=first_pk, is_active=True), saved.params)
+        if saved.params.get('q'):
+            queryset = search.search_jobs(queryset, saved.params['q'])
+        expected = {(pk, saved.pk) for pk in queryset.values_list('pk', flat=True)}
+        agree += expected == {pair for pair in found if pair[1] == saved.pk}
+    per_search = (time.perf_counter() - start) / len(sample)
+    results['scan_per_search'] = f'{per_search * 1000:.2f}ms'
+    results['scan_all_searches'] = (
+        f'{per_search * saved_searches:.0f}s per batch of {len(jobs)} jobs (estimated from {len(sample)} searches)'
+    )
+    results['agreement'] = f'{agree / len(sample):.1%} of sampled searches'
+    return results
+
+
+def random_profile(rng):
+    """{term: count} for a synthetic user: a few skills, past job titles and a degree"""
+    counts = defaultdict(float)
+    for skill in rng.sample(SKILLS, k=rng.randint(2, 8)):
+        counts[SKILL_PREFIX + normalize_skill(skill)] += SKILL_WEIGHT * rng.randint(1, 5) / 3
+        for term in search.tokenize(skill):
+            counts[term] += 1
+    for title in rng.sample(TITLES, k=rng.randint(1, 3)):
+        for term in search.tokenize(title):
+            counts[term] += TITLE_WEIGHT
+    for term in search.tokenize(' '.join(rng.choices(WORDS, k=20)) + ' B.Tech Computer Science'):
+        counts[term] += 1
+    return counts
+
+
+@suite('recommend')
+def bench_recommend(size, repeat, rng):
+    """Ranking every active job against a profile: packed columns and postings vs scoring each row"""
+    recommender = JobRecommender()
+    start = time.perf_counter()
+    recommender.refresh(force=True)
+    matrix = recommender.matrix
+    results = {'full_build': f'{time.perf_counter() - start:.1f}s for {len(matrix)} jobs, {len(matrix.terms)} terms'}
+
+    profiles = [random_profile(rng) for _ in range(50)]
+    results['recommend_top_10'] = measure(lambda: recommender.recommend(rng.choice(profiles)), repeat)
+
+    def exact_scan(profile):
+        """Exact cosine of every row, one at a time"""
+        query = matrix.vectorize(profile)
+        weights = dict(query)
+        scores = [(matrix.score(weights, row), matrix.ids[row]) for row in range(len(matrix.ids)) if matrix.alive[row]]
+        return nlargest(10, scores)
+
+    results['exact_scan_top_10'] = measure(lambda: exact_scan(rng.choice(profiles)), max(repeat // 20, 3))
+    # Synthetic jobs tie a lot, so agreement compares the top scores rather than ids
+    agree = sum(
+        [round(score, 5) for _, score, _ in recommender.recommend(profile)]
+        == [round(score, 5) for score, _ in exact_scan(profile)]
+        for profile in profiles[:10]
+    )
+    results['agreement'] = f'{agree / 10:.0%} of profiles (same top 10 scores as the exact scan)'
+    results['memory'] = f'{sum(sys.getsizeof(column) for column in matrix.columns.values()) / 2 ** 20:.0f}MB in {len(matrix.columns)} packed columns'
+
+    changed = list(Job.objects.filter(is_active=True).order_by('?').values_list('pk', flat=True)[:max(size // 100, 1)])
+    Job.objects.filter(pk__in=changed[::2]).update(is_active=False)
+    Job.objects.filter(pk__in=changed[1::2]).update(skills=['Rust', 'Go'], updated_at=timezone.now())
+    start = time.perf_counter()
+    count = recommender.refresh(force=True)
+    results['incremental_refresh'] = f'{(time.perf_counter() - start) * 1000:.0f}ms ({count} jobs re-vectorized)'
+    return results
+
+
+@suite('similar')
+def bench_similar(size, repeat, rng):
+    """Similar jobs: precomputed neighbor table vs comparing the job with every other on each request"""
+    results = {}
+    start = time.perf_counter()
+    signed, refreshed = refresh_similar_jobs(full=True)
+    results['full_build'] = f'{time.perf_counter() - start:.1f}s ({signed} signed, {refreshed} lists)'
+
+    ids = list(Job.objects.filter(is_active=True).values_list('pk', flat=True))
+    client = Client()
+    with override_settings(ALLOWED_HOSTS=['*']):
+        results['similar_endpoint'] = measure(lambda: client.get(f'/api/jobs/{rng.choice(ids)}/similar/'), repeat)
+
+    def scan(pk):
+        """Score one job against every stored signature"""
+        rows = JobSimilarity.objects.filter(job__is_active=True, signature__isnull=False).values_list('job_id', 'signature')
+        signatures = {job_id: unpack_signature(value) for job_id, value in rows.iterator(chunk_size=5000)}
+        signature = signatures.pop(pk)
+        return nlargest(NEIGHBORS, ((similarity(signature, other), job_id) for job_id, other in signatures.items()))
+
+    sample = rng.sample(ids, min(20, len(ids)))
+    results['all_pairs_scan'] = measure(lambda: scan(rng.choice(sample)), max(repeat // 20, 3))
+    # Synthetic jobs tie a lot, so recall counts stored neighbors scoring at least the scan's 10th best
+    found = total = 0
+    for pk in sample:
+        best = scan(pk)
+        stored = list(SimilarJob.objects.filter(job_id=pk).values_list('score', flat=True))
+        found += sum(score >= best[-1][0] for score in stored)
+        total += len(best)
+    results['recall_at_10'] = f'{found / total:.1%} of sampled lists'
+
+    changed = rng.sample(ids, max(size // 100, 1))
+    Job.objects.filter(pk__in=changed[::2]).update(is_active=False)
+    Job.objects.filter(pk__in=changed[1::2]).update(title='Rust Developer', skills=['Rust', 'Go'], updated_at=timezone.now())
+    start = time.perf_counter()
+    signed, refreshed = refresh_similar_jobs()
+    results['incremental_refresh'] = f'{time.perf_counter() - start:.1f}s ({signed} signed, {refreshed} lists)'
+    return results
+
+
+@suite('popularity')
+def bench_popularity(size, repeat, rng, threads=4):
+    """Counting views with an UPDATE each vs buffering them; trending from the small table vs ranking every job"""
+    ids = list(Job.objects.filter(is_active=True).values_list('pk', flat=True))
+    now = timezone.now()
+    JobPopularity.objects.all().delete()
+    JobPopularity.objects.bulk_create(
+        (JobPopularity(job_id=pk, views=0, score=rng.expovariate(0.1), scored_at=now - timedelta(hours=rng.uniform(0, 168)))
+         for pk in ids),
+        batch_size=5000,
+    )
+    # Skewed, like real traffic: a few jobs get most views
+    hot = ids[:1000]
+    weights = [1 / (rank + 1) for rank in range(len(hot))]
+
+    def update_per_view():
+        JobPopularity.objects.filter(job_id=rng.choices(hot, weights)[0]).update(views=F('views') + 1, score=F('score') + 1)
+
+    results = {'update_per_view': measure_concurrent(update_per_view, repeat, threads)}
+    buffer = EventBuffer()
+    with override_settings(JOB_EVENTS_FLUSH_SECONDS=1):
+        results['buffered_view'] = measure_concurrent(lambda: buffer.add(rng.choices(hot, weights)[0], VIEW), repeat, threads)
+        flush_thread = buffer.flush_thread
+        if flush_thread:
+            flush_thread.join()
+    with override_settings(JOB_EVENTS_BACKGROUND_FLUSH=False, JOB_EVENTS_FLUSH_SECONDS=3600):
+        for pk in rng.choices(hot, weights, k=100000):
+            buffer.add(pk, VIEW)
+    jobs = len(buffer.counts)
+    start = time.perf_counter()
+    buffer.flush()
+    results['flush_100k_views'] = f'{(time.perf_counter() - start) * 1000:.0f}ms ({jobs} jobs)'
+
+    start = time.perf_counter()
+    refresh_trending()
+    results['refresh_trending'] = f'{(time.perf_counter() - start) * 1000:.0f}ms'
+    results['rank_stops_early'] = measure(rank_trending, max(repeat // 10, 3))
+
+    def rank_every_job():
+        rows = JobPopularity.objects.filter(job__is_active=True).values_list('score', 'scored_at', 'job_id')
+        current = timezone.now()
+        return nlargest(TRENDING_SIZE, ((decayed(score, scored_at, current), pk) for score, scored_at, pk in rows.iterator(chunk_size=5000)))
+
+    results['rank_every_job'] = measure(rank_every_job, max(repeat // 20, 3))
+    client = Client()
+    with override_settings(ALLOWED_HOSTS=['*']):
+        results['trending_endpoint'] = measure(lambda: client.get('/api/jobs/trending/'), repeat)
+    return results
+
+
+@task
+def noop_task(number):
+    """Benchmark task doing nothing"""
+
+
+@suite('tasks')
+def bench_tasks(size, repeat, rng, ready=2000):
+    """Enqueueing vs a thread per call; claiming ready tasks with `size` scheduled or failed ones queued"""
+    now = timezone.now()
+    Task.objects.all().delete()
+    Task.objects.bulk_create(
+        (Task(name=noop_task.name, args=[number], priority=rng.randint(-5, 5), run_at=now + timedelta(hours=rng.uniform(1, 48)),
+              status=rng.choice([Task.QUEUED] * 9 + [Task.FAILED]))
+         for number in range(size)),
+        batch_size=5000,
+    )
+    results = {
+        'thread_per_call': measure(lambda: threading.Thread(target=time.sleep, args=(0.001,)).start(), repeat),
+        'enqueue': measure(lambda: noop_task.enqueue(1), repeat),
+    }
+    Task.objects.filter(run_at__lte=timezone.now()).delete()
+    Task.objects.bulk_create(Task(name=noop_task.name, args=[number], run_at=now) for number in range(ready))
+    worker = Worker(batch_size=10)
+    claimed = []
+    results['claim_10'] = measure(lambda: claimed.extend(worker.claim()), min(repeat, ready // 10))
+    Task.objects.filter(pk__in=[claimed_task.pk for claimed_task in claimed]).delete()
+    left = Task.objects.filter(status=Task.QUEUED, run_at__lte=timezone.now()).count()
+    start = time.perf_counter()
+    worker.run_pending()
+    elapsed = time.perf_counter() - start
+    results['run_pending'] = f'{left / elapsed:.0f} tasks/s ({left} tasks)'
+    return results
+
+
+@suite('uploads')
+def bench_uploads(size, repeat, rng, file_size=8 * 1024 * 1024):
+    """Applying with an 8MB resume as one multipart body vs resumable 1MB chunks: time and peak memory (client + server)"""
+    content = b'%PDF-1.4 ' + rng.randbytes(file_size - 9)
+    job = Job.objects.filter(is_active=True).first()
+    client = Client()
+    sent = iter(range(10 ** 9))
+
+    def applicant():
+        return {'full_name': 'Asha Rao', 'email': f'asha{next(sent)}@example.com', 'phone': '9876543210'}
+
+    def multipart(collect=False):
+        response = client.post(f'/api/jobs/{job.pk}/apply/', {
+            **applicant(), 'resume': SimpleUploadedFile('resume.pdf', content, content_type='application/pdf'),
+        })
+        assert response.status_code == 201, response.content
+
+    def chunked(collect=False):
+        upload = client.post('/api/jobs/uploads/', {'filename': 'resume.pdf', 'size': file_size, 'purpose': 'resume'}).json()
+        for start in range(0, file_size, CHUNK_SIZE):
+            chunk = content[start:start + CHUNK_SIZE]
+            client.put(
+                f"/api/jobs/uploads/{upload['id']}/", chunk, content_type='application/octet-stream',
+                HTTP_CONTENT_RANGE=f'bytes {start}-{start + len(chunk) - 1}/{file_size}',
+            )
+            if collect:
+                # The test client's request bodies linger in reference cycles; a server's would not
+                gc.collect()
+        client.post(f"/api/jobs/uploads/{upload['id']}/finalize/")
+        response = client.post(f'/api/jobs/{job.pk}/apply/', {**applicant(), 'resume_upload': upload['id']})
+        assert response.status_code == 201, response.content
+
+    results = {}
+    with tempfile.TemporaryDirectory() as media, override_settings(
+        ALLOWED_HOSTS=['*'], MEDIA_ROOT=media, UPLOAD_TEMP_DIR=os.path.join(media, 'incoming'), JOB_EVENTS_ENABLED=False,
+    ):
+        for name, func in (('multipart', multipart), ('chunked', chunked)):
+            results[name] = measure(func, max(min(repeat, 10), 3))
+            tracemalloc.start()
+            func(collect=True)
+            results[f'{name}_peak_memory'] = f'{tracemalloc.get_traced_memory()[1] / 2 ** 20:.1f}MB'
+            tracemalloc.stop()
+    return results
+
+
+@suite('downloads')
+def bench_downloads(size, repeat, rng, file_size=8 * 1024 * 1024):
+    """Staff downloading an 8MB resume among `size` applications: streamed by the app vs handed to nginx, ranges, 304s"""
+    job = Job.objects.filter(is_active=True).first()
+    staff, _ = get_user_model().objects.get_or_create(
+        email='hr@example.com', defaults={'username': 'hr', 'first_name': 'H', 'last_name': 'R', 'is_staff': True},
+    )
+    have = JobApplication.objects.count()
+    JobApplication.objects.bulk_create(
+        (JobApplication(job=job, full_name='Asha Rao', email=f'asha{number}@example.com', phone='9876543210',
+                        resume=f'applications/resumes/resume_{number}.pdf')
+         for number in range(have, size)),
+        batch_size=5000,
+    )
+    client = APIClient()
+    client.force_authenticate(staff)
+    results = {}
+    with tempfile.TemporaryDirectory() as media, override_settings(ALLOWED_HOSTS=['*'], MEDIA_ROOT=media):
+        name = 'applications/resumes/resume_0.pdf'
+        os.makedirs(os.path.join(media, 'applications', 'resumes'))
+        with open(os.path.join(media, name), 'wb') as resume:
+            resume.write(b'%PDF-1.4 ' + rng.randbytes(file_size - 9))
+        url = f'/api/jobs/files/{name}'
+
+        def streamed(**headers):
+            response = client.get(url, **headers)
+            return sum(map(len, response.streaming_content))
+
+        results['app_streams_8mb'] = measure(streamed, max(repeat // 10, 3))
+        tracemalloc.start()
+        streamed()
+        results['app_streams_peak_memory'] = f'{tracemalloc.get_traced_memory()[1] / 2 ** 20:.1f}MB'
+        tracemalloc.stop()
+        results['range_1mb'] = measure(lambda: streamed(HTTP_RANGE='bytes=1048576-2097151'), repeat)
+        etag = client.get(url)['ETag']
+        results['not_modified'] = measure(lambda: client.get(url, HTTP_IF_NONE_MATCH=etag), repeat)
+        with override_settings(PROTECTED_MEDIA_SERVER='nginx'):
+            results['x_accel_redirect'] = measure(lambda: client.get(url), repeat)
+    return results
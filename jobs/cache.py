@@ -0,0 +1,116 @@
+"""
+SkillConnect - Job Response Cache
+Version-invalidated caching for the job list, detail and facet endpoints.
+
+Every cache key embeds a global "jobs version". Saving or deleting a Job bumps
+the version, which orphans all old entries at once - no key scan or pattern
+delete is needed; stale entries simply expire.
+
+If the cache table is missing (`createcachetable` not run) or unusable, the
+version is kept per process instead of failing the request or the Job save.
+"""
+import hashlib
+import logging
+import time
+from urllib.parse import urlencode
+
+from django.conf import settings
+from django.core.cache import cache, caches
+from django.core.cache.backends.db import DatabaseCache
+from django.db import DatabaseError, connection, transaction
+
+from .filters import normalize_filter_params
+
+logger = logging.getLogger(__name__)
+
+JOBS_VERSION_KEY = 'jobs_version'
+
+# This process's version while the cache is unavailable
+local_version = int(time.time() * 1000)
+
+
+class CacheUnavailable(Exception):
+    pass
+
+
+def cache_call(operation, *args, **kwargs):
+    """A cache operation; raises CacheUnavailable for database errors, which leave an enclosing transaction usable"""
+    try:
+        if connection.in_atomic_block and isinstance(caches['default'], DatabaseCache):
+            with transaction.atomic():
+                return operation(*args, **kwargs)
+        return operation(*args, **kwargs)
+    except DatabaseError:
+        logger.warning('The jobs version cache is unavailable (run `manage.py createcachetable`)', exc_info=True)
+        raise CacheUnavailable
+
+
+def get_jobs_version():
+    """Current jobs version (created on first use)"""
+    try:
+        version = cache_call(cache.get, JOBS_VERSION_KEY)
+        if version is None:
+            # Start from the clock, not 1, so an evicted counter never reuses old keys
+            cache_call(cache.add, JOBS_VERSION_KEY, int(time.time() * 1000), timeout=None)
+            version = cache_call(cache.get, JOBS_VERSION_KEY)
+    except CacheUnavailable:
+        return local_version
+    return version
+
+
+def bump_jobs_version():
+    """Invalidate every cached job response"""
+    global local_version
+    try:
+        return cache_call(cache.incr, JOBS_VERSION_KEY)
+    except ValueError:
+        return get_jobs_version()
+    except CacheUnavailable:
+        local_version += 1
+        return local_version
+
+
+def cache_timeout():
+    return getattr(settings, 'JOB_CACHE_TIMEOUT', 600)
+
+
+def _digest(parts):
+    return hashlib.md5(urlencode(parts).encode()).hexdigest()
+
+
+def listing_cache_key(request, paginator=None):
+    """Cache key for a job list request - equivalent query strings share a key.
+
+    Filter params go through normalize_filter_params(); the default ordering
+    and page size are dropped so `/api/jobs/` and
+    `/api/jobs/?ordering=-created_at&page_size=20` hit the same entry.
+    """
+    params = request.query_params
+    parts = normalize_filter_params(params)
+
+    ordering = (params.get('ordering') or '').strip()
+    if ordering and ordering != '-created_at':
+        parts.append(('ordering', ordering))
+    if paginator is not None:
+        page_size = paginator.get_page_size(request)
+        if page_size != paginator.page_size:
+            parts.append(('page_size', page_size))
+        cursor = params.get(paginator.cursor_query_param)
+        if cursor:
+            parts.append(('cursor', cursor))
+    fields = sorted({name.strip() for name in (params.get('fields') or '').split(',') if name.strip()})
+    if fields:
+        parts.append(('fields', ','.join(fields)))
+    # next/previous links are absolute URLs
+    parts.append(('host', request.get_host()))
+    return f'{get_jobs_version()}_{_digest(parts)}'
+
+
+def detail_cache_key(pk, fields=None):
+    if fields:
+        return f'{get_jobs_version()}_{pk}_{_digest([("fields", ",".join(fields))])}'
+    return f'{get_jobs_version()}_{pk}'
+
+
+def facets_cache_key(request):
+    return f'{get_jobs_version()}_{_digest(normalize_filter_params(request.query_params))}'
@@ -0,0 +1,369 @@
+"""
+SkillConnect - Active Job Catalog
+Per-worker columnar snapshot of active jobs, so the job list can filter and
+sort without asking the database which rows match.
+
+Rows are stored newest first (the default listing order). Every value of a
+filterable column (category, job type, level, work mode, company size,
+city) has a bitmap - a Python int with bit i set for row i - so
+?category=it&work_mode=remote is one AND of two ints. Salaries and
+timestamps are `array` columns; salary ranges are narrowed with bucket
+bitmaps and checked exactly per row. Each supported ?ordering= has a
+precomputed row permutation, and cursors are resolved with a bisect on it.
+
+JobListView takes a page of ids from the snapshot and loads just those rows
+by primary key. Filters the snapshot does not model (keyword search, skills,
+radius search, free-text locations) and other orderings use the database as
+before.
+
+The snapshot belongs to one jobs version. When the version changes it is
+rebuilt in a background thread and requests use the database meanwhile.
+"""
+
+import sys
+import threading
+from array import array
+from bisect import bisect_left, bisect_right
+from datetime import datetime, timedelta, timezone as dt_timezone
+from heapq import nlargest, nsmallest
+
+from django.conf import settings
+from django.db import connections
+
+from .cache import get_jobs_version
+from .filters import SEARCH_PARAMS, parse_amount
+from .geo import resolve_location
+
+# Filterable columns, one bitmap per distinct value
+FACETS = ('category', 'job_type', 'experience_level', 'work_mode', 'company_size', 'city')
+
+# Query params that need the database
+UNSUPPORTED_PARAMS = SEARCH_PARAMS + ('near', 'skills')
+
+# Numeric columns; NULL is stored as -1 (all of them are non-negative)
+NUMERIC_COLUMNS = ('created_at', 'min_salary', 'annual_salary_min', 'annual_salary_max')
+NULL = -1
+
+# Orderings with a row permutation (-created_at is the row order itself).
+# salary_top is filters.SALARY_TOP: the annual max, else the min
+SORTED_ORDERINGS = (
+    'created_at', '-salary_top', '-annual_salary_max', 'annual_salary_min', '-min_salary', 'min_salary',
+)
+
+# At most this many salary bucket bitmaps per bound
+SALARY_BUCKETS = 32
+
+SCAN_CHUNK_BYTES = 64
+EPOCH = datetime(1970, 1, 1, tzinfo=dt_timezone.utc)
+
+
+def to_micros(value):
+    """created_at as integer microseconds since the epoch"""
+    if value.tzinfo is None:
+        value = value.replace(tzinfo=dt_timezone.utc)
+    return (value - EPOCH) // timedelta(microseconds=1)
+
+
+def column_value(name, value):
+    """Stored form of a column value (also used for cursor positions)"""
+    if value is None:
+        return NULL
+    if name == 'created_at':
+        return to_micros(value)
+    if name == 'min_salary':
+        return int(round(value * 100))  # paise, so Decimal comparisons stay exact
+    return int(value)
+
+
+def supports(params, ordering):
+    """Whether the catalog can answer a listing with these params and keyset ordering"""
+    if any((params.get(param) or '').strip() for param in UNSUPPORTED_PARAMS):
+        return False
+    if len(ordering) != 2:
+        return False
+    term = ('-' if ordering[0][1] else '') + ordering[0][0]
+    if term != '-created_at' and term not in SORTED_ORDERINGS:
+        return False
+    location = (params.get('location') or '').strip()
+    # Free-text locations are an icontains match - the database does it
+    return not location or location.lower() == 'all' or resolve_location(location) is not None
+
+
+def bitmap_from_rows(rows, size):
+    """Bitmap (int) with the given row numbers set"""
+    bits = bytearray((size + 7) // 8)
+    for row in rows:
+        bits[row >> 3] |= 1 << (row & 7)
+    return int.from_bytes(bits, 'little')
+
+
+class CatalogSnapshot:
+    """Immutable columnar copy of the active jobs at one jobs version"""
+
+    def __init__(self, rows, version=None):
+        """rows: (id, created_at, *FACETS, min_salary, annual_salary_min, annual_salary_max)
+        tuples, newest first (-created_at, id) - the order the listing uses
+        """
+        self.version = version
+        self.ids = array('q')
+        self.columns = {name: array('q') for name in NUMERIC_COLUMNS}
+        # One streaming pass: facet values become small-int codes, numbers go to arrays
+        codes = {facet: array('H') for facet in FACETS}
+        values = {facet: {} for facet in FACETS}
+        created, min_salary, annual_min, annual_max = (self.columns[name] for name in NUMERIC_COLUMNS)
+        for row in rows:
+            for facet, value in zip(FACETS, row[2:8]):
+                codes[facet].append(values[facet].setdefault(value, len(values[facet])))
+            self.ids.append(row[0])
+            created.append(column_value('created_at', row[1]))
+            min_salary.append(column_value('min_salary', row[8]))
+            annual_min.append(column_value('annual_salary_min', row[9]))
+            annual_max.append(column_value('annual_salary_max', row[10]))
+        self.columns['salary_top'] = array('q', (
+            high if high != NULL else low for low, high in zip(annual_min, annual_max)
+        ))
+
+        self.size = len(self.ids)
+        self.nbytes = (self.size + 7) // 8
+        self.all_rows = (1 << self.size) - 1
+        self.facets = {facet: self._code_bitmaps(codes[facet], values[facet]) for facet in FACETS}
+
+        self.orderings = {name: self._permutation(name) for name in SORTED_ORDERINGS}
+        self.salary_known = self.all_rows & ~(self._nulls('annual_salary_min') & self._nulls('annual_salary_max'))
+        self.max_null = self._nulls('annual_salary_max')
+        self.min_null = self._nulls('annual_salary_min')
+        # rows with annual max >= boundary / annual min <= boundary
+        self.max_at_least = self._buckets('-annual_salary_max')
+        self.min_at_most = self._buckets('annual_salary_min')
+
+    # Building --------------------------------------------------------------
+
+    def sort_key(self, term):
+        """Row -> sort key for an ordering term; NULLs last, `id` breaks ties"""
+        name = term.lstrip('-')
+        column, ids = self.columns[name], self.ids
+        sign = -1 if term.startswith('-') else 1
+
+        def key(row):
+            value = column[row]
+            if value == NULL:
+                return (1, 0, ids[row])
+            return (0, sign * value, ids[row])
+        return key
+
+    def _code_bitmaps(self, codes, values):
+        """{value: bitmap} from a code array"""
+        bits = [bytearray(self.nbytes) for _ in values]
+        for row, code in enumerate(codes):
+            bits[code][row >> 3] |= 1 << (row & 7)
+        return {value: int.from_bytes(bits[code], 'little') for value, code in values.items()}
+
+    def _permutation(self, term):
+        return array('I', sorted(range(self.size), key=self.sort_key(term)))
+
+    def _nulls(self, name):
+        column = self.columns[name]
+        return bitmap_from_rows((row for row in range(self.size) if column[row] == NULL), self.size)
+
+    def _buckets(self, term):
+        """[(boundary, bitmap)] ascending by boundary, walking the term's permutation.
+
+        For -annual_salary_max each bitmap holds the rows whose max is at least
+        the boundary; for annual_salary_min the rows whose min is at most it.
+        """
+        column = self.columns[term.lstrip('-')]
+        order = self.orderings[term]
+        values = [column[row] for row in order if column[row] != NULL]
+        if not values:
+            return []
+        step = max(len(values) // SALARY_BUCKETS, 1)
+        boundaries = sorted(set(values[::step]) | {values[-1]}, reverse=term.startswith('-'))
+
+        buckets = []
+        bits = bytearray(self.nbytes)
+        pending = iter(boundaries)
+        boundary = next(pending)
+        descending = term.startswith('-')
+        for row in order:
+            value = column[row]
+            while boundary is not None and (value == NULL or (value < boundary if descending else value > boundary)):
+                buckets.append((boundary, int.from_bytes(bits, 'little')))
+                boundary = next(pending, None)
+            if value == NULL:
+                break
+            bits[row >> 3] |= 1 << (row & 7)
+        while boundary is not None:
+            buckets.append((boundary, int.from_bytes(bits, 'little')))
+            boundary = next(pending, None)
+        return sorted(buckets, key=lambda bucket: bucket[0])
+
+    # Filtering -------------------------------------------------------------
+
+    def select(self, params):
+        """(bitmap, (low, high) or None) for supported filter params.
+
+        Mirrors filters.filter_jobs(); the salary bounds are rechecked per row.
+        """
+        bitmap = self.all_rows
+        for facet in FACETS[:-1]:
+            value = params.get(facet)
+            if value:
+                bitmap &= self.facets[facet].get(value, 0)
+        location = (params.get('location') or '').strip()
+        if location and location.lower() != 'all':
+            bitmap &= self.facets['city'].get(resolve_location(location).name, 0)
+
+        low = parse_amount(params.get('min_salary'))
+        high = parse_amount(params.get('max_salary'))
+        if low is None and high is None:
+            return bitmap, None
+        bitmap &= self.salary_known
+        if low is not None:
+            bitmap &= self._bucket(self.max_at_least, low, at_most=True) | self.max_null
+        if high is not None:
+            bitmap &= self._bucket(self.min_at_most, high, at_most=False) | self.min_null
+        return bitmap, (low, high)
+
+    @staticmethod
+    def _bucket(buckets, amount, at_most):
+        """Smallest bucket bitmap that still covers every row matching amount"""
+        if not buckets:
+            return 0
+        boundaries = [boundary for boundary, _ in buckets]
+        if at_most:
+            index = bisect_right(boundaries, amount) - 1
+            return buckets[max(index, 0)][1]
+        index = bisect_left(boundaries, amount)
+        return buckets[min(index, len(buckets) - 1)][1]
+
+    def _salary_check(self, bounds):
+        if bounds is None:
+            return None
+        low, high = bounds
+        annual_min, annual_max = self.columns['annual_salary_min'], self.columns['annual_salary_max']
+
+        def matches(row):
+            if low is not None and annual_max[row] != NULL and annual_max[row] < low:
+                return False
+            return high is None or annual_min[row] == NULL or annual_min[row] <= high
+        return matches
+
+    def rows_of(self, bitmap):
+        """Row numbers set in bitmap, ascending"""
+        data = bitmap.to_bytes(self.nbytes, 'little')
+        for start in range(0, self.nbytes, SCAN_CHUNK_BYTES):
+            chunk = int.from_bytes(data[start:start + SCAN_CHUNK_BYTES], 'little')
+            offset = start * 8
+            while chunk:
+                lowest = chunk & -chunk
+                yield offset + lowest.bit_length() - 1
+                chunk ^= lowest
+
+    # Paging ----------------------------------------------------------------
+
+    def page(self, selection, ordering, position, reverse, limit):
+        """Ids of up to `limit` rows after position, in walk order.
+
+        ordering is [(name, descending), ('id', False)] as built by the keyset
+        paginator, for a term supports() accepts.
+        """
+        name, descending = ordering[0]
+        term = ('-' if descending else '') + name
+        sequence = range(self.size) if term == '-created_at' else self.orderings[term]
+        key = self.sort_key(term)
+        bitmap, bounds = selection
+        check = self._salary_check(bounds)
+
+        target = None
+        if position is not None:
+            value = column_value(name, position[0])
+            target = (1, 0, position[1]) if value == NULL else (0, (-1 if descending else 1) * value, position[1])
+
+        matched = bitmap.bit_count()
+        if matched * matched < limit * self.size:
+            # Few matches: collect them all and take the page by sort key
+            rows = [row for row in self.rows_of(bitmap) if check is None or check(row)]
+            if target is not None:
+                rows = [row for row in rows if (key(row) < target if reverse else key(row) > target)]
+            rows = nlargest(limit, rows, key=key) if reverse else nsmallest(limit, rows, key=key)
+            return [self.ids[row] for row in rows]
+
+        if target is None:
+            index = 0
+        elif reverse:
+            index = bisect_left(sequence, target, key=key) - 1
+        else:
+            index = bisect_right(sequence, target, key=key)
+        step = -1 if reverse else 1
+        flags = bitmap.to_bytes(self.nbytes, 'little')
+        ids = []
+        while 0 <= index < self.size and len(ids) < limit:
+            row = sequence[index]
+            if flags[row >> 3] >> (row & 7) & 1 and (check is None or check(row)):
+                ids.append(self.ids[row])
+            index += step
+        return ids
+
+    def memory_bytes(self):
+        """Approximate memory held by the snapshot"""
+        total = sys.getsizeof(self.ids) + sys.getsizeof(self.all_rows)
+        total += sum(sys.getsizeof(column) for column in self.columns.values())
+        total += sum(sys.getsizeof(order) for order in self.orderings.values())
+        total += sum(sys.getsizeof(bitmap) for values in self.facets.values() for bitmap in values.values())
+        total += sum(sys.getsizeof(bitmap) for _, bitmap in self.max_at_least + self.min_at_most)
+        total += sum(sys.getsizeof(bitmap) for bitmap in (self.salary_known, self.max_null, self.min_null))
+        return total
+
+
+def load_snapshot(version=None, using='default'):
+    """Build a snapshot of the active jobs from the database"""
+    from .models import Job
+
+    rows = Job.objects.using(using).filter(is_active=True).order_by('-created_at', 'id').values_list(
+        'id', 'created_at', *FACETS, 'min_salary', 'annual_salary_min', 'annual_salary_max',
+    )
+    return CatalogSnapshot(rows.iterator(chunk_size=5000), version)
+
+
+class JobCatalog:
+    """Holds the current snapshot for this worker and rebuilds it when stale"""
+
+    def __init__(self):
+        self.snapshot = None
+        self.lock = threading.Lock()
+        self.build_thread = None
+
+    def current(self, using='default'):
+        """The snapshot for the current jobs version, or None while it is rebuilt"""
+        version = get_jobs_version()
+        snapshot = self.snapshot
+        if snapshot is not None and snapshot.version == version:
+            return snapshot
+        # A background thread cannot see this transaction's writes (tests, atomic requests)
+        if connections[using].in_atomic_block or not getattr(settings, 'JOB_CATALOG_BACKGROUND_REFRESH', True):
+            self.snapshot = load_snapshot(version, using)
+            return self.snapshot
+        with self.lock:
+            if self.build_thread is None or not self.build_thread.is_alive():
+                self.build_thread = threading.Thread(
+                    target=self._build, args=(version, using), name='job-catalog-build', daemon=True,
+                )
+                self.build_thread.start()
+        return None
+
+    def _build(self, version, using):
+        try:
+            self.snapshot = load_snapshot(version, using)
+        finally:
+            connections[using].close()
+
+    def page(self, params, ordering, position, reverse, limit, using='default'):
+        """Ids for one listing page, or None when the database has to answer"""
+        if not getattr(settings, 'JOB_CATALOG_ENABLED', True) or not supports(params, ordering):
+            return None
+        snapshot = self.current(using)
+        if snapshot is None:
+            return None
+        return snapshot.page(snapshot.select(params), ordering, position, reverse, limit)
+
+job_catalog = JobCatalog()
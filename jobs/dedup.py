@@ -0,0 +1,217 @@
+"""
+SkillConnect - Near-Duplicate Jobs
+MinHash signatures of a job's title, skills and description, used to catch
+postings that arrive again with small wording changes.
+
+Two jobs are near-duplicates when their signatures agree on at least
+SIMILARITY_THRESHOLD of their positions (an estimate of the Jaccard
+similarity of their feature sets). Each signature is also stored as BANDS
+hashed bands of ROWS_PER_BAND values: similar jobs very likely agree on a
+whole band, so candidates come from indexed equality lookups on the band
+columns instead of comparing every pair of jobs.
+"""
+
+import hashlib
+import operator
+import struct
+from array import array
+from collections import defaultdict
+from functools import lru_cache
+
+from django.db import transaction
+
+from . import search
+from .search import tokenize
+from .skills import skill_labels
+
+# 16-bit hash values keep signatures small; chance collisions between the
+# minima of unrelated sets stay well under 1% for job-sized texts
+NUM_HASHES = 64
+BANDS = 8
+ROWS_PER_BAND = 4
+BAND_FIELDS = tuple(f'fingerprint_band{band}' for band in range(BANDS))
+SIGNATURE_FORMAT = f'<{NUM_HASHES}H'
+
+# Bands cover the first BANDS * ROWS_PER_BAND values: pairs with Jaccard 0.8
+# share a band ~98% of the time, 0.3 pairs ~6%. All NUM_HASHES values are
+# compared to confirm a match.
+SIMILARITY_THRESHOLD = 0.8
+
+# Description text is compared as overlapping word triples; title words and
+# skills count TERM_WEIGHT times (as numbered copies of the term)
+SHINGLE_SIZE = 3
+TERM_WEIGHT = 4
+MAX_DESCRIPTION_WORDS = 2000
+
+# Each 64-byte blake2b digest yields 32 of the hash values; a suffix byte varies the digest
+HASHES_PER_DIGEST = 32
+DIGEST_SUFFIXES = [bytes([index]) for index in range(NUM_HASHES // HASHES_PER_DIGEST)]
+UNPACK_HASHES = struct.Struct(SIGNATURE_FORMAT).unpack
+
+DUPLICATE_POLICIES = ('flag', 'merge', 'off')
+
+
+def feature_hashes(feature):
+    """NUM_HASHES 16-bit hash values for one feature"""
+    data = feature.encode('utf-8')
+    return UNPACK_HASHES(b''.join(hashlib.blake2b(data + suffix, digest_size=64).digest() for suffix in DIGEST_SUFFIXES))
+
+
+@lru_cache(maxsize=4096)
+def term_hashes(term):
+    """Column-wise minimum over the hashes of a title word's or skill's TERM_WEIGHT copies.
+
+    Cached: the same few thousand words and skills recur across jobs.
+    """
+    return array('H', map(min, zip(*(feature_hashes(f'{term}:{copy}') for copy in range(TERM_WEIGHT)))))
+
+
+def job_signature(job):
+    """MinHash signature (tuple of NUM_HASHES ints) of a job's features, or None if it has none.
+
+    Features are the title words and skills (each counting TERM_WEIGHT times)
+    and the description's word shingles.
+    """
+    terms = {f'title:{word}' for word in tokenize(job.title)}
+    terms.update(f'skill:{key}' for key in skill_labels(job.skills))
+    words = tokenize(job.description)[:MAX_DESCRIPTION_WORDS]
+    shingles = {
+        ' '.join(words[start:start + SHINGLE_SIZE])
+        for start in range(max(len(words) - SHINGLE_SIZE + 1, 1 if words else 0))
+    }
+    rows = [term_hashes(term) for term in terms] + [feature_hashes(shingle) for shingle in shingles]
+    if not rows:
+        return None
+    # Column-wise minimum, done by min() in C rather than a Python loop per hash
+    return tuple(map(min, zip(*rows)))
+
+
+def band_values(signature):
+    """Signed 32-bit hash of each band of ROWS_PER_BAND signature values"""
+    packed = struct.pack(SIGNATURE_FORMAT, *signature)
+    width = ROWS_PER_BAND * 2
+    return tuple(
+        int.from_bytes(hashlib.blake2b(packed[band * width:(band + 1) * width], digest_size=4).digest(), 'little', signed=True)
+        for band in range(BANDS)
+    )
+
+
+def similarity(a, b):
+    """Estimated Jaccard similarity of two signatures"""
+    return sum(map(operator.eq, a, b)) / NUM_HASHES
+
+
+def unpack_signature(value):
+    """Signature tuple from the stored fingerprint bytes"""
+    return struct.unpack(SIGNATURE_FORMAT, bytes(value))
+
+
+def fingerprint_job(job):
+    """Set job.fingerprint (packed signature) and its band columns in place (called before save)"""
+    signature = job_signature(job)
+    job.fingerprint = struct.pack(SIGNATURE_FORMAT, *signature) if signature else None
+    bands = band_values(signature) if signature else (None,) * BANDS
+    for field, value in zip(BAND_FIELDS, bands):
+        setattr(job, field, value)
+
+
+class BandIndex:
+    """In-memory band -> (signature, item) buckets, for matching without a query"""
+
+    def __init__(self):
+        self.buckets = defaultdict(list)
+
+    def add(self, fingerprint, item):
+        signature = unpack_signature(fingerprint)
+        for band, value in enumerate(band_values(signature)):
+            self.buckets[band, value].append((signature, item))
+
+    def nearest(self, fingerprint, skip=None):
+        """Most similar item at or above SIMILARITY_THRESHOLD (ties: first added)
+        that skip(item) doesn't reject, or None"""
+        signature = unpack_signature(fingerprint)
+        best = None
+        for band, value in enumerate(band_values(signature)):
+            for other, item in self.buckets.get((band, value), ()):
+                if skip is not None and skip(item):
+                    continue
+                score = similarity(signature, other)
+                if score >= SIMILARITY_THRESHOLD and (best is None or score > best[0]):
+                    best = (score, item)
+        return best[1] if best else None
+
+
+def stored_originals(queryset, fingerprints):
+    """BandIndex of the active, unflagged jobs in queryset that share a band with fingerprints.
+
+    Items are (pk, source, external_id), added oldest first. Each band is
+    its own SELECT in a UNION: an OR across the band columns would not use
+    the partial band indexes on SQLite.
+    """
+    index = BandIndex()
+    bands = [set() for _ in range(BANDS)]
+    for fingerprint in fingerprints:
+        if fingerprint is not None:
+            for band, value in enumerate(band_values(unpack_signature(fingerprint))):
+                bands[band].add(value)
+    columns = ('created_at', 'pk', 'fingerprint', 'source', 'external_id', 'duplicate_of_id')
+    selects = [
+        queryset.filter(is_active=True, **{f'{field}__in': sorted(values)}).order_by().values_list(*columns)
+        for field, values in zip(BAND_FIELDS, bands) if values
+    ]
+    if not selects:
+        return index
+    rows = selects[0].union(*selects[1:]) if len(selects) > 1 else selects[0]
+    for _, pk, fingerprint, source, external_id, duplicate_of_id in sorted(rows, key=lambda row: row[:2]):
+        if duplicate_of_id is None:
+            index.add(fingerprint, (pk, source, external_id))
+    return index
+
+
+def backfill_fingerprints(queryset, batch_size=2000):
+    """Recompute fingerprints for queryset in primary-key batches; returns the number changed"""
+    model = queryset.model
+    updated = 0
+    last_pk = 0
+    columns = ['pk', 'title', 'skills', 'description', 'fingerprint']
+    while True:
+        batch = list(queryset.filter(pk__gt=last_pk).order_by('pk').only(*columns)[:batch_size])
+        if not batch:
+            break
+        changed = []
+        for job in batch:
+            stored = job.fingerprint
+            fingerprint_job(job)
+            if job.fingerprint != stored:
+                changed.append(job)
+        with transaction.atomic(using=queryset.db):
+            model._default_manager.using(queryset.db).bulk_update(changed, ['fingerprint', *BAND_FIELDS])
+        updated += len(changed)
+        last_pk = batch[-1].pk
+    return updated
+
+
+def flag_duplicates(queryset):
+    """Flag every active job in queryset that near-duplicates an earlier one.
+
+    The earliest posting stays; later ones get duplicate_of set and are
+    deactivated. Returns the number of jobs flagged.
+    """
+    index = BandIndex()
+    flagged = {}
+    rows = (
+        queryset.filter(is_active=True, duplicate_of__isnull=True, fingerprint__isnull=False)
+        .order_by('created_at', 'id').values_list('pk', 'fingerprint')
+    )
+    for pk, fingerprint in rows.iterator(chunk_size=5000):
+        original = index.nearest(fingerprint)
+        if original is None:
+            index.add(fingerprint, pk)
+        else:
+            flagged.setdefault(original, []).append(pk)
+    manager = queryset.model._default_manager.using(queryset.db)
+    with transaction.atomic(using=queryset.db):
+        for original, ids in flagged.items():
+            manager.filter(pk__in=ids).update(duplicate_of=original, is_active=False)
+            search.unindex_jobs(ids, queryset.db)
+    return sum(len(ids) for ids in flagged.values())
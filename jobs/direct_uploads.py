@@ -0,0 +1,242 @@
+"""
+SkillConnect - Direct Uploads
+Uploads sent straight from the client to media storage, so file bytes
+never pass through an app worker (or get uploaded twice).
+
+POST /api/jobs/uploads/direct/ {filename, size, purpose} creates an Upload
+and returns a signed form: the client POSTs `fields` plus the file (as
+`file`) to `url`, then sends the storage's JSON response to
+/api/jobs/uploads/<id>/finalize/. The upload id is then used like a chunked
+upload's (see uploads.py) - attaching it sets the field to the stored
+name, with no copy.
+
+Signing follows Cloudinary's upload API: the signature is the SHA-1 of the
+sorted `key=value` parameters joined with `&`, followed by the API secret;
+signatures expire SIGNATURE_TTL after their timestamp. The storage response
+is signed the same way over its public_id and version, so finalizing needs
+no callback - only a metadata lookup for the stored file's size and format. The
+client cannot choose the name: public_id is signed. DIRECT_UPLOAD_BACKEND
+picks the storage:
+- 'cloudinary' - Cloudinary, with the CLOUDINARY_STORAGE credentials
+- 'local' - a stand-in at /api/jobs/uploads/direct/local/ implementing the
+  same protocol over the default (filesystem) storage, for development and
+  tests
+"""
+
+import hashlib
+import hmac
+import logging
+import os
+import secrets
+import time
+from datetime import timedelta
+
+from django.conf import settings
+from django.core.files.storage import default_storage
+from django.urls import reverse
+from django.utils import timezone
+from django.utils.text import get_valid_filename
+
+from .uploads import PURPOSES, UPLOAD_EXPIRY, UploadError, check_image, check_open, clean_file
+
+logger = logging.getLogger(__name__)
+
+# Cloudinary refuses signatures older than an hour
+SIGNATURE_TTL = timedelta(hours=1)
+FOLDERS = {'resume': 'resumes', 'profile_picture': 'profile_pictures'}
+
+
+def sign(params, secret):
+    """Cloudinary's request signature: SHA-1 hex of the sorted non-empty params and the secret"""
+    payload = '&'.join(
+        f"{key}={','.join(map(str, value)) if isinstance(value, (list, tuple)) else value}"
+        for key, value in sorted(params.items()) if value not in (None, '')
+    )
+    return hashlib.sha1((payload + secret).encode('utf-8')).hexdigest()
+
+
+class SignedUploadBackend:
+    """Where direct uploads go; subclasses provide the storage's URL, credentials and naming"""
+    # Parameters signed into every upload besides public_id and timestamp
+    extra_params = {}
+
+    def credentials(self):
+        """(api key, api secret)"""
+        raise NotImplementedError
+
+    def upload_url(self, request):
+        raise NotImplementedError
+
+    def public_id(self, purpose, filename):
+        """A fresh storage name for a file, under uploads/<purpose folder>/ (without extension)"""
+        stem = get_valid_filename(os.path.splitext(filename)[0])[:60] or 'file'
+        return f"uploads/{FOLDERS[purpose]}/{stem}_{secrets.token_urlsafe(9)}"
+
+    def signed_form(self, public_id, now=None):
+        """The form fields to POST with the file"""
+        api_key, secret = self.credentials()
+        params = {'public_id': public_id, 'timestamp': int(now or time.time()), **self.extra_params}
+        return {**params, 'api_key': api_key, 'signature': sign(params, secret)}
+
+    def verify_response(self, data):
+        """Whether data is a storage response signed with our secret"""
+        signature = sign({'public_id': data.get('public_id'), 'version': data.get('version')}, self.credentials()[1])
+        return hmac.compare_digest(signature, str(data.get('signature', '')))
+
+    def stored_info(self, name):
+        """(size in bytes, format - the extension without the dot) of a stored file"""
+        raise NotImplementedError
+
+    def check_stored(self, upload):
+        """Raise UploadError if the stored file is not what its purpose allows (beyond its format)"""
+
+    def delete(self, name):
+        raise NotImplementedError
+
+
+class CloudinaryBackend(SignedUploadBackend):
+    """Cloudinary, named like MediaCloudinaryStorage names its files (MEDIA_URL prefix, media tag)"""
+    extra_params = {'tags': 'media'}
+
+    def credentials(self):
+        config = settings.CLOUDINARY_STORAGE
+        return config['API_KEY'], config['API_SECRET']
+
+    def upload_url(self, request):
+        # The storage reads resumes as images too
+        return f"https://api.cloudinary.com/v1_1/{settings.CLOUDINARY_STORAGE['CLOUD_NAME']}/image/upload"
+
+    def public_id(self, purpose, filename):
+        # Cloudinary keeps the extension as the resource's format
+        return f"{settings.MEDIA_URL.strip('/')}/{super().public_id(purpose, filename)}"
+
+    def stored_info(self, name):
+        import cloudinary.api
+        from cloudinary_storage import app_settings  # noqa: F401 - configures cloudinary from CLOUDINARY_STORAGE
+
+        # Cloudinary detects the format from the content
+        resource = cloudinary.api.resource(name, resource_type='image')
+        return resource['bytes'], resource.get('format', '')
+
+    def delete(self, name):
+        import cloudinary.uploader
+        from cloudinary_storage import app_settings  # noqa: F401
+
+        cloudinary.uploader.destroy(name, invalidate=True, resource_type='image')
+
+
+class LocalBackend(SignedUploadBackend):
+    """The offline stand-in: /api/jobs/uploads/direct/local/ stores into the default storage"""
+
+    def credentials(self):
+        return 'local', hmac.new(settings.SECRET_KEY.encode('utf-8'), b'direct-uploads', hashlib.sha256).hexdigest()
+
+    def upload_url(self, request):
+        return request.build_absolute_uri(reverse('upload-direct-local'))
+
+    def public_id(self, purpose, filename):
+        # Filesystem names keep their extension, so they are served with the right type
+        return super().public_id(purpose, filename) + os.path.splitext(filename)[1].lower()
+
+    def stored_info(self, name):
+        return default_storage.size(name), os.path.splitext(name)[1].lstrip('.')
+
+    def check_stored(self, upload):
+        # The format is only the name's extension here: read pictures back
+        if upload.purpose == upload.PROFILE_PICTURE:
+            with default_storage.open(upload.stored_name) as stored:
+                check_image(stored)
+
+    def delete(self, name):
+        default_storage.delete(name)
+
+    def receive(self, fields, file):
+        """Check a signed form like Cloudinary would and store its file; returns the signed response"""
+        api_key, secret = self.credentials()
+        params = {key: fields.get(key) for key in ('public_id', 'timestamp', *self.extra_params)}
+        if fields.get('api_key') != api_key or not hmac.compare_digest(sign(params, secret), fields.get('signature', '')):
+            raise UploadError('Invalid Signature', status_code=401)
+        try:
+            timestamp = int(params['timestamp'])
+        except (TypeError, ValueError):
+            raise UploadError('Missing required parameter - timestamp')
+        if time.time() - timestamp > SIGNATURE_TTL.total_seconds():
+            raise UploadError('Stale request - signature expired', status_code=401)
+        if file is None:
+            raise UploadError('Missing required parameter - file')
+        name = params['public_id']
+        if file.size > max(max_size for _, max_size in PURPOSES.values()):
+            raise UploadError('File size too large')
+        if default_storage.exists(name):
+            raise UploadError('This upload was already stored', status_code=409)
+        stored = default_storage.save(name, file)
+        version = int(time.time())
+        return {
+            'public_id': stored,
+            'version': version,
+            'signature': sign({'public_id': stored, 'version': version}, secret),
+            'bytes': file.size,
+            'format': os.path.splitext(stored)[1].lstrip('.'),
+            'secure_url': default_storage.url(stored),
+        }
+
+
+BACKENDS = {'cloudinary': CloudinaryBackend, 'local': LocalBackend}
+
+
+def direct_backend():
+    return BACKENDS[getattr(settings, 'DIRECT_UPLOAD_BACKEND', 'local')]()
+
+
+def create_direct_upload(request, filename, size, purpose, content_type=''):
+    """Start a direct upload; returns (upload, {'url', 'fields'}) - the form to send the file with"""
+    from .models import Upload
+
+    filename = clean_file(filename, size, purpose)
+    backend = direct_backend()
+    public_id = backend.public_id(purpose, filename)
+    now = timezone.now()
+    upload = Upload.objects.create(
+        user=request.user if request.user.is_authenticated else None, purpose=purpose, filename=filename,
+        content_type=(content_type or '')[:100], size=size, stored_name=public_id,
+        created_at=now, expires_at=now + SIGNATURE_TTL,
+    )
+    return upload, {'url': backend.upload_url(request), 'fields': backend.signed_form(public_id, now.timestamp())}
+
+
+def finalize_direct_upload(upload, response):
+    """Mark a direct upload complete, given the storage's response to the client's upload"""
+    from .models import Upload
+
+    if upload.status != Upload.OPEN:
+        return upload
+    check_open(upload)
+    backend = direct_backend()
+    if response.get('public_id') != upload.stored_name or not backend.verify_response(response):
+        raise UploadError('The storage response is not signed for this upload', status_code=422)
+    size, file_format = backend.stored_info(upload.stored_name)
+    extensions, max_size = PURPOSES[upload.purpose]
+    try:
+        if size > max_size:
+            raise UploadError(f'The stored file is larger than {max_size} bytes')
+        if f'.{file_format.lower()}' not in extensions:
+            raise UploadError(f"A {upload.purpose.replace('_', ' ')} must be a {', '.join(extensions)} file")
+        backend.check_stored(upload)
+    except UploadError as exc:
+        # Nothing can use the file: it goes, with the upload
+        delete_stored(upload.stored_name)
+        Upload.objects.filter(pk=upload.pk).delete()
+        raise UploadError(str(exc), status_code=422)
+    Upload.objects.filter(pk=upload.pk, status=Upload.OPEN).update(
+        status=Upload.COMPLETE, size=size, offset=size, expires_at=timezone.now() + UPLOAD_EXPIRY,
+    )
+    upload.refresh_from_db()
+    return upload
+
+
+def delete_stored(name):
+    """Delete a direct upload's stored file (best effort)"""
+    try:
+        direct_backend().delete(name)
+    except Exception:
+        logger.exception('Deleting the stored upload %s failed', name)
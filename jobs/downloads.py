@@ -0,0 +1,168 @@
+"""
+SkillConnect - Protected Media Downloads
+Resumes and profile files served to their owner and to staff (HR), at
+/api/jobs/files/<media name> - the path under MEDIA_URL.
+
+Once the request is authorized, the transfer is handed off rather than
+streamed through a worker. PROTECTED_MEDIA_SERVER picks how:
+- 'nginx' - an X-Accel-Redirect to PROTECTED_MEDIA_PREFIX + name, which
+  nginx serves from an internal location:
+      location /protected-media/ { internal; alias /app/media/; }
+- 'sendfile' - an X-Sendfile header with the file's path (Apache
+  mod_xsendfile, lighttpd)
+- '' - a FileResponse: gunicorn sends it with sendfile(), without copying
+  it through Python. Single byte ranges (Range, If-Range) and conditional
+  requests (ETag, If-Modified-Since) are answered here, so resumed and
+  repeated downloads do not resend the file.
+The proxy handles ranges and caching headers itself in the first two modes.
+Files in a storage without local paths (Cloudinary) are redirected to.
+"""
+
+import mimetypes
+import os
+import re
+from urllib.parse import quote
+
+from django.apps import apps
+from django.conf import settings
+from django.core.exceptions import SuspiciousFileOperation
+from django.core.files.storage import default_storage
+from django.http import FileResponse, Http404, HttpResponse, HttpResponseRedirect
+from django.utils.cache import get_conditional_response, patch_cache_control
+from django.utils.http import http_date, parse_http_date_safe
+from django.utils.text import get_valid_filename
+
+# (model, file field, owner lookup) of the files the download view serves
+PROTECTED_FILES = (
+    ('jobs.JobApplication', 'resume', 'user'),
+    ('accounts.CustomUser', 'resume_file', 'pk'),
+    ('accounts.CustomUser', 'profile_picture', 'pk'),
+)
+
+RANGE_RE = re.compile(r'^bytes=(\d*)-(\d*)$')
+
+
+class RangeNotSatisfiable(Exception):
+    pass
+
+
+def can_download(user, name):
+    """Whether user may download a media file: staff any file a record refers to, others their own"""
+    for label, field, owner in PROTECTED_FILES:
+        rows = apps.get_model(label)._default_manager.filter(**{field: name})
+        if not user.is_staff:
+            rows = rows.filter(**{owner: user.pk})
+        if rows.exists():
+            return True
+    return False
+
+
+def parse_range(header, size):
+    """(start, end) - end exclusive - of a single `Range: bytes=...` header, or None to send the whole file.
+
+    Multiple ranges are answered with the whole file, which HTTP allows.
+    """
+    match = RANGE_RE.match((header or '').strip())
+    if not match or match.groups() == ('', ''):
+        return None
+    first, last = match.groups()
+    if not first:
+        # bytes=-N: the last N bytes
+        start, end = max(size - int(last), 0), size
+    elif last and int(last) < int(first):
+        # Malformed: ignored
+        return None
+    else:
+        start, end = int(first), min(int(last) + 1, size) if last else size
+    if start >= end:
+        raise RangeNotSatisfiable
+    return start, end
+
+
+class FileRange:
+    """A window of an open file; fileno() is the file's, positioned at the window, so a server can sendfile() it"""
+
+    def __init__(self, file, start, end):
+        self.file = file
+        self.file.seek(start)
+        self.remaining = end - start
+
+    def read(self, size=-1):
+        if size < 0 or size > self.remaining:
+            size = self.remaining
+        data = self.file.read(size)
+        self.remaining -= len(data)
+        return data
+
+    def fileno(self):
+        return self.file.fileno()
+
+    def close(self):
+        self.file.close()
+
+
+def validators(stat):
+    """(ETag, Last-Modified as a timestamp) of a file, from its size and modification time like nginx's"""
+    return f'"{int(stat.st_mtime):x}-{stat.st_size:x}"', int(stat.st_mtime)
+
+
+def if_range_matches(request, etag, last_modified):
+    """Whether a Range request's If-Range (if any) still names this version of the file"""
+    if_range = request.headers.get('If-Range')
+    if not if_range:
+        return True
+    if if_range.startswith(('"', 'W/')):
+        return if_range == etag
+    return parse_http_date_safe(if_range) == last_modified
+
+
+def serve_file(request, name):
+    """The response sending the media file name - handed to the proxy, redirected to, or a FileResponse"""
+    filename = get_valid_filename(os.path.basename(name))
+    try:
+        path = default_storage.path(name)
+    except NotImplementedError:
+        return HttpResponseRedirect(default_storage.url(name))
+    except SuspiciousFileOperation:
+        raise Http404
+    if not os.path.isfile(path):
+        raise Http404
+
+    server = getattr(settings, 'PROTECTED_MEDIA_SERVER', '')
+    if server in ('nginx', 'sendfile'):
+        response = HttpResponse(content_type=mimetypes.guess_type(filename)[0] or 'application/octet-stream')
+        if server == 'nginx':
+            prefix = getattr(settings, 'PROTECTED_MEDIA_PREFIX', '/protected-media/')
+            response['X-Accel-Redirect'] = prefix.rstrip('/') + '/' + quote(name)
+        else:
+            response['X-Sendfile'] = path
+        response['Content-Disposition'] = f'inline; filename="{filename}"'
+        patch_cache_control(response, private=True, no_cache=True)
+        return response
+
+    stat = os.stat(path)
+    etag, last_modified = validators(stat)
+    response = get_conditional_response(request, etag=etag, last_modified=last_modified)
+    if response is None:
+        try:
+            window = parse_range(request.headers.get('Range'), stat.st_size)
+        except RangeNotSatisfiable:
+            response = HttpResponse(status=416)
+            response['Content-Range'] = f'bytes */{stat.st_size}'
+            return response
+        if window is not None and not if_range_matches(request, etag, last_modified):
+            window = None
+        file = open(path, 'rb')
+        if window is None:
+            response = FileResponse(file, filename=filename)
+        else:
+            start, end = window
+            response = FileResponse(FileRange(file, start, end), filename=filename, status=206)
+            response['Content-Length'] = end - start
+            response['Content-Range'] = f'bytes {start}-{end - 1}/{stat.st_size}'
+    response['Accept-Ranges'] = 'bytes'
+    response['ETag'] = etag
+    response['Last-Modified'] = http_date(last_modified)
+    # Revalidated on every use, so access taken away is taken away from caches too
+    patch_cache_control(response, private=True, no_cache=True)
+    return response
@@ -0,0 +1,37 @@
+"""
+SkillConnect - Job Facet Counts
+Per-value counts for the jobs page sidebar, computed in a single
+conditional-aggregate query over the filtered queryset.
+"""
+from django.db.models import Count, Q
+
+from .models import Job
+
+FACET_FIELDS = ('category', 'job_type', 'experience_level', 'work_mode', 'company_size')
+
+
+def facet_choices(field):
+    return Job._meta.get_field(field).choices
+
+
+def facet_counts(queryset):
+    """Return {'total': n, 'facets': {field: [{value, label, count}, ...]}}"""
+    aliases = {}
+    aggregates = {'total': Count('pk')}
+    for field in FACET_FIELDS:
+        for value, _ in facet_choices(field):
+            # Plain aliases - choice values such as "full-time" are not valid SQL names
+            alias = aliases[field, value] = f'facet_{len(aliases)}'
+            aggregates[alias] = Count('pk', filter=Q(**{field: value}))
+
+    counts = queryset.order_by().aggregate(**aggregates)
+    return {
+        'total': counts['total'],
+        'facets': {
+            field: [
+                {'value': value, 'label': label, 'count': counts[aliases[field, value]]}
+                for value, label in facet_choices(field)
+            ]
+            for field in FACET_FIELDS
+        },
+    }
@@ -0,0 +1,179 @@
+"""
+DRF filter backends for the job listing API
+"""
+from django.db.models.functions import Coalesce
+from rest_framework import filters
+
+from .geo import filter_near, parse_radius, resolve_location
+from .salary import salary_overlap_q
+from .search import search_jobs, tokenize
+from .skills import filter_by_skills, skill_labels
+
+# `keyword` is what the jobs page sends; `search` is DRF's usual name
+SEARCH_PARAMS = ('keyword', 'search')
+
+# Query params understood by filter_jobs()
+FILTER_PARAMS = (
+    'category', 'job_type', 'experience_level', 'work_mode', 'company_size',
+    'min_salary', 'max_salary', 'location', 'near', 'radius_km', 'skills', 'skills_mode',
+)
+
+
+# What ?ordering=-salary sorts on: the annual maximum, else the minimum ("₹30 LPA+")
+SALARY_TOP = Coalesce('annual_salary_max', 'annual_salary_min')
+
+
+# Salary params are clamped to this (₹1,000 crore), so they fit every database's integers
+MAX_AMOUNT = 10 ** 10
+
+
+def parse_amount(value):
+    """Whole rupees from a query param, clamped to 0..MAX_AMOUNT, or None when missing/invalid"""
+    try:
+        return min(max(int(float(value)), 0), MAX_AMOUNT)
+    except (TypeError, ValueError, OverflowError):
+        return None
+
+
+def filter_jobs(queryset, params):
+    """Apply the job list query params (everything except free-text search)"""
+    # Category filtering
+    category = params.get('category')
+    if category and category != '':
+        queryset = queryset.filter(category=category)
+
+    # Job type filtering
+    job_type = params.get('job_type')
+    if job_type:
+        queryset = queryset.filter(job_type=job_type)
+
+    # Experience level filtering
+    experience_level = params.get('experience_level')
+    if experience_level:
+        queryset = queryset.filter(experience_level=experience_level)
+
+    # Work mode filtering
+    work_mode = params.get('work_mode')
+    if work_mode:
+        queryset = queryset.filter(work_mode=work_mode)
+
+    # Company size filtering
+    company_size = params.get('company_size')
+    if company_size:
+        queryset = queryset.filter(company_size=company_size)
+
+    # Salary range (annual rupees): jobs whose annualized range overlaps it
+    min_salary = parse_amount(params.get('min_salary'))
+    max_salary = parse_amount(params.get('max_salary'))
+    if min_salary is not None or max_salary is not None:
+        queryset = queryset.filter(salary_overlap_q(min_salary, max_salary))
+
+    # Location filtering - known cities (and aliases) match the indexed city
+    # column; anything else ("Remote", "India") falls back to a text match
+    location = (params.get('location') or '').strip()
+    if location and location.lower() != 'all':
+        city = resolve_location(location)
+        if city:
+            queryset = queryset.filter(city=city.name)
+        else:
+            queryset = queryset.filter(location__icontains=location)
+
+    # Radius search (?near=pune&radius_km=50, or ?near=18.52,73.85)
+    near = (params.get('near') or '').strip()
+    if near:
+        queryset = filter_near(queryset, near, parse_radius(params.get('radius_km')))
+
+    # Skill filtering (?skills=python,django&skills_mode=all|any)
+    skills = params.get('skills')
+    if skills:
+        queryset = filter_by_skills(queryset, skills, mode=params.get('skills_mode') or 'all')
+
+    return queryset
+
+
+def normalize_filter_params(params):
+    """Canonical, sorted [(param, value)] for a filter set - used in cache keys.
+
+    Empty values and location=all are dropped, places resolve to their
+    gazetteer city (Bangalore and Bengaluru share a key), skills are
+    normalized and sorted, and keyword/search collapse into one
+    order-independent `q` entry.
+    """
+    normalized = {}
+    for param in FILTER_PARAMS:
+        value = (params.get(param) or '').strip()
+        if param in ('location', 'near'):
+            city = resolve_location(value)
+            value = city.name.lower() if city else ' '.join(value.lower().split())
+            if value == 'all' and param == 'location':
+                value = ''
+        elif param == 'radius_km':
+            value = f'{parse_radius(value):g}' if normalized.get('near') else ''
+        elif param == 'skills':
+            value = ','.join(sorted(skill_labels(value)))
+        elif param == 'skills_mode':
+            # Only `any` changes the result, and only when skills are given
+            value = value if value == 'any' and normalized.get('skills') else ''
+        if value:
+            normalized[param] = value
+    for param in SEARCH_PARAMS:
+        value = (params.get(param) or '').strip()
+        if value:
+            terms = tokenize(value)
+            if terms:
+                normalized['q'] = ' '.join(sorted(set(terms)))
+            break
+    return sorted(normalized.items())
+
+
+def get_search_query(request):
+    """Return the free-text query from the request, if any"""
+    for param in SEARCH_PARAMS:
+        value = (request.query_params.get(param) or '').strip()
+        if value:
+            return value
+    return ''
+
+
+class JobSearchFilter(filters.BaseFilterBackend):
+    """Full-text search backed by the job search index"""
+
+    def filter_queryset(self, request, queryset, view):
+        query = get_search_query(request)
+        if not query:
+            return queryset
+        return search_jobs(queryset, query)
+
+
+class JobOrderingFilter(filters.OrderingFilter):
+    """Order search results by relevance unless ?ordering= is given.
+
+    ?ordering=-salary lists the best paid jobs first (by annual maximum, or
+    the minimum of open-ended ranges like "₹30 LPA+"), ?ordering=salary the
+    lowest paid first (by annual minimum).
+    """
+    ordering_aliases = {'salary': 'annual_salary_min', '-salary': '-salary_top'}
+    # Orderable expressions, annotated when used (salary_top has an index, job_active_salary_top_idx)
+    ordering_annotations = {'salary_top': SALARY_TOP}
+
+    def get_ordering(self, request, queryset, view):
+        params = request.query_params.get(self.ordering_param)
+        if params:
+            fields = [self.ordering_aliases.get(term.strip(), term.strip()) for term in params.split(',')]
+            valid = set(self.remove_invalid_fields(queryset, fields, view, request))
+            ordering = [term for term in fields if term in valid or term.lstrip('-') in self.ordering_annotations]
+            if ordering:
+                return ordering
+        return self.get_default_ordering(view)
+
+    def filter_queryset(self, request, queryset, view):
+        explicit = request.query_params.get(self.ordering_param)
+        if not explicit and 'search_rank' in queryset.query.annotations:
+            return queryset.order_by('-search_rank', '-created_at')
+        ordering = self.get_ordering(request, queryset, view)
+        if not ordering:
+            return queryset
+        used = {term.lstrip('-') for term in ordering} & set(self.ordering_annotations)
+        if used:
+            queryset = queryset.annotate(**{name: self.ordering_annotations[name] for name in used})
+        return queryset.order_by(*ordering)
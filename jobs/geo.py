@@ -0,0 +1,155 @@
+"""
+SkillConnect - Job Locations
+Offline city gazetteer (jobs/data/cities.csv) used to resolve Job.location
+to a canonical city with coordinates, and radius search over them.
+
+"Bangalore", "Bengaluru, Karnataka" and "BLR" all resolve to Bengaluru, so
+location filters compare an indexed city column instead of scanning text.
+"""
+
+import csv
+import math
+import re
+from collections import namedtuple
+from functools import lru_cache
+from pathlib import Path
+
+from django.db import transaction
+from django.db.models import F, FloatField, Value
+from django.db.models.functions import ASin, Cos, Power, Radians, Sin, Sqrt
+
+GAZETTEER_PATH = Path(__file__).resolve().parent / 'data' / 'cities.csv'
+
+EARTH_RADIUS_KM = 6371.0
+KM_PER_DEGREE_LAT = 111.045
+DEFAULT_RADIUS_KM = 50
+MAX_RADIUS_KM = 500
+
+City = namedtuple('City', 'name state latitude longitude')
+
+# Location text is split on these before each part is looked up
+PART_SEPARATORS = re.compile(r'[,/|;()&]|\s+-\s+|\bor\b')
+COORDINATES_RE = re.compile(r'^\s*(-?\d+(?:\.\d+)?)\s*,\s*(-?\d+(?:\.\d+)?)\s*$')
+
+
+def place_key(text):
+    """Lookup key for a place name: case-folded letters/digits only"""
+    return ' '.join(re.sub(r'[^a-z0-9]+', ' ', str(text).casefold()).split())
+
+
+@lru_cache(maxsize=1)
+def load_gazetteer():
+    """Return {place key: City} for every city name and alias in the data file"""
+    places = {}
+    with open(GAZETTEER_PATH, newline='', encoding='utf-8') as handle:
+        for row in csv.DictReader(handle):
+            city = City(row['city'], row['state'], float(row['latitude']), float(row['longitude']))
+            for name in [row['city']] + (row['aliases'] or '').split('|'):
+                if name.strip():
+                    places.setdefault(place_key(name), city)
+    return places
+
+
+@lru_cache(maxsize=4096)
+def resolve_location(text):
+    """City for free-text location ("Whitefield, Bangalore, India"), or None.
+
+    The first part that names a known city wins.
+    """
+    places = load_gazetteer()
+    for part in PART_SEPARATORS.split(text or ''):
+        key = place_key(part)
+        if not key:
+            continue
+        city = places.get(key) or places.get(re.sub(r'\s+(?:city|district|urban|rural)$', '', key))
+        if city:
+            return city
+    return None
+
+
+def geocode_job(job):
+    """Set job.city/latitude/longitude from job.location in place (called before save)"""
+    city = resolve_location(job.location)
+    job.city = city.name if city else ''
+    job.latitude = city.latitude if city else None
+    job.longitude = city.longitude if city else None
+
+
+def backfill_locations(queryset):
+    """Re-geocode every job in queryset; one UPDATE per distinct location text.
+
+    Returns the number of rows updated.
+    """
+    updated = 0
+    locations = queryset.order_by().values_list('location', flat=True).distinct()
+    with transaction.atomic(using=queryset.db):
+        for location in list(locations):
+            city = resolve_location(location)
+            updated += queryset.filter(location=location).update(
+                city=city.name if city else '',
+                latitude=city.latitude if city else None,
+                longitude=city.longitude if city else None,
+            )
+    return updated
+
+
+def resolve_point(place):
+    """(latitude, longitude) for a city name or a "lat,lon" string, or None"""
+    match = COORDINATES_RE.match(place or '')
+    if match:
+        latitude, longitude = float(match.group(1)), float(match.group(2))
+        if -90 <= latitude <= 90 and -180 <= longitude <= 180:
+            return latitude, longitude
+        return None
+    city = resolve_location(place)
+    return (city.latitude, city.longitude) if city else None
+
+
+def parse_radius(value):
+    """Radius in km from a query param, clamped to (0, MAX_RADIUS_KM]"""
+    try:
+        radius = float(value)
+    except (TypeError, ValueError):
+        return DEFAULT_RADIUS_KM
+    if not math.isfinite(radius) or radius <= 0:
+        return DEFAULT_RADIUS_KM
+    return min(radius, MAX_RADIUS_KM)
+
+
+def haversine_km(latitude, longitude):
+    """Expression: great-circle distance (km) from the point to each job"""
+    half_dlat = Radians(F('latitude') - Value(latitude)) / 2
+    half_dlon = Radians(F('longitude') - Value(longitude)) / 2
+    a = Power(Sin(half_dlat), 2) + (
+        Value(math.cos(math.radians(latitude))) * Cos(Radians(F('latitude'))) * Power(Sin(half_dlon), 2)
+    )
+    return Value(2 * EARTH_RADIUS_KM) * ASin(Sqrt(a), output_field=FloatField())
+
+
+def distance_km(point, latitude, longitude):
+    """Great-circle distance (km) from point to one location - haversine_km() in Python"""
+    half_dlat = math.radians(latitude - point[0]) / 2
+    half_dlon = math.radians(longitude - point[1]) / 2
+    a = math.sin(half_dlat) ** 2 + (
+        math.cos(math.radians(point[0])) * math.cos(math.radians(latitude)) * math.sin(half_dlon) ** 2
+    )
+    return 2 * EARTH_RADIUS_KM * math.asin(math.sqrt(min(a, 1.0)))
+
+
+def filter_near(queryset, place, radius_km=DEFAULT_RADIUS_KM):
+    """Jobs within radius_km of place.
+
+    A bounding box on the indexed latitude/longitude columns narrows the rows
+    first; the exact haversine distance is only computed for those.
+    Unknown places match nothing.
+    """
+    point = resolve_point(place)
+    if point is None:
+        return queryset.none()
+    latitude, longitude = point
+    dlat = radius_km / KM_PER_DEGREE_LAT
+    dlon = radius_km / (KM_PER_DEGREE_LAT * max(math.cos(math.radians(latitude)), 0.01))
+    return queryset.filter(
+        latitude__range=(latitude - dlat, latitude + dlat),
+        longitude__range=(longitude - dlon, longitude + dlon),
+    ).alias(distance_km=haversine_km(latitude, longitude)).filter(distance_km__lte=radius_km)
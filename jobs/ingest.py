@@ -0,0 +1,366 @@
+"""
+SkillConnect - Bulk Job Ingest
+Streaming import of partner job feeds (CSV, JSONL or XML) with upsert on
+(source, external_id).
+
+Rows are read one at a time, validated in batches with the model's own field
+validation, and each batch is written with a single
+bulk_create(update_conflicts=True) - INSERT ... ON CONFLICT DO UPDATE (ON
+DUPLICATE KEY UPDATE on MySQL). bulk_create skips the Job signals, so each
+batch refreshes the search and skill indexes for its rows itself (and queues
+saved search alerts for the jobs it created), and the stats rollup and jobs
+version are updated once the feed is done.
+
+Records that near-duplicate a stored job (or an earlier record of the same
+batch) are matched by MinHash fingerprint (jobs/dedup.py) and, depending on
+the duplicates policy, flagged - stored inactive with duplicate_of set -
+or merged into the original by dropping them.
+
+Used by `manage.py ingest_jobs` and POST /api/jobs/ingest/.
+"""
+
+import codecs
+import csv
+import io
+import json
+import time
+import xml.etree.ElementTree as ET
+from itertools import islice
+
+from django.core.exceptions import ValidationError
+from django.db import DatabaseError, connections, transaction
+
+from . import search
+from .alerts import queue_job_alerts
+from .cache import bump_jobs_version
+from .dedup import BAND_FIELDS, DUPLICATE_POLICIES, BandIndex, fingerprint_job, stored_originals
+from .geo import geocode_job
+from .salary import normalize_job_salary
+from .skills import link_job_skills
+from .stats import rebuild_job_stats
+
+FORMATS = ('csv', 'jsonl', 'xml')
+DEFAULT_BATCH_SIZE = 1000
+READ_CHUNK_SIZE = 64 * 1024
+
+# Feed columns -> Job fields; external_id is required, the rest as on the model
+INGEST_FIELDS = (
+    'title', 'company', 'location', 'category', 'job_type', 'experience_level', 'work_mode',
+    'min_salary', 'max_salary', 'salary_display', 'description', 'requirements', 'skills',
+    'company_logo', 'company_size', 'is_active', 'created_at', 'expires_at',
+)
+
+# Derived on ingest, like the pre_save signals do on save()
+DERIVED_FIELDS = ('annual_salary_min', 'annual_salary_max', 'city', 'latitude', 'longitude', 'fingerprint') + BAND_FIELDS
+
+# Written on conflict - created_at keeps the first-seen value; re-sending an
+# expired job clears expired_at along with reopening it
+UPDATE_FIELDS = (
+    [field for field in INGEST_FIELDS if field != 'created_at'] + list(DERIVED_FIELDS)
+    + ['duplicate_of', 'expired_at', 'updated_at']
+)
+
+# Keep a few errors per batch in the report; the count covers all of them
+MAX_ERRORS_PER_BATCH = 20
+
+
+class FeedError(ValueError):
+    """The feed itself cannot be read (bad format, malformed XML, ...)"""
+
+
+def detect_format(name='', content_type=''):
+    """Feed format from a file name or content type, or None"""
+    name = (name or '').lower()
+    content_type = (content_type or '').lower()
+    if name.endswith('.csv') or 'csv' in content_type:
+        return 'csv'
+    if name.endswith(('.jsonl', '.ndjson')) or 'ndjson' in content_type or 'jsonl' in content_type:
+        return 'jsonl'
+    if name.endswith('.xml') or 'xml' in content_type:
+        return 'xml'
+    return None
+
+
+def text_stream(stream):
+    """Text view of a binary or text stream (UTF-8, BOM tolerated)"""
+    if isinstance(stream, io.TextIOBase):
+        return stream
+    return codecs.getreader('utf-8-sig')(stream)
+
+
+def read_csv(stream):
+    yield from csv.DictReader(text_stream(stream))
+
+
+def read_jsonl(stream):
+    for number, line in enumerate(text_stream(stream), 1):
+        if not line.strip():
+            continue
+        try:
+            record = json.loads(line)
+        except ValueError as exc:
+            raise FeedError(f'Line {number}: invalid JSON ({exc})')
+        if not isinstance(record, dict):
+            raise FeedError(f'Line {number}: expected a JSON object')
+        yield record
+
+
+def read_xml(stream):
+    """<jobs><job><title>..</title><skills><skill>..</skill></skills></job>...</jobs>
+
+    DTDs are refused, which rules out entity expansion attacks.
+    """
+    parser = ET.XMLPullParser(events=('start', 'end'))
+    tail = b''
+    depth = 0
+    root = None
+    while True:
+        chunk = stream.read(READ_CHUNK_SIZE)
+        if not chunk:
+            break
+        if isinstance(chunk, str):
+            chunk = chunk.encode('utf-8')
+        if b'<!DOCTYPE' in tail + chunk:
+            raise FeedError('XML feeds must not contain a DOCTYPE')
+        tail = chunk[-8:]
+        try:
+            parser.feed(chunk)
+            events = list(parser.read_events())
+        except ET.ParseError as exc:
+            raise FeedError(f'Malformed XML: {exc}')
+        for event, element in events:
+            if event == 'start':
+                depth += 1
+                if root is None:
+                    root = element
+                continue
+            depth -= 1
+            if depth == 1:  # a direct child of the root element
+                yield {
+                    child.tag: [item.text or '' for item in child] if len(child) else (child.text or '').strip()
+                    for child in element
+                }
+                root.clear()  # drop the finished record
+    try:
+        parser.close()
+    except ET.ParseError as exc:
+        raise FeedError(f'Malformed XML: {exc}')
+
+
+READERS = {'csv': read_csv, 'jsonl': read_jsonl, 'xml': read_xml}
+
+
+def read_feed(stream, feed_format):
+    """Iterate the records (dicts) of a feed"""
+    if feed_format not in READERS:
+        raise FeedError(f"Unknown format {feed_format!r}; expected one of {', '.join(FORMATS)}")
+    return READERS[feed_format](stream)
+
+
+def build_job(record, source):
+    """Unsaved, validated Job for one feed record; raises ValidationError"""
+    from .models import Job
+
+    external_id = str(record.get('external_id') or '').strip()
+    if not external_id:
+        raise ValidationError({'external_id': ['This field is required.']})
+    job = Job(source=source, external_id=external_id)
+    for name in INGEST_FIELDS:
+        if name not in record or record[name] is None:
+            continue
+        value = record[name]
+        field = Job._meta.get_field(name)
+        if isinstance(value, str):
+            value = value.strip()
+            if name == 'skills':
+                value = [skill.strip() for skill in value.replace('|', ',').split(',') if skill.strip()]
+            elif value == '' and (field.null or field.has_default()):
+                value = None if field.null else field.get_default()
+        setattr(job, name, value)
+    job.clean_fields(exclude=['source', 'external_id'])
+    if not isinstance(job.skills, list):
+        raise ValidationError({'skills': ['Expected a list or a comma-separated string.']})
+    normalize_job_salary(job)
+    geocode_job(job)
+    fingerprint_job(job)
+    return job
+
+
+def error_messages(exc):
+    if hasattr(exc, 'message_dict'):
+        return '; '.join(f"{field}: {' '.join(messages)}" for field, messages in exc.message_dict.items())
+    return ' '.join(exc.messages)
+
+
+class IngestReport:
+    """Counts, throughput and per-batch errors for one ingest run"""
+
+    def __init__(self):
+        self.rows = self.created = self.updated = self.invalid = self.failed = 0
+        self.flagged = self.merged = 0
+        self.batches = 0
+        self.errors = []
+        self.feed_error = None
+        self.started = time.perf_counter()
+        self.elapsed = 0.0
+
+    @property
+    def rows_per_second(self):
+        return self.rows / self.elapsed if self.elapsed else 0.0
+
+    def as_dict(self):
+        return {
+            'rows': self.rows,
+            'created': self.created,
+            'updated': self.updated,
+            'invalid': self.invalid,
+            'failed': self.failed,
+            'flagged': self.flagged,
+            'merged': self.merged,
+            'batches': self.batches,
+            'seconds': round(self.elapsed, 3),
+            'rows_per_second': round(self.rows_per_second, 1),
+            'errors': self.errors,
+            'feed_error': self.feed_error,
+        }
+
+
+def upsert_batch(jobs, using='default'):
+    """Write one batch; returns (created, updated)"""
+    from .models import Job
+
+    if not jobs:
+        return 0, 0
+    manager = Job.objects.using(using)
+    keys = [job.external_id for job in jobs]
+    source = jobs[0].source
+    existing = set(manager.filter(source=source, external_id__in=keys).values_list('external_id', flat=True))
+    conflict_target = {}
+    if connections[using].features.supports_update_conflicts_with_target:
+        conflict_target['unique_fields'] = ['source', 'external_id']
+    with transaction.atomic(using=using):
+        manager.bulk_create(jobs, update_conflicts=True, update_fields=UPDATE_FIELDS, **conflict_target)
+        # Conflict updates don't report primary keys back; look them up once
+        ids = dict(manager.filter(source=source, external_id__in=keys).values_list('external_id', 'id'))
+        for job in jobs:
+            job.pk = ids[job.external_id]
+        search.index_jobs(jobs, using)
+        link_job_skills([(job.pk, job.skills) for job in jobs], using)
+        queue_job_alerts([job for job in jobs if job.external_id not in existing], using)
+    return len(jobs) - len(existing), len(existing)
+
+
+def find_duplicates(jobs, using='default'):
+    """{external_id: original} for the near-duplicates in a batch of built jobs.
+
+    original is the pk of an active, unflagged stored job, or an earlier job
+    of the batch. A job never matches its own stored row.
+    """
+    from .models import Job
+
+    stored = stored_originals(Job.objects.using(using), [job.fingerprint for job in jobs])
+    batch = BandIndex()
+    originals = {}
+    for job in jobs:
+        if job.fingerprint is None:
+            continue
+        own_key = (job.source, job.external_id)
+        match = stored.nearest(job.fingerprint, skip=lambda item: item[1:] == own_key)
+        if match is not None:
+            originals[job.external_id] = match[0]
+            continue
+        match = batch.nearest(job.fingerprint)
+        if match is not None:
+            originals[job.external_id] = match
+        else:
+            batch.add(job.fingerprint, job)
+    return originals
+
+
+def write_batch(jobs, duplicates='flag', using='default'):
+    """Upsert a batch of built jobs under a duplicates policy.
+
+    flag stores near-duplicates inactive with duplicate_of set; merge drops
+    them (a stored row with the same key is left as it is); off stores
+    everything. Returns (created, updated, flagged, merged).
+    """
+    originals = find_duplicates(jobs, using) if duplicates != 'off' else {}
+    if duplicates == 'merge':
+        return (*upsert_batch([job for job in jobs if job.external_id not in originals], using), 0, len(originals))
+    for job in jobs:
+        if isinstance(originals.get(job.external_id), int):
+            job.duplicate_of_id = originals[job.external_id]
+            job.is_active = False
+    # Duplicates of jobs from this batch go second, once their originals have ids
+    later = {job.external_id: job for job in jobs if job.external_id in originals and job.duplicate_of_id is None}
+    with transaction.atomic(using=using):
+        created, updated = upsert_batch([job for job in jobs if job.external_id not in later], using)
+        for key, job in later.items():
+            job.duplicate_of_id = originals[key].pk
+            job.is_active = False
+        later_created, later_updated = upsert_batch(list(later.values()), using)
+    return created + later_created, updated + later_updated, len(originals), 0
+
+
+def ingest(records, source, batch_size=DEFAULT_BATCH_SIZE, using='default', progress=None, duplicates='flag'):
+    """Validate and upsert feed records in batches; returns an IngestReport.
+
+    A record replaces the stored job with the same (source, external_id);
+    fields it leaves out fall back to the model defaults. Invalid rows are
+    skipped and reported; a batch the database rejects is rolled back and
+    reported (as failed) without stopping the run. An unreadable feed
+    (FeedError) stops it; the batches before are kept and report.feed_error
+    says what went wrong. progress, if given, is called with the report after every batch.
+    duplicates is the near-duplicate policy, see write_batch().
+    """
+    if duplicates not in DUPLICATE_POLICIES:
+        raise ValueError(f"duplicates must be one of {', '.join(DUPLICATE_POLICIES)}")
+    report = IngestReport()
+    numbered = enumerate(records, 1)
+    try:
+        while True:
+            chunk = list(islice(numbered, batch_size))
+            if not chunk:
+                break
+            report.batches += 1
+            report.rows += len(chunk)
+            batch_errors = []
+            jobs = {}
+            for row, record in chunk:
+                try:
+                    job = build_job(record, source)
+                except ValidationError as exc:
+                    report.invalid += 1
+                    batch_errors.append({'row': row, 'external_id': record.get('external_id'), 'error': error_messages(exc)})
+                    continue
+                # ON CONFLICT cannot touch one row twice per statement - the last record wins
+                jobs[job.external_id] = job
+            if jobs:
+                try:
+                    created, updated, flagged, merged = write_batch(list(jobs.values()), duplicates, using)
+                    report.created += created
+                    report.updated += updated
+                    report.flagged += flagged
+                    report.merged += merged
+                    bump_jobs_version()
+                except DatabaseError as exc:
+                    report.failed += len(jobs)
+                    batch_errors.append({'row': chunk[0][0], 'external_id': None, 'error': f'Batch failed: {exc}'})
+            if batch_errors:
+                report.errors.append({
+                    'batch': report.batches,
+                    'rows': [chunk[0][0], chunk[-1][0]],
+                    'error_count': len(batch_errors),
+                    'errors': batch_errors[:MAX_ERRORS_PER_BATCH],
+                })
+            report.elapsed = time.perf_counter() - report.started
+            if progress:
+                progress(report)
+    except FeedError as exc:
+        report.feed_error = str(exc)
+    finally:
+        if report.created or report.updated:
+            rebuild_job_stats(using)
+            bump_jobs_version()
+        report.elapsed = time.perf_counter() - report.started
+    return report
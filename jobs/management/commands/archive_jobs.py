@@ -0,0 +1,22 @@
+import time
+
+from django.core.management.base import BaseCommand
+
+from jobs.archive import DEFAULT_BATCH_SIZE, close_expired_jobs
+
+
+class Command(BaseCommand):
+    help = 'Close expired jobs and move long-expired jobs without applications to the archive table (run_worker runs it daily)'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--batch-size', type=int, default=DEFAULT_BATCH_SIZE)
+        parser.add_argument('--database', default='default')
+        parser.add_argument('--expire-only', action='store_true', help='Close expired jobs without archiving')
+
+    def handle(self, *args, **options):
+        started = time.perf_counter()
+        closed, archived = close_expired_jobs(options['database'], options['batch_size'], options['expire_only'])
+        elapsed = time.perf_counter() - started
+        self.stdout.write(self.style.SUCCESS(
+            f'Closed {closed} expired jobs and archived {archived} in {elapsed:.1f}s.'
+        ))
@@ -0,0 +1,45 @@
+import random
+
+from django.core.management.base import BaseCommand, CommandError
+from django.test.utils import setup_databases, teardown_databases
+
+from jobs.benchmarks import SUITES, seed_jobs
+from jobs.models import Job
+
+
+class Command(BaseCommand):
+    help = 'Run job API benchmarks against a throwaway test database'
+
+    def add_arguments(self, parser):
+        parser.add_argument('suite', choices=sorted(SUITES))
+        parser.add_argument('--sizes', type=int, nargs='+', default=[10000, 100000, 1000000])
+        parser.add_argument('--repeat', type=int, default=200)
+        parser.add_argument('--seed', type=int, default=42)
+
+    def handle(self, *args, **options):
+        sizes = sorted(options['sizes'])
+        if not sizes or sizes[0] <= 0:
+            raise CommandError('--sizes must be positive')
+
+        rng = random.Random(options['seed'])
+        bench = SUITES[options['suite']]
+        old_config = setup_databases(verbosity=0, interactive=False)
+        try:
+            for size in sizes:
+                current = Job.objects.count()
+                if size > current:
+                    self.stdout.write(f'Seeding {size - current} jobs...')
+                    seed_jobs(size - current, rng)
+                results = bench(size, options['repeat'], rng)
+                self.stdout.write(self.style.MIGRATE_HEADING(f'\n{options["suite"]} @ {size} jobs'))
+                for name, stats in results.items():
+                    if isinstance(stats, dict):
+                        line = '  '.join(
+                            f'{key}={value:.1f}/s' if key == 'rps' else f'{key}={value:.3f}ms'
+                            for key, value in stats.items()
+                        )
+                    else:
+                        line = str(stats)
+                    self.stdout.write(f'  {name:<24} {line}')
+        finally:
+            teardown_databases(old_config, verbosity=0)
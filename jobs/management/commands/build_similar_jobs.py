@@ -0,0 +1,24 @@
+import time
+
+from django.core.management.base import BaseCommand
+
+from jobs.similar import DEFAULT_BATCH_SIZE, refresh_similar_jobs
+
+
+class Command(BaseCommand):
+    help = 'Refresh the precomputed similar-jobs lists for jobs changed since the last run (run_worker runs it every few minutes)'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--batch-size', type=int, default=DEFAULT_BATCH_SIZE)
+        parser.add_argument('--database', default='default')
+        parser.add_argument('--full', action='store_true', help='Re-sign every active job and recompute every list')
+
+    def handle(self, *args, **options):
+        started = time.perf_counter()
+        signed, refreshed = refresh_similar_jobs(
+            options['database'], full=options['full'], batch_size=options['batch_size'],
+        )
+        elapsed = time.perf_counter() - started
+        self.stdout.write(self.style.SUCCESS(
+            f'Signed {signed} jobs and refreshed {refreshed} similar-job lists in {elapsed:.1f}s.'
+        ))
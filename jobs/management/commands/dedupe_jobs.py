@@ -0,0 +1,33 @@
+import time
+
+from django.core.management.base import BaseCommand
+
+from jobs.cache import bump_jobs_version
+from jobs.dedup import backfill_fingerprints, flag_duplicates
+from jobs.models import Job
+from jobs.stats import rebuild_job_stats
+
+
+class Command(BaseCommand):
+    help = 'Recompute near-duplicate fingerprints and flag active jobs that duplicate an earlier posting'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--batch-size', type=int, default=2000)
+        parser.add_argument('--database', default='default')
+        parser.add_argument('--fingerprints-only', action='store_true', help='Recompute fingerprints without flagging')
+
+    def handle(self, *args, **options):
+        using = options['database']
+        queryset = Job.objects.using(using).all()
+        started = time.perf_counter()
+        updated = backfill_fingerprints(queryset, batch_size=options['batch_size'])
+        flagged = 0 if options['fingerprints_only'] else flag_duplicates(queryset)
+        if flagged:
+            # queryset.update() skips the Job signals
+            rebuild_job_stats(using)
+        if updated or flagged:
+            bump_jobs_version()
+        elapsed = time.perf_counter() - started
+        self.stdout.write(self.style.SUCCESS(
+            f'Updated {updated} fingerprints and flagged {flagged} near-duplicates in {elapsed:.1f}s.'
+        ))
@@ -0,0 +1,21 @@
+from django.core.management.base import BaseCommand
+
+from jobs.cache import bump_jobs_version
+from jobs.geo import backfill_locations, load_gazetteer
+from jobs.models import Job
+
+
+class Command(BaseCommand):
+    help = 'Re-resolve every job location against the city gazetteer (run after editing jobs/data/cities.csv)'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--database', default='default')
+
+    def handle(self, *args, **options):
+        queryset = Job.objects.using(options['database']).all()
+        updated = backfill_locations(queryset)
+        bump_jobs_version()
+        unresolved = queryset.filter(city='').count()
+        self.stdout.write(self.style.SUCCESS(
+            f'Geocoded {updated} jobs against {len(load_gazetteer())} place names; {unresolved} without a known city.'
+        ))
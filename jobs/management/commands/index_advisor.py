@@ -0,0 +1,123 @@
+from django.conf import settings
+from django.core.management.base import BaseCommand
+from django.db import connections
+from django.test.utils import override_settings
+from rest_framework.test import APIClient
+
+from core.performance import DatabaseIndexOptimizer
+from jobs.models import Job, JobApplication
+
+# Read-only requests that make up most job traffic
+HOT_ENDPOINTS = [
+    '/api/jobs/',
+    '/api/jobs/?category=it',
+    '/api/jobs/?job_type=full-time',
+    '/api/jobs/?work_mode=remote',
+    '/api/jobs/?category=it&work_mode=remote',
+    '/api/jobs/?keyword=python',
+    '/api/jobs/?location=pune',
+    '/api/jobs/?ordering=-salary',
+    '/api/jobs/?min_salary=800000&max_salary=1500000',
+    '/api/jobs/facets/',
+    '/api/jobs/categories/',
+    '/api/jobs/stats/',
+    '/api/jobs/{job_id}/',
+    '/api/jobs/applications/',
+]
+
+
+class QueryRecorder:
+    """execute_wrapper that keeps (sql, params) so queries can be re-EXPLAINed"""
+
+    def __init__(self):
+        self.queries = []
+
+    def __call__(self, execute, sql, params, many, context):
+        if not many and sql.lstrip().upper().startswith('SELECT'):
+            self.queries.append((sql, params))
+        return execute(sql, params, many, context)
+
+
+class Command(BaseCommand):
+    help = 'EXPLAIN the queries behind the hot job endpoints and report full scans and missing indexes'
+
+    def add_arguments(self, parser):
+        parser.add_argument('paths', nargs='*', help='Extra GET paths to analyse')
+        parser.add_argument('--database', default='default')
+        parser.add_argument('--verbose-plans', action='store_true', help='Print every plan, not just problems')
+
+    def handle(self, *args, **options):
+        using = options['database']
+        connection = connections[using]
+        self.vendor = connection.vendor
+        self.using = using
+        self.verbose_plans = options['verbose_plans']
+        self.tables = set(connection.introspection.table_names())
+
+        job = Job.objects.using(using).filter(is_active=True).only('id').first()
+        application = JobApplication.objects.using(using).filter(user__isnull=False).only('user', 'job', 'email').first()
+        client = APIClient()
+        if application:
+            client.force_authenticate(application.user)
+
+        captured = []
+        cache_table = settings.CACHES['default'].get('LOCATION', '')
+        # Bypass the response cache and the in-memory catalog so every endpoint runs its real queries,
+        # and leave view counts alone
+        with override_settings(
+            JOB_CACHE_TIMEOUT=0, JOB_CATALOG_ENABLED=False, JOB_EVENTS_ENABLED=False, ALLOWED_HOSTS=['*'],
+        ):
+            for path in HOT_ENDPOINTS + options['paths']:
+                if '{job_id}' in path:
+                    if job is None:
+                        continue
+                    path = path.format(job_id=job.id)
+                if path.startswith('/api/jobs/applications/') and application is None:
+                    continue
+                recorder = QueryRecorder()
+                with connection.execute_wrapper(recorder):
+                    client.get(path)
+                captured.extend(
+                    (path, sql, params) for sql, params in recorder.queries
+                    if not cache_table or cache_table not in sql
+                )
+
+        # apply_to_job's duplicate check is a POST, so EXPLAIN its query directly
+        if application:
+            duplicate_check = JobApplication.objects.using(using).filter(
+                job_id=application.job_id, email=application.email
+            ).order_by().values('id')[:1]
+            captured.append(('POST /api/jobs/<id>/apply/ (duplicate check)', *duplicate_check.query.sql_with_params()))
+
+        problems = 0
+        for path, sql, params in captured:
+            problems += self.report(path, sql, params)
+
+        self.stdout.write('')
+        if problems:
+            self.stdout.write(self.style.WARNING(
+                f'{problems} of {len(captured)} queries need attention ({self.vendor}). '
+                'Small tables are often scanned on purpose - run this against production-sized data.'
+            ))
+        else:
+            self.stdout.write(self.style.SUCCESS(f'All {len(captured)} queries use indexes ({self.vendor})'))
+
+    def report(self, path, sql, params):
+        """Print findings for one query; return 1 if it has a problem"""
+        plan = DatabaseIndexOptimizer.explain(sql, params, using=self.using)
+        scans, needs_sort = DatabaseIndexOptimizer.analyze_plan(plan, self.vendor)
+        scans = [table for table in scans if table in self.tables]  # not subqueries/CTEs
+        if not (scans or needs_sort or self.verbose_plans):
+            return 0
+
+        self.stdout.write(self.style.MIGRATE_HEADING(f'\n{path}'))
+        self.stdout.write(f'  {sql[:200]}{"..." if len(sql) > 200 else ""}')
+        for line in plan:
+            self.stdout.write(f'    {line}')
+        for table in scans:
+            columns = DatabaseIndexOptimizer.suggest_columns(sql, table)
+            hint = f' - consider an index on ({", ".join(columns)})' if columns else ''
+            self.stdout.write(self.style.WARNING(f'  full scan on {table}{hint}'))
+        if needs_sort:
+            self.stdout.write(self.style.WARNING('  sorted without an index (filesort / temp b-tree)'))
+        return int(bool(scans or needs_sort))
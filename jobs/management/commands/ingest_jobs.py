@@ -0,0 +1,55 @@
+import sys
+
+from django.core.management.base import BaseCommand, CommandError
+
+from jobs.dedup import DUPLICATE_POLICIES
+from jobs.ingest import DEFAULT_BATCH_SIZE, FORMATS, detect_format, ingest, read_feed
+
+
+class Command(BaseCommand):
+    help = 'Stream a CSV/JSONL/XML job feed into the jobs table, upserting on (source, external_id)'
+
+    def add_arguments(self, parser):
+        parser.add_argument('path', help="Feed file, or - for stdin")
+        parser.add_argument('--source', required=True, help="Feed name, e.g. partner-x")
+        parser.add_argument('--format', choices=FORMATS, help="Default: from the file extension")
+        parser.add_argument('--batch-size', type=int, default=DEFAULT_BATCH_SIZE)
+        parser.add_argument(
+            '--duplicates', choices=DUPLICATE_POLICIES, default='flag',
+            help="Near-duplicates of stored jobs: store them inactive (flag), drop them (merge) or ignore (off)",
+        )
+        parser.add_argument('--database', default='default')
+
+    def handle(self, *args, **options):
+        feed_format = options['format'] or detect_format(options['path'])
+        if not feed_format:
+            raise CommandError('Cannot tell the feed format from the file name; pass --format.')
+        if options['batch_size'] < 1:
+            raise CommandError('--batch-size must be positive')
+
+        def progress(report):
+            if options['verbosity'] > 1:
+                self.stdout.write(f'  batch {report.batches}: {report.rows} rows, {report.rows_per_second:.0f} rows/s')
+
+        stream = sys.stdin.buffer if options['path'] == '-' else open(options['path'], 'rb')
+        try:
+            report = ingest(
+                read_feed(stream, feed_format), options['source'][:50],
+                batch_size=options['batch_size'], using=options['database'], progress=progress,
+                duplicates=options['duplicates'],
+            )
+        finally:
+            if stream is not sys.stdin.buffer:
+                stream.close()
+
+        for batch in report.errors:
+            self.stderr.write(f"Batch {batch['batch']} (rows {batch['rows'][0]}-{batch['rows'][1]}): {batch['error_count']} errors")
+            for error in batch['errors']:
+                self.stderr.write(f"  row {error['row']} [{error['external_id']}]: {error['error']}")
+        self.stdout.write(self.style.SUCCESS(
+            f'{report.rows} rows in {report.elapsed:.1f}s ({report.rows_per_second:.0f} rows/s): '
+            f'{report.created} created, {report.updated} updated, {report.invalid} invalid, {report.failed} failed; '
+            f'{report.flagged} flagged and {report.merged} merged as near-duplicates.'
+        ))
+        if report.feed_error:
+            raise CommandError(f'Stopped at an unreadable part of the feed: {report.feed_error}')
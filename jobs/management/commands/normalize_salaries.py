@@ -0,0 +1,31 @@
+import time
+
+from django.core.management.base import BaseCommand
+
+from jobs.models import Job
+from jobs.salary import backfill_salaries, parse_salary
+
+
+class Command(BaseCommand):
+    help = 'Recompute the annualized salary columns from salary_display in batches'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--batch-size', type=int, default=5000)
+        parser.add_argument('--database', default='default')
+        parser.add_argument('--missing-only', action='store_true',
+                            help='Only jobs with no annual salary yet')
+
+    def handle(self, *args, **options):
+        queryset = Job.objects.using(options['database']).all()
+        if options['missing_only']:
+            queryset = queryset.filter(annual_salary_min__isnull=True, annual_salary_max__isnull=True)
+
+        started = time.perf_counter()
+        scanned, updated = backfill_salaries(queryset, batch_size=options['batch_size'])
+        elapsed = time.perf_counter() - started
+
+        rate = scanned / elapsed if elapsed else 0
+        self.stdout.write(self.style.SUCCESS(
+            f'Scanned {scanned} jobs, updated {updated} in {elapsed:.1f}s ({rate:.0f} rows/s, '
+            f'{parse_salary.cache_info().currsize} distinct salary strings).'
+        ))
@@ -0,0 +1,15 @@
+import time
+
+from django.core.management.base import BaseCommand
+
+from jobs.applications import purge_idempotency_keys
+
+
+class Command(BaseCommand):
+    help = 'Delete application Idempotency-Key records past their TTL (run_worker runs it hourly)'
+
+    def handle(self, *args, **options):
+        started = time.perf_counter()
+        count = purge_idempotency_keys()
+        elapsed = time.perf_counter() - started
+        self.stdout.write(self.style.SUCCESS(f"Deleted {count} expired idempotency keys in {elapsed:.2f}s."))
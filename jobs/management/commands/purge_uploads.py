@@ -0,0 +1,15 @@
+import time
+
+from django.core.management.base import BaseCommand
+
+from jobs.uploads import purge_uploads
+
+
+class Command(BaseCommand):
+    help = 'Delete expired resumable uploads and their temporary files (run_worker runs it daily)'
+
+    def handle(self, *args, **options):
+        started = time.perf_counter()
+        count = purge_uploads()
+        elapsed = time.perf_counter() - started
+        self.stdout.write(self.style.SUCCESS(f"Deleted {count} expired uploads in {elapsed:.2f}s."))
@@ -0,0 +1,21 @@
+from django.core.management.base import BaseCommand
+
+from jobs.models import Job
+from jobs import search
+
+
+class Command(BaseCommand):
+    help = 'Rebuild the job search inverted index (not needed on PostgreSQL)'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--batch-size', type=int, default=500)
+        parser.add_argument('--database', default='default')
+
+    def handle(self, *args, **options):
+        using = options['database']
+        if search.uses_native_fulltext(using):
+            self.stdout.write('PostgreSQL detected - the native GIN index is maintained by the database.')
+            return
+
+        count = search.rebuild_index(Job.objects.using(using).all(), batch_size=options['batch_size'])
+        self.stdout.write(self.style.SUCCESS(f'Indexed {count} jobs.'))
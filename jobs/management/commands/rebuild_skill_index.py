@@ -0,0 +1,17 @@
+from django.core.management.base import BaseCommand
+
+from jobs.models import Job
+from jobs.skills import rebuild_skill_index
+
+
+class Command(BaseCommand):
+    help = 'Rebuild the normalized skill tags and job-skill links from Job.skills'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--batch-size', type=int, default=500)
+        parser.add_argument('--database', default='default')
+
+    def handle(self, *args, **options):
+        using = options['database']
+        count = rebuild_skill_index(Job.objects.using(using).all(), batch_size=options['batch_size'])
+        self.stdout.write(self.style.SUCCESS(f'Indexed skills for {count} jobs.'))
@@ -0,0 +1,23 @@
+import time
+
+from django.core.management.base import BaseCommand
+
+from jobs.stats import get_job_stats, rebuild_job_stats
+
+
+class Command(BaseCommand):
+    help = 'Rebuild the job stats rollup from the jobs table (after bulk imports or queryset.update())'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--database', default='default')
+
+    def handle(self, *args, **options):
+        using = options['database']
+        started = time.perf_counter()
+        drifted = rebuild_job_stats(using)
+        elapsed = time.perf_counter() - started
+        stats = get_job_stats(using)
+        self.stdout.write(self.style.SUCCESS(
+            f"{stats['total_jobs']} open jobs, {stats['categories']} categories, {stats['companies']} companies; "
+            f"fixed {drifted} drifted counters in {elapsed:.2f}s."
+        ))
@@ -0,0 +1,28 @@
+import signal
+
+from django.core.management.base import BaseCommand
+
+from jobs.tasks import DEFAULT_BATCH_SIZE, DEFAULT_LEASE_SECONDS, DEFAULT_POLL_SECONDS, Worker
+
+
+class Command(BaseCommand):
+    help = 'Run queued and periodic background tasks (emails, alerts, trending jobs etc.) until stopped; SIGTERM/SIGINT finish the current batch first'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--batch-size', type=int, default=DEFAULT_BATCH_SIZE, help='Tasks claimed at a time')
+        parser.add_argument('--lease', type=int, default=DEFAULT_LEASE_SECONDS,
+                            help='Seconds before a claimed task counts as abandoned and is run again')
+        parser.add_argument('--poll', type=float, default=DEFAULT_POLL_SECONDS, help='Seconds between polls when idle')
+        parser.add_argument('--once', action='store_true', help='Run the ready tasks, then exit (for cron)')
+        parser.add_argument('--database', default='default')
+
+    def handle(self, *args, **options):
+        worker = Worker(options['batch_size'], options['lease'], options['poll'], options['database'])
+        handlers = {signum: signal.signal(signum, lambda *_: worker.stop()) for signum in (signal.SIGTERM, signal.SIGINT)}
+        self.stdout.write(f'Worker {worker.name} started.')
+        try:
+            worker.run(once=options['once'])
+        finally:
+            for signum, handler in handlers.items():
+                signal.signal(signum, handler)
+        self.stdout.write(self.style.SUCCESS(f'Worker {worker.name} stopped.'))
@@ -0,0 +1,18 @@
+import time
+
+from django.core.management.base import BaseCommand
+
+from jobs.popularity import refresh_trending
+
+
+class Command(BaseCommand):
+    help = 'Recompute the trending jobs table from decayed view/apply scores (run_worker runs it every few minutes)'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--database', default='default')
+
+    def handle(self, *args, **options):
+        started = time.perf_counter()
+        count = refresh_trending(options['database'])
+        elapsed = time.perf_counter() - started
+        self.stdout.write(self.style.SUCCESS(f"Ranked {count} trending jobs in {elapsed:.2f}s."))
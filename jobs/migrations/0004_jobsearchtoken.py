@@ -0,0 +1,100 @@
+# Generated by Django 4.2.26 on 2026-10-18 18:44
+
+import re
+from collections import defaultdict
+
+from django.db import migrations, models
+import django.db.models.deletion
+
+# Frozen copy of jobs/search.py's index definition and term builder as of this migration
+PG_SEARCH_VECTOR_SQL = (
+    "(setweight(to_tsvector('english', coalesce(\"jobs_job\".\"title\", '')), 'A') || "
+    "setweight(to_tsvector('english', coalesce(\"jobs_job\".\"company\", '')), 'A') || "
+    "setweight(to_tsvector('english', coalesce(\"jobs_job\".\"skills\"::text, '')), 'B') || "
+    "setweight(to_tsvector('english', coalesce(\"jobs_job\".\"requirements\", '')), 'C') || "
+    "setweight(to_tsvector('english', coalesce(\"jobs_job\".\"description\", '')), 'D'))"
+)
+PG_SEARCH_INDEX_NAME = 'jobs_job_search_gin'
+FIELD_WEIGHTS = {'title': 10, 'company': 8, 'skills': 6, 'requirements': 2, 'description': 1}
+MAX_TERM_LENGTH = 40
+MAX_TERM_WEIGHT = 255
+STOP_WORDS = frozenset([
+    'a', 'an', 'and', 'are', 'as', 'at', 'be', 'by', 'for', 'from', 'in',
+    'is', 'it', 'of', 'on', 'or', 'our', 'the', 'to', 'we', 'will', 'with',
+    'you', 'your',
+])
+TOKEN_RE = re.compile(r'[a-z0-9][a-z0-9+#.]*')
+
+
+def tokenize(text):
+    if not text:
+        return []
+    if isinstance(text, (list, tuple)):
+        text = ' '.join(str(item) for item in text)
+    terms = []
+    for match in TOKEN_RE.findall(str(text).lower()):
+        term = match.rstrip('.')[:MAX_TERM_LENGTH]
+        if term and term not in STOP_WORDS:
+            terms.append(term)
+    return terms
+
+
+def build_job_terms(job):
+    weights = defaultdict(int)
+    for field, field_weight in FIELD_WEIGHTS.items():
+        for term in tokenize(getattr(job, field, None)):
+            weights[term] = min(weights[term] + field_weight, MAX_TERM_WEIGHT)
+    return weights
+
+
+def build_search_index(apps, schema_editor):
+    """Native GIN index on Postgres, inverted index rows everywhere else"""
+    if schema_editor.connection.vendor == 'postgresql':
+        schema_editor.execute(
+            f'CREATE INDEX IF NOT EXISTS {PG_SEARCH_INDEX_NAME} ON jobs_job USING GIN ({PG_SEARCH_VECTOR_SQL})'
+        )
+        return
+
+    Job = apps.get_model('jobs', 'Job')
+    JobSearchToken = apps.get_model('jobs', 'JobSearchToken')
+    db_alias = schema_editor.connection.alias
+    tokens = []
+    for job in Job.objects.using(db_alias).iterator(chunk_size=500):
+        tokens.extend(
+            JobSearchToken(job_id=job.pk, term=term, weight=weight)
+            for term, weight in build_job_terms(job).items()
+        )
+        if len(tokens) >= 5000:
+            JobSearchToken.objects.using(db_alias).bulk_create(tokens)
+            tokens = []
+    JobSearchToken.objects.using(db_alias).bulk_create(tokens)
+
+
+def drop_search_index(apps, schema_editor):
+    if schema_editor.connection.vendor == 'postgresql':
+        schema_editor.execute(f'DROP INDEX IF EXISTS {PG_SEARCH_INDEX_NAME}')
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('jobs', '0003_alter_jobapplication_user'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='JobSearchToken',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('term', models.CharField(max_length=40)),
+                ('weight', models.PositiveSmallIntegerField(default=1)),
+                ('job', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='search_tokens', to='jobs.job')),
+            ],
+            options={
+                'verbose_name': 'Job Search Token',
+                'verbose_name_plural': 'Job Search Tokens',
+                'unique_together': {('term', 'job')},
+            },
+        ),
+        migrations.RunPython(build_search_index, drop_search_index),
+    ]
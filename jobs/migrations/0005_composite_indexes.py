@@ -0,0 +1,60 @@
+# Generated by Django 4.2.26 on 2026-10-18 18:52
+
+from django.db import migrations, models
+
+# MySQL silently skips partial indexes, so it gets full indexes led by is_active
+MYSQL_ACTIVE_INDEXES = {
+    'job_active_recent_idx': 'is_active, created_at DESC, id',
+    'job_active_category_idx': 'is_active, category, created_at DESC',
+    'job_active_type_idx': 'is_active, job_type, created_at DESC',
+    'job_active_mode_idx': 'is_active, work_mode, created_at DESC',
+}
+
+
+def create_mysql_indexes(apps, schema_editor):
+    if schema_editor.connection.vendor != 'mysql':
+        return
+    for name, columns in MYSQL_ACTIVE_INDEXES.items():
+        schema_editor.execute(f'CREATE INDEX {name} ON jobs_job ({columns})')
+
+
+def drop_mysql_indexes(apps, schema_editor):
+    if schema_editor.connection.vendor != 'mysql':
+        return
+    for name in MYSQL_ACTIVE_INDEXES:
+        schema_editor.execute(f'DROP INDEX {name} ON jobs_job')
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('jobs', '0004_jobsearchtoken'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='job',
+            index=models.Index(condition=models.Q(('is_active', True)), fields=['-created_at', 'id'], name='job_active_recent_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='job',
+            index=models.Index(condition=models.Q(('is_active', True)), fields=['category', '-created_at'], name='job_active_category_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='job',
+            index=models.Index(condition=models.Q(('is_active', True)), fields=['job_type', '-created_at'], name='job_active_type_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='job',
+            index=models.Index(condition=models.Q(('is_active', True)), fields=['work_mode', '-created_at'], name='job_active_mode_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='jobapplication',
+            index=models.Index(fields=['job', 'email'], name='application_job_email_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='jobapplication',
+            index=models.Index(fields=['user', '-applied_at'], name='application_user_recent_idx'),
+        ),
+        migrations.RunPython(create_mysql_indexes, drop_mysql_indexes),
+    ]
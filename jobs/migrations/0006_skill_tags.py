@@ -0,0 +1,99 @@
+# Generated by Django 4.2.26 on 2026-10-18 18:55
+
+from django.db import migrations, models
+import django.db.models.deletion
+
+# Frozen copy of jobs/skills.py's normalization as of this migration
+MAX_SKILL_LENGTH = 60
+SKILL_ALIASES = {
+    'react.js': 'react', 'reactjs': 'react', 'react js': 'react',
+    'node': 'node.js', 'nodejs': 'node.js', 'node js': 'node.js',
+    'vue.js': 'vue', 'vuejs': 'vue',
+    'angular.js': 'angular', 'angularjs': 'angular',
+    'next.js': 'nextjs', 'express.js': 'express', 'expressjs': 'express',
+    'js': 'javascript', 'es6': 'javascript', 'ts': 'typescript',
+    'golang': 'go', 'c sharp': 'c#', 'cpp': 'c++',
+    'postgres': 'postgresql', 'psql': 'postgresql', 'mongo': 'mongodb',
+    'k8s': 'kubernetes', 'amazon web services': 'aws', 'gcp': 'google cloud',
+    'ms excel': 'excel', 'microsoft excel': 'excel', 'advanced excel': 'excel',
+    'powerbi': 'power bi', 'power-bi': 'power bi',
+    'rest': 'rest api', 'rest apis': 'rest api', 'restful api': 'rest api', 'restful apis': 'rest api',
+    'ml': 'machine learning', 'ai': 'artificial intelligence',
+    'springboot': 'spring boot', 'ui/ux': 'ui/ux design', 'ux/ui': 'ui/ux design',
+}
+
+
+def normalize_skill(name):
+    key = ' '.join(str(name).casefold().replace('_', ' ').split()).strip(' .,;')
+    return SKILL_ALIASES.get(key, key)[:MAX_SKILL_LENGTH]
+
+
+def skill_labels(values):
+    if isinstance(values, str):
+        values = values.split(',')
+    labels = {}
+    for value in values or []:
+        key = normalize_skill(value)
+        if key:
+            labels.setdefault(key, str(value).strip()[:MAX_SKILL_LENGTH])
+    return labels
+
+
+def backfill_skill_tags(apps, schema_editor):
+    Job = apps.get_model('jobs', 'Job')
+    SkillTag = apps.get_model('jobs', 'SkillTag')
+    JobSkill = apps.get_model('jobs', 'JobSkill')
+    db_alias = schema_editor.connection.alias
+
+    job_labels = [
+        (pk, skill_labels(skills))
+        for pk, skills in Job.objects.using(db_alias).values_list('pk', 'skills').iterator(chunk_size=500)
+    ]
+    labels = {}
+    for _, job_skills in job_labels:
+        for key, label in job_skills.items():
+            labels.setdefault(key, label)
+    SkillTag.objects.using(db_alias).bulk_create([SkillTag(name=key, label=label) for key, label in labels.items()])
+    tag_ids = dict(SkillTag.objects.using(db_alias).values_list('name', 'id'))
+    JobSkill.objects.using(db_alias).bulk_create([
+        JobSkill(job_id=pk, tag_id=tag_ids[key])
+        for pk, job_skills in job_labels
+        for key in job_skills
+    ], batch_size=2000)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('jobs', '0005_composite_indexes'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='SkillTag',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('name', models.CharField(help_text='Case-folded, alias-merged key', max_length=60, unique=True)),
+                ('label', models.CharField(help_text='Display form, as first seen', max_length=60)),
+            ],
+            options={
+                'verbose_name': 'Skill Tag',
+                'verbose_name_plural': 'Skill Tags',
+                'ordering': ['name'],
+            },
+        ),
+        migrations.CreateModel(
+            name='JobSkill',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('job', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='skill_links', to='jobs.job')),
+                ('tag', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='job_links', to='jobs.skilltag')),
+            ],
+            options={
+                'verbose_name': 'Job Skill',
+                'verbose_name_plural': 'Job Skills',
+                'unique_together': {('tag', 'job')},
+            },
+        ),
+        migrations.RunPython(backfill_skill_tags, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,150 @@
+# Generated by Django 4.2.26 on 2026-10-18 19:05
+
+import re
+
+from django.db import migrations, models
+
+# Frozen copy of jobs/salary.py's parser as of this migration
+
+# Multipliers to rupees
+UNIT_MULTIPLIERS = {
+    'lpa': 100000, 'lakhs': 100000, 'lakh': 100000, 'lacs': 100000, 'lac': 100000, 'l': 100000,
+    'crores': 10000000, 'crore': 10000000, 'cr': 10000000,
+    'thousand': 1000, 'k': 1000,
+}
+
+# Pay periods -> payments per year (first match wins; default is yearly)
+PERIODS = [
+    (re.compile(r'/\s*(?:hr|hour)\b|per\s+hour|hourly'), 2080),
+    (re.compile(r'/\s*day\b|per\s+day|daily'), 260),
+    (re.compile(r'/\s*(?:wk|week)\b|per\s+week|weekly'), 52),
+    (re.compile(r'/\s*(?:mo|mon|month)\b|per\s+month|monthly|\bp\.?\s?m\b\.?'), 12),
+]
+
+AMOUNT_RE = re.compile(
+    r'(\d+(?:,\d{2,3})*(?:\.\d+)?)\s*(lpa|lakhs?|lacs?|crores?|cr|thousand|k|l)?\b'
+)
+UP_TO_RE = re.compile(r'\b(?:up\s*to|upto|max(?:imum)?|under|below)\b')
+AT_LEAST_RE = re.compile(r'\+|\b(?:from|min(?:imum)?|above|starting|at\s+least)\b')
+
+# A bare "8-12" with no unit or period is far more likely lakhs than rupees
+BARE_LAKHS_BELOW = 1000
+# annual_salary_min/max are 32-bit on PostgreSQL and MySQL
+MAX_ANNUAL_SALARY = 2 ** 31 - 1
+
+
+def clamp_annual(value):
+    return min(max(value, 0), MAX_ANNUAL_SALARY)
+
+
+def parse_salary(text):
+    text = (text or '').lower()
+    amounts = AMOUNT_RE.findall(text)[:2]
+    if not amounts:
+        return None, None
+    per_year = next((times for pattern, times in PERIODS if pattern.search(text)), 1)
+    units = [unit for _, unit in amounts]
+    if len(amounts) == 2 and not units[0]:
+        units[0] = units[1]
+    values = []
+    for (number, _), unit in zip(amounts, units):
+        value = float(number.replace(',', ''))
+        if unit:
+            value *= UNIT_MULTIPLIERS[unit]
+        elif per_year == 1 and value < BARE_LAKHS_BELOW:
+            value *= UNIT_MULTIPLIERS['lakh']
+        values.append(int(round(clamp_annual(value * per_year))))
+    if len(values) == 2:
+        return min(values), max(values)
+    if UP_TO_RE.search(text):
+        return None, values[0]
+    if AT_LEAST_RE.search(text):
+        return values[0], None
+    return values[0], values[0]
+
+
+def annual_salary(display, min_salary, max_salary):
+    low, high = parse_salary(display)
+    if low is None and high is None:
+        low = int(clamp_annual(min_salary)) if min_salary is not None else None
+        high = int(clamp_annual(max_salary)) if max_salary is not None else None
+        if low is None or high is None:
+            low = high = low if high is None else high
+    return low, high
+
+# Listings sort salaries NULLS LAST; Postgres puts NULLs first in a DESC index
+PG_SALARY_MAX_INDEX_SQL = (
+    'CREATE INDEX job_active_salary_max_idx ON jobs_job '
+    '(annual_salary_max DESC NULLS LAST, id) WHERE is_active'
+)
+MYSQL_SALARY_INDEXES = {
+    'job_active_salary_max_idx': 'is_active, annual_salary_max DESC, id',
+    'job_active_salary_min_idx': 'is_active, annual_salary_min, id',
+}
+
+
+def create_vendor_indexes(apps, schema_editor):
+    vendor = schema_editor.connection.vendor
+    if vendor == 'postgresql':
+        schema_editor.execute('DROP INDEX IF EXISTS job_active_salary_max_idx')
+        schema_editor.execute(PG_SALARY_MAX_INDEX_SQL)
+    elif vendor == 'mysql':
+        for name, columns in MYSQL_SALARY_INDEXES.items():
+            schema_editor.execute(f'CREATE INDEX {name} ON jobs_job ({columns})')
+
+
+def drop_vendor_indexes(apps, schema_editor):
+    if schema_editor.connection.vendor == 'mysql':
+        for name in MYSQL_SALARY_INDEXES:
+            schema_editor.execute(f'DROP INDEX {name} ON jobs_job')
+
+
+def backfill_annual_salary(apps, schema_editor, batch_size=5000):
+    Job = apps.get_model('jobs', 'Job')
+    jobs = Job.objects.using(schema_editor.connection.alias)
+    last_pk = 0
+    while True:
+        batch = list(
+            jobs.filter(pk__gt=last_pk).order_by('pk')
+            .values_list('pk', 'salary_display', 'min_salary', 'max_salary')[:batch_size]
+        )
+        if not batch:
+            break
+        changes = {}
+        for pk, display, min_salary, max_salary in batch:
+            changes.setdefault(annual_salary(display, min_salary, max_salary), []).append(pk)
+        # The new columns start NULL
+        changes.pop((None, None), None)
+        for (low, high), ids in changes.items():
+            jobs.filter(pk__in=ids).update(annual_salary_min=low, annual_salary_max=high)
+        last_pk = batch[-1][0]
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('jobs', '0006_skill_tags'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='job',
+            name='annual_salary_max',
+            field=models.PositiveIntegerField(blank=True, editable=False, null=True),
+        ),
+        migrations.AddField(
+            model_name='job',
+            name='annual_salary_min',
+            field=models.PositiveIntegerField(blank=True, editable=False, null=True),
+        ),
+        migrations.AddIndex(
+            model_name='job',
+            index=models.Index(condition=models.Q(('is_active', True)), fields=['-annual_salary_max', 'id'], name='job_active_salary_max_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='job',
+            index=models.Index(condition=models.Q(('is_active', True)), fields=['annual_salary_min', 'id'], name='job_active_salary_min_idx'),
+        ),
+        migrations.RunPython(create_vendor_indexes, drop_vendor_indexes),
+        migrations.RunPython(backfill_annual_salary, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,105 @@
+# Generated by Django 4.2.26 on 2026-10-18 19:12
+
+import csv
+import os
+import re
+
+from django.db import migrations, models
+
+# Frozen copy of jobs/geo.py's location resolver as of this migration; the
+# gazetteer is read from the data file
+GAZETTEER_PATH = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), 'data', 'cities.csv')
+PART_SEPARATORS = re.compile(r'[,/|;()&]|\s+-\s+|\bor\b')
+
+MYSQL_GEO_INDEXES = {
+    'job_active_city_idx': 'is_active, city, created_at DESC',
+    'job_active_geo_idx': 'is_active, latitude, longitude',
+}
+
+
+def create_mysql_indexes(apps, schema_editor):
+    if schema_editor.connection.vendor != 'mysql':
+        return
+    for name, columns in MYSQL_GEO_INDEXES.items():
+        schema_editor.execute(f'CREATE INDEX {name} ON jobs_job ({columns})')
+
+
+def drop_mysql_indexes(apps, schema_editor):
+    if schema_editor.connection.vendor != 'mysql':
+        return
+    for name in MYSQL_GEO_INDEXES:
+        schema_editor.execute(f'DROP INDEX {name} ON jobs_job')
+
+
+def place_key(text):
+    return ' '.join(re.sub(r'[^a-z0-9]+', ' ', str(text).casefold()).split())
+
+
+def load_gazetteer():
+    """{place key: (city, latitude, longitude)} for every city name and alias"""
+    places = {}
+    with open(GAZETTEER_PATH, newline='', encoding='utf-8') as handle:
+        for row in csv.DictReader(handle):
+            city = (row['city'], float(row['latitude']), float(row['longitude']))
+            for name in [row['city']] + (row['aliases'] or '').split('|'):
+                if name.strip():
+                    places.setdefault(place_key(name), city)
+    return places
+
+
+def resolve_location(places, text):
+    for part in PART_SEPARATORS.split(text or ''):
+        key = place_key(part)
+        if not key:
+            continue
+        city = places.get(key) or places.get(re.sub(r'\s+(?:city|district|urban|rural)$', '', key))
+        if city:
+            return city
+    return None
+
+
+def geocode_jobs(apps, schema_editor):
+    """One UPDATE per distinct location text"""
+    Job = apps.get_model('jobs', 'Job')
+    jobs = Job.objects.using(schema_editor.connection.alias)
+    places = load_gazetteer()
+    for location in list(jobs.order_by().values_list('location', flat=True).distinct()):
+        city = resolve_location(places, location)
+        if city:
+            name, latitude, longitude = city
+            jobs.filter(location=location).update(city=name, latitude=latitude, longitude=longitude)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('jobs', '0007_annual_salary'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='job',
+            name='city',
+            field=models.CharField(blank=True, default='', editable=False, max_length=80),
+        ),
+        migrations.AddField(
+            model_name='job',
+            name='latitude',
+            field=models.FloatField(blank=True, editable=False, null=True),
+        ),
+        migrations.AddField(
+            model_name='job',
+            name='longitude',
+            field=models.FloatField(blank=True, editable=False, null=True),
+        ),
+        migrations.AddIndex(
+            model_name='job',
+            index=models.Index(condition=models.Q(('is_active', True)), fields=['city', '-created_at'], name='job_active_city_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='job',
+            index=models.Index(condition=models.Q(('is_active', True)), fields=['latitude', 'longitude'], name='job_active_geo_idx'),
+        ),
+        migrations.RunPython(create_mysql_indexes, drop_mysql_indexes),
+        migrations.RunPython(geocode_jobs, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,63 @@
+# Generated by Django 4.2.26 on 2026-10-18 19:23
+
+from django.db import migrations, models
+from django.db.models import Count
+
+
+def build_stats(apps, schema_editor):
+    Job = apps.get_model('jobs', 'Job')
+    JobStats = apps.get_model('jobs', 'JobStats')
+    JobStatCount = apps.get_model('jobs', 'JobStatCount')
+    using = schema_editor.connection.alias
+    active = Job.objects.using(using).filter(is_active=True).order_by()
+    buckets = {}
+    for kind in ('category', 'company'):
+        buckets[kind] = list(active.values_list(kind).annotate(n=Count('id')))
+        JobStatCount.objects.using(using).bulk_create(
+            [JobStatCount(kind=kind, key=key, open_jobs=n) for key, n in buckets[kind]], batch_size=2000,
+        )
+    JobStats.objects.using(using).create(
+        pk=1,
+        total_jobs=sum(n for _, n in buckets['category']),
+        categories=len(buckets['category']),
+        companies=len(buckets['company']),
+    )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('jobs', '0008_job_geolocation'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='JobStats',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('total_jobs', models.PositiveIntegerField(default=0)),
+                ('categories', models.PositiveIntegerField(default=0, help_text='Categories with at least one open job')),
+                ('companies', models.PositiveIntegerField(default=0, help_text='Companies with at least one open job')),
+                ('updated_at', models.DateTimeField(auto_now=True)),
+            ],
+            options={
+                'verbose_name': 'Job Stats',
+                'verbose_name_plural': 'Job Stats',
+            },
+        ),
+        migrations.CreateModel(
+            name='JobStatCount',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('kind', models.CharField(choices=[('category', 'Category'), ('company', 'Company')], max_length=10)),
+                ('key', models.CharField(max_length=150)),
+                ('open_jobs', models.PositiveIntegerField(default=0)),
+            ],
+            options={
+                'verbose_name': 'Job Stat Count',
+                'verbose_name_plural': 'Job Stat Counts',
+                'unique_together': {('kind', 'key')},
+            },
+        ),
+        migrations.RunPython(build_stats, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,239 @@
+# Generated by Django 4.2.26 on 2026-10-18 19:55
+
+import hashlib
+import re
+import struct
+from functools import lru_cache
+
+from django.db import migrations, models
+import django.db.models.deletion
+
+# Frozen copy of jobs/dedup.py's fingerprint - with the jobs/search.py
+# tokenizer and jobs/skills.py normalization it uses - as of this migration
+NUM_HASHES = 64
+BANDS = 8
+ROWS_PER_BAND = 4
+BAND_FIELDS = tuple(f'fingerprint_band{band}' for band in range(BANDS))
+SIGNATURE_FORMAT = f'<{NUM_HASHES}H'
+SHINGLE_SIZE = 3
+TERM_WEIGHT = 4
+MAX_DESCRIPTION_WORDS = 2000
+HASHES_PER_DIGEST = 32
+DIGEST_SUFFIXES = [bytes([index]) for index in range(NUM_HASHES // HASHES_PER_DIGEST)]
+UNPACK_HASHES = struct.Struct(SIGNATURE_FORMAT).unpack
+
+MAX_TERM_LENGTH = 40
+STOP_WORDS = frozenset([
+    'a', 'an', 'and', 'are', 'as', 'at', 'be', 'by', 'for', 'from', 'in',
+    'is', 'it', 'of', 'on', 'or', 'our', 'the', 'to', 'we', 'will', 'with',
+    'you', 'your',
+])
+TOKEN_RE = re.compile(r'[a-z0-9][a-z0-9+#.]*')
+
+MAX_SKILL_LENGTH = 60
+SKILL_ALIASES = {
+    'react.js': 'react', 'reactjs': 'react', 'react js': 'react',
+    'node': 'node.js', 'nodejs': 'node.js', 'node js': 'node.js',
+    'vue.js': 'vue', 'vuejs': 'vue',
+    'angular.js': 'angular', 'angularjs': 'angular',
+    'next.js': 'nextjs', 'express.js': 'express', 'expressjs': 'express',
+    'js': 'javascript', 'es6': 'javascript', 'ts': 'typescript',
+    'golang': 'go', 'c sharp': 'c#', 'cpp': 'c++',
+    'postgres': 'postgresql', 'psql': 'postgresql', 'mongo': 'mongodb',
+    'k8s': 'kubernetes', 'amazon web services': 'aws', 'gcp': 'google cloud',
+    'ms excel': 'excel', 'microsoft excel': 'excel', 'advanced excel': 'excel',
+    'powerbi': 'power bi', 'power-bi': 'power bi',
+    'rest': 'rest api', 'rest apis': 'rest api', 'restful api': 'rest api', 'restful apis': 'rest api',
+    'ml': 'machine learning', 'ai': 'artificial intelligence',
+    'springboot': 'spring boot', 'ui/ux': 'ui/ux design', 'ux/ui': 'ui/ux design',
+}
+
+
+def tokenize(text):
+    if not text:
+        return []
+    if isinstance(text, (list, tuple)):
+        text = ' '.join(str(item) for item in text)
+    terms = []
+    for match in TOKEN_RE.findall(str(text).lower()):
+        term = match.rstrip('.')[:MAX_TERM_LENGTH]
+        if term and term not in STOP_WORDS:
+            terms.append(term)
+    return terms
+
+
+def skill_keys(values):
+    if isinstance(values, str):
+        values = values.split(',')
+    keys = {}
+    for value in values or []:
+        key = ' '.join(str(value).casefold().replace('_', ' ').split()).strip(' .,;')
+        key = SKILL_ALIASES.get(key, key)[:MAX_SKILL_LENGTH]
+        if key:
+            keys.setdefault(key)
+    return keys
+
+
+def feature_hashes(feature):
+    data = feature.encode('utf-8')
+    return UNPACK_HASHES(b''.join(hashlib.blake2b(data + suffix, digest_size=64).digest() for suffix in DIGEST_SUFFIXES))
+
+
+@lru_cache(maxsize=4096)
+def term_hashes(term):
+    return tuple(map(min, zip(*(feature_hashes(f'{term}:{copy}') for copy in range(TERM_WEIGHT)))))
+
+
+def job_signature(job):
+    terms = {f'title:{word}' for word in tokenize(job.title)}
+    terms.update(f'skill:{key}' for key in skill_keys(job.skills))
+    words = tokenize(job.description)[:MAX_DESCRIPTION_WORDS]
+    shingles = {
+        ' '.join(words[start:start + SHINGLE_SIZE])
+        for start in range(max(len(words) - SHINGLE_SIZE + 1, 1 if words else 0))
+    }
+    rows = [term_hashes(term) for term in terms] + [feature_hashes(shingle) for shingle in shingles]
+    if not rows:
+        return None
+    return tuple(map(min, zip(*rows)))
+
+
+def band_values(signature):
+    packed = struct.pack(SIGNATURE_FORMAT, *signature)
+    width = ROWS_PER_BAND * 2
+    return tuple(
+        int.from_bytes(hashlib.blake2b(packed[band * width:(band + 1) * width], digest_size=4).digest(), 'little', signed=True)
+        for band in range(BANDS)
+    )
+
+MYSQL_BAND_INDEXES = {
+    f'job_active_band{band}_idx': f'is_active, fingerprint_band{band}' for band in range(8)
+}
+
+
+def create_mysql_indexes(apps, schema_editor):
+    if schema_editor.connection.vendor != 'mysql':
+        return
+    for name, columns in MYSQL_BAND_INDEXES.items():
+        schema_editor.execute(f'CREATE INDEX {name} ON jobs_job ({columns})')
+
+
+def drop_mysql_indexes(apps, schema_editor):
+    if schema_editor.connection.vendor != 'mysql':
+        return
+    for name in MYSQL_BAND_INDEXES:
+        schema_editor.execute(f'DROP INDEX {name} ON jobs_job')
+
+
+def fingerprint_jobs(apps, schema_editor, batch_size=2000):
+    Job = apps.get_model('jobs', 'Job')
+    jobs = Job.objects.using(schema_editor.connection.alias)
+    last_pk = 0
+    while True:
+        batch = list(jobs.filter(pk__gt=last_pk).order_by('pk').only('pk', 'title', 'skills', 'description')[:batch_size])
+        if not batch:
+            break
+        changed = []
+        for job in batch:
+            signature = job_signature(job)
+            if signature:
+                job.fingerprint = struct.pack(SIGNATURE_FORMAT, *signature)
+                for field, value in zip(BAND_FIELDS, band_values(signature)):
+                    setattr(job, field, value)
+                changed.append(job)
+        jobs.bulk_update(changed, ['fingerprint', *BAND_FIELDS])
+        last_pk = batch[-1].pk
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('jobs', '0010_job_external_id'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='job',
+            name='duplicate_of',
+            field=models.ForeignKey(blank=True, editable=False, null=True, on_delete=django.db.models.deletion.SET_NULL, related_name='duplicates', to='jobs.job'),
+        ),
+        migrations.AddField(
+            model_name='job',
+            name='fingerprint',
+            field=models.BinaryField(blank=True, null=True),
+        ),
+        migrations.AddField(
+            model_name='job',
+            name='fingerprint_band0',
+            field=models.IntegerField(blank=True, editable=False, null=True),
+        ),
+        migrations.AddField(
+            model_name='job',
+            name='fingerprint_band1',
+            field=models.IntegerField(blank=True, editable=False, null=True),
+        ),
+        migrations.AddField(
+            model_name='job',
+            name='fingerprint_band2',
+            field=models.IntegerField(blank=True, editable=False, null=True),
+        ),
+        migrations.AddField(
+            model_name='job',
+            name='fingerprint_band3',
+            field=models.IntegerField(blank=True, editable=False, null=True),
+        ),
+        migrations.AddField(
+            model_name='job',
+            name='fingerprint_band4',
+            field=models.IntegerField(blank=True, editable=False, null=True),
+        ),
+        migrations.AddField(
+            model_name='job',
+            name='fingerprint_band5',
+            field=models.IntegerField(blank=True, editable=False, null=True),
+        ),
+        migrations.AddField(
+            model_name='job',
+            name='fingerprint_band6',
+            field=models.IntegerField(blank=True, editable=False, null=True),
+        ),
+        migrations.AddField(
+            model_name='job',
+            name='fingerprint_band7',
+            field=models.IntegerField(blank=True, editable=False, null=True),
+        ),
+        migrations.AddIndex(
+            model_name='job',
+            index=models.Index(condition=models.Q(('is_active', True)), fields=['fingerprint_band0'], name='job_active_band0_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='job',
+            index=models.Index(condition=models.Q(('is_active', True)), fields=['fingerprint_band1'], name='job_active_band1_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='job',
+            index=models.Index(condition=models.Q(('is_active', True)), fields=['fingerprint_band2'], name='job_active_band2_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='job',
+            index=models.Index(condition=models.Q(('is_active', True)), fields=['fingerprint_band3'], name='job_active_band3_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='job',
+            index=models.Index(condition=models.Q(('is_active', True)), fields=['fingerprint_band4'], name='job_active_band4_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='job',
+            index=models.Index(condition=models.Q(('is_active', True)), fields=['fingerprint_band5'], name='job_active_band5_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='job',
+            index=models.Index(condition=models.Q(('is_active', True)), fields=['fingerprint_band6'], name='job_active_band6_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='job',
+            index=models.Index(condition=models.Q(('is_active', True)), fields=['fingerprint_band7'], name='job_active_band7_idx'),
+        ),
+        migrations.RunPython(create_mysql_indexes, drop_mysql_indexes),
+        migrations.RunPython(fingerprint_jobs, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,89 @@
+# Generated by Django 4.2.26 on 2026-10-18 20:23
+
+from django.db import migrations, models
+import django.utils.timezone
+
+MYSQL_EXPIRY_INDEXES = {
+    'job_active_expires_idx': 'is_active, expires_at',
+    'job_expired_idx': 'expired_at',
+}
+
+
+def create_mysql_indexes(apps, schema_editor):
+    if schema_editor.connection.vendor != 'mysql':
+        return
+    for name, columns in MYSQL_EXPIRY_INDEXES.items():
+        schema_editor.execute(f'CREATE INDEX {name} ON jobs_job ({columns})')
+
+
+def drop_mysql_indexes(apps, schema_editor):
+    if schema_editor.connection.vendor != 'mysql':
+        return
+    for name in MYSQL_EXPIRY_INDEXES:
+        schema_editor.execute(f'DROP INDEX {name} ON jobs_job')
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('jobs', '0011_job_fingerprint'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='ArchivedJob',
+            fields=[
+                ('id', models.BigIntegerField(primary_key=True, serialize=False)),
+                ('title', models.CharField(max_length=200)),
+                ('company', models.CharField(max_length=150)),
+                ('location', models.CharField(max_length=100)),
+                ('city', models.CharField(blank=True, default='', max_length=80)),
+                ('latitude', models.FloatField(blank=True, null=True)),
+                ('longitude', models.FloatField(blank=True, null=True)),
+                ('category', models.CharField(choices=[('it', 'IT & Software'), ('marketing', 'Marketing'), ('finance', 'Finance'), ('design', 'Design'), ('hr', 'HR & Admin'), ('sales', 'Sales'), ('engineering', 'Engineering'), ('healthcare', 'Healthcare'), ('education', 'Education'), ('other', 'Other')], max_length=50)),
+                ('job_type', models.CharField(choices=[('full-time', 'Full-time'), ('part-time', 'Part-time'), ('contract', 'Contract'), ('internship', 'Internship'), ('freelance', 'Freelance')], max_length=20)),
+                ('experience_level', models.CharField(choices=[('entry', 'Entry Level (0-2 years)'), ('mid', 'Mid Level (3-5 years)'), ('senior', 'Senior Level (6-10 years)'), ('lead', 'Lead/Manager (10+ years)')], max_length=20)),
+                ('work_mode', models.CharField(choices=[('remote', 'Remote'), ('hybrid', 'Hybrid'), ('office', 'Office')], max_length=20)),
+                ('min_salary', models.DecimalField(blank=True, decimal_places=2, max_digits=10, null=True)),
+                ('max_salary', models.DecimalField(blank=True, decimal_places=2, max_digits=10, null=True)),
+                ('salary_display', models.CharField(max_length=50)),
+                ('annual_salary_min', models.PositiveIntegerField(blank=True, null=True)),
+                ('annual_salary_max', models.PositiveIntegerField(blank=True, null=True)),
+                ('description', models.TextField()),
+                ('requirements', models.TextField(blank=True, null=True)),
+                ('skills', models.JSONField(default=list)),
+                ('company_logo', models.CharField(default='🏢', max_length=10)),
+                ('company_size', models.CharField(max_length=20)),
+                ('source', models.CharField(blank=True, default='', max_length=50)),
+                ('external_id', models.CharField(blank=True, max_length=100, null=True)),
+                ('created_at', models.DateTimeField()),
+                ('updated_at', models.DateTimeField()),
+                ('expires_at', models.DateTimeField(blank=True, null=True)),
+                ('expired_at', models.DateTimeField(blank=True, null=True)),
+                ('archived_at', models.DateTimeField(default=django.utils.timezone.now)),
+            ],
+            options={
+                'verbose_name': 'Archived Job',
+                'verbose_name_plural': 'Archived Jobs',
+            },
+        ),
+        migrations.AddField(
+            model_name='job',
+            name='expired_at',
+            field=models.DateTimeField(blank=True, editable=False, help_text='When the expiry run closed the job', null=True),
+        ),
+        migrations.AddField(
+            model_name='job',
+            name='expires_at',
+            field=models.DateTimeField(blank=True, help_text='Close the job after this time', null=True),
+        ),
+        migrations.AddIndex(
+            model_name='job',
+            index=models.Index(condition=models.Q(('is_active', True)), fields=['expires_at'], name='job_active_expires_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='job',
+            index=models.Index(condition=models.Q(('expired_at__isnull', False)), fields=['expired_at'], name='job_expired_idx'),
+        ),
+        migrations.RunPython(create_mysql_indexes, drop_mysql_indexes),
+    ]
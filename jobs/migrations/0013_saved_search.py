@@ -0,0 +1,56 @@
+# Generated by Django 4.2.26 on 2026-10-18 20:32
+
+from django.conf import settings
+from django.db import migrations, models
+import django.db.models.deletion
+import django.utils.timezone
+
+
+MYSQL_SAVED_SEARCH_INDEXES = {
+    'saved_search_key_idx': 'is_active, key_hash',
+}
+
+
+def create_mysql_indexes(apps, schema_editor):
+    if schema_editor.connection.vendor != 'mysql':
+        return
+    for name, columns in MYSQL_SAVED_SEARCH_INDEXES.items():
+        schema_editor.execute(f'CREATE INDEX {name} ON jobs_savedsearch ({columns})')
+
+
+def drop_mysql_indexes(apps, schema_editor):
+    if schema_editor.connection.vendor != 'mysql':
+        return
+    for name in MYSQL_SAVED_SEARCH_INDEXES:
+        schema_editor.execute(f'DROP INDEX {name} ON jobs_savedsearch')
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+        ('jobs', '0012_job_archive'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='SavedSearch',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('name', models.CharField(blank=True, max_length=100)),
+                ('params', models.JSONField(default=dict, help_text='Job list query params, normalized on save')),
+                ('key_hash', models.BigIntegerField(default=0, editable=False)),
+                ('is_active', models.BooleanField(default=True)),
+                ('created_at', models.DateTimeField(default=django.utils.timezone.now)),
+                ('last_alerted_at', models.DateTimeField(blank=True, editable=False, null=True)),
+                ('user', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='saved_searches', to=settings.AUTH_USER_MODEL)),
+            ],
+            options={
+                'verbose_name': 'Saved Search',
+                'verbose_name_plural': 'Saved Searches',
+                'ordering': ['-created_at'],
+                'indexes': [models.Index(condition=models.Q(('is_active', True)), fields=['key_hash'], name='saved_search_key_idx'), models.Index(fields=['user', '-created_at'], name='saved_search_user_idx')],
+            },
+        ),
+        migrations.RunPython(create_mysql_indexes, drop_mysql_indexes),
+    ]
@@ -0,0 +1,40 @@
+# Generated by Django 4.2.26 on 2026-10-18 21:23
+
+from django.db import migrations, models
+import django.db.models.deletion
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('jobs', '0013_saved_search'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='JobSimilarity',
+            fields=[
+                ('job', models.OneToOneField(on_delete=django.db.models.deletion.CASCADE, primary_key=True, related_name='similarity', serialize=False, to='jobs.job')),
+                ('signature', models.BinaryField(blank=True, null=True)),
+                ('computed_at', models.DateTimeField()),
+            ],
+            options={
+                'verbose_name': 'Job Similarity',
+                'verbose_name_plural': 'Job Similarities',
+            },
+        ),
+        migrations.CreateModel(
+            name='SimilarJob',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('score', models.FloatField(help_text='Estimated Jaccard similarity of the two jobs')),
+                ('job', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='similar_links', to='jobs.job')),
+                ('similar', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='+', to='jobs.job')),
+            ],
+            options={
+                'verbose_name': 'Similar Job',
+                'verbose_name_plural': 'Similar Jobs',
+                'indexes': [models.Index(fields=['job', '-score'], name='similar_job_score_idx')],
+            },
+        ),
+    ]
@@ -0,0 +1,43 @@
+# Generated by Django 4.2.26 on 2026-10-18 21:44
+
+from django.db import migrations, models
+import django.db.models.deletion
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('jobs', '0014_similar_jobs'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='TrendingJob',
+            fields=[
+                ('job', models.OneToOneField(on_delete=django.db.models.deletion.CASCADE, primary_key=True, related_name='trending', serialize=False, to='jobs.job')),
+                ('rank', models.PositiveSmallIntegerField()),
+                ('score', models.FloatField(help_text='Popularity score decayed to computed_at')),
+                ('computed_at', models.DateTimeField()),
+            ],
+            options={
+                'verbose_name': 'Trending Job',
+                'verbose_name_plural': 'Trending Jobs',
+                'ordering': ['rank'],
+            },
+        ),
+        migrations.CreateModel(
+            name='JobPopularity',
+            fields=[
+                ('job', models.OneToOneField(on_delete=django.db.models.deletion.CASCADE, primary_key=True, related_name='popularity', serialize=False, to='jobs.job')),
+                ('views', models.PositiveIntegerField(default=0)),
+                ('applications', models.PositiveIntegerField(default=0)),
+                ('score', models.FloatField(default=0)),
+                ('scored_at', models.DateTimeField()),
+            ],
+            options={
+                'verbose_name': 'Job Popularity',
+                'verbose_name_plural': 'Job Popularity',
+                'indexes': [models.Index(fields=['-score'], name='job_popularity_score_idx')],
+            },
+        ),
+    ]
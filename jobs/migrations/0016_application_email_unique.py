@@ -0,0 +1,86 @@
+# Generated by Django 4.2.26 on 2026-10-18 21:57
+
+from django.db import migrations, models
+import django.db.models.deletion
+import django.utils.timezone
+
+
+# Frozen copy of jobs/applications.py's email normalization as of this migration
+def normalize_email(email):
+    return (email or '').strip().lower()
+
+
+# Conflicts listed in the error; the rest are counted
+MAX_LISTED_CONFLICTS = 50
+
+
+def normalize_application_emails(apps, schema_editor):
+    """Normalize stored emails. Applications that would repeat a (job, email)
+    pair are not deleted - their status, notes or resume may matter - the
+    migration stops and lists them to be resolved by hand first."""
+    JobApplication = apps.get_model('jobs', 'JobApplication')
+    applications = JobApplication.objects.using(schema_editor.connection.alias)
+    groups, changed = {}, []
+    rows = applications.order_by('applied_at', 'pk').values_list('pk', 'job_id', 'email')
+    for pk, job_id, email in rows.iterator(chunk_size=5000):
+        normalized = normalize_email(email)
+        groups.setdefault((job_id, normalized), []).append(pk)
+        if normalized != email:
+            changed.append(JobApplication(pk=pk, email=normalized))
+    conflicts = [(key, pks) for key, pks in groups.items() if len(pks) > 1]
+    if conflicts:
+        lines = [
+            f'  job {job_id}: applications {", ".join(map(str, pks))}'
+            for (job_id, _), pks in conflicts[:MAX_LISTED_CONFLICTS]
+        ]
+        if len(conflicts) > MAX_LISTED_CONFLICTS:
+            lines.append(f'  ... and {len(conflicts) - MAX_LISTED_CONFLICTS} more')
+        raise RuntimeError(
+            f'{len(conflicts)} (job, email) pairs have more than one application once emails are '
+            'normalized (stripped, lowercased). Merge or delete the extra applications, then migrate '
+            'again:\n' + '\n'.join(lines)
+        )
+    applications.bulk_update(changed, ['email'], batch_size=1000)
+
+
+def keep_normalized_emails(apps, schema_editor):
+    """The original spelling of an email is not kept; normalized emails are valid without the constraint"""
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('jobs', '0015_job_popularity'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='IdempotencyKey',
+            fields=[
+                ('key', models.CharField(max_length=64, primary_key=True, serialize=False)),
+                ('fingerprint', models.CharField(help_text='SHA-256 of the submitted fields', max_length=64)),
+                ('status_code', models.PositiveSmallIntegerField(blank=True, null=True)),
+                ('response', models.JSONField(blank=True, null=True)),
+                ('created_at', models.DateTimeField(default=django.utils.timezone.now)),
+            ],
+            options={
+                'verbose_name': 'Idempotency Key',
+                'verbose_name_plural': 'Idempotency Keys',
+            },
+        ),
+        migrations.RunPython(normalize_application_emails, keep_normalized_emails),
+        migrations.AddConstraint(
+            model_name='jobapplication',
+            constraint=models.UniqueConstraint(fields=('job', 'email'), name='application_job_email_uniq'),
+        ),
+        # The unique constraint's index covers the job foreign key (MySQL needs one) and the old lookups
+        migrations.RemoveIndex(
+            model_name='jobapplication',
+            name='application_job_email_idx',
+        ),
+        migrations.AddField(
+            model_name='idempotencykey',
+            name='application',
+            field=models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.CASCADE, related_name='+', to='jobs.jobapplication'),
+        ),
+    ]
@@ -0,0 +1,18 @@
+# Generated by Django 4.2.26 on 2026-10-18 22:17
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('jobs', '0018_upload'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='upload',
+            name='stored_name',
+            field=models.CharField(blank=True, max_length=255),
+        ),
+    ]
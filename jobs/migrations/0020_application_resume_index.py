@@ -0,0 +1,18 @@
+# Generated by Django 4.2.26 on 2026-10-18 22:19
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('jobs', '0019_upload_stored_name'),
+    ]
+
+    operations = [
+        migrations.AlterField(
+            model_name='jobapplication',
+            name='resume',
+            field=models.FileField(db_index=True, help_text='Upload your resume (PDF/DOC)', upload_to='applications/resumes/'),
+        ),
+    ]
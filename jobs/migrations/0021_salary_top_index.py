@@ -0,0 +1,47 @@
+# Generated by Django 4.2.26 on 2026-10-18 22:28
+
+from django.db import migrations, models
+import django.db.models.functions.comparison
+
+# Listings sort salaries NULLS LAST; Postgres puts NULLs first in a DESC index
+PG_SALARY_TOP_INDEX_SQL = (
+    'CREATE INDEX job_active_salary_top_idx ON jobs_job '
+    '((COALESCE(annual_salary_max, annual_salary_min)) DESC NULLS LAST, id) WHERE is_active'
+)
+# MySQL skips partial indexes; 0007 gave it an is_active-leading max index instead
+MYSQL_SALARY_TOP_INDEX = 'is_active, (COALESCE(annual_salary_max, annual_salary_min)) DESC, id'
+
+
+def create_vendor_indexes(apps, schema_editor):
+    vendor = schema_editor.connection.vendor
+    if vendor == 'postgresql':
+        schema_editor.execute('DROP INDEX IF EXISTS job_active_salary_top_idx')
+        schema_editor.execute(PG_SALARY_TOP_INDEX_SQL)
+    elif vendor == 'mysql':
+        schema_editor.execute('DROP INDEX job_active_salary_max_idx ON jobs_job')
+        schema_editor.execute(f'CREATE INDEX job_active_salary_top_idx ON jobs_job ({MYSQL_SALARY_TOP_INDEX})')
+
+
+def drop_vendor_indexes(apps, schema_editor):
+    if schema_editor.connection.vendor == 'mysql':
+        schema_editor.execute('DROP INDEX job_active_salary_top_idx ON jobs_job')
+        schema_editor.execute('CREATE INDEX job_active_salary_max_idx ON jobs_job (is_active, annual_salary_max DESC, id)')
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('jobs', '0020_application_resume_index'),
+    ]
+
+    operations = [
+        migrations.RemoveIndex(
+            model_name='job',
+            name='job_active_salary_max_idx',
+        ),
+        migrations.AddIndex(
+            model_name='job',
+            index=models.Index(models.OrderBy(django.db.models.functions.comparison.Coalesce('annual_salary_max', 'annual_salary_min'), descending=True), models.F('id'), condition=models.Q(('is_active', True)), name='job_active_salary_top_idx'),
+        ),
+        migrations.RunPython(create_vendor_indexes, drop_vendor_indexes),
+    ]
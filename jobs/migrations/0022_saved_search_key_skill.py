@@ -0,0 +1,92 @@
+# Generated by Django 4.2.26 on 2026-10-18 22:33
+
+import csv
+import hashlib
+import os
+import re
+
+from django.db import migrations, models
+
+# Frozen copies of jobs.alerts.search_key() and jobs.geo.resolve_location() as
+# of this migration: key hashes no longer include skill tags
+KEY_FIELDS = ('category', 'job_type', 'experience_level', 'work_mode', 'city')
+GAZETTEER_PATH = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), 'data', 'cities.csv')
+PART_SEPARATORS = re.compile(r'[,/|;()&]|\s+-\s+|\bor\b')
+
+
+def place_key(text):
+    return ' '.join(re.sub(r'[^a-z0-9]+', ' ', str(text).casefold()).split())
+
+
+def load_gazetteer():
+    places = {}
+    with open(GAZETTEER_PATH, newline='', encoding='utf-8') as handle:
+        for row in csv.DictReader(handle):
+            for name in [row['city']] + (row['aliases'] or '').split('|'):
+                if name.strip():
+                    places.setdefault(place_key(name), row['city'])
+    return places
+
+
+def resolve_city(places, text):
+    for part in PART_SEPARATORS.split(text or ''):
+        key = place_key(part)
+        if not key:
+            continue
+        city = places.get(key) or places.get(re.sub(r'\s+(?:city|district|urban|rural)$', '', key))
+        if city:
+            return city
+    return None
+
+
+def key_hash(key):
+    return int.from_bytes(hashlib.blake2b(key.encode('utf-8'), digest_size=8).digest(), 'little', signed=True)
+
+
+def rehash_saved_searches(apps, schema_editor, key_skills=0):
+    """Only searches requiring skills had them in their key; drop the skills and keep the first as key_skill"""
+    SavedSearch = apps.get_model('jobs', 'SavedSearch')
+    manager = SavedSearch.objects.using(schema_editor.connection.alias)
+    places = None
+    changed = []
+    for search in manager.filter(params__has_key='skills').only('pk', 'params').iterator(chunk_size=2000):
+        params = search.params
+        if not params.get('skills') or params.get('skills_mode') == 'any':
+            continue
+        if places is None:
+            places = load_gazetteer()
+        parts = []
+        for field in KEY_FIELDS:
+            value = resolve_city(places, params.get('location')) if field == 'city' else params.get(field)
+            if value:
+                parts.append(f'{field}={value}')
+        skills = sorted(params['skills'].split(','))
+        parts.extend(f'skill={key}' for key in skills[:key_skills])
+        search.key_hash = key_hash('&'.join(parts))
+        search.key_skill = '' if key_skills else skills[0]
+        changed.append(search)
+        if len(changed) >= 2000:
+            manager.bulk_update(changed, ['key_hash', 'key_skill'])
+            changed = []
+    manager.bulk_update(changed, ['key_hash', 'key_skill'])
+
+
+def restore_skill_hashes(apps, schema_editor):
+    """Back to the hashes 0013 made, with up to two skills in the key"""
+    rehash_saved_searches(apps, schema_editor, key_skills=2)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('jobs', '0021_salary_top_index'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='savedsearch',
+            name='key_skill',
+            field=models.CharField(blank=True, default='', editable=False, max_length=60),
+        ),
+        migrations.RunPython(rehash_saved_searches, restore_skill_hashes),
+    ]
@@ -1,4 +1,7 @@
-from django.db import models
+import uuid
+
+from django.db import models, router, transaction
+from django.db.models.functions import Coalesce
 from django.utils import timezone
 from accounts.models import CustomUser
 
@@ -41,6 +44,10 @@ class Job(models.Model):
     title = models.CharField(max_length=200)
     company = models.CharField(max_length=150)
     location = models.CharField(max_length=100)
+    # Resolved from location via the city gazetteer on save (blank/NULL if unknown)
+    city = models.CharField(max_length=80, blank=True, default='', editable=False)
+    latitude = models.FloatField(null=True, blank=True, editable=False)
+    longitude = models.FloatField(null=True, blank=True, editable=False)
     category = models.CharField(max_length=50, choices=CATEGORY_CHOICES)
     job_type = models.CharField(max_length=20, choices=JOB_TYPE_CHOICES, default='full-time')
     experience_level = models.CharField(max_length=20, choices=EXPERIENCE_CHOICES, default='entry')
@@ -50,6 +57,9 @@ class Job(models.Model):
     min_salary = models.DecimalField(max_digits=10, decimal_places=2, null=True, blank=True)
     max_salary = models.DecimalField(max_digits=10, decimal_places=2, null=True, blank=True)
     salary_display = models.CharField(max_length=50, help_text="e.g., ₹8-15 LPA")
+    # Annual rupees parsed from salary_display on save (NULL = open-ended/unknown)
+    annual_salary_min = models.PositiveIntegerField(null=True, blank=True, editable=False)
+    annual_salary_max = models.PositiveIntegerField(null=True, blank=True, editable=False)
     
     # Job Details
     description = models.TextField()
@@ -65,18 +75,83 @@ class Job(models.Model):
         ('large', 'Large (1000+)'),
     ], default='medium')
     
+    # Partner feed identity - bulk ingest upserts on (source, external_id)
+    source = models.CharField(max_length=50, blank=True, default='', help_text="Feed the job came from")
+    external_id = models.CharField(max_length=100, null=True, blank=True, help_text="Job id within the feed")
+    
+    # MinHash signature of title/skills/description set on save, plus its hashed
+    # bands for indexed near-duplicate lookups (jobs/dedup.py)
+    fingerprint = models.BinaryField(null=True, blank=True, editable=False)
+    fingerprint_band0 = models.IntegerField(null=True, blank=True, editable=False)
+    fingerprint_band1 = models.IntegerField(null=True, blank=True, editable=False)
+    fingerprint_band2 = models.IntegerField(null=True, blank=True, editable=False)
+    fingerprint_band3 = models.IntegerField(null=True, blank=True, editable=False)
+    fingerprint_band4 = models.IntegerField(null=True, blank=True, editable=False)
+    fingerprint_band5 = models.IntegerField(null=True, blank=True, editable=False)
+    fingerprint_band6 = models.IntegerField(null=True, blank=True, editable=False)
+    fingerprint_band7 = models.IntegerField(null=True, blank=True, editable=False)
+    # Set (and the job deactivated) when ingest flags it as a near-duplicate
+    duplicate_of = models.ForeignKey(
+        'self', on_delete=models.SET_NULL, null=True, blank=True, editable=False, related_name='duplicates',
+    )
+    
     # Timestamps
     created_at = models.DateTimeField(default=timezone.now)
     updated_at = models.DateTimeField(auto_now=True)
     is_active = models.BooleanField(default=True)
     
+    # Expiry (jobs/archive.py): without expires_at a job expires JOB_EXPIRY_DAYS after created_at
+    expires_at = models.DateTimeField(null=True, blank=True, help_text="Close the job after this time")
+    expired_at = models.DateTimeField(null=True, blank=True, editable=False, help_text="When the expiry run closed the job")
+    
     class Meta:
         ordering = ['-created_at']
         verbose_name = 'Job'
         verbose_name_plural = 'Jobs'
+        # Listings always filter is_active=True, so these are partial indexes
+        # on PostgreSQL/SQLite. MySQL can't do partial indexes; migration 0005
+        # gives it is_active-leading equivalents instead.
+        indexes = [
+            models.Index(fields=['-created_at', 'id'], condition=models.Q(is_active=True), name='job_active_recent_idx'),
+            models.Index(fields=['category', '-created_at'], condition=models.Q(is_active=True), name='job_active_category_idx'),
+            models.Index(fields=['job_type', '-created_at'], condition=models.Q(is_active=True), name='job_active_type_idx'),
+            models.Index(fields=['work_mode', '-created_at'], condition=models.Q(is_active=True), name='job_active_mode_idx'),
+            # Salary sorts: ?ordering=-salary is on the max, else the min (filters.SALARY_TOP).
+            # PostgreSQL rebuilds it NULLS LAST, see 0021
+            models.Index(
+                Coalesce('annual_salary_max', 'annual_salary_min').desc(), 'id',
+                condition=models.Q(is_active=True), name='job_active_salary_top_idx',
+            ),
+            models.Index(fields=['annual_salary_min', 'id'], condition=models.Q(is_active=True), name='job_active_salary_min_idx'),
+            # Gazetteer city match and ?near= bounding box
+            models.Index(fields=['city', '-created_at'], condition=models.Q(is_active=True), name='job_active_city_idx'),
+            models.Index(fields=['latitude', 'longitude'], condition=models.Q(is_active=True), name='job_active_geo_idx'),
+            # Near-duplicate candidates share at least one fingerprint band
+            models.Index(fields=['fingerprint_band0'], condition=models.Q(is_active=True), name='job_active_band0_idx'),
+            models.Index(fields=['fingerprint_band1'], condition=models.Q(is_active=True), name='job_active_band1_idx'),
+            models.Index(fields=['fingerprint_band2'], condition=models.Q(is_active=True), name='job_active_band2_idx'),
+            models.Index(fields=['fingerprint_band3'], condition=models.Q(is_active=True), name='job_active_band3_idx'),
+            models.Index(fields=['fingerprint_band4'], condition=models.Q(is_active=True), name='job_active_band4_idx'),
+            models.Index(fields=['fingerprint_band5'], condition=models.Q(is_active=True), name='job_active_band5_idx'),
+            models.Index(fields=['fingerprint_band6'], condition=models.Q(is_active=True), name='job_active_band6_idx'),
+            models.Index(fields=['fingerprint_band7'], condition=models.Q(is_active=True), name='job_active_band7_idx'),
+            # Expiry runs: open jobs past expires_at, then expired jobs due for the archive
+            models.Index(fields=['expires_at'], condition=models.Q(is_active=True), name='job_active_expires_idx'),
+            models.Index(fields=['expired_at'], condition=models.Q(expired_at__isnull=False), name='job_expired_idx'),
+        ]
+        constraints = [
+            # Conflict target for ingest upserts; jobs added by hand have no external_id
+            models.UniqueConstraint(fields=['source', 'external_id'], name='job_source_external_id_uniq'),
+        ]
     
     def __str__(self):
         return f"{self.title} at {self.company}"
+
+    def save(self, *args, **kwargs):
+        # One transaction with the stats rollup change, whose pre_save read locks the row (jobs/signals.py)
+        using = kwargs.get('using') or router.db_for_write(type(self), instance=self)
+        with transaction.atomic(using=using):
+            super().save(*args, **kwargs)
     
     @property
     def posted_ago(self):
@@ -106,7 +181,8 @@ class JobApplication(models.Model):
     experience_years = models.IntegerField(default=0)
     
     # Files
-    resume = models.FileField(upload_to='applications/resumes/', help_text="Upload your resume (PDF/DOC)")
+    # Indexed for protected downloads, which look applications up by file name
+    resume = models.FileField(upload_to='applications/resumes/', db_index=True, help_text="Upload your resume (PDF/DOC)")
     cover_letter = models.TextField(blank=True, help_text="Tell us why you're perfect for this role")
     
     # Additional Info
@@ -207,6 +283,14 @@ class JobApplication(models.Model):
         ordering = ['-created_at']
         verbose_name = 'Job'
         verbose_name_plural = 'Jobs'
+        # NOTE: this second Meta is the one JobApplication actually uses
+        indexes = [
+            models.Index(fields=['user', '-applied_at'], name='application_user_recent_idx'),  # my applications
+        ]
+        constraints = [
+            # One application per (job, email) - emails are normalized on save (see jobs/applications.py)
+            models.UniqueConstraint(fields=['job', 'email'], name='application_job_email_uniq'),
+        ]
     
     def __str__(self):
         return f"{self.title} at {self.company}"
@@ -216,3 +300,321 @@ class JobApplication(models.Model):
         """Calculate how long ago the job was posted"""
         from django.utils.timesince import timesince
         return timesince(self.created_at)
+
+
+class JobSearchToken(models.Model):
+    """Inverted index row: one search term for one job, used where the
+    database has no native full-text index (SQLite/MySQL)."""
+    job = models.ForeignKey(Job, on_delete=models.CASCADE, related_name='search_tokens')
+    term = models.CharField(max_length=40)
+    weight = models.PositiveSmallIntegerField(default=1)
+
+    class Meta:
+        unique_together = ['term', 'job']
+        verbose_name = 'Job Search Token'
+        verbose_name_plural = 'Job Search Tokens'
+
+    def __str__(self):
+        return f"{self.term} -> {self.job_id}"
+
+
+class SkillTag(models.Model):
+    """Normalized skill vocabulary - "React.js", "ReactJS" and "react" share one tag"""
+    name = models.CharField(max_length=60, unique=True, help_text="Case-folded, alias-merged key")
+    label = models.CharField(max_length=60, help_text="Display form, as first seen")
+
+    class Meta:
+        ordering = ['name']
+        verbose_name = 'Skill Tag'
+        verbose_name_plural = 'Skill Tags'
+
+    def __str__(self):
+        return self.label
+
+
+class JobSkill(models.Model):
+    """Job-to-skill link, kept in sync with Job.skills from save signals"""
+    job = models.ForeignKey(Job, on_delete=models.CASCADE, related_name='skill_links')
+    tag = models.ForeignKey(SkillTag, on_delete=models.CASCADE, related_name='job_links')
+
+    class Meta:
+        unique_together = ['tag', 'job']
+        verbose_name = 'Job Skill'
+        verbose_name_plural = 'Job Skills'
+
+    def __str__(self):
+        return f"{self.tag_id} -> {self.job_id}"
+
+
+class JobStats(models.Model):
+    """Single-row rollup of open-job counters, maintained from Job signals (see jobs/stats.py)"""
+    total_jobs = models.PositiveIntegerField(default=0)
+    categories = models.PositiveIntegerField(default=0, help_text="Categories with at least one open job")
+    companies = models.PositiveIntegerField(default=0, help_text="Companies with at least one open job")
+    updated_at = models.DateTimeField(auto_now=True)
+
+    class Meta:
+        verbose_name = 'Job Stats'
+        verbose_name_plural = 'Job Stats'
+
+    def __str__(self):
+        return f"{self.total_jobs} open jobs"
+
+
+class JobStatCount(models.Model):
+    """Open-job count for one category or company; rows are removed at zero"""
+    KIND_CHOICES = [
+        ('category', 'Category'),
+        ('company', 'Company'),
+    ]
+
+    kind = models.CharField(max_length=10, choices=KIND_CHOICES)
+    key = models.CharField(max_length=150)
+    open_jobs = models.PositiveIntegerField(default=0)
+
+    class Meta:
+        unique_together = ['kind', 'key']
+        verbose_name = 'Job Stat Count'
+        verbose_name_plural = 'Job Stat Counts'
+
+    def __str__(self):
+        return f"{self.kind} {self.key}: {self.open_jobs}"
+
+
+class ArchivedJob(models.Model):
+    """Expired job moved out of jobs_job by the archive_jobs command (see jobs/archive.py)"""
+    # The Job's own id, so old job links still resolve through the detail view
+    id = models.BigIntegerField(primary_key=True)
+    title = models.CharField(max_length=200)
+    company = models.CharField(max_length=150)
+    location = models.CharField(max_length=100)
+    city = models.CharField(max_length=80, blank=True, default='')
+    latitude = models.FloatField(null=True, blank=True)
+    longitude = models.FloatField(null=True, blank=True)
+    category = models.CharField(max_length=50, choices=Job.CATEGORY_CHOICES)
+    job_type = models.CharField(max_length=20, choices=Job.JOB_TYPE_CHOICES)
+    experience_level = models.CharField(max_length=20, choices=Job.EXPERIENCE_CHOICES)
+    work_mode = models.CharField(max_length=20, choices=Job.WORK_MODE_CHOICES)
+    min_salary = models.DecimalField(max_digits=10, decimal_places=2, null=True, blank=True)
+    max_salary = models.DecimalField(max_digits=10, decimal_places=2, null=True, blank=True)
+    salary_display = models.CharField(max_length=50)
+    annual_salary_min = models.PositiveIntegerField(null=True, blank=True)
+    annual_salary_max = models.PositiveIntegerField(null=True, blank=True)
+    description = models.TextField()
+    requirements = models.TextField(null=True, blank=True)
+    skills = models.JSONField(default=list)
+    company_logo = models.CharField(max_length=10, default='🏢')
+    company_size = models.CharField(max_length=20)
+    source = models.CharField(max_length=50, blank=True, default='')
+    external_id = models.CharField(max_length=100, null=True, blank=True)
+    created_at = models.DateTimeField()
+    updated_at = models.DateTimeField()
+    expires_at = models.DateTimeField(null=True, blank=True)
+    expired_at = models.DateTimeField(null=True, blank=True)
+    archived_at = models.DateTimeField(default=timezone.now)
+
+    class Meta:
+        verbose_name = 'Archived Job'
+        verbose_name_plural = 'Archived Jobs'
+
+    def __str__(self):
+        return f"{self.title} at {self.company} (archived)"
+
+    # Serialized like a closed Job
+    @property
+    def is_active(self):
+        return False
+
+    @property
+    def posted_ago(self):
+        from django.utils.timesince import timesince
+        return timesince(self.created_at)
+
+
+class SavedSearch(models.Model):
+    """A user's saved job list filters; new jobs that match them are sent as alerts (see jobs/alerts.py)"""
+    user = models.ForeignKey(CustomUser, on_delete=models.CASCADE, related_name='saved_searches')
+    name = models.CharField(max_length=100, blank=True)
+    params = models.JSONField(default=dict, help_text="Job list query params, normalized on save")
+    # Hash of the equality filters, looked up from each new job's attribute combinations
+    key_hash = models.BigIntegerField(editable=False, default=0)
+    # Key of the first required skill (skills_mode=all), '' if none - a job must list it to match
+    key_skill = models.CharField(max_length=60, blank=True, default='', editable=False)
+    is_active = models.BooleanField(default=True)
+    created_at = models.DateTimeField(default=timezone.now)
+    last_alerted_at = models.DateTimeField(null=True, blank=True, editable=False)
+
+    class Meta:
+        ordering = ['-created_at']
+        verbose_name = 'Saved Search'
+        verbose_name_plural = 'Saved Searches'
+        indexes = [
+            models.Index(fields=['key_hash'], condition=models.Q(is_active=True), name='saved_search_key_idx'),
+            models.Index(fields=['user', '-created_at'], name='saved_search_user_idx'),
+        ]
+
+    def __str__(self):
+        return self.name or f"Saved search {self.pk}"
+
+
+class JobSimilarity(models.Model):
+    """A job's similarity signature, kept by `manage.py build_similar_jobs` (see jobs/similar.py)"""
+    job = models.OneToOneField(Job, on_delete=models.CASCADE, primary_key=True, related_name='similarity')
+    # Packed MinHash signature of title words, skills and description words; NULL when the job has none
+    signature = models.BinaryField(null=True, blank=True)
+    computed_at = models.DateTimeField()
+
+    class Meta:
+        verbose_name = 'Job Similarity'
+        verbose_name_plural = 'Job Similarities'
+
+    def __str__(self):
+        return f"Signature of {self.job_id}"
+
+
+class SimilarJob(models.Model):
+    """One of a job's precomputed most similar jobs, read by /api/jobs/<id>/similar/"""
+    job = models.ForeignKey(Job, on_delete=models.CASCADE, related_name='similar_links')
+    similar = models.ForeignKey(Job, on_delete=models.CASCADE, related_name='+')
+    score = models.FloatField(help_text="Estimated Jaccard similarity of the two jobs")
+
+    class Meta:
+        verbose_name = 'Similar Job'
+        verbose_name_plural = 'Similar Jobs'
+        indexes = [
+            models.Index(fields=['job', '-score'], name='similar_job_score_idx'),
+        ]
+
+    def __str__(self):
+        return f"{self.job_id} ~ {self.similar_id}"
+
+
+class JobPopularity(models.Model):
+    """A job's view and application counts, written in batches from worker buffers (see jobs/popularity.py)"""
+    job = models.OneToOneField(Job, on_delete=models.CASCADE, primary_key=True, related_name='popularity')
+    views = models.PositiveIntegerField(default=0)
+    applications = models.PositiveIntegerField(default=0)
+    # Views and weighted applications, halving every JOB_TRENDING_HALF_LIFE_HOURS; decayed as of scored_at
+    score = models.FloatField(default=0)
+    scored_at = models.DateTimeField()
+
+    class Meta:
+        verbose_name = 'Job Popularity'
+        verbose_name_plural = 'Job Popularity'
+        indexes = [
+            models.Index(fields=['-score'], name='job_popularity_score_idx'),
+        ]
+
+    def __str__(self):
+        return f"{self.job_id}: {self.views} views, {self.applications} applications"
+
+
+class TrendingJob(models.Model):
+    """One of the open jobs with the highest decayed popularity, kept by `manage.py update_trending_jobs`"""
+    job = models.OneToOneField(Job, on_delete=models.CASCADE, primary_key=True, related_name='trending')
+    rank = models.PositiveSmallIntegerField()
+    score = models.FloatField(help_text="Popularity score decayed to computed_at")
+    computed_at = models.DateTimeField()
+
+    class Meta:
+        ordering = ['rank']
+        verbose_name = 'Trending Job'
+        verbose_name_plural = 'Trending Jobs'
+
+    def __str__(self):
+        return f"#{self.rank} {self.job_id}"
+
+
+class IdempotencyKey(models.Model):
+    """Response stored for an application submit sent with an Idempotency-Key header (see jobs/applications.py)"""
+    # SHA-256 of the user, endpoint and header value
+    key = models.CharField(max_length=64, primary_key=True)
+    fingerprint = models.CharField(max_length=64, help_text="SHA-256 of the submitted fields")
+    application = models.ForeignKey(JobApplication, on_delete=models.CASCADE, null=True, blank=True, related_name='+')
+    status_code = models.PositiveSmallIntegerField(null=True, blank=True)
+    response = models.JSONField(null=True, blank=True)
+    # Indexed for the purge of expired keys
+    created_at = models.DateTimeField(default=timezone.now, db_index=True)
+
+    class Meta:
+        verbose_name = 'Idempotency Key'
+        verbose_name_plural = 'Idempotency Keys'
+
+    def __str__(self):
+        return self.key
+
+
+class Task(models.Model):
+    """A call of a @task function waiting for `manage.py run_worker` (see jobs/tasks.py)"""
+    QUEUED = 'queued'
+    RUNNING = 'running'
+    FAILED = 'failed'
+    STATUS_CHOICES = [
+        (QUEUED, 'Queued'),
+        (RUNNING, 'Running'),
+        (FAILED, 'Failed'),
+    ]
+
+    name = models.CharField(max_length=200, help_text="Dotted path of the task function")
+    args = models.JSONField(default=list, blank=True)
+    kwargs = models.JSONField(default=dict, blank=True)
+    status = models.CharField(max_length=10, choices=STATUS_CHOICES, default=QUEUED)
+    # Higher runs first
+    priority = models.SmallIntegerField(default=0)
+    run_at = models.DateTimeField(default=timezone.now, help_text="Not run before this time")
+    attempts = models.PositiveSmallIntegerField(default=0)
+    max_attempts = models.PositiveSmallIntegerField(default=5)
+    locked_by = models.CharField(max_length=100, blank=True, help_text="Worker holding the task")
+    locked_until = models.DateTimeField(null=True, blank=True, help_text="End of the worker's lease")
+    last_error = models.TextField(blank=True)
+    created_at = models.DateTimeField(default=timezone.now)
+
+    class Meta:
+        verbose_name = 'Task'
+        verbose_name_plural = 'Tasks'
+        indexes = [
+            models.Index(fields=['status', '-priority', 'run_at'], name='task_claim_idx'),
+        ]
+
+    def __str__(self):
+        return f"{self.name} ({self.status})"
+
+
+class Upload(models.Model):
+    """A resumable chunked upload of a resume or profile picture (see jobs/uploads.py)"""
+    RESUME = 'resume'
+    PROFILE_PICTURE = 'profile_picture'
+    PURPOSE_CHOICES = [
+        (RESUME, 'Resume'),
+        (PROFILE_PICTURE, 'Profile Picture'),
+    ]
+    OPEN = 'open'
+    COMPLETE = 'complete'
+    USED = 'used'
+    STATUS_CHOICES = [
+        (OPEN, 'Receiving chunks'),
+        (COMPLETE, 'Finalized'),
+        (USED, 'Attached'),
+    ]
+
+    id = models.UUIDField(primary_key=True, default=uuid.uuid4, editable=False)
+    # NULL for guests: the id alone gives access
+    user = models.ForeignKey(CustomUser, on_delete=models.CASCADE, null=True, blank=True, related_name='+')
+    purpose = models.CharField(max_length=20, choices=PURPOSE_CHOICES)
+    filename = models.CharField(max_length=255)
+    content_type = models.CharField(max_length=100, blank=True)
+    size = models.PositiveBigIntegerField()
+    offset = models.PositiveBigIntegerField(default=0, help_text="Bytes received so far")
+    sha256 = models.CharField(max_length=64, blank=True, help_text="Set when finalized")
+    # Direct uploads (jobs/direct_uploads.py): the name the client was signed to store the file under
+    stored_name = models.CharField(max_length=255, blank=True)
+    status = models.CharField(max_length=10, choices=STATUS_CHOICES, default=OPEN)
+    created_at = models.DateTimeField(default=timezone.now)
+    expires_at = models.DateTimeField(db_index=True)
+
+    class Meta:
+        verbose_name = 'Upload'
+        verbose_name_plural = 'Uploads'
+
+    def __str__(self):
+        return f"{self.filename} ({self.offset}/{self.size})"
@@ -0,0 +1,235 @@
+"""
+SkillConnect - Keyset Pagination
+Opaque-cursor pagination for the job listing API.
+
+Each cursor carries the sort key of the last (or first) row it saw, and the
+next page is fetched with a WHERE on that key instead of OFFSET. No COUNT(*)
+is issued, so page 500 costs the same as page 1. Works with any ordering
+chosen by the filter backends (including search relevance); `id` is always
+appended as the final tie-breaker so the sort key is unique.
+"""
+from collections import OrderedDict
+from functools import reduce
+import operator
+
+from django.core import signing
+from django.core.exceptions import FieldDoesNotExist
+from django.db.models import F, Q
+from rest_framework.exceptions import NotFound
+from rest_framework.pagination import BasePagination
+from rest_framework.response import Response
+from rest_framework.utils.urls import remove_query_param, replace_query_param
+
+
+class KeysetCursorPagination(BasePagination):
+    """Keyset pagination on the queryset's ordering plus `id`"""
+
+    cursor_query_param = 'cursor'
+    page_size = 20
+    page_size_query_param = 'page_size'
+    max_page_size = 100
+    default_ordering = ('-created_at',)
+    cursor_salt = 'jobs.pagination.cursor'
+    invalid_cursor_message = 'Invalid cursor'
+
+    def paginate_queryset(self, queryset, request, view=None):
+        self.request = request
+        self.page_size = self.get_page_size(request)
+        self.ordering = self.get_ordering(queryset)
+        self.model = queryset.model
+        self.annotations = queryset.query.annotations
+
+        position, reverse = self.decode_cursor(request)
+        ordering = [self._invert(key) for key in self.ordering] if reverse else self.ordering
+
+        queryset = queryset.order_by(*[self._order_expression(key) for key in ordering])
+        if position is not None:
+            queryset = queryset.filter(self._keyset_filter(ordering, position))
+
+        rows = list(queryset[:self.page_size + 1])
+        return self._paginate_rows(rows, position, reverse)
+
+    def paginate_catalog(self, catalog, queryset, request, view=None):
+        """paginate_queryset(), but the page's ids come from an in-memory catalog.
+
+        Only those rows are loaded, by primary key. Returns None when the
+        catalog cannot answer this request (the caller uses the database).
+        """
+        self.request = request
+        self.page_size = self.get_page_size(request)
+        self.ordering = self.get_ordering(queryset)
+        self.model = queryset.model
+        self.annotations = queryset.query.annotations
+
+        position, reverse = self.decode_cursor(request)
+        ids = catalog.page(request.query_params, self.ordering, position, reverse, self.page_size + 1)
+        if ids is None:
+            return None
+        loaded = queryset.order_by().in_bulk(ids)
+        return self._paginate_rows([loaded[pk] for pk in ids if pk in loaded], position, reverse)
+
+    def _paginate_rows(self, rows, position, reverse):
+        """Trim the page_size + 1 rows fetched in walk order and record the cursor state"""
+        has_more = len(rows) > self.page_size
+        rows = rows[:self.page_size]
+        if reverse:
+            rows.reverse()
+            self.has_next, self.has_previous = True, has_more
+        else:
+            self.has_next, self.has_previous = has_more, position is not None
+
+        self.first_position = self._position(rows[0]) if rows else None
+        self.last_position = self._position(rows[-1]) if rows else None
+        return rows
+
+    def get_paginated_response(self, data):
+        return Response(OrderedDict([
+            ('next', self.get_next_link()),
+            ('previous', self.get_previous_link()),
+            ('results', data),
+        ]))
+
+    def get_paginated_response_schema(self, schema):
+        return {
+            'type': 'object',
+            'required': ['results'],
+            'properties': {
+                'next': {'type': 'string', 'nullable': True, 'format': 'uri'},
+                'previous': {'type': 'string', 'nullable': True, 'format': 'uri'},
+                'results': schema,
+            },
+        }
+
+    def get_page_size(self, request):
+        try:
+            size = int(request.query_params[self.page_size_query_param])
+        except (KeyError, ValueError):
+            return self.page_size
+        return max(1, min(size, self.max_page_size))
+
+    def get_ordering(self, queryset):
+        """Return [(name, descending), ...] ending with the `id` tie-breaker"""
+        order_by = list(queryset.query.order_by) or list(queryset.model._meta.ordering) or list(self.default_ordering)
+        ordering = []
+        for entry in order_by:
+            if not isinstance(entry, str):
+                continue
+            name = entry.lstrip('-')
+            if name in ('pk', 'id'):
+                continue
+            ordering.append((name, entry.startswith('-')))
+        ordering.append(('id', False))
+        return ordering
+
+    # Cursor encoding -------------------------------------------------------
+
+    def decode_cursor(self, request):
+        token = request.query_params.get(self.cursor_query_param)
+        if not token:
+            return None, False
+        try:
+            payload = signing.loads(token, salt=self.cursor_salt)
+            keys, values, reverse = payload['k'], payload['v'], payload['r']
+        except (signing.BadSignature, KeyError, TypeError):
+            raise NotFound(self.invalid_cursor_message)
+        # A cursor issued for another ordering would skip or repeat rows
+        if keys != self._ordering_signature() or len(values) != len(self.ordering):
+            raise NotFound(self.invalid_cursor_message)
+        return [self._to_python(name, value) for (name, _), value in zip(self.ordering, values)], bool(reverse)
+
+    def encode_cursor(self, position, reverse):
+        payload = {
+            'k': self._ordering_signature(),
+            'v': [self._to_json(value) for value in position],
+            'r': int(reverse),
+        }
+        token = signing.dumps(payload, salt=self.cursor_salt, compress=True)
+        url = self.request.build_absolute_uri()
+        return replace_query_param(url, self.cursor_query_param, token)
+
+    def get_next_link(self):
+        if not self.has_next:
+            return None
+        if self.last_position is None:
+            return remove_query_param(self.request.build_absolute_uri(), self.cursor_query_param)
+        return self.encode_cursor(self.last_position, reverse=False)
+
+    def get_previous_link(self):
+        if not self.has_previous:
+            return None
+        if self.first_position is None:
+            return remove_query_param(self.request.build_absolute_uri(), self.cursor_query_param)
+        return self.encode_cursor(self.first_position, reverse=True)
+
+    def _ordering_signature(self):
+        return [('-' if desc else '') + name for name, desc in self.ordering]
+
+    def _field(self, name):
+        """The model field, or the output field of an annotation such as search_rank or salary_top"""
+        try:
+            return self.model._meta.get_field(name)
+        except FieldDoesNotExist:
+            annotation = self.annotations.get(name)
+            return annotation.output_field if annotation is not None else None
+
+    def _to_json(self, value):
+        if value is None or isinstance(value, (int, float, str)):
+            return value
+        if hasattr(value, 'isoformat'):
+            return value.isoformat()
+        return str(value)  # Decimal
+
+    def _to_python(self, name, value):
+        if value is None:
+            return None
+        field = self._field(name)
+        try:
+            return field.to_python(value) if field is not None else float(value)
+        except Exception:
+            raise NotFound(self.invalid_cursor_message)
+
+    # Keyset query building -------------------------------------------------
+
+    def _position(self, row):
+        return [getattr(row, name) for name, _ in self.ordering]
+
+    def _nullable(self, name):
+        field = self._field(name)
+        return field is not None and field.null
+
+    @staticmethod
+    def _invert(key):
+        name, desc = key
+        return name, not desc
+
+    def _order_expression(self, key):
+        """NULLs always sort after values in the forward direction"""
+        name, desc = key
+        nulls_last = desc == self._forward_desc(name)
+        expression = F(name)
+        if not self._nullable(name):
+            return expression.desc() if desc else expression.asc()
+        nulls = {'nulls_last': True} if nulls_last else {'nulls_first': True}
+        return expression.desc(**nulls) if desc else expression.asc(**nulls)
+
+    def _forward_desc(self, name):
+        return dict(self.ordering)[name]
+
+    def _keyset_filter(self, ordering, position):
+        """(a > x) OR (a = x AND b > y) OR ... for the given directions"""
+        branches = []
+        equal = []
+        for (name, desc), value in zip(ordering, position):
+            nulls_last = desc == self._forward_desc(name)
+            if value is None:
+                after = Q(**{f'{name}__isnull': False}) if not nulls_last else None
+                same = Q(**{f'{name}__isnull': True})
+            else:
+                after = Q(**{f'{name}__lt' if desc else f'{name}__gt': value})
+                if nulls_last and self._nullable(name):
+                    after |= Q(**{f'{name}__isnull': True})
+                same = Q(**{name: value})
+            if after is not None:
+                branches.append(reduce(operator.and_, equal + [after]))
+            equal.append(same)
+        return reduce(operator.or_, branches) if branches else Q(pk__in=[])
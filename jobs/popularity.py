@@ -0,0 +1,246 @@
+"""
+SkillConnect - Job Popularity
+View and application counts per job, and the trending list behind
+/api/jobs/trending/.
+
+Detail views and applications are counted in memory (one EventBuffer per
+worker) rather than with an UPDATE per request, which would queue every
+request for a popular job on that job's row lock. A background thread
+writes the buffer out JOB_EVENTS_FLUSH_SECONDS after its first unflushed
+event, whether or not more events arrive, and the process flushes once more
+when it exits. Flushes go in batches: the touched JobPopularity rows are
+locked in pk order and bulk-updated, one transaction per FLUSH_BATCH jobs
+however many events they got. Counts buffered by a worker that is killed
+are lost - at most one flush interval's worth. Views from crawlers, link
+previews and uptime checks (by User-Agent) are not counted.
+
+Each JobPopularity row also keeps a decayed score: views plus APPLY_WEIGHT
+per application, halving in weight every JOB_TRENDING_HALF_LIFE_HOURS and
+stored as of scored_at. refresh_trending() - a periodic task, and `manage.py
+update_trending_jobs` - ranks the open jobs by score decayed to now and keeps the best TRENDING_SIZE in TrendingJob, so
+the endpoint reads a small table instead of ranking every job.
+"""
+
+import atexit
+import logging
+import re
+import threading
+import time
+from heapq import heappush, heappushpop
+
+from django.conf import settings
+from django.db import DatabaseError, connections, transaction
+from django.utils import timezone
+
+from .tasks import task
+
+logger = logging.getLogger(__name__)
+
+VIEW = 'view'
+APPLY = 'apply'
+EVENT_KINDS = (VIEW, APPLY)
+VIEW_WEIGHT = 1.0
+APPLY_WEIGHT = 10.0
+
+FLUSH_BATCH = 500
+# A buffer holding this many jobs is flushed without waiting for the interval
+MAX_BUFFERED_JOBS = 10000
+
+TRENDING_SIZE = 100
+DEFAULT_LIMIT = 20
+SCAN_CHUNK = 1000
+
+# User-Agents of requests no person made
+AUTOMATED_AGENTS = re.compile(
+    r'bot|crawl|spider|slurp|preview|monitor|uptime|headless|lighthouse|curl|wget|python-requests|httpx',
+    re.IGNORECASE,
+)
+
+
+def half_life_seconds():
+    return getattr(settings, 'JOB_TRENDING_HALF_LIFE_HOURS', 24) * 3600
+
+
+def decayed(score, scored_at, now):
+    """A score stored as of scored_at, decayed to now"""
+    age = max((now - scored_at).total_seconds(), 0)
+    return score * 0.5 ** (age / half_life_seconds())
+
+
+def flush_counts(counts, using='default'):
+    """Add {job pk: [views, applications]} to JobPopularity; returns the number of jobs updated.
+
+    Events of jobs deleted or archived since are dropped.
+    """
+    from .models import Job, JobPopularity
+
+    now = timezone.now()
+    rows = JobPopularity.objects.using(using)
+    ids = sorted(counts)
+    updated = 0
+    for start in range(0, len(ids), FLUSH_BATCH):
+        batch = ids[start:start + FLUSH_BATCH]
+        with transaction.atomic(using=using):
+            existing = list(Job.objects.using(using).filter(pk__in=batch).values_list('pk', flat=True))
+            rows.bulk_create([JobPopularity(job_id=pk, scored_at=now) for pk in existing], ignore_conflicts=True)
+            # Locked in pk order so concurrent flushes from other workers cannot deadlock
+            locked = list(rows.select_for_update().filter(job_id__in=existing).order_by('job_id'))
+            for row in locked:
+                views, applications = counts[row.job_id]
+                row.views += views
+                row.applications += applications
+                row.score = decayed(row.score, row.scored_at, now) + views * VIEW_WEIGHT + applications * APPLY_WEIGHT
+                row.scored_at = now
+            rows.bulk_update(locked, ['views', 'applications', 'score', 'scored_at'])
+        updated += len(locked)
+    return updated
+
+
+class EventBuffer:
+    """This worker's unflushed event counts: {job pk: [views, applications]}"""
+
+    def __init__(self):
+        self.counts = {}
+        self.lock = threading.Lock()
+        self.flushed_at = time.monotonic()
+        self.flush_thread = None
+        self.wake = threading.Event()
+        self.exit_flush = False
+
+    def add(self, pk, kind, using='default'):
+        """Count one event; a background thread flushes it within JOB_EVENTS_FLUSH_SECONDS.
+
+        With JOB_EVENTS_BACKGROUND_FLUSH off, or in an open transaction, the
+        flush runs here instead once the interval has passed.
+        """
+        index = EVENT_KINDS.index(kind)
+        interval = getattr(settings, 'JOB_EVENTS_FLUSH_SECONDS', 10)
+        # A background thread cannot see this transaction's writes (tests, atomic requests)
+        background = getattr(settings, 'JOB_EVENTS_BACKGROUND_FLUSH', True) and not connections[using].in_atomic_block
+        with self.lock:
+            self.counts.setdefault(pk, [0, 0])[index] += 1
+            full = len(self.counts) >= MAX_BUFFERED_JOBS
+            due = full or time.monotonic() - self.flushed_at >= interval
+            start = background and self.flush_thread is None
+            if start:
+                self.flush_thread = threading.Thread(
+                    target=self.run_flushes, args=(using,), name='job-events-flush', daemon=True,
+                )
+                if not self.exit_flush:
+                    atexit.register(self.flush, using)
+                    self.exit_flush = True
+        if start:
+            self.flush_thread.start()
+        elif background and full:
+            self.wake.set()
+        elif not background and due:
+            self.flush(using)
+
+    def run_flushes(self, using='default'):
+        """Background thread: flush every JOB_EVENTS_FLUSH_SECONDS until the buffer stays empty"""
+        while True:
+            interval = getattr(settings, 'JOB_EVENTS_FLUSH_SECONDS', 10)
+            self.wake.wait(max(interval - (time.monotonic() - self.flushed_at), 0))
+            self.wake.clear()
+            self.flush(using, close_connection=True)
+            with self.lock:
+                if not self.counts:
+                    # The next event starts a new thread
+                    self.flush_thread = None
+                    return
+
+    def take(self):
+        """Empty the buffer and return what it held"""
+        with self.lock:
+            counts, self.counts = self.counts, {}
+            self.flushed_at = time.monotonic()
+        return counts
+
+    def restore(self, counts):
+        """Put counts that failed to flush back into the buffer"""
+        with self.lock:
+            for pk, (views, applications) in counts.items():
+                buffered = self.counts.setdefault(pk, [0, 0])
+                buffered[0] += views
+                buffered[1] += applications
+
+    def flush(self, using='default', close_connection=False):
+        """Write the buffered counts out; returns the number of jobs updated"""
+        counts = self.take()
+        try:
+            return flush_counts(counts, using) if counts else 0
+        except DatabaseError:
+            logger.exception('Flushing event counts of %d jobs failed; kept for the next flush', len(counts))
+            self.restore(counts)
+            return 0
+        finally:
+            if close_connection:
+                connections[using].close()
+
+
+job_events = EventBuffer()
+
+
+def is_automated(request):
+    """True for crawlers, link previews, uptime checks and scripts - their views are not counted"""
+    return bool(AUTOMATED_AGENTS.search(request.META.get('HTTP_USER_AGENT', '')))
+
+
+def record_event(pk, kind, using='default'):
+    """Count a view or application of a job (written out later, in batches)"""
+    if getattr(settings, 'JOB_EVENTS_ENABLED', True):
+        job_events.add(pk, kind, using)
+
+
+def rank_trending(limit=TRENDING_SIZE, using='default'):
+    """[(score decayed to now, job pk)] of the open jobs scoring highest, best first.
+
+    Rows are read in stored-score order: a score only decays, so the scan
+    stops at the first stored score below the limit-th best decayed one.
+    """
+    from .models import JobPopularity
+
+    now = timezone.now()
+    rows = (
+        JobPopularity.objects.using(using).filter(job__is_active=True, score__gt=0)
+        .order_by('-score').values_list('score', 'scored_at', 'job_id')
+    )
+    best = []
+    for score, scored_at, pk in rows.iterator(chunk_size=SCAN_CHUNK):
+        if len(best) == limit and score <= best[0][0]:
+            break
+        item = (decayed(score, scored_at, now), pk)
+        if len(best) < limit:
+            heappush(best, item)
+        else:
+            heappushpop(best, item)
+    return sorted(best, reverse=True)
+
+
+@task(max_attempts=3)
+def refresh_trending(using='default'):
+    """Rebuild TrendingJob from the current decayed scores; returns the number of trending jobs"""
+    from core.performance import CacheManager
+    from .models import TrendingJob
+
+    now = timezone.now()
+    rows = [
+        TrendingJob(job_id=pk, rank=rank, score=score, computed_at=now)
+        for rank, (score, pk) in enumerate(rank_trending(TRENDING_SIZE, using), 1)
+    ]
+    with transaction.atomic(using=using):
+        TrendingJob.objects.using(using).all().delete()
+        TrendingJob.objects.using(using).bulk_create(rows)
+    CacheManager.invalidate_popular_jobs()
+    return len(rows)
+
+
+def trending_jobs(columns, limit=TRENDING_SIZE, using='default'):
+    """TrendingJob rows whose job is still open, best first, with the job joined (only columns loaded)"""
+    from .models import TrendingJob
+
+    return (
+        TrendingJob.objects.using(using).filter(job__is_active=True)
+        .select_related('job').only('score', 'rank', 'job_id', *(f'job__{column}' for column in columns))
+        .order_by('rank')[:limit]
+    )
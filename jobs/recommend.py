@@ -0,0 +1,400 @@
+"""
+SkillConnect - Job Recommendations
+Local TF-IDF recommender behind AIJobMatchingView: ranks every active job
+against a user's skills, work experience and education without any API
+calls.
+
+Jobs are vectorized from their title, skill tags and requirements: weighted
+term counts, log-scaled, times the term's idf and L2-normalized, so the dot
+product with a user vector built the same way is their cosine similarity.
+
+Frequent terms (in DENSE_RATIO of the jobs or more) are packed columns - a
+Python int holding one 32-bit weight per row, like the catalog's bitmaps -
+so a query's frequent terms score every job with one big-int multiply-add
+each. Rarer terms keep posting lists. Weights in the packed columns are
+quantized to QUANTIZE_SCALE steps, so the best RERANK_CANDIDATES rows are
+scored again exactly from their own vectors.
+
+Each worker keeps its own matrix. When the jobs version changes, only the
+jobs whose updated_at moved are vectorized again; their old rows stay as
+zeroed tombstones. Idf weights (and which terms are packed) are those of
+the last full build until tombstones pass COMPACT_RATIO of the rows and it
+is rebuilt.
+"""
+
+import math
+import sys
+import threading
+import time
+from array import array
+from collections import defaultdict
+from heapq import nlargest
+from itertools import compress
+from operator import itemgetter
+
+from django.conf import settings
+from django.db import connections
+
+from .cache import get_jobs_version
+from .search import tokenize
+from .skills import normalize_skill, skill_labels
+
+DEFAULT_LIMIT = 10
+MAX_LIMIT = 50
+
+# Term count weights; skill tags are their own terms ("skill:python") on top of their words
+TITLE_WEIGHT = 3
+SKILL_WEIGHT = 3
+SKILL_PREFIX = 'skill:'
+
+DENSE_RATIO = 1 / 16
+DENSE_MIN_DF = 64
+# Query and row weights are at most 1 and unit vectors dot to at most 1, so a
+# packed score stays under QUANTIZE_SCALE ** 2 (plus rounding) - well inside 32 bits
+QUANTIZE_SCALE = 4095
+FIELD_BYTES = 4
+RERANK_CANDIDATES = 200
+
+COMPACT_RATIO = 0.2
+COMPACT_MIN_ROWS = 1000
+
+JOB_COLUMNS = ('pk', 'updated_at', 'title', 'skills', 'requirements')
+FETCH_CHUNK = 500
+
+
+def job_term_counts(title, skills, requirements):
+    """{term: weighted count} for a job's title, skills and requirements"""
+    counts = defaultdict(float)
+    for term in tokenize(title):
+        counts[term] += TITLE_WEIGHT
+    for key, label in skill_labels(skills).items():
+        counts[SKILL_PREFIX + key] += SKILL_WEIGHT
+        for term in tokenize(label):
+            counts[term] += 1
+    for term in tokenize(requirements):
+        counts[term] += 1
+    return counts
+
+
+def user_term_counts(user, using='default'):
+    """{term: weighted count} for a user's Skill, WorkExperience and Education rows.
+
+    Skills count by level (Intermediate = SKILL_WEIGHT), job titles held like
+    job titles.
+    """
+    from accounts.models import Education, Skill, WorkExperience
+
+    counts = defaultdict(float)
+    for name, level in Skill.objects.using(using).filter(user=user).values_list('name', 'level'):
+        key = normalize_skill(name)
+        if key:
+            counts[SKILL_PREFIX + key] += SKILL_WEIGHT * level / 3
+        for term in tokenize(name):
+            counts[term] += 1
+    for title, description in WorkExperience.objects.using(using).filter(user=user).values_list('title', 'description'):
+        for term in tokenize(title):
+            counts[term] += TITLE_WEIGHT
+        for term in tokenize(description):
+            counts[term] += 1
+    for degree, description in Education.objects.using(using).filter(user=user).values_list('degree', 'description'):
+        for term in tokenize(degree) + tokenize(description):
+            counts[term] += 1
+    return counts
+
+
+def smooth_idf(rows, df):
+    return math.log((1 + rows) / (1 + df)) + 1
+
+
+def quantize(weight):
+    return round(weight * QUANTIZE_SCALE)
+
+
+def pack(fields):
+    """Packed column (int) from an array('I') of per-row fields"""
+    if sys.byteorder == 'big':
+        fields = array('I', fields)
+        fields.byteswap()
+    return int.from_bytes(fields.tobytes(), 'little')
+
+
+def unpack(column, size):
+    """array('I') of size per-row fields from a packed column"""
+    fields = array('I', column.to_bytes(size * FIELD_BYTES, 'little'))
+    if sys.byteorder == 'big':
+        fields.byteswap()
+    return fields
+
+
+class TfidfMatrix:
+    """Sparse TF-IDF rows of the active jobs, with packed columns for frequent terms"""
+
+    def __init__(self, jobs=(), dense_df=None):
+        """jobs: (pk, updated_at, title, skills, requirements) tuples.
+
+        Terms in at least dense_df rows get a packed column (default:
+        DENSE_RATIO of the rows, and at least DENSE_MIN_DF).
+        """
+        self.terms = {}
+        self.df = array('I')
+        self.ids = array('q')
+        self.row_terms = []
+        self.row_weights = []
+        self.alive = bytearray()
+        self.rows = {}
+        self.stamps = {}
+        self.dead = 0
+
+        # Term counts first: idf needs every job's terms
+        for pk, updated_at, *fields in jobs:
+            counts = job_term_counts(*fields)
+            term_ids = array('I', (self._term_id(term) for term in counts))
+            for term_id in term_ids:
+                self.df[term_id] += 1
+            self._add_row(pk, updated_at, term_ids, array('f', counts.values()))
+        size = len(self.ids)
+        if dense_df is None:
+            dense_df = max(size * DENSE_RATIO, DENSE_MIN_DF)
+        self.idf = array('d', (smooth_idf(size, df) for df in self.df))
+        fields = {term_id: array('I', bytes(size * FIELD_BYTES)) for term_id, df in enumerate(self.df) if df >= dense_df}
+        self.posting_rows = [array('I') for _ in self.terms]
+        self.posting_weights = [array('f') for _ in self.terms]
+        for row, (term_ids, counts) in enumerate(zip(self.row_terms, self.row_weights)):
+            weights = self._weigh(zip(term_ids, counts))
+            self.row_weights[row] = array('f', map(itemgetter(1), weights))
+            for term_id, weight in weights:
+                if term_id in fields:
+                    fields[term_id][row] = quantize(weight)
+                else:
+                    self.posting_rows[term_id].append(row)
+                    self.posting_weights[term_id].append(weight)
+        self.columns = {term_id: pack(column) for term_id, column in fields.items()}
+
+    def __len__(self):
+        return len(self.ids) - self.dead
+
+    def _term_id(self, term):
+        term_id = self.terms.get(term)
+        if term_id is None:
+            term_id = self.terms[term] = len(self.df)
+            self.df.append(0)
+        return term_id
+
+    def _add_row(self, pk, updated_at, term_ids, weights):
+        self.rows[pk] = len(self.ids)
+        self.stamps[pk] = updated_at
+        self.ids.append(pk)
+        self.row_terms.append(term_ids)
+        self.row_weights.append(weights)
+        self.alive.append(1)
+
+    def _weigh(self, counts):
+        """[(term id, weight)] L2-normalized log-scaled tf-idf of (term id, count) pairs"""
+        weights = [(term_id, (1 + math.log(count)) * self.idf[term_id]) for term_id, count in counts]
+        norm = math.sqrt(sum(weight * weight for _, weight in weights)) or 1.0
+        return [(term_id, weight / norm) for term_id, weight in weights]
+
+    def vectorize(self, counts):
+        """Query vector for {term: count}; terms no job uses are dropped"""
+        known = [(self.terms[term], count) for term, count in counts.items() if term in self.terms]
+        return self._weigh(known)
+
+    # Incremental updates ---------------------------------------------------
+
+    def stale(self, stamps):
+        """(removed pks, changed or new pks) against {pk: updated_at} of the active jobs"""
+        removed = [pk for pk in self.stamps if pk not in stamps]
+        changed = [pk for pk, stamp in stamps.items() if self.stamps.get(pk) != stamp]
+        return removed, changed
+
+    def update(self, removed, jobs):
+        """Tombstone the rows of removed pks and vectorize jobs into new rows.
+
+        New rows use the current idf; a term no job had before gets the idf
+        of a single-row term and a posting list.
+        """
+        changes = defaultdict(dict)
+        for pk in removed:
+            self._remove(pk, changes)
+        for pk, updated_at, *fields in jobs:
+            self._remove(pk, changes)
+            counts = job_term_counts(*fields)
+            for term in counts:
+                if term not in self.terms:
+                    self._term_id(term)
+                    self.idf.append(smooth_idf(len(self) + 1, 1))
+                    self.posting_rows.append(array('I'))
+                    self.posting_weights.append(array('f'))
+            weights = self._weigh((self.terms[term], count) for term, count in counts.items())
+            row = len(self.ids)
+            self._add_row(pk, updated_at, array('I', map(itemgetter(0), weights)), array('f', map(itemgetter(1), weights)))
+            for term_id, weight in weights:
+                self.df[term_id] += 1
+                if term_id in self.columns:
+                    changes[term_id][row] = quantize(weight)
+                else:
+                    self.posting_rows[term_id].append(row)
+                    self.posting_weights[term_id].append(weight)
+        # Each touched column is unpacked and packed once
+        for term_id, fields in changes.items():
+            column = unpack(self.columns[term_id], len(self.ids))
+            for row, value in fields.items():
+                column[row] = value
+            self.columns[term_id] = pack(column)
+
+    def _remove(self, pk, changes):
+        row = self.rows.pop(pk, None)
+        if row is None:
+            return
+        del self.stamps[pk]
+        self.alive[row] = 0
+        self.dead += 1
+        for term_id in self.row_terms[row]:
+            self.df[term_id] -= 1
+            if term_id in self.columns:
+                changes[term_id][row] = 0
+
+    # Ranking ---------------------------------------------------------------
+
+    def score(self, query, row):
+        """Exact cosine of a query ({term id: weight}) with one row"""
+        get = query.get
+        return sum(get(term_id, 0.0) * weight for term_id, weight in zip(self.row_terms[row], self.row_weights[row]))
+
+    def rank(self, query, limit=DEFAULT_LIMIT):
+        """[(job pk, cosine)] of the best rows for a query vector, best first.
+
+        Packed columns score every row at once; posting lists add the rarer
+        terms. The leading candidates are then rescored exactly.
+        """
+        packed = 0
+        sparse = defaultdict(float)
+        for term_id, query_weight in query:
+            column = self.columns.get(term_id)
+            if column is not None:
+                packed += quantize(query_weight) * column
+            else:
+                for row, weight in zip(self.posting_rows[term_id], self.posting_weights[term_id]):
+                    sparse[row] += query_weight * weight
+        count = max(RERANK_CANDIDATES, limit)
+        approximate = dict(sparse)
+        if packed:
+            scores = unpack(packed, len(self.ids))
+            # Rows at or above the count-th best packed score, found without a Python loop over every row
+            threshold = max(nlargest(count, scores)[-1], 1)
+            scale = QUANTIZE_SCALE * QUANTIZE_SCALE
+            for row in compress(range(len(scores)), map(threshold.__le__, scores)):
+                approximate[row] = sparse.get(row, 0.0)
+            for row in approximate:
+                approximate[row] += scores[row] / scale
+        alive = self.alive
+        candidates = nlargest(count, (row for row in approximate if alive[row]), key=approximate.__getitem__)
+        weights = dict(query)
+        ids = self.ids
+        ranked = nlargest(limit, ((self.score(weights, row), ids[row]) for row in candidates))
+        return [(pk, score) for score, pk in ranked if score > 0]
+
+    def shared_terms(self, names, pk):
+        """Terms of names ({term id: term}) that a job's row has"""
+        row = self.rows.get(pk)
+        if row is None:
+            return []
+        return sorted(names[term_id] for term_id in self.row_terms[row] if term_id in names)
+
+
+def load_stamps(using='default'):
+    """{pk: updated_at} of the active jobs"""
+    from .models import Job
+
+    return dict(Job.objects.using(using).filter(is_active=True).order_by().values_list('pk', 'updated_at'))
+
+
+def load_jobs(pks=None, using='default'):
+    """(pk, updated_at, title, skills, requirements) of the active jobs, or of those in pks"""
+    from .models import Job
+
+    active = Job.objects.using(using).filter(is_active=True).order_by('pk')
+    if pks is None:
+        yield from active.values_list(*JOB_COLUMNS).iterator(chunk_size=5000)
+        return
+    pks = sorted(pks)
+    for start in range(0, len(pks), FETCH_CHUNK):
+        yield from active.filter(pk__in=pks[start:start + FETCH_CHUNK]).values_list(*JOB_COLUMNS)
+
+
+class JobRecommender:
+    """Holds this worker's matrix and brings it up to date with the jobs version"""
+
+    def __init__(self):
+        self.matrix = None
+        self.version = None
+        self.lock = threading.Lock()
+        self.checked_at = float('-inf')
+        self.refresh_thread = None
+
+    def refresh(self, using='default', force=False):
+        """Update the matrix if the jobs version moved; returns the number of jobs vectorized.
+
+        The version is checked at most every JOB_RECOMMEND_REFRESH_SECONDS.
+        Only the first build (or force=True) runs inline - later updates run
+        in a background thread while queries use the current matrix, unless
+        JOB_RECOMMEND_BACKGROUND_REFRESH is off or a transaction is open.
+        """
+        now = time.monotonic()
+        interval = getattr(settings, 'JOB_RECOMMEND_REFRESH_SECONDS', 30)
+        if not force and now - self.checked_at < interval:
+            return 0
+        self.checked_at = now
+        version = get_jobs_version()
+        # A background thread cannot see this transaction's writes (tests, atomic requests)
+        background = getattr(settings, 'JOB_RECOMMEND_BACKGROUND_REFRESH', True) and not connections[using].in_atomic_block
+        if force or self.matrix is None or (version != self.version and not background):
+            return self._update(version, using)
+        if version != self.version and not (self.refresh_thread and self.refresh_thread.is_alive()):
+            self.refresh_thread = threading.Thread(
+                target=self._update, args=(version, using, True), name='job-recommend-refresh', daemon=True,
+            )
+            self.refresh_thread.start()
+        return 0
+
+    def _update(self, version, using, close_connection=False):
+        try:
+            matrix = self.matrix
+            if matrix is not None:
+                stamps = load_stamps(using)
+                removed, changed = matrix.stale(stamps)
+                if matrix.dead + len(removed) + len(changed) <= max(COMPACT_RATIO * len(stamps), COMPACT_MIN_ROWS):
+                    jobs = list(load_jobs(changed, using))
+                    with self.lock:
+                        matrix.update(removed, jobs)
+                        self.version = version
+                    return len(jobs)
+            matrix = TfidfMatrix(load_jobs(using=using))
+            with self.lock:
+                self.matrix, self.version = matrix, version
+            return len(matrix)
+        finally:
+            if close_connection:
+                connections[using].close()
+
+    def recommend(self, counts, limit=DEFAULT_LIMIT):
+        """[(job pk, cosine, shared skill keys)] for {term: count}, best first"""
+        with self.lock:
+            matrix = self.matrix
+            skills = {
+                matrix.terms[term]: term[len(SKILL_PREFIX):]
+                for term in counts if term.startswith(SKILL_PREFIX) and term in matrix.terms
+            }
+            return [
+                (pk, score, matrix.shared_terms(skills, pk))
+                for pk, score in matrix.rank(matrix.vectorize(counts), limit)
+            ]
+
+
+job_recommender = JobRecommender()
+
+
+def recommend_jobs(user, limit=DEFAULT_LIMIT, using='default'):
+    """[(job pk, cosine, shared skill keys)] of the active jobs best matching a user's profile"""
+    job_recommender.refresh(using)
+    return job_recommender.recommend(user_term_counts(user, using), limit)
@@ -0,0 +1,157 @@
+"""
+SkillConnect - Salary Normalization
+Parse free-text salaries ("₹8-15 LPA", "₹10-20K/month", "Up to ₹12 LPA")
+into annual rupee bounds stored on Job.annual_salary_min/max.
+
+A None bound means open-ended ("Up to ..." has no minimum, "... +" has no
+maximum); a job with both bounds None has an unknown salary.
+"""
+
+import re
+from functools import lru_cache
+
+from django.db import transaction
+from django.db.models import Q
+
+# Multipliers to rupees
+UNIT_MULTIPLIERS = {
+    'lpa': 100000, 'lakhs': 100000, 'lakh': 100000, 'lacs': 100000, 'lac': 100000, 'l': 100000,
+    'crores': 10000000, 'crore': 10000000, 'cr': 10000000,
+    'thousand': 1000, 'k': 1000,
+}
+
+# Pay periods -> payments per year (first match wins; default is yearly)
+PERIODS = [
+    (re.compile(r'/\s*(?:hr|hour)\b|per\s+hour|hourly'), 2080),
+    (re.compile(r'/\s*day\b|per\s+day|daily'), 260),
+    (re.compile(r'/\s*(?:wk|week)\b|per\s+week|weekly'), 52),
+    (re.compile(r'/\s*(?:mo|mon|month)\b|per\s+month|monthly|\bp\.?\s?m\b\.?'), 12),
+]
+
+AMOUNT_RE = re.compile(
+    r'(\d+(?:,\d{2,3})*(?:\.\d+)?)\s*(lpa|lakhs?|lacs?|crores?|cr|thousand|k|l)?\b'
+)
+UP_TO_RE = re.compile(r'\b(?:up\s*to|upto|max(?:imum)?|under|below)\b')
+AT_LEAST_RE = re.compile(r'\+|\b(?:from|min(?:imum)?|above|starting|at\s+least)\b')
+
+# A bare "8-12" with no unit or period is far more likely lakhs than rupees
+BARE_LAKHS_BELOW = 1000
+
+# annual_salary_min/max are PositiveIntegerFields - 32-bit on PostgreSQL and MySQL
+MAX_ANNUAL_SALARY = 2 ** 31 - 1
+
+
+def clamp_annual(value):
+    """An annual amount clamped to 0..MAX_ANNUAL_SALARY, so any salary string can be saved"""
+    return min(max(value, 0), MAX_ANNUAL_SALARY)
+
+
+@lru_cache(maxsize=4096)
+def parse_salary(text):
+    """Return annual (low, high) rupees for a salary string, or (None, None).
+
+    Cached: the same few hundred display strings repeat across the catalog.
+    """
+    text = (text or '').lower()
+    amounts = AMOUNT_RE.findall(text)[:2]
+    if not amounts:
+        return None, None
+
+    per_year = next((times for pattern, times in PERIODS if pattern.search(text)), 1)
+    # "10-20K" - a unitless first amount shares the second one's unit
+    units = [unit for _, unit in amounts]
+    if len(amounts) == 2 and not units[0]:
+        units[0] = units[1]
+
+    values = []
+    for (number, _), unit in zip(amounts, units):
+        value = float(number.replace(',', ''))
+        if unit:
+            value *= UNIT_MULTIPLIERS[unit]
+        elif per_year == 1 and value < BARE_LAKHS_BELOW:
+            value *= UNIT_MULTIPLIERS['lakh']
+        values.append(int(round(clamp_annual(value * per_year))))
+
+    if len(values) == 2:
+        return min(values), max(values)
+    if UP_TO_RE.search(text):
+        return None, values[0]
+    if AT_LEAST_RE.search(text):
+        return values[0], None
+    return values[0], values[0]
+
+
+def annual_salary(job):
+    """Annual (low, high) for a job: salary_display first, then min/max_salary"""
+    low, high = parse_salary(job.salary_display)
+    if low is None and high is None:
+        # Legacy numeric fields are annual figures; a single one is a point
+        low = int(clamp_annual(job.min_salary)) if job.min_salary is not None else None
+        high = int(clamp_annual(job.max_salary)) if job.max_salary is not None else None
+        if low is None or high is None:
+            low = high = low if high is None else high
+    return low, high
+
+
+def normalize_job_salary(job):
+    """Set job.annual_salary_min/max in place (called before save)"""
+    job.annual_salary_min, job.annual_salary_max = annual_salary(job)
+
+
+def salary_overlap_q(low=None, high=None):
+    """Q for jobs whose annual range overlaps [low, high]; open bounds match.
+
+    Jobs with an unknown salary (both bounds NULL) never match.
+    """
+    known = Q(annual_salary_min__isnull=False) | Q(annual_salary_max__isnull=False)
+    condition = known
+    if low is not None:
+        condition &= Q(annual_salary_max__gte=low) | Q(annual_salary_max__isnull=True)
+    if high is not None:
+        condition &= Q(annual_salary_min__lte=high) | Q(annual_salary_min__isnull=True)
+    return condition
+
+
+def backfill_salaries(queryset, batch_size=5000):
+    """Recompute annual salaries for queryset in primary-key batches.
+
+    Parsing is memoized per distinct display string and rows with the same
+    result share one UPDATE, so a batch costs a handful of queries however
+    large it is. Bumps the jobs version when a row changed, so cached
+    listings and the catalog pick up the new salaries. Returns (scanned, updated).
+    """
+    from .cache import bump_jobs_version
+
+    scanned = updated = 0
+    last_pk = 0
+    columns = ('pk', 'salary_display', 'min_salary', 'max_salary', 'annual_salary_min', 'annual_salary_max')
+    while True:
+        batch = list(queryset.filter(pk__gt=last_pk).order_by('pk').values_list(*columns)[:batch_size])
+        if not batch:
+            break
+        changes = {}
+        for pk, display, min_salary, max_salary, old_low, old_high in batch:
+            row = _SalaryRow(display, min_salary, max_salary)
+            bounds = annual_salary(row)
+            if bounds != (old_low, old_high):
+                changes.setdefault(bounds, []).append(pk)
+        with transaction.atomic(using=queryset.db):
+            for (low, high), ids in changes.items():
+                updated += queryset.model._default_manager.using(queryset.db).filter(pk__in=ids).update(
+                    annual_salary_min=low, annual_salary_max=high,
+                )
+        scanned += len(batch)
+        last_pk = batch[-1][0]
+    if updated:
+        bump_jobs_version()
+    return scanned, updated
+
+
+class _SalaryRow:
+    """The salary columns of one values_list() row, shaped like a Job"""
+    __slots__ = ('salary_display', 'min_salary', 'max_salary')
+
+    def __init__(self, salary_display, min_salary, max_salary):
+        self.salary_display = salary_display
+        self.min_salary = min_salary
+        self.max_salary = max_salary
@@ -0,0 +1,225 @@
+"""
+SkillConnect - Job Search Index
+Relevance-ranked full-text search over title, company, skills,
+requirements and description.
+
+PostgreSQL uses a native GIN index on a weighted tsvector expression.
+Other backends (SQLite/MySQL) use the JobSearchToken inverted index
+table, which is kept in sync from Job save signals.
+
+Query terms of MIN_PREFIX_LENGTH or more letters and digits match as
+prefixes, so "dev" finds "developer" as the old substring search did;
+shorter terms ("go", "ai") and ones with symbols ("c++") match whole
+tokens. Both are index range lookups, never a scan.
+"""
+
+import re
+from collections import defaultdict
+from functools import reduce
+from operator import or_
+
+from django.db import connections, transaction
+from django.db.models import Count, FloatField, BooleanField, OuterRef, Q, Subquery, Sum
+from django.db.models.expressions import RawSQL
+
+# Field weights for the inverted index (and the tsvector labels A-D on Postgres)
+FIELD_WEIGHTS = {
+    'title': 10,
+    'company': 8,
+    'skills': 6,
+    'requirements': 2,
+    'description': 1,
+}
+MAX_TERM_LENGTH = 40
+MAX_TERM_WEIGHT = 255
+# Shorter query terms only match whole tokens
+MIN_PREFIX_LENGTH = 3
+
+STOP_WORDS = frozenset([
+    'a', 'an', 'and', 'are', 'as', 'at', 'be', 'by', 'for', 'from', 'in',
+    'is', 'it', 'of', 'on', 'or', 'our', 'the', 'to', 'we', 'will', 'with',
+    'you', 'your',
+])
+
+# Keep '+', '#' and inner '.' so "C++", "C#" and "Node.js" stay searchable
+TOKEN_RE = re.compile(r'[a-z0-9][a-z0-9+#.]*')
+
+# The Postgres expression - the GIN index created in migration 0004 (from a
+# copy of this text) must match it exactly for the planner to use it.
+PG_SEARCH_VECTOR_SQL = (
+    "(setweight(to_tsvector('english', coalesce(\"jobs_job\".\"title\", '')), 'A') || "
+    "setweight(to_tsvector('english', coalesce(\"jobs_job\".\"company\", '')), 'A') || "
+    "setweight(to_tsvector('english', coalesce(\"jobs_job\".\"skills\"::text, '')), 'B') || "
+    "setweight(to_tsvector('english', coalesce(\"jobs_job\".\"requirements\", '')), 'C') || "
+    "setweight(to_tsvector('english', coalesce(\"jobs_job\".\"description\", '')), 'D'))"
+)
+PG_SEARCH_INDEX_NAME = 'jobs_job_search_gin'
+
+
+def tokenize(text):
+    """Split text into normalized search terms (lowercase, no stop words)"""
+    if not text:
+        return []
+    if isinstance(text, (list, tuple)):
+        text = ' '.join(str(item) for item in text)
+    terms = []
+    for match in TOKEN_RE.findall(str(text).lower()):
+        term = match.rstrip('.')[:MAX_TERM_LENGTH]
+        if term and term not in STOP_WORDS:
+            terms.append(term)
+    return terms
+
+
+def is_prefix_term(term):
+    """Whether a query term matches every token it starts"""
+    return len(term) >= MIN_PREFIX_LENGTH and term.isascii() and term.isalnum()
+
+
+def term_matches(term, tokens):
+    """Whether a query term matches one of a job's tokens (a set) - search_jobs() in Python"""
+    if term in tokens:
+        return True
+    return is_prefix_term(term) and any(token.startswith(term) for token in tokens)
+
+
+def term_q(term):
+    """Q on JobSearchToken.term for one query term: a prefix range, or equality"""
+    if not is_prefix_term(term):
+        return Q(term=term)
+    # Tokens starting with the term sort between it and the term with its last character bumped
+    return Q(term__gte=term, term__lt=term[:-1] + chr(ord(term[-1]) + 1))
+
+
+def build_job_terms(job):
+    """Return {term: weight} for a job; repeated terms accumulate weight"""
+    weights = defaultdict(int)
+    for field, field_weight in FIELD_WEIGHTS.items():
+        for term in tokenize(getattr(job, field, None)):
+            weights[term] = min(weights[term] + field_weight, MAX_TERM_WEIGHT)
+    return weights
+
+
+def uses_native_fulltext(using='default'):
+    """True when the database provides its own full-text index"""
+    return connections[using].vendor == 'postgresql'
+
+
+def index_job(job, using='default'):
+    """(Re)build the inverted index rows for one job (none for a flagged duplicate)"""
+    if uses_native_fulltext(using):
+        return
+    from .models import JobSearchToken
+
+    with transaction.atomic(using=using):
+        JobSearchToken.objects.using(using).filter(job_id=job.pk).delete()
+        if job.duplicate_of_id is not None:
+            return
+        JobSearchToken.objects.using(using).bulk_create([
+            JobSearchToken(job_id=job.pk, term=term, weight=weight)
+            for term, weight in build_job_terms(job).items()
+        ])
+
+
+def insert_tokens(tokens, using='default'):
+    """INSERT (job_id, term, weight) rows with one executemany.
+
+    Rebuilds write tens of rows per job; building a model instance for each
+    made bulk_create the bulk of a rebuild's cost.
+    """
+    from .models import JobSearchToken
+
+    connection = connections[using]
+    quote = connection.ops.quote_name
+    sql = 'INSERT INTO {} ({}, {}, {}) VALUES (%s, %s, %s)'.format(
+        quote(JobSearchToken._meta.db_table), quote('job_id'), quote('term'), quote('weight'),
+    )
+    with connection.cursor() as cursor:
+        cursor.executemany(sql, tokens)
+
+
+def rebuild_index(queryset, batch_size=500):
+    """Rebuild the inverted index for every job in queryset, in batches.
+
+    Returns the number of jobs indexed.
+    """
+    using = queryset.db
+    if uses_native_fulltext(using):
+        return 0
+
+    indexed = 0
+    fields = ['id', 'duplicate_of'] + list(FIELD_WEIGHTS)
+    last_pk = 0
+    while True:
+        batch = list(
+            queryset.filter(pk__gt=last_pk).order_by('pk').only(*fields)[:batch_size]
+        )
+        if not batch:
+            break
+        index_jobs(batch, using)
+        indexed += len(batch)
+        last_pk = batch[-1].pk
+    return indexed
+
+
+def index_jobs(jobs, using='default'):
+    """(Re)build the inverted index rows for a batch of saved jobs"""
+    if uses_native_fulltext(using):
+        return
+    from .models import JobSearchToken
+
+    tokens = [
+        (job.pk, term, weight)
+        for job in jobs if job.duplicate_of_id is None
+        for term, weight in build_job_terms(job).items()
+    ]
+    with transaction.atomic(using=using):
+        JobSearchToken.objects.using(using).filter(job_id__in=[job.pk for job in jobs]).delete()
+        insert_tokens(tokens, using)
+
+
+def unindex_jobs(job_ids, using='default'):
+    """Drop the inverted index rows of jobs flagged as near-duplicates"""
+    if uses_native_fulltext(using):
+        return
+    from .models import JobSearchToken
+
+    JobSearchToken.objects.using(using).filter(job_id__in=list(job_ids)).delete()
+
+
+def search_jobs(queryset, query):
+    """Filter queryset to jobs matching every term in query (see term_matches()).
+
+    The result is annotated with ``search_rank`` (higher is better).
+    Queries made only of stop words or punctuation leave queryset unchanged.
+    """
+    terms = list(dict.fromkeys(tokenize(query)))
+    if not terms:
+        return queryset
+
+    if uses_native_fulltext(queryset.db):
+        # Tokens never contain quotes, so each quotes safely as one operand
+        ts_text = ' & '.join(f"'{term}':*" if is_prefix_term(term) else f"'{term}'" for term in terms)
+        ts_query = "to_tsquery('english', %s)"
+        return queryset.annotate(
+            search_match=RawSQL(f"{PG_SEARCH_VECTOR_SQL} @@ {ts_query}", [ts_text], output_field=BooleanField()),
+            search_rank=RawSQL(f"ts_rank_cd({PG_SEARCH_VECTOR_SQL}, {ts_query})", [ts_text], output_field=FloatField()),
+        ).filter(search_match=True)
+
+    from .models import JobSearchToken
+
+    # One row per matching token; a job matches when every term matched at least one
+    conditions = [term_q(term) for term in terms]
+    hits = {f'hits_{index}': Count('id', filter=condition) for index, condition in enumerate(conditions)}
+    matches = (
+        JobSearchToken.objects.using(queryset.db)
+        .filter(reduce(or_, conditions))
+        .values('job_id')
+        .annotate(rank=Sum('weight'), **hits)
+        .filter(**{f'{name}__gt': 0 for name in hits})
+    )
+    return queryset.filter(pk__in=matches.values('job_id')).annotate(
+        search_rank=Subquery(
+            matches.filter(job_id=OuterRef('pk')).values('rank')[:1],
+            output_field=FloatField(),
+        )
+    )
@@ -1,19 +1,54 @@
+from contextlib import ExitStack
+from functools import partial
+
+from django.db import transaction
+from django.db.models import Q
+from django.utils import timezone
 from rest_framework import serializers
-from .models import Job, JobApplication
+from .alerts import SAVED_SEARCH_PARAMS, normalize_search_params
+from .models import Job, JobApplication, SavedSearch, Upload
+from .uploads import UploadError, use_upload
+
+class SparseFieldsMixin:
+    """Pass fields=[...] to keep only those serializer fields (?fields=a,b)"""
+    
+    def __init__(self, *args, **kwargs):
+        fields = kwargs.pop('fields', None)
+        super().__init__(*args, **kwargs)
+        if fields is not None:
+            for name in set(self.fields) - set(fields):
+                self.fields.pop(name)
 
-class JobSerializer(serializers.ModelSerializer):
+class JobSerializer(SparseFieldsMixin, serializers.ModelSerializer):
     posted_ago = serializers.ReadOnlyField()
     
     class Meta:
         model = Job
         fields = [
-            'id', 'title', 'company', 'location', 'category', 'job_type',
-            'experience_level', 'work_mode', 'min_salary', 'max_salary',
-            'salary_display', 'description', 'requirements', 'skills',
-            'company_logo', 'company_size', 'created_at', 'updated_at',
-            'is_active', 'posted_ago'
+            'id', 'title', 'company', 'location', 'city', 'latitude', 'longitude',
+            'category', 'job_type', 'experience_level', 'work_mode', 'min_salary', 'max_salary',
+            'salary_display', 'annual_salary_min', 'annual_salary_max',
+            'description', 'requirements', 'skills', 'company_logo',
+            'company_size', 'created_at', 'updated_at', 'is_active', 'posted_ago'
         ]
 
+# Columns shown on a job card - everything else is left in the database
+JOB_CARD_FIELDS = [
+    'id', 'title', 'company', 'location', 'category', 'job_type',
+    'experience_level', 'work_mode', 'min_salary', 'max_salary',
+    'salary_display', 'annual_salary_min', 'annual_salary_max', 'skills',
+    'company_logo', 'company_size', 'created_at',
+]
+JOB_SUMMARY_LENGTH = 300
+
+class JobListSerializer(JobSerializer):
+    """Job listing rows. Views default to JOB_CARD_FIELDS + `summary` (the start
+    of the description, cut in the database); ?fields= can pick any field."""
+    summary = serializers.CharField(read_only=True)
+    
+    class Meta(JobSerializer.Meta):
+        fields = JobSerializer.Meta.fields + ['summary']
+
 class JobApplicationSerializer(serializers.ModelSerializer):
     applied_ago = serializers.ReadOnlyField()
     job_title = serializers.CharField(source='job.title', read_only=True)
@@ -29,11 +64,95 @@ class JobApplicationSerializer(serializers.ModelSerializer):
         ]
         read_only_fields = ['status', 'applied_at']
 
-class JobApplicationCreateSerializer(serializers.ModelSerializer):
+class UploadField(serializers.PrimaryKeyRelatedField):
+    """Id of a finalized Upload (jobs/uploads.py) for purpose, made by the requesting user or a guest"""
+
+    def __init__(self, purpose, **kwargs):
+        self.purpose = purpose
+        kwargs.setdefault('required', False)
+        kwargs.setdefault('write_only', True)
+        super().__init__(queryset=Upload.objects.all(), **kwargs)
+
+    def get_queryset(self):
+        request = self.context.get('request')
+        user = request.user if request is not None and request.user.is_authenticated else None
+        owners = Q(user=None) | Q(user=user) if user else Q(user=None)
+        return Upload.objects.filter(owners, purpose=self.purpose, status=Upload.COMPLETE, expires_at__gt=timezone.now())
+
+
+class UploadFieldsMixin:
+    """Saves the uploads of the upload_fields ({upload field: file field}) into their file fields, marking them used"""
+    upload_fields = {}
+
+    def create(self, validated_data):
+        return self.save_with_uploads(super().create, validated_data)
+
+    def update(self, instance, validated_data):
+        return self.save_with_uploads(partial(super().update, instance), validated_data)
+
+    def save_with_uploads(self, save, validated_data):
+        attached = [
+            (upload_field, file_field, validated_data.pop(upload_field))
+            for upload_field, file_field in self.upload_fields.items() if upload_field in validated_data
+        ]
+        if not attached:
+            return save(validated_data)
+        with transaction.atomic(), ExitStack() as files:
+            for upload_field, file_field, upload in attached:
+                try:
+                    validated_data[file_field] = files.enter_context(use_upload(upload))
+                except UploadError as exc:
+                    raise serializers.ValidationError({upload_field: [str(exc)]})
+            return save(validated_data)
+
+
+class JobApplicationCreateSerializer(UploadFieldsMixin, serializers.ModelSerializer):
+    job = serializers.PrimaryKeyRelatedField(queryset=Job.objects.filter(is_active=True).only('id', 'title', 'company'))
+    # Instead of a resume file: a finalized upload from /api/jobs/uploads/
+    resume_upload = UploadField(Upload.RESUME)
+    upload_fields = {'resume_upload': 'resume'}
+
     class Meta:
         model = JobApplication
         fields = [
             'job', 'full_name', 'email', 'phone', 'current_position', 
-            'experience_years', 'resume', 'cover_letter', 'linkedin_url', 
+            'experience_years', 'resume', 'resume_upload', 'cover_letter', 'linkedin_url', 
             'portfolio_url', 'expected_salary', 'notice_period'
-        ]
\ No newline at end of file
+        ]
+        extra_kwargs = {'resume': {'required': False}}
+        # Duplicates are caught by the (job, email) constraint on insert, not a pre-read (jobs/applications.py)
+        validators = []
+
+    def validate(self, attrs):
+        if not attrs.get('resume') and not attrs.get('resume_upload'):
+            raise serializers.ValidationError({'resume': ['No file was submitted.']})
+        return attrs
+
+class SavedSearchSerializer(serializers.ModelSerializer):
+    """params takes the job list query params (category, location, skills, keyword, ...)"""
+    CHOICE_PARAMS = {
+        'category': Job.CATEGORY_CHOICES,
+        'job_type': Job.JOB_TYPE_CHOICES,
+        'experience_level': Job.EXPERIENCE_CHOICES,
+        'work_mode': Job.WORK_MODE_CHOICES,
+        'company_size': Job._meta.get_field('company_size').choices,
+    }
+    
+    class Meta:
+        model = SavedSearch
+        fields = ['id', 'name', 'params', 'is_active', 'created_at', 'last_alerted_at']
+        read_only_fields = ['created_at', 'last_alerted_at']
+    
+    def validate_params(self, value):
+        if not isinstance(value, dict):
+            raise serializers.ValidationError('Expected an object of job list filters.')
+        unknown = sorted(set(value) - set(SAVED_SEARCH_PARAMS))
+        if unknown:
+            raise serializers.ValidationError(f"Unknown filter(s): {', '.join(unknown)}")
+        for param, choices in self.CHOICE_PARAMS.items():
+            if value.get(param) and str(value[param]) not in dict(choices):
+                raise serializers.ValidationError(f"Invalid {param}: {value[param]}")
+        params = normalize_search_params(value)
+        if not params:
+            raise serializers.ValidationError('Choose at least one filter or keyword.')
+        return params
@@ -0,0 +1,141 @@
+"""
+Job model signal handlers - keep derived search data and caches in sync with Job rows
+"""
+from django.db import transaction
+from django.db.models.signals import post_delete, post_save, pre_save
+from django.dispatch import receiver
+
+from .models import Job, JobApplication, SavedSearch
+from . import search
+from .alerts import prepare_saved_search, queue_job_alerts
+from .applications import normalize_application
+from .dedup import fingerprint_job
+from .geo import geocode_job
+from .popularity import APPLY, record_event
+from .salary import normalize_job_salary
+from .skills import sync_job_skills
+from .stats import STATE_FIELDS, apply_job_change, open_job_state
+from .cache import bump_jobs_version
+
+
+@receiver(pre_save, sender=Job, dispatch_uid='jobs_normalize_salary')
+def normalize_salary_on_save(sender, instance, raw=False, **kwargs):
+    """Derive the annual salary columns from salary_display"""
+    if raw:
+        return
+    normalize_job_salary(instance)
+
+
+@receiver(pre_save, sender=Job, dispatch_uid='jobs_geocode')
+def geocode_on_save(sender, instance, raw=False, **kwargs):
+    """Resolve location to a gazetteer city and coordinates"""
+    if raw:
+        return
+    geocode_job(instance)
+
+
+@receiver(pre_save, sender=Job, dispatch_uid='jobs_fingerprint')
+def fingerprint_on_save(sender, instance, raw=False, **kwargs):
+    """Recompute the near-duplicate fingerprint and its bands"""
+    if raw:
+        return
+    fingerprint_job(instance)
+
+
+@receiver(pre_save, sender=Job, dispatch_uid='jobs_stats_before')
+def remember_stats_state(sender, instance, raw=False, using='default', update_fields=None, **kwargs):
+    """Record what the stored row contributes to the stats rollup before it changes.
+
+    The row is read locked, inside Job.save()'s transaction, so a concurrent
+    save of the same job waits for this one's rollup change. Saves of other
+    fields only (update_fields) skip the read.
+    """
+    if raw:
+        return
+    before = None
+    if update_fields is not None and not set(STATE_FIELDS) & set(update_fields):
+        before = open_job_state(*(getattr(instance, field) for field in STATE_FIELDS))
+    elif not instance._state.adding and instance.pk is not None:
+        row = Job.objects.using(using).select_for_update().filter(pk=instance.pk).values_list(*STATE_FIELDS).first()
+        before = open_job_state(*row) if row else None
+    instance._stats_before = before
+
+
+@receiver(post_save, sender=Job, dispatch_uid='jobs_stats_save')
+def update_stats_on_save(sender, instance, raw=False, using='default', **kwargs):
+    """Apply the job's change to the stats rollup"""
+    if raw:
+        return
+    after = open_job_state(instance.is_active, instance.category, instance.company)
+    apply_job_change(getattr(instance, '_stats_before', None), after, using=using)
+
+
+@receiver(post_delete, sender=Job, dispatch_uid='jobs_stats_delete')
+def update_stats_on_delete(sender, instance, using='default', **kwargs):
+    """Remove a deleted job from the stats rollup"""
+    before = open_job_state(instance.is_active, instance.category, instance.company)
+    apply_job_change(before, None, using=using)
+
+
+@receiver(post_save, sender=Job, dispatch_uid='jobs_index_job')
+def index_job_on_save(sender, instance, raw=False, using='default', **kwargs):
+    """Refresh the search index for a saved job (rows are removed on delete by CASCADE)"""
+    if raw:
+        return
+    search.index_job(instance, using=using)
+
+
+@receiver(post_save, sender=Job, dispatch_uid='jobs_sync_skills')
+def sync_skills_on_save(sender, instance, raw=False, using='default', **kwargs):
+    """Refresh the job's skill tag links"""
+    if raw:
+        return
+    sync_job_skills(instance, using=using)
+
+
+@receiver(post_save, sender=Job, dispatch_uid='jobs_saved_search_alerts')
+def alert_on_create(sender, instance, created=False, raw=False, using='default', **kwargs):
+    """Match a new open job against saved searches once it is committed"""
+    if raw or not created:
+        return
+    queue_job_alerts([instance], using=using)
+
+
+@receiver(pre_save, sender=JobApplication, dispatch_uid='jobs_application_email')
+def normalize_application_on_save(sender, instance, raw=False, **kwargs):
+    """Normalize the email the (job, email) unique constraint compares"""
+    if raw:
+        return
+    normalize_application(instance)
+
+
+@receiver(post_save, sender=JobApplication, dispatch_uid='jobs_count_application')
+def count_application(sender, instance, created=False, raw=False, using='default', **kwargs):
+    """Count a new application towards the job's popularity once it is committed"""
+    if raw or not created:
+        return
+    transaction.on_commit(lambda: record_event(instance.job_id, APPLY, using), using=using)
+
+
+@receiver(pre_save, sender=SavedSearch, dispatch_uid='jobs_saved_search_key')
+def prepare_saved_search_on_save(sender, instance, raw=False, **kwargs):
+    """Normalize the saved filters and recompute their key hash"""
+    if raw:
+        return
+    prepare_saved_search(instance)
+
+
+@receiver(post_save, sender=Job, dispatch_uid='jobs_bump_version_save')
+@receiver(post_delete, sender=Job, dispatch_uid='jobs_bump_version_delete')
+def bump_version_on_change(sender, instance, using='default', signal=None, **kwargs):
+    """Invalidate cached job responses.
+
+    Bumped now and again after commit: a request that reads the old rows
+    between the two bumps can only cache them under the intermediate version.
+    Deleting a closed job is skipped - it's in no cached listing, and
+    archive_jobs deletes them by the thousand (then bumps once).
+    """
+    if signal is post_delete and not instance.is_active:
+        return
+    bump_jobs_version()
+    transaction.on_commit(bump_jobs_version, using=using)
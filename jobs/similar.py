@@ -0,0 +1,192 @@
+"""
+SkillConnect - Similar Jobs
+Precomputed "similar jobs" lists behind /api/jobs/<id>/similar/.
+
+Each active job gets a MinHash signature (dedup.py's hash functions) of its
+title words and skills - counting TERM_WEIGHT times - and the words of its
+description and requirements, stored in JobSimilarity. Signatures are cut
+into BANDS bands of ROWS_PER_BAND values and jobs sharing a band are
+candidate neighbors (pairs with Jaccard 0.3 share one ~95% of the time),
+so no job is compared with every other. Common words and skills make some
+buckets huge; within a bucket jobs are sorted by the rest of their
+signature (as in an LSH forest), so the BUCKET_WINDOW jobs around a job
+are the ones agreeing with it on the longest run of values. The
+CANDIDATES sharing the most bands are scored on the whole signature and
+the best NEIGHBORS become SimilarJob rows, so a read is one indexed lookup.
+
+refresh_similar_jobs() - a periodic task, and `manage.py build_similar_jobs` -
+keeps the table current. It signs only the
+jobs changed since their signature was computed, and recomputes the lists
+of those jobs, of jobs that listed a changed or closed job, and of the
+changed jobs' new neighbors.
+"""
+
+import struct
+from array import array
+from bisect import bisect_left, bisect_right
+from collections import Counter
+from functools import lru_cache
+from heapq import nlargest
+
+from django.db import transaction
+from django.db.models import F, Q
+from django.utils import timezone
+
+from .dedup import (
+    MAX_DESCRIPTION_WORDS, NUM_HASHES, SIGNATURE_FORMAT, feature_hashes, similarity, term_hashes, unpack_signature,
+)
+from .search import tokenize
+from .skills import skill_labels
+from .tasks import task
+
+NEIGHBORS = 10
+BANDS = 32
+ROWS_PER_BAND = NUM_HASHES // BANDS
+BAND_BYTES = ROWS_PER_BAND * 2
+# Shared-band candidates scored per job; bigger buckets offer the jobs next to it
+CANDIDATES = 50
+BUCKET_WINDOW = 64
+MIN_SIMILARITY = 0.1
+
+DEFAULT_BATCH_SIZE = 1000
+SIGN_COLUMNS = ('pk', 'title', 'skills', 'description', 'requirements')
+
+
+@lru_cache(maxsize=65536)
+def word_hashes(word):
+    """Hash values of a description word (cached: job texts share most of their words)"""
+    return feature_hashes(f'word:{word}')
+
+
+def similarity_signature(title, skills, description, requirements):
+    """MinHash signature (tuple of NUM_HASHES ints) of a job's similarity features, or None if it has none"""
+    rows = [term_hashes(f'title:{word}') for word in set(tokenize(title))]
+    rows += [term_hashes(f'skill:{key}') for key in skill_labels(skills)]
+    words = set(tokenize(description)[:MAX_DESCRIPTION_WORDS]) | set(tokenize(requirements))
+    rows += [word_hashes(word) for word in words]
+    if not rows:
+        return None
+    return tuple(map(min, zip(*rows)))
+
+
+class SignatureIndex:
+    """Band buckets over stored signatures: per band, the rows sorted by band value"""
+
+    def __init__(self, signatures):
+        """signatures: (job pk, packed signature) pairs"""
+        self.ids = array('q')
+        self.signatures = []
+        packed = []
+        for pk, value in signatures:
+            value = bytes(value)
+            self.ids.append(pk)
+            self.signatures.append(unpack_signature(value))
+            packed.append(value)
+        self.rows = {pk: row for row, pk in enumerate(self.ids)}
+        size = len(self.ids)
+        self.keys, self.order, self.positions = [], [], []
+        for band in range(BANDS):
+            start = band * BAND_BYTES
+            # Rows in a bucket are ordered by the rest of the signature from this band on
+            order = array('I', sorted(range(size), key=lambda row: packed[row][start:] + packed[row][:start]))
+            positions = array('I', bytes(4 * size))
+            for position, row in enumerate(order):
+                positions[row] = position
+            self.keys.append(array('Q', (int.from_bytes(packed[row][start:start + BAND_BYTES], 'big') for row in order)))
+            self.order.append(order)
+            self.positions.append(positions)
+
+    def neighbors(self, pk, limit=NEIGHBORS):
+        """[(score, pk)] of a job's most similar other jobs, best first"""
+        row = self.rows.get(pk)
+        if row is None:
+            return []
+        counts = Counter()
+        for keys, order, positions in zip(self.keys, self.order, self.positions):
+            position = positions[row]
+            start, end = bisect_left(keys, keys[position]), bisect_right(keys, keys[position])
+            if end - start > BUCKET_WINDOW:
+                start = min(max(position - BUCKET_WINDOW // 2, start), end - BUCKET_WINDOW)
+                end = start + BUCKET_WINDOW
+            counts.update(order[start:end])
+        del counts[row]
+        signature, signatures, ids = self.signatures[row], self.signatures, self.ids
+        scored = ((similarity(signature, signatures[other]), ids[other]) for other, _ in counts.most_common(CANDIDATES))
+        return nlargest(limit, (pair for pair in scored if pair[0] >= MIN_SIMILARITY))
+
+
+@task(max_attempts=3)
+def refresh_similar_jobs(using='default', full=False, batch_size=DEFAULT_BATCH_SIZE):
+    """Bring JobSimilarity and SimilarJob up to date; returns (jobs signed, lists recomputed).
+
+    full=True signs every active job and recomputes every list.
+    """
+    from .models import Job, JobSimilarity, SimilarJob
+
+    now = timezone.now()
+    stored = JobSimilarity.objects.using(using)
+    links = SimilarJob.objects.using(using)
+
+    # Closed jobs leave the index along with their own lists
+    closed = list(stored.filter(job__is_active=False).values_list('job_id', flat=True))
+    for start in range(0, len(closed), batch_size):
+        ids = closed[start:start + batch_size]
+        with transaction.atomic(using=using):
+            links.filter(job_id__in=ids).delete()
+            stored.filter(job_id__in=ids).delete()
+
+    due = Job.objects.using(using).filter(is_active=True)
+    if not full:
+        due = due.filter(Q(similarity__isnull=True) | Q(similarity__computed_at__lt=F('updated_at')))
+    changed = list(due.order_by('pk').values_list('pk', flat=True))
+    for start in range(0, len(changed), batch_size):
+        ids = changed[start:start + batch_size]
+        rows = Job.objects.using(using).filter(pk__in=ids).values_list(*SIGN_COLUMNS)
+        signed = []
+        for pk, *fields in rows:
+            signature = similarity_signature(*fields)
+            packed = struct.pack(SIGNATURE_FORMAT, *signature) if signature else None
+            signed.append(JobSimilarity(job_id=pk, signature=packed, computed_at=now))
+        with transaction.atomic(using=using):
+            stored.filter(job_id__in=ids).delete()
+            stored.bulk_create(signed)
+
+    index = SignatureIndex(
+        stored.filter(job__is_active=True, signature__isnull=False).values_list('job_id', 'signature').iterator(chunk_size=5000)
+    )
+    lists = {}
+    if full:
+        affected = set(index.ids)
+    else:
+        # The changed jobs, the jobs they now rank among, and the jobs that listed a changed or closed job
+        lists = {pk: index.neighbors(pk) for pk in changed}
+        affected = set(changed)
+        affected.update(other for pairs in lists.values() for _, other in pairs)
+        stale = changed + closed
+        for start in range(0, len(stale), batch_size):
+            affected.update(links.filter(similar_id__in=stale[start:start + batch_size]).values_list('job_id', flat=True))
+    affected = sorted(affected | set(changed))
+    for start in range(0, len(affected), batch_size):
+        ids = affected[start:start + batch_size]
+        rows = [
+            SimilarJob(job_id=pk, similar_id=other, score=score)
+            for pk in ids for score, other in (lists.pop(pk, None) or index.neighbors(pk))
+        ]
+        with transaction.atomic(using=using):
+            links.filter(job_id__in=ids).delete()
+            links.bulk_create(rows)
+    return len(changed), len(affected)
+
+
+def similar_jobs(pk, columns, limit=NEIGHBORS, using='default'):
+    """SimilarJob rows of a job whose similar job is still open, most similar first.
+
+    One indexed lookup; the similar job comes joined, with only columns loaded.
+    """
+    from .models import SimilarJob
+
+    return (
+        SimilarJob.objects.using(using).filter(job_id=pk, similar__is_active=True)
+        .select_related('similar').only('score', 'similar_id', *(f'similar__{column}' for column in columns))
+        .order_by('-score')[:limit]
+    )
@@ -0,0 +1,144 @@
+"""
+SkillConnect - Skill Tags
+Normalized skill vocabulary and the Job-to-skill inverted index.
+
+Job.skills stays the free-form list shown to users. Every entry is
+case-folded and alias-merged into a SkillTag, and JobSkill rows link jobs to
+their tags so "jobs needing Python and Django" is an indexed join instead of
+a JSON containment scan.
+"""
+
+from django.db import connections, transaction
+from django.db.models import Exists, OuterRef
+
+MAX_SKILL_LENGTH = 60
+
+# Spelling variants -> canonical key (keys are already case-folded)
+SKILL_ALIASES = {
+    'react.js': 'react', 'reactjs': 'react', 'react js': 'react',
+    'node': 'node.js', 'nodejs': 'node.js', 'node js': 'node.js',
+    'vue.js': 'vue', 'vuejs': 'vue',
+    'angular.js': 'angular', 'angularjs': 'angular',
+    'next.js': 'nextjs', 'express.js': 'express', 'expressjs': 'express',
+    'js': 'javascript', 'es6': 'javascript', 'ts': 'typescript',
+    'golang': 'go', 'c sharp': 'c#', 'cpp': 'c++',
+    'postgres': 'postgresql', 'psql': 'postgresql', 'mongo': 'mongodb',
+    'k8s': 'kubernetes', 'amazon web services': 'aws', 'gcp': 'google cloud',
+    'ms excel': 'excel', 'microsoft excel': 'excel', 'advanced excel': 'excel',
+    'powerbi': 'power bi', 'power-bi': 'power bi',
+    'rest': 'rest api', 'rest apis': 'rest api', 'restful api': 'rest api', 'restful apis': 'rest api',
+    'ml': 'machine learning', 'ai': 'artificial intelligence',
+    'springboot': 'spring boot', 'ui/ux': 'ui/ux design', 'ux/ui': 'ui/ux design',
+}
+
+
+def normalize_skill(name):
+    """Canonical key for one skill name ('' if there is nothing left)"""
+    key = ' '.join(str(name).casefold().replace('_', ' ').split()).strip(' .,;')
+    return SKILL_ALIASES.get(key, key)[:MAX_SKILL_LENGTH]
+
+
+def skill_labels(values):
+    """Return {key: label} for a skills list or comma-separated string.
+
+    Duplicates (after normalization) keep the first label seen.
+    """
+    if isinstance(values, str):
+        values = values.split(',')
+    labels = {}
+    for value in values or []:
+        key = normalize_skill(value)
+        if key:
+            labels.setdefault(key, str(value).strip()[:MAX_SKILL_LENGTH])
+    return labels
+
+
+def get_tag_ids(labels, using='default'):
+    """Return {key: SkillTag id} for labels, creating missing tags"""
+    from .models import SkillTag
+
+    if not labels:
+        return {}
+    tags = SkillTag.objects.using(using)
+    tag_ids = dict(tags.filter(name__in=list(labels)).values_list('name', 'id'))
+    missing = [key for key in labels if key not in tag_ids]
+    if missing:
+        # ignore_conflicts: another worker may create the same tag concurrently
+        tags.bulk_create([SkillTag(name=key, label=labels[key]) for key in missing], ignore_conflicts=True)
+        tag_ids.update(tags.filter(name__in=missing).values_list('name', 'id'))
+    return tag_ids
+
+
+def sync_job_skills(job, using='default'):
+    """Make the JobSkill rows for one job match job.skills"""
+    from .models import JobSkill
+
+    tag_ids = set(get_tag_ids(skill_labels(job.skills), using).values())
+    links = JobSkill.objects.using(using)
+    with transaction.atomic(using=using):
+        links.filter(job_id=job.pk).exclude(tag_id__in=tag_ids).delete()
+        links.bulk_create([JobSkill(job_id=job.pk, tag_id=tag_id) for tag_id in tag_ids], ignore_conflicts=True)
+
+
+def rebuild_skill_index(queryset, batch_size=500):
+    """Rebuild JobSkill rows for every job in queryset, in batches.
+
+    Returns the number of jobs indexed.
+    """
+    using = queryset.db
+    indexed = 0
+    last_pk = 0
+    while True:
+        batch = list(
+            queryset.filter(pk__gt=last_pk).order_by('pk').values_list('pk', 'skills')[:batch_size]
+        )
+        if not batch:
+            break
+        link_job_skills(batch, using)
+        indexed += len(batch)
+        last_pk = batch[-1][0]
+    return indexed
+
+
+def link_job_skills(job_skills, using='default'):
+    """Replace the JobSkill rows for a batch of (job pk, skills list) pairs"""
+    from .models import JobSkill
+
+    job_labels = [(pk, skill_labels(skills)) for pk, skills in job_skills]
+    labels = {}
+    for _, job_skill_labels in job_labels:
+        for key, label in job_skill_labels.items():
+            labels.setdefault(key, label)
+    tag_ids = get_tag_ids(labels, using)
+
+    connection = connections[using]
+    quote = connection.ops.quote_name
+    # Plain executemany: a few rows per job, too many for per-instance bulk_create overhead
+    sql = 'INSERT INTO {} ({}, {}) VALUES (%s, %s)'.format(
+        quote(JobSkill._meta.db_table), quote('job_id'), quote('tag_id'),
+    )
+    with transaction.atomic(using=using):
+        JobSkill.objects.using(using).filter(job_id__in=[pk for pk, _ in job_labels]).delete()
+        with connection.cursor() as cursor:
+            cursor.executemany(sql, [(pk, tag_ids[key]) for pk, keys in job_labels for key in keys])
+
+
+def filter_by_skills(queryset, skills, mode='all'):
+    """Filter queryset to jobs with all (or any) of skills.
+
+    skills is a list or comma-separated string; names are normalized, so
+    "ReactJS" finds jobs listing "React.js". Each skill is a correlated
+    EXISTS probe on the (tag, job) unique index, so an ordered, limited
+    listing stops as soon as it has a page of matches.
+    """
+    from .models import JobSkill
+
+    keys = list(skill_labels(skills))
+    if not keys:
+        return queryset
+    links = JobSkill.objects.using(queryset.db).filter(job_id=OuterRef('pk'))
+    if mode == 'any':
+        return queryset.filter(Exists(links.filter(tag__name__in=keys)))
+    for key in keys:
+        queryset = queryset.filter(Exists(links.filter(tag__name=key)))
+    return queryset
@@ -0,0 +1,120 @@
+"""
+SkillConnect - Job Statistics Rollup
+Open-job counters kept in a single JobStats row plus one JobStatCount row per
+category and company, so /api/jobs/stats/ reads one row instead of counting
+distinct values over the whole jobs table.
+
+Job save/delete signals apply each change as a delta inside a transaction
+that locks the JobStats row. Job.save() wraps the save in a transaction and
+the pre-save read of the stored row locks it, so concurrent saves of one
+job apply their changes one after the other. Writes that skip signals (queryset.update(),
+bulk_create()) leave the rollup stale until rebuild_job_stats() runs - the
+reconcile_job_stats command does that.
+"""
+
+from collections import Counter
+
+from django.db import transaction
+from django.db.models import Count, F
+
+STATS_ID = 1
+STAT_KINDS = ('category', 'company')
+# Job fields open_job_state() reads
+STATE_FIELDS = ('is_active', 'category', 'company')
+
+
+def open_job_state(is_active, category, company):
+    """What a job contributes to the rollup: (category, company) if open, else None"""
+    return (category, company) if is_active else None
+
+
+def _locked_stats(using):
+    """The JobStats row, created if missing and locked for the current transaction"""
+    from .models import JobStats
+
+    stats = JobStats.objects.using(using).select_for_update().filter(pk=STATS_ID).first()
+    if stats is None:
+        JobStats.objects.using(using).bulk_create([JobStats(pk=STATS_ID)], ignore_conflicts=True)
+        stats = JobStats.objects.using(using).select_for_update().get(pk=STATS_ID)
+    return stats
+
+
+def apply_job_change(before, after, using='default'):
+    """Move one job's contribution from `before` to `after` (open_job_state values)"""
+    from .models import JobStatCount
+
+    if before == after:
+        return
+    deltas = Counter()
+    for state, sign in ((before, -1), (after, 1)):
+        if state is not None:
+            for kind, key in zip(STAT_KINDS, state):
+                deltas[(kind, key)] += sign
+
+    counts = JobStatCount.objects.using(using)
+    with transaction.atomic(using=using):
+        stats = _locked_stats(using)
+        stats.total_jobs = max(stats.total_jobs + (after is not None) - (before is not None), 0)
+        for (kind, key), delta in deltas.items():
+            if not delta:
+                continue
+            row = counts.filter(kind=kind, key=key).first()
+            old = row.open_jobs if row else 0
+            new = max(old + delta, 0)
+            if row is None:
+                counts.create(kind=kind, key=key, open_jobs=new)
+            elif new:
+                counts.filter(pk=row.pk).update(open_jobs=F('open_jobs') + (new - old))
+            else:
+                counts.filter(pk=row.pk).delete()
+            # Distinct counters only move when a bucket appears or empties
+            if bool(old) != bool(new):
+                field = 'categories' if kind == 'category' else 'companies'
+                setattr(stats, field, max(getattr(stats, field) + (1 if new else -1), 0))
+        stats.save(using=using)
+
+
+def rebuild_job_stats(using='default'):
+    """Recompute the rollup from the jobs table.
+
+    Returns the number of counters (totals and buckets) that had drifted.
+    """
+    from .models import Job, JobStatCount
+
+    active = Job.objects.using(using).filter(is_active=True).order_by()
+    fresh = {}
+    for kind in STAT_KINDS:
+        fresh.update(((kind, key), n) for key, n in active.values_list(kind).annotate(n=Count('id')))
+
+    counts = JobStatCount.objects.using(using)
+    with transaction.atomic(using=using):
+        stats = _locked_stats(using)
+        stored = {(kind, key): n for kind, key, n in counts.values_list('kind', 'key', 'open_jobs')}
+        drifted = sum(1 for bucket in fresh.keys() | stored.keys() if fresh.get(bucket) != stored.get(bucket))
+        totals = {
+            'total_jobs': sum(n for (kind, _), n in fresh.items() if kind == 'category'),
+            'categories': sum(1 for kind, _ in fresh if kind == 'category'),
+            'companies': sum(1 for kind, _ in fresh if kind == 'company'),
+        }
+        for field, value in totals.items():
+            drifted += getattr(stats, field) != value
+            setattr(stats, field, value)
+        if drifted:
+            counts.all().delete()
+            counts.bulk_create(
+                [JobStatCount(kind=kind, key=key, open_jobs=n) for (kind, key), n in fresh.items()],
+                batch_size=2000,
+            )
+        stats.save(using=using)
+    return drifted
+
+
+def get_job_stats(using='default'):
+    """{'total_jobs', 'categories', 'companies'} from the rollup row"""
+    from .models import JobStats
+
+    row = JobStats.objects.using(using).filter(pk=STATS_ID).values('total_jobs', 'categories', 'companies').first()
+    if row is None:
+        rebuild_job_stats(using)
+        row = JobStats.objects.using(using).filter(pk=STATS_ID).values('total_jobs', 'categories', 'companies').first()
+    return row
@@ -0,0 +1,173 @@
+"""
+SkillConnect - Search Suggestions
+In-process prefix index over active job titles, companies, skill tags and
+cities, behind /api/jobs/suggest/?q=.
+
+Every term is indexed under each of its word starts ("Senior Python
+Developer" answers "sen", "pyt" and "dev"), and ranked by how many active
+jobs use it. Each worker keeps its own copy: when the jobs version changes
+it re-counts terms with a few GROUP BY queries in a background thread and
+applies only the difference to the index.
+"""
+
+import heapq
+import threading
+import time
+from collections import defaultdict
+
+from django.conf import settings
+from django.db import connections
+from django.db.models import Count
+
+from .cache import get_jobs_version
+
+MAX_PREFIX_LENGTH = 12
+DEFAULT_LIMIT = 8
+MAX_LIMIT = 20
+
+# Suggestion types, in tie-break order
+KINDS = ('title', 'skill', 'company', 'city')
+
+
+def suggest_key(text):
+    """Lookup form of a term or query: case-folded, single-spaced"""
+    return ' '.join(str(text).casefold().split())
+
+
+def term_counts(using='default'):
+    """{(kind, label): active job count} for every suggestible term"""
+    from .models import Job, JobSkill
+
+    active = Job.objects.using(using).filter(is_active=True).order_by()
+    counts = {}
+    for kind, column in (('title', 'title'), ('company', 'company'), ('city', 'city')):
+        rows = active.exclude(**{column: ''}).values_list(column).annotate(n=Count('id'))
+        counts.update(((kind, label), n) for label, n in rows)
+    skills = (
+        JobSkill.objects.using(using).filter(job__is_active=True).order_by()
+        .values_list('tag__label').annotate(n=Count('job_id'))
+    )
+    counts.update((('skill', label), n) for label, n in skills)
+    return counts
+
+
+class PrefixIndex:
+    """Prefix -> terms map with lazily cached top-k per prefix"""
+
+    def __init__(self):
+        self.weights = {}
+        self.members = defaultdict(set)
+        self.top = {}
+        self.lock = threading.Lock()
+        self.version = None
+        self.checked_at = float('-inf')
+        self.refresh_thread = None
+
+    @staticmethod
+    def prefixes(label):
+        """Every indexed prefix for a term (word starts, up to MAX_PREFIX_LENGTH)"""
+        key = suggest_key(label)
+        words = key.split(' ')
+        found = set()
+        for start in range(len(words)):
+            tail = ' '.join(words[start:])
+            for length in range(1, min(len(tail), MAX_PREFIX_LENGTH) + 1):
+                found.add(tail[:length])
+        return found
+
+    def apply(self, counts):
+        """Bring the index in line with counts; returns the number of changed terms"""
+        changed = [term for term in self.weights.keys() | counts.keys()
+                   if self.weights.get(term) != counts.get(term)]
+        for term in changed:
+            weight = counts.get(term)
+            membership_changes = (term in self.weights) != (weight is not None)
+            for prefix in self.prefixes(term[1]):
+                if membership_changes:
+                    if weight is None:
+                        self.members[prefix].discard(term)
+                        if not self.members[prefix]:
+                            del self.members[prefix]
+                    else:
+                        self.members[prefix].add(term)
+                self.top.pop(prefix, None)
+            if weight is None:
+                del self.weights[term]
+            else:
+                self.weights[term] = weight
+        return len(changed)
+
+    def _rank(self, term):
+        kind, label = term
+        return (-self.weights[term], KINDS.index(kind), label)
+
+    def lookup(self, query, limit=DEFAULT_LIMIT):
+        """Best terms starting (at a word boundary) with query"""
+        key = suggest_key(query)
+        if not key:
+            return []
+        with self.lock:
+            if len(key) <= MAX_PREFIX_LENGTH:
+                ranked = self.top.get(key)
+                if ranked is None:
+                    ranked = heapq.nsmallest(MAX_LIMIT, self.members.get(key, ()), key=self._rank)
+                    self.top[key] = ranked
+            else:
+                # Longer than any stored prefix: filter that bucket's members
+                candidates = (
+                    term for term in self.members.get(key[:MAX_PREFIX_LENGTH], ())
+                    if any(tail.startswith(key) for tail in self._tails(term[1]))
+                )
+                ranked = heapq.nsmallest(MAX_LIMIT, candidates, key=self._rank)
+            return [
+                {'text': label, 'type': kind, 'count': self.weights[(kind, label)]}
+                for kind, label in ranked[:limit]
+            ]
+
+    @staticmethod
+    def _tails(label):
+        words = suggest_key(label).split(' ')
+        return (' '.join(words[start:]) for start in range(len(words)))
+
+    def refresh(self, using='default', force=False):
+        """Re-count terms if the jobs version moved; returns the number of changed terms.
+
+        The version is checked at most every JOB_SUGGEST_REFRESH_SECONDS. Only
+        the first build (or force=True) runs inline - later re-counts run in a
+        background thread while lookups keep using the current index, unless
+        JOB_SUGGEST_BACKGROUND_REFRESH is off.
+        """
+        now = time.monotonic()
+        interval = getattr(settings, 'JOB_SUGGEST_REFRESH_SECONDS', 30)
+        if not force and now - self.checked_at < interval:
+            return 0
+        self.checked_at = now
+        version = get_jobs_version()
+        background = getattr(settings, 'JOB_SUGGEST_BACKGROUND_REFRESH', True)
+        if force or self.version is None or (version != self.version and not background):
+            return self._rebuild(version, using)
+        if version != self.version and not (self.refresh_thread and self.refresh_thread.is_alive()):
+            self.refresh_thread = threading.Thread(
+                target=self._rebuild, args=(version, using, True), name='job-suggest-refresh', daemon=True,
+            )
+            self.refresh_thread.start()
+        return 0
+
+    def _rebuild(self, version, using, close_connection=False):
+        try:
+            counts = term_counts(using)
+            with self.lock:
+                self.version = version
+                return self.apply(counts)
+        finally:
+            if close_connection:
+                connections[using].close()
+
+
+suggestion_index = PrefixIndex()
+
+
+def suggest(query, limit=DEFAULT_LIMIT):
+    """Suggestions for a typeahead query, refreshing the index when stale"""
+    suggestion_index.refresh()
+    return suggestion_index.lookup(query, limit)
@@ -0,0 +1,257 @@
+"""
+SkillConnect - Background Tasks
+A task queue kept in the app database (no Redis), worked by
+`manage.py run_worker`.
+
+Functions decorated with @task still run inline when called, and gain
+.enqueue(*args, **kwargs), which stores a Task row to run later. Arguments
+must be JSON-serializable. Enqueued inside a transaction, a task only
+exists if that transaction commits.
+
+Workers claim the highest-priority tasks whose run_at has passed, leasing
+each for `--lease` seconds: with SELECT ... FOR UPDATE SKIP LOCKED where
+the database has it (PostgreSQL, MySQL 8), else with a conditional UPDATE
+per task, so two workers never claim the same task. A task whose worker
+died is queued again once its lease expires, as its next attempt - tasks
+run at least once, so they should be safe to repeat. A task that raises is retried with
+exponential backoff until max_attempts; then it stays as FAILED (see the
+admin). Finished tasks are deleted.
+
+Workers also enqueue the PERIODIC_TASKS setting's tasks ({task name:
+seconds between runs}), each whenever none is queued or running: at once
+when a worker starts, then the interval after the last run finished. Two
+workers starting together may both enqueue one - it runs twice.
+"""
+
+import copy
+import functools
+import logging
+import os
+import random
+import socket
+import threading
+import time
+import traceback
+import uuid
+from datetime import timedelta
+from importlib import import_module
+
+from django.conf import settings
+from django.db import DatabaseError, close_old_connections, connections, transaction
+from django.db.models import F, Q
+from django.utils import timezone
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_PRIORITY = 0
+DEFAULT_MAX_ATTEMPTS = 5
+RETRY_BASE_SECONDS = 30
+RETRY_MAX_SECONDS = 3600
+
+DEFAULT_BATCH_SIZE = 10
+DEFAULT_LEASE_SECONDS = 300
+DEFAULT_POLL_SECONDS = 2
+# How often a worker looks for periodic tasks to enqueue
+SCHEDULE_SECONDS = 60
+MAX_ERROR_LENGTH = 10000
+
+# Task name -> TaskFunction, filled as modules defining tasks are imported
+registry = {}
+
+
+def retry_delay(attempts):
+    """Backoff before a task's next attempt: doubling per failure, capped, with jitter"""
+    delay = min(RETRY_BASE_SECONDS * 2 ** (attempts - 1), RETRY_MAX_SECONDS)
+    return timedelta(seconds=delay * random.uniform(0.5, 1))
+
+
+class TaskFunction:
+    """A function that can also be enqueued; made by @task"""
+
+    def __init__(self, func, priority=DEFAULT_PRIORITY, max_attempts=DEFAULT_MAX_ATTEMPTS):
+        functools.update_wrapper(self, func)
+        self.func = func
+        self.name = f'{func.__module__}.{func.__qualname__}'
+        self.priority = priority
+        self.max_attempts = max_attempts
+        self.run_at = None
+
+    def __call__(self, *args, **kwargs):
+        return self.func(*args, **kwargs)
+
+    def options(self, priority=None, run_at=None, max_attempts=None):
+        """A copy enqueueing with other options; run_at is a datetime or a delay (timedelta)"""
+        bound = copy.copy(self)
+        if priority is not None:
+            bound.priority = priority
+        if run_at is not None:
+            bound.run_at = run_at
+        if max_attempts is not None:
+            bound.max_attempts = max_attempts
+        return bound
+
+    def enqueue(self, *args, **kwargs):
+        """Store a call to run in a worker; returns the Task"""
+        from .models import Task
+
+        run_at = self.run_at or timezone.now()
+        if isinstance(run_at, timedelta):
+            run_at = timezone.now() + run_at
+        return Task.objects.create(
+            name=self.name, args=list(args), kwargs=kwargs, priority=self.priority,
+            max_attempts=self.max_attempts, run_at=run_at,
+        )
+
+
+def task(func=None, *, priority=DEFAULT_PRIORITY, max_attempts=DEFAULT_MAX_ATTEMPTS):
+    """Decorator registering a function as a task: @task or @task(priority=10, max_attempts=3)"""
+    def decorator(func):
+        wrapped = TaskFunction(func, priority, max_attempts)
+        registry[wrapped.name] = wrapped
+        return wrapped
+    return decorator(func) if func is not None else decorator
+
+
+def resolve(name):
+    """The registered function of a task name, importing its module if needed; None if unknown"""
+    if name not in registry:
+        try:
+            import_module(name.rsplit('.', 1)[0])
+        except ImportError:
+            return None
+    return registry.get(name)
+
+
+class Worker:
+    """Claims and runs tasks; `manage.py run_worker` runs one per process"""
+
+    def __init__(self, batch_size=DEFAULT_BATCH_SIZE, lease_seconds=DEFAULT_LEASE_SECONDS,
+                 poll_seconds=DEFAULT_POLL_SECONDS, using='default'):
+        self.name = f'{socket.gethostname()}:{os.getpid()}:{uuid.uuid4().hex[:8]}'
+        self.batch_size = batch_size
+        self.lease = timedelta(seconds=lease_seconds)
+        self.poll_seconds = poll_seconds
+        self.using = using
+        self.stopping = threading.Event()
+        self.scheduled = set()
+        self.scheduled_at = None
+
+    def claim(self):
+        """Lease up to batch_size ready tasks to this worker; returns them, best first"""
+        from .models import Task
+
+        now = timezone.now()
+        tasks = Task.objects.using(self.using)
+        ready = Q(status=Task.QUEUED, run_at__lte=now)
+        leased = {'status': Task.RUNNING, 'locked_by': self.name, 'locked_until': now + self.lease}
+        order = ('-priority', 'run_at', 'pk')
+        if connections[self.using].features.has_select_for_update_skip_locked:
+            with transaction.atomic(using=self.using):
+                claimed = list(tasks.select_for_update(skip_locked=True).filter(ready).order_by(*order)[:self.batch_size])
+                for claimed_task in claimed:
+                    claimed_task.attempts += 1
+                    for field, value in leased.items():
+                        setattr(claimed_task, field, value)
+                tasks.bulk_update(claimed, ['attempts', *leased])
+            return claimed
+        # No SKIP LOCKED (SQLite): the UPDATE only matches while the task is still ready
+        candidates = list(tasks.filter(ready).order_by(*order).values_list('pk', flat=True)[:self.batch_size])
+        with transaction.atomic(using=self.using):
+            won = [pk for pk in candidates if tasks.filter(ready, pk=pk).update(attempts=F('attempts') + 1, **leased)]
+        return sorted(tasks.filter(pk__in=won, locked_by=self.name), key=lambda claimed_task: won.index(claimed_task.pk))
+
+    def execute(self, claimed_task):
+        """Run a claimed task and record the outcome; returns True if it succeeded"""
+        from .models import Task
+
+        function = resolve(claimed_task.name)
+        if function is None:
+            self.fail(claimed_task, f'Unknown task {claimed_task.name}', retry=False)
+            return False
+        try:
+            function.func(*claimed_task.args, **claimed_task.kwargs)
+        except Exception:
+            logger.exception('Task %s (%s) failed on attempt %d', claimed_task.pk, claimed_task.name, claimed_task.attempts)
+            self.fail(claimed_task, traceback.format_exc())
+            return False
+        # No-op if the lease ran out and another worker holds the task now
+        Task.objects.using(self.using).filter(pk=claimed_task.pk, locked_by=self.name).delete()
+        return True
+
+    def fail(self, claimed_task, error, retry=True):
+        from .models import Task
+
+        retry = retry and claimed_task.attempts < claimed_task.max_attempts
+        Task.objects.using(self.using).filter(pk=claimed_task.pk, locked_by=self.name).update(
+            status=Task.QUEUED if retry else Task.FAILED,
+            run_at=timezone.now() + retry_delay(claimed_task.attempts) if retry else claimed_task.run_at,
+            locked_by='', locked_until=None, last_error=error[-MAX_ERROR_LENGTH:],
+        )
+
+    def reclaim(self):
+        """Queue again the tasks whose worker died (their lease is over), failing those on their last attempt"""
+        from .models import Task
+
+        expired = Task.objects.using(self.using).filter(status=Task.RUNNING, locked_until__lt=timezone.now())
+        expired.filter(attempts__gte=F('max_attempts')).update(
+            status=Task.FAILED, locked_by='', locked_until=None, last_error='Worker lease expired on the last attempt',
+        )
+        expired.update(status=Task.QUEUED, locked_by='', locked_until=None)
+
+    def schedule(self):
+        """Enqueue the PERIODIC_TASKS that are not queued or running; returns how many were"""
+        from .models import Task
+
+        periodic = getattr(settings, 'PERIODIC_TASKS', {})
+        if not periodic:
+            return 0
+        pending = set(
+            Task.objects.using(self.using).filter(name__in=periodic, status__in=[Task.QUEUED, Task.RUNNING])
+            .values_list('name', flat=True)
+        )
+        count = 0
+        for name, seconds in periodic.items():
+            function = resolve(name)
+            if function is None:
+                continue
+            if name not in pending:
+                # Missing since this worker started: run now, else an interval after the last run
+                delay = timedelta(seconds=seconds) if name in self.scheduled else timedelta()
+                function.options(run_at=delay).enqueue()
+                count += 1
+            self.scheduled.add(name)
+        return count
+
+    def run_pending(self):
+        """Run ready tasks until none are left (or the worker is stopped); returns how many ran"""
+        self.reclaim()
+        count = 0
+        while not self.stopping.is_set():
+            claimed = self.claim()
+            if not claimed:
+                break
+            for claimed_task in claimed:
+                self.execute(claimed_task)
+                count += 1
+        return count
+
+    def run(self, once=False):
+        """Work the queue, polling every poll_seconds when idle, until stop() (or once it is empty)"""
+        while not self.stopping.is_set():
+            close_old_connections()
+            try:
+                if self.scheduled_at is None or time.monotonic() - self.scheduled_at >= SCHEDULE_SECONDS:
+                    self.schedule()
+                    self.scheduled_at = time.monotonic()
+                ran = self.run_pending()
+            except DatabaseError:
+                logger.exception('Claiming tasks failed; retrying in %ss', self.poll_seconds)
+                ran = 0
+            if once:
+                return
+            if not ran:
+                self.stopping.wait(self.poll_seconds)
+
+    def stop(self):
+        """Finish the tasks already claimed, then return from run()"""
+        self.stopping.set()
@@ -1,3 +1,2025 @@
-from django.test import TestCase
+"""
+SkillConnect - Jobs App Tests
+"""
+from datetime import timedelta
+import hashlib
+import io
+import os
+import shutil
+import tempfile
+import threading
+import time
+from io import StringIO
+from unittest import mock, skipUnless
 
-# Create your tests here.
+from rest_framework.test import APITestCase, APITransactionTestCase
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from django.core.files.uploadedfile import SimpleUploadedFile
+from django.core.management import call_command
+from django.conf import settings
+from django.db import OperationalError, connection, connections
+from django.test import TestCase, override_settings
+from django.test.utils import CaptureQueriesContext
+from django.utils import timezone
+
+from core.db_router import PIN_COOKIE, ReadReplicaRouter, ReplicaHealth, RoutingState, primary_reads, replica_health, routing_state
+from core.performance import CacheManager, DatabaseIndexOptimizer
+from .models import (
+    ArchivedJob, IdempotencyKey, Job, JobApplication, JobPopularity, JobSearchToken, JobSimilarity, JobSkill, JobStatCount, JobStats,
+    SavedSearch, SimilarJob, SkillTag, Task, TrendingJob, Upload,
+)
+from . import alerts, applications, archive, dedup, direct_uploads, geo, popularity, recommend, salary, search, similar, skills, stats, tasks, uploads
+from .ingest import ingest, read_feed
+from .cache import get_jobs_version
+from .catalog import CatalogSnapshot, job_catalog, load_snapshot
+from .filters import filter_jobs
+from .suggest import PrefixIndex
+
+
+# Query-count tests should not see the database cache backend's own queries
+LOCMEM_CACHE = {'default': {'BACKEND': 'django.core.cache.backends.locmem.LocMemCache'}}
+
+
+def create_job(**overrides):
+    """Create a Job with sensible defaults for tests"""
+    data = {
+        'title': 'Python Developer',
+        'company': 'Infosys',
+        'location': 'Bangalore, India',
+        'category': 'it',
+        'job_type': 'full-time',
+        'experience_level': 'mid',
+        'work_mode': 'office',
+        'min_salary': 800000,
+        'max_salary': 1200000,
+        'salary_display': '₹8-12 LPA',
+        'description': 'Build scalable backend systems with Django.',
+        'requirements': '3+ years Python. REST APIs experience.',
+        'skills': ['Python', 'Django', 'REST API'],
+    }
+    data.update(overrides)
+    return Job.objects.create(**data)
+
+
+class SearchIndexTest(TestCase):
+    """Test the job search inverted index"""
+
+    def test_tokenize(self):
+        self.assertEqual(search.tokenize('Node.js and C++ for the Web.'), ['node.js', 'c++', 'web'])
+        self.assertEqual(search.tokenize(['React.js', 'SQL']), ['react.js', 'sql'])
+
+    def test_index_kept_in_sync(self):
+        job = create_job()
+        self.assertTrue(JobSearchToken.objects.filter(job=job, term='django').exists())
+
+        job.skills = ['Flask']
+        job.description = 'Build APIs with Flask.'
+        job.save()
+        self.assertFalse(JobSearchToken.objects.filter(job=job, term='django').exists())
+        self.assertTrue(JobSearchToken.objects.filter(job=job, term='flask').exists())
+
+        job.delete()
+        self.assertFalse(JobSearchToken.objects.exists())
+
+    def test_all_terms_must_match(self):
+        python_job = create_job()
+        create_job(title='Data Analyst', company='Wipro', skills=['SQL'], description='Dashboards.', requirements='')
+
+        results = search.search_jobs(Job.objects.all(), 'python django')
+        self.assertEqual(list(results), [python_job])
+        self.assertFalse(search.search_jobs(Job.objects.all(), 'python sql').exists())
+
+    def test_partial_terms_match_as_prefixes(self):
+        python_job = create_job()
+        analyst = create_job(title='Data Analyst', company='Wipro', skills=['SQL', 'Go'], description='Dashboards.', requirements='')
+
+        self.assertEqual(list(search.search_jobs(Job.objects.all(), 'dev')), [python_job])
+        self.assertEqual(list(search.search_jobs(Job.objects.all(), 'pyth djan')), [python_job])
+        # "develop" matches "developer" once, not a term per token it starts
+        self.assertEqual(list(search.search_jobs(Job.objects.all(), 'develop developer')), [python_job])
+        self.assertEqual(list(search.search_jobs(Job.objects.all(), 'dashb')), [analyst])
+        # Terms shorter than MIN_PREFIX_LENGTH match whole tokens only
+        self.assertEqual(list(search.search_jobs(Job.objects.all(), 'go')), [analyst])
+        self.assertFalse(search.search_jobs(Job.objects.all(), 'py').exists())
+        self.assertTrue(search.term_matches('dev', {'developer'}))
+        self.assertFalse(search.term_matches('py', {'python'}))
+
+    def test_rebuild_index(self):
+        job = create_job()
+        JobSearchToken.objects.all().delete()
+        self.assertEqual(search.rebuild_index(Job.objects.all()), 1)
+        self.assertTrue(JobSearchToken.objects.filter(job=job, term='infosys').exists())
+
+
+class JobSearchAPITest(APITestCase):
+    """Test keyword search on the job list endpoint"""
+
+    def test_keyword_results_ranked_by_relevance(self):
+        mention = create_job(title='Backend Developer', company='TCS', skills=['Java'],
+                             description='Some Django exposure is a plus.', requirements='')
+        title_match = create_job(title='Django Developer', company='Zoho', skills=['Django'])
+
+        response = self.client.get('/api/jobs/', {'keyword': 'django'})
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual([job['id'] for job in response.data['results']], [title_match.id, mention.id])
+
+    def test_search_param_and_explicit_ordering(self):
+        create_job(title='Django Developer', company='Zoho')
+        create_job(title='Python Developer', company='Amazon')
+        create_job(title='Sales Executive', company='HDFC Bank', skills=['Sales'],
+                   description='Sell banking products.', requirements='')
+
+        response = self.client.get('/api/jobs/', {'search': 'developer', 'ordering': 'company'})
+        self.assertEqual([job['company'] for job in response.data['results']], ['Amazon', 'Zoho'])
+
+    def test_stop_word_query_does_not_filter(self):
+        create_job()
+        response = self.client.get('/api/jobs/', {'keyword': 'the'})
+        self.assertEqual(len(response.data['results']), 1)
+
+
+@override_settings(CACHES=LOCMEM_CACHE)
+class JobCursorPaginationTest(APITestCase):
+    """Test keyset pagination on the job list endpoint"""
+
+    def setUp(self):
+        now = timezone.now()
+        self.jobs = []
+        for i in range(7):
+            # Pairs share created_at so the id tie-breaker is exercised
+            self.jobs.append(create_job(
+                title=f'Developer {i}',
+                created_at=now - timedelta(hours=i // 2),
+                min_salary=None if i % 3 == 0 else 100000 * (i % 4),
+                category='it' if i % 2 else 'design',
+            ))
+
+    def walk(self, params):
+        """Follow next links to the end; return ids in page order"""
+        ids = []
+        response = self.client.get('/api/jobs/', {**params, 'page_size': 2})
+        while True:
+            self.assertEqual(response.status_code, 200)
+            ids.extend(job['id'] for job in response.data['results'])
+            if not response.data['next']:
+                return ids
+            response = self.client.get(response.data['next'])
+
+    def test_walks_every_job_once_in_order(self):
+        expected = [job.id for job in sorted(self.jobs, key=lambda job: (-job.created_at.timestamp(), job.id))]
+        self.assertEqual(self.walk({}), expected)
+
+    def test_ordering_on_nullable_field(self):
+        ids = self.walk({'ordering': '-min_salary'})
+        self.assertEqual(sorted(ids), sorted(job.id for job in self.jobs))
+        salaries = [Job.objects.get(id=job_id).min_salary for job_id in ids]
+        present = [salary for salary in salaries if salary is not None]
+        self.assertEqual(present, sorted(present, reverse=True))
+        self.assertEqual(salaries[len(present):], [None] * (len(salaries) - len(present)))
+
+    def test_filters_apply_to_every_page(self):
+        ids = self.walk({'category': 'it'})
+        self.assertEqual(set(ids), {job.id for job in self.jobs if job.category == 'it'})
+
+    def test_search_results_paginate_by_rank(self):
+        ids = self.walk({'keyword': 'developer'})
+        self.assertEqual(sorted(ids), sorted(job.id for job in self.jobs))
+
+    def test_previous_link_returns_prior_page(self):
+        first = self.client.get('/api/jobs/', {'page_size': 3})
+        second = self.client.get(first.data['next'])
+        back = self.client.get(second.data['previous'])
+        self.assertEqual(back.data['results'], first.data['results'])
+
+    def test_no_count_or_offset_queries(self):
+        first = self.client.get('/api/jobs/', {'page_size': 2})
+        with CaptureQueriesContext(connection) as queries:
+            self.client.get(first.data['next'])
+        sql = ' '.join(query['sql'].upper() for query in queries)
+        self.assertNotIn('COUNT(', sql)
+        self.assertNotIn('OFFSET', sql)
+
+    def test_invalid_cursor(self):
+        response = self.client.get('/api/jobs/', {'cursor': 'not-a-cursor'})
+        self.assertEqual(response.status_code, 404)
+
+
+@override_settings(CACHES=LOCMEM_CACHE)
+class JobFacetsAPITest(APITestCase):
+    """Test the faceted counts endpoint"""
+
+    def setUp(self):
+        cache.clear()
+        create_job(category='it', work_mode='remote')
+        create_job(category='it', work_mode='office', company_size='large')
+        create_job(title='Sales Executive', category='sales', work_mode='office', skills=['Sales'], requirements='')
+        create_job(category='it', is_active=False)
+
+    def counts(self, data, field):
+        return {item['value']: item['count'] for item in data['facets'][field] if item['count']}
+
+    def test_counts_in_single_query(self):
+        with CaptureQueriesContext(connection) as queries:
+            response = self.client.get('/api/jobs/facets/')
+        self.assertEqual(len(queries), 1)
+        self.assertEqual(response.data['total'], 3)
+        self.assertEqual(self.counts(response.data, 'category'), {'it': 2, 'sales': 1})
+        self.assertEqual(self.counts(response.data, 'work_mode'), {'remote': 1, 'office': 2})
+        self.assertEqual(self.counts(response.data, 'company_size'), {'medium': 2, 'large': 1})
+
+    def test_respects_list_filters(self):
+        response = self.client.get('/api/jobs/facets/', {'work_mode': 'office', 'keyword': 'python'})
+        self.assertEqual(response.data['total'], 1)
+        self.assertEqual(self.counts(response.data, 'category'), {'it': 1})
+
+    def test_cached_per_normalized_filter_set(self):
+        self.client.get('/api/jobs/facets/', {'location': 'Bangalore', 'keyword': 'Python Developer'})
+        with CaptureQueriesContext(connection) as queries:
+            response = self.client.get('/api/jobs/facets/', {'keyword': 'developer python', 'location': ' bangalore '})
+        self.assertEqual(len(queries), 0)
+        self.assertEqual(response.data['total'], 2)
+
+    @override_settings(JOB_CACHE_TIMEOUT=0)
+    def test_not_cached_when_caching_off(self):
+        self.client.get('/api/jobs/facets/')
+        with CaptureQueriesContext(connection) as queries:
+            response = self.client.get('/api/jobs/facets/')
+        self.assertEqual(len(queries), 1)
+        self.assertEqual(response.data['total'], 3)
+
+
+@override_settings(CACHES=LOCMEM_CACHE)
+class JobResponseCacheTest(APITestCase):
+    """Test the version-invalidated list/detail cache"""
+
+    def setUp(self):
+        cache.clear()
+        self.job = create_job()
+
+    def test_equivalent_query_strings_share_an_entry(self):
+        first = self.client.get('/api/jobs/', {'location': 'Bangalore', 'category': 'it'})
+        second = self.client.get('/api/jobs/', {'category': 'it', 'location': 'BANGALORE', 'ordering': '-created_at', 'page_size': 20})
+        self.assertEqual(first['X-Cache'], 'MISS')
+        self.assertEqual(second['X-Cache'], 'HIT')
+        self.assertEqual(first.data, second.data)
+
+    def test_job_save_invalidates_list_and_detail(self):
+        self.client.get('/api/jobs/')
+        self.client.get(f'/api/jobs/{self.job.id}/')
+
+        self.job.title = 'Senior Python Developer'
+        self.job.save()
+
+        listing = self.client.get('/api/jobs/')
+        detail = self.client.get(f'/api/jobs/{self.job.id}/')
+        self.assertEqual(listing['X-Cache'], 'MISS')
+        self.assertEqual(detail['X-Cache'], 'MISS')
+        self.assertEqual(detail.data['title'], 'Senior Python Developer')
+
+    def test_job_delete_invalidates_list(self):
+        self.client.get('/api/jobs/')
+        self.job.delete()
+        self.assertEqual(self.client.get('/api/jobs/').data['results'], [])
+
+    @override_settings(CACHES={'default': {
+        'BACKEND': 'django.core.cache.backends.db.DatabaseCache', 'LOCATION': 'missing_cache_table',
+    }}, JOB_CACHE_TIMEOUT=0)
+    def test_missing_cache_table(self):
+        # Before `createcachetable`: the version is kept per process, and saves still work
+        with self.assertLogs('jobs.cache', 'WARNING'):
+            version = get_jobs_version()
+            self.job.title = 'Senior Python Developer'
+            self.job.save()
+            self.assertGreater(get_jobs_version(), version)
+            self.assertEqual(self.client.get('/api/jobs/').status_code, 200)
+
+    def test_hit_rate_recorded(self):
+        CacheManager.reset_hit_rate('job_detail')
+        for _ in range(4):
+            self.client.get(f'/api/jobs/{self.job.id}/')
+        self.assertEqual(CacheManager.get_hit_rate('job_detail'), {'hits': 3, 'misses': 1, 'hit_rate': 0.75})
+
+
+@override_settings(CACHES=LOCMEM_CACHE, JOB_CACHE_TIMEOUT=0)
+class JobSparseFieldsTest(APITestCase):
+    """Test the compact listing projection and ?fields="""
+
+    def setUp(self):
+        self.job = create_job(description='x' * 1000)
+        create_job(title='Django Developer')
+        job_catalog.current()  # built on first use; not part of the listing's queries
+
+    def test_listing_uses_card_fields(self):
+        with CaptureQueriesContext(connection) as queries:
+            response = self.client.get('/api/jobs/')
+        self.assertEqual(len(queries), 1)
+        self.assertNotIn('"requirements"', queries[0]['sql'])
+        row = response.data['results'][-1]
+        self.assertNotIn('description', row)
+        self.assertNotIn('posted_ago', row)
+        self.assertEqual(len(row['summary']), 300)
+
+    def test_fields_param_on_list(self):
+        with CaptureQueriesContext(connection) as queries:
+            response = self.client.get('/api/jobs/', {'fields': 'title, id', 'ordering': 'company'})
+        self.assertEqual(len(queries), 1)
+        self.assertEqual(set(response.data['results'][0]), {'id', 'title'})
+
+    def test_fields_param_on_detail(self):
+        response = self.client.get(f'/api/jobs/{self.job.id}/', {'fields': 'title,posted_ago'})
+        self.assertEqual(set(response.data), {'title', 'posted_ago'})
+
+        full = self.client.get(f'/api/jobs/{self.job.id}/')
+        self.assertIn('requirements', full.data)
+
+    def test_unknown_field_rejected(self):
+        response = self.client.get('/api/jobs/', {'fields': 'title,password'})
+        self.assertEqual(response.status_code, 400)
+
+
+@override_settings(CACHES=LOCMEM_CACHE, JOB_CACHE_TIMEOUT=0)
+class IndexAdvisorTest(TestCase):
+    """Test the composite indexes and the index advisor"""
+
+    def test_model_indexes_created(self):
+        with connection.cursor() as cursor:
+            job_indexes = connection.introspection.get_constraints(cursor, 'jobs_job')
+            application_indexes = connection.introspection.get_constraints(cursor, 'jobs_jobapplication')
+        for index in Job._meta.indexes:
+            self.assertIn(index.name, job_indexes)
+        self.assertEqual(application_indexes['application_job_email_uniq']['columns'], ['job_id', 'email'])
+        self.assertTrue(application_indexes['application_job_email_uniq']['unique'])
+
+    @skipUnless(connection.vendor == 'sqlite', 'plan text is SQLite specific')
+    def test_listing_uses_partial_index(self):
+        create_job()
+        sql, params = Job.objects.filter(is_active=True, category='it').order_by('-created_at').query.sql_with_params()
+        plan = DatabaseIndexOptimizer.explain(sql, params)
+        self.assertIn('job_active_category_idx', ' '.join(plan))
+        self.assertEqual(DatabaseIndexOptimizer.analyze_plan(plan, 'sqlite'), ([], False))
+
+    def test_analyze_plan(self):
+        self.assertEqual(
+            DatabaseIndexOptimizer.analyze_plan(['SCAN jobs_job', 'USE TEMP B-TREE FOR ORDER BY'], 'sqlite'),
+            (['jobs_job'], True),
+        )
+        self.assertEqual(
+            DatabaseIndexOptimizer.analyze_plan(['SCAN jobs_job USING INDEX job_active_recent_idx'], 'sqlite'),
+            ([], False),
+        )
+        self.assertEqual(
+            DatabaseIndexOptimizer.analyze_plan(['Limit  (cost=1..2)', '  ->  Sort  (cost=1..2)', '        ->  Seq Scan on jobs_job  (cost=0..1)'], 'postgresql'),
+            (['jobs_job'], True),
+        )
+        self.assertEqual(
+            DatabaseIndexOptimizer.analyze_plan(['jobs_job: type=ALL key=None rows=900 Using where; Using filesort'], 'mysql'),
+            (['jobs_job'], True),
+        )
+
+    def test_suggest_columns(self):
+        sql = ('SELECT "jobs_job"."id" FROM "jobs_job" WHERE ("jobs_job"."is_active" AND "jobs_job"."location" = %s '
+               'AND "jobs_job"."min_salary" >= %s) ORDER BY "jobs_job"."created_at" DESC')
+        self.assertEqual(DatabaseIndexOptimizer.suggest_columns(sql, 'jobs_job'), ['is_active', 'location', 'created_at'])
+
+    def test_index_advisor_command(self):
+        create_job()
+        out = StringIO()
+        call_command('index_advisor', stdout=out)
+        self.assertIn('queries', out.getvalue())
+        self.assertIn(connection.vendor, out.getvalue())
+
+    def test_index_advisor_skips_catalog(self):
+        create_job()
+        job_catalog.current()  # a ready snapshot would answer listings with primary key lookups
+        with mock.patch.object(DatabaseIndexOptimizer, 'explain', return_value=[]) as explain:
+            call_command('index_advisor', stdout=StringIO())
+        queries = [call.args[0] for call in explain.call_args_list]
+        self.assertTrue(any('"category" =' in sql and 'ORDER BY' in sql for sql in queries))
+
+    def test_index_advisor_records_no_views(self):
+        popularity.job_events.take()
+        create_job()
+        call_command('index_advisor', stdout=StringIO())
+        self.assertEqual(popularity.job_events.take(), {})
+
+
+@override_settings(CACHES=LOCMEM_CACHE, JOB_CACHE_TIMEOUT=0)
+class SkillTagTest(APITestCase):
+    """Test the normalized skill tags and ?skills= filtering"""
+
+    def setUp(self):
+        self.django_job = create_job(skills=['Python', 'Django', 'REST APIs'])
+        self.react_job = create_job(title='Frontend Developer', skills=['React.js', 'JavaScript'])
+        self.full_stack = create_job(title='Full Stack Developer', skills=['ReactJS', 'python ', 'Node'])
+
+    def ids(self, params):
+        response = self.client.get('/api/jobs/', params)
+        self.assertEqual(response.status_code, 200)
+        return {job['id'] for job in response.data['results']}
+
+    def test_normalize_skill(self):
+        self.assertEqual(skills.normalize_skill('  React.JS '), 'react')
+        self.assertEqual(skills.normalize_skill('Power_BI'), 'power bi')
+        self.assertEqual(skills.skill_labels('Python, python,NodeJS'), {'python': 'Python', 'node.js': 'NodeJS'})
+
+    def test_aliases_share_one_tag(self):
+        self.assertEqual(SkillTag.objects.filter(name='react').count(), 1)
+        self.assertEqual(SkillTag.objects.get(name='react').label, 'React.js')
+        self.assertEqual(JobSkill.objects.filter(tag__name='rest api').count(), 1)
+
+    def test_links_follow_job_saves(self):
+        self.react_job.skills = ['Vue.js']
+        self.react_job.save()
+        self.assertEqual(
+            set(JobSkill.objects.filter(job=self.react_job).values_list('tag__name', flat=True)), {'vue'}
+        )
+
+    def test_skills_all_and_any(self):
+        self.assertEqual(self.ids({'skills': 'python,react'}), {self.full_stack.id})
+        self.assertEqual(self.ids({'skills': 'Django, React', 'skills_mode': 'any'}),
+                         {self.django_job.id, self.react_job.id, self.full_stack.id})
+        self.assertEqual(self.ids({'skills': 'python,rust'}), set())
+
+    def test_skills_filter_is_one_query(self):
+        with CaptureQueriesContext(connection) as queries:
+            self.client.get('/api/jobs/', {'skills': 'python,nodejs'})
+        self.assertEqual(len(queries), 1)
+
+    def test_rebuild_skill_index(self):
+        JobSkill.objects.all().delete()
+        self.assertEqual(skills.rebuild_skill_index(Job.objects.all()), 3)
+        self.assertEqual(JobSkill.objects.filter(tag__name='python').count(), 2)
+
+    def test_cache_key_normalizes_skills(self):
+        from .filters import normalize_filter_params
+        self.assertEqual(
+            normalize_filter_params({'skills': 'ReactJS, python', 'skills_mode': 'all'}),
+            normalize_filter_params({'skills': 'python,react.js'}),
+        )
+
+
+@override_settings(CACHES=LOCMEM_CACHE, JOB_CACHE_TIMEOUT=0)
+class SalaryNormalizationTest(APITestCase):
+    """Test annualized salaries, overlap filtering and salary ordering"""
+
+    def setUp(self):
+        self.mid = create_job(salary_display='₹8-12 LPA')
+        self.intern = create_job(title='Intern', salary_display='₹10-20K/month', min_salary=10000, max_salary=20000)
+        self.up_to = create_job(title='Support Engineer', salary_display='Up to ₹5 LPA', min_salary=None, max_salary=None)
+        self.senior = create_job(title='Architect', salary_display='₹30 LPA+', min_salary=None, max_salary=None)
+        self.unknown = create_job(title='Sales Executive', salary_display='Not disclosed', min_salary=None, max_salary=None)
+
+    def ids(self, params):
+        return [job['id'] for job in self.client.get('/api/jobs/', params).data['results']]
+
+    def test_parse_salary(self):
+        self.assertEqual(salary.parse_salary('₹8-15 LPA'), (800000, 1500000))
+        self.assertEqual(salary.parse_salary('₹25,000 - 40,000 per month'), (300000, 480000))
+        self.assertEqual(salary.parse_salary('₹1.2 Cr'), (12000000, 12000000))
+        self.assertEqual(salary.parse_salary('Up to ₹12 LPA'), (None, 1200000))
+        self.assertEqual(salary.parse_salary('Competitive'), (None, None))
+        # Clamped to what the 32-bit annual salary columns hold
+        self.assertEqual(salary.parse_salary('₹99999 LPA'), (salary.MAX_ANNUAL_SALARY, salary.MAX_ANNUAL_SALARY))
+        job = create_job(salary_display='₹5-99999 LPA')
+        self.assertEqual((job.annual_salary_min, job.annual_salary_max), (500000, salary.MAX_ANNUAL_SALARY))
+
+    def test_annualized_on_save(self):
+        self.assertEqual((self.intern.annual_salary_min, self.intern.annual_salary_max), (120000, 240000))
+        self.intern.salary_display = '₹3-4 LPA'
+        self.intern.save()
+        self.intern.refresh_from_db()
+        self.assertEqual(self.intern.annual_salary_max, 400000)
+
+    def test_range_overlap_filter(self):
+        # 2-4 LPA: the monthly intern (1.2-2.4 LPA annual) and "up to 5 LPA" overlap
+        self.assertEqual(set(self.ids({'min_salary': 200000, 'max_salary': 400000})), {self.intern.id, self.up_to.id})
+        # 10 LPA+: 8-12 LPA overlaps, 30 LPA+ is open-ended; unknown never matches
+        self.assertEqual(set(self.ids({'min_salary': 1000000})), {self.mid.id, self.senior.id})
+        self.assertEqual(len(self.ids({'min_salary': 'lots'})), 5)
+        # Absurd amounts are clamped, not a database overflow
+        self.assertEqual(self.ids({'min_salary': '1e30'}), [self.senior.id])
+        self.assertEqual(len(self.ids({'max_salary': '1e30'})), 4)
+
+    def test_salary_ordering(self):
+        # Best paid first by annual maximum - or minimum, for open-ended "30 LPA+"; unknown sorts last
+        self.assertEqual(self.ids({'ordering': '-salary'}),
+                         [self.senior.id, self.mid.id, self.up_to.id, self.intern.id, self.unknown.id])
+        self.assertEqual(self.ids({'ordering': 'salary'}),
+                         [self.intern.id, self.mid.id, self.senior.id, self.up_to.id, self.unknown.id])
+
+    def test_backfill(self):
+        Job.objects.update(annual_salary_min=None, annual_salary_max=None)
+        version = get_jobs_version()
+        self.assertEqual(salary.backfill_salaries(Job.objects.all(), batch_size=2), (5, 4))
+        self.assertEqual(Job.objects.get(pk=self.mid.pk).annual_salary_min, 800000)
+        # Cached listings and the catalog snapshot see the new salaries
+        self.assertNotEqual(get_jobs_version(), version)
+        self.assertEqual(salary.backfill_salaries(Job.objects.all()), (5, 0))
+
+
+@override_settings(CACHES=LOCMEM_CACHE, JOB_CACHE_TIMEOUT=0)
+class JobLocationTest(APITestCase):
+    """Test gazetteer geocoding, city matching and ?near= radius search"""
+
+    def setUp(self):
+        self.bangalore = create_job(location='Bangalore, India')
+        self.pune = create_job(location='Hinjewadi, Pune')
+        self.mumbai = create_job(location='Mumbai, Maharashtra')
+        self.solapur = create_job(location='Solapur, India')
+        self.remote = create_job(location='Remote', work_mode='remote')
+
+    def ids(self, params):
+        response = self.client.get('/api/jobs/', params)
+        self.assertEqual(response.status_code, 200)
+        return {job['id'] for job in response.data['results']}
+
+    def test_resolve_location(self):
+        self.assertEqual(geo.resolve_location('Bengaluru Urban, Karnataka').name, 'Bengaluru')
+        self.assertEqual(geo.resolve_location('Gurgaon / Delhi NCR').name, 'Gurugram')
+        self.assertIsNone(geo.resolve_location('Remote'))
+
+    def test_geocoded_on_save(self):
+        self.assertEqual(self.pune.city, 'Pune')
+        self.assertAlmostEqual(self.pune.latitude, 18.5204)
+        self.assertEqual((self.remote.city, self.remote.latitude), ('', None))
+
+        self.pune.location = 'Nagpur'
+        self.pune.save()
+        self.pune.refresh_from_db()
+        self.assertEqual(self.pune.city, 'Nagpur')
+
+    def test_location_alias_matches_city(self):
+        self.assertEqual(self.ids({'location': 'Bengaluru'}), {self.bangalore.id})
+        self.assertEqual(self.ids({'location': 'poona'}), {self.pune.id})
+        self.assertEqual(self.ids({'location': 'remote'}), {self.remote.id})
+
+    def test_near_radius(self):
+        self.assertEqual(self.ids({'near': 'pune', 'radius_km': 50}), {self.pune.id})
+        # Mumbai is ~120 km from Pune, Solapur ~200 km
+        self.assertEqual(self.ids({'near': 'pune', 'radius_km': 150}), {self.pune.id, self.mumbai.id})
+        self.assertEqual(self.ids({'near': '18.52,73.85', 'radius_km': 250}),
+                         {self.pune.id, self.mumbai.id, self.solapur.id})
+        self.assertEqual(self.ids({'near': 'atlantis'}), set())
+
+    @skipUnless(connection.vendor == 'sqlite', 'plan text is SQLite specific')
+    def test_near_uses_geo_index(self):
+        sql, params = geo.filter_near(Job.objects.filter(is_active=True), 'pune', 50).query.sql_with_params()
+        self.assertIn('job_active_geo_idx', ' '.join(DatabaseIndexOptimizer.explain(sql, params)))
+
+    def test_cache_key_uses_canonical_city(self):
+        from .filters import normalize_filter_params
+        self.assertEqual(normalize_filter_params({'location': 'Bangalore'}), normalize_filter_params({'location': 'bengaluru'}))
+        self.assertEqual(normalize_filter_params({'near': 'Poona', 'radius_km': '50.0'}),
+                         normalize_filter_params({'near': 'pune', 'radius_km': '50'}))
+
+
+@override_settings(CACHES=LOCMEM_CACHE, JOB_SUGGEST_REFRESH_SECONDS=0, JOB_SUGGEST_BACKGROUND_REFRESH=False)
+class JobSuggestTest(APITestCase):
+    """Test the typeahead prefix index and /api/jobs/suggest/"""
+
+    def setUp(self):
+        cache.clear()
+        create_job(title='Senior Python Developer', company='Zoho', location='Chennai')
+        create_job(title='Python Developer', company='Infosys')
+        create_job(title='Python Developer', company='Paytm', location='Noida')
+        create_job(title='Product Manager', company='Paytm', is_active=False)
+        self.index = PrefixIndex()
+        self.index.refresh(force=True)
+
+    def texts(self, query, **kwargs):
+        return [(item['type'], item['text']) for item in self.index.lookup(query, **kwargs)]
+
+    def test_ranked_by_frequency(self):
+        # Every active job lists the Python skill; two share the title
+        self.assertEqual(self.texts('pyt')[:2], [('skill', 'Python'), ('title', 'Python Developer')])
+        self.assertEqual(self.index.lookup('python d')[0]['count'], 2)
+
+    def test_matches_word_starts_only(self):
+        self.assertIn(('title', 'Senior Python Developer'), self.texts('dev'))
+        self.assertEqual(self.texts('eloper'), [])
+
+    def test_inactive_jobs_excluded(self):
+        self.assertNotIn(('title', 'Product Manager'), self.texts('pro'))
+        self.assertEqual(self.texts('paytm'), [('company', 'Paytm')])
+        self.assertEqual(self.index.lookup('paytm')[0]['count'], 1)
+
+    def test_long_queries_and_limit(self):
+        self.assertEqual(self.texts('senior python developer'), [('title', 'Senior Python Developer')])
+        self.assertEqual(len(self.texts('p', limit=2)), 2)
+
+    def test_incremental_refresh(self):
+        Job.objects.filter(company='Zoho').update(is_active=False)
+        create_job(title='Data Analyst', company='Zomato', location='Gurgaon')
+        changed = self.index.refresh(force=True)
+        self.assertLess(changed, len(self.index.weights))
+        self.assertEqual(self.texts('zo'), [('company', 'Zomato')])
+        self.assertEqual(self.texts('gur'), [('city', 'Gurugram')])
+
+    def test_endpoint_refreshes_on_version_change(self):
+        response = self.client.get('/api/jobs/suggest/', {'q': 'Pyth', 'limit': 1})
+        self.assertEqual(response.data['suggestions'], [{'text': 'Python', 'type': 'skill', 'count': 3}])
+
+        create_job(title='Rust Developer', company='Ola', skills=['Rust'])
+        response = self.client.get('/api/jobs/suggest/', {'q': 'rus'})
+        self.assertIn({'text': 'Rust Developer', 'type': 'title', 'count': 1}, response.data['suggestions'])
+        self.assertEqual(self.client.get('/api/jobs/suggest/', {'q': ' '}).data['suggestions'], [])
+
+
+class JobStatsRollupTest(APITestCase):
+    """Test the incrementally maintained stats rollup and /api/jobs/stats/"""
+
+    def setUp(self):
+        self.python = create_job(company='Infosys', category='it')
+        self.writer = create_job(title='Content Writer', company='Zomato', category='marketing')
+        create_job(title='Designer', company='Zomato', category='design', is_active=False)
+
+    def assertStats(self, total_jobs, categories, companies):
+        self.assertEqual(stats.get_job_stats(), {
+            'total_jobs': total_jobs, 'categories': categories, 'companies': companies,
+        })
+
+    def test_signals_keep_counts(self):
+        self.assertStats(2, 2, 2)
+        self.assertEqual(JobStatCount.objects.get(kind='company', key='Zomato').open_jobs, 1)
+
+        create_job(title='SEO Executive', company='Zomato', category='marketing')
+        self.assertStats(3, 2, 2)
+        self.python.category = 'design'
+        self.python.save()
+        self.assertStats(3, 2, 2)
+        self.assertFalse(JobStatCount.objects.filter(kind='category', key='it').exists())
+
+        self.writer.is_active = False
+        self.writer.save()
+        self.python.delete()
+        self.assertStats(1, 1, 1)
+        self.assertEqual(JobStatCount.objects.get(kind='company', key='Zomato').open_jobs, 1)
+
+        # Saves that leave the counted fields alone don't read the stored row
+        self.writer.title = 'Senior Content Writer'
+        with CaptureQueriesContext(connection) as queries:
+            self.writer.save(update_fields=['title', 'updated_at'])
+        self.assertFalse([query for query in queries if query['sql'].startswith('SELECT "jobs_job"."is_active"')])
+        self.assertStats(1, 1, 1)
+
+    def test_endpoint_reads_one_row(self):
+        with self.assertNumQueries(1):
+            response = self.client.get('/api/jobs/stats/')
+        self.assertEqual(response.data, {'total_jobs': 2, 'categories': 2, 'companies': 2})
+
+    def test_reconcile_fixes_drift(self):
+        # queryset.update() bypasses the signals
+        Job.objects.filter(company='Zomato').update(is_active=True)
+        self.assertStats(2, 2, 2)
+        out = StringIO()
+        call_command('reconcile_job_stats', stdout=out)
+        self.assertIn('3 open jobs, 3 categories, 2 companies', out.getvalue())
+        self.assertStats(3, 3, 2)
+        self.assertEqual(stats.rebuild_job_stats(), 0)
+
+    def test_missing_row_is_rebuilt(self):
+        JobStats.objects.all().delete()
+        self.assertStats(2, 2, 2)
+
+
+@override_settings(CACHES=LOCMEM_CACHE, JOB_CACHE_TIMEOUT=0)
+class JobCatalogTest(APITestCase):
+    """Test the in-memory catalog answers listings exactly like the database"""
+
+    def setUp(self):
+        cache.clear()
+        now = timezone.now()
+        bands = ['₹4-7 LPA', '₹8-12 LPA', '₹25-40 LPA', 'Up to ₹6 LPA', '₹10 LPA+', 'Negotiable', '₹10-20K/month']
+        places = ['Pune', 'Bengaluru', 'Remote', 'Mumbai, India']
+        for n in range(40):
+            create_job(
+                title=f'Job {n}', company=f'Company {n % 6}',
+                category=['it', 'marketing', 'design'][n % 3],
+                work_mode=['remote', 'office', 'hybrid'][n % 4 % 3],
+                experience_level=['entry', 'mid'][n % 2],
+                location=places[n % 4], salary_display=bands[n % 7],
+                min_salary=None if n % 5 == 0 else 100000 * (n % 9 + 1), max_salary=None,
+                # a few equal timestamps, so the id tie-breaker matters
+                created_at=now - timedelta(hours=n // 3),
+            )
+
+    def walk(self, params):
+        """Every id of a listing, following next links, then back via previous links"""
+        response = self.client.get('/api/jobs/', dict(params, page_size=7))
+        pages = [[row['id'] for row in response.data['results']]]
+        while response.data['next']:
+            response = self.client.get(response.data['next'])
+            pages.append([row['id'] for row in response.data['results']])
+        backwards = []
+        while response.data['previous']:
+            response = self.client.get(response.data['previous'])
+            backwards.append([row['id'] for row in response.data['results']])
+        return pages, backwards
+
+    def test_matches_database(self):
+        cases = [
+            {}, {'category': 'it'}, {'category': 'it', 'work_mode': 'remote'}, {'job_type': 'part-time'},
+            {'location': 'bangalore'}, {'location': 'all', 'experience_level': 'mid'},
+            {'min_salary': '900000'}, {'max_salary': '500000'}, {'min_salary': '500000', 'max_salary': '1500000'},
+            {'ordering': '-salary'}, {'ordering': 'salary', 'category': 'design'},
+            {'ordering': 'created_at'}, {'ordering': '-min_salary', 'min_salary': '300000'},
+        ]
+        for params in cases:
+            with self.subTest(params=params):
+                with override_settings(JOB_CATALOG_ENABLED=False):
+                    expected = self.walk(params)
+                self.assertEqual(self.walk(params), expected)
+
+    def test_unsupported_requests_skip_the_catalog(self):
+        job_catalog.snapshot = None
+        for params in ({'keyword': 'job'}, {'skills': 'python'}, {'near': 'pune'}, {'location': 'Remote'},
+                       {'ordering': 'title'}):
+            self.client.get('/api/jobs/', params)
+        self.assertIsNone(job_catalog.snapshot)
+        self.client.get('/api/jobs/', {'category': 'it'})
+        self.assertEqual(job_catalog.snapshot.size, 40)
+
+    def test_rebuilt_when_jobs_change(self):
+        self.client.get('/api/jobs/')
+        snapshot = job_catalog.snapshot
+        job = create_job(title='Fresh Job', category='sales')
+        response = self.client.get('/api/jobs/', {'category': 'sales'})
+        self.assertIsNot(job_catalog.snapshot, snapshot)
+        self.assertEqual([row['id'] for row in response.data['results']], [job.id])
+
+    def test_salary_buckets_cover_matches(self):
+        snapshot = load_snapshot()
+        self.assertGreater(snapshot.memory_bytes(), 0)
+        for low in (0, 150000, 700000, 2500000, 10 ** 9):
+            bitmap, bounds = snapshot.select({'min_salary': str(low)})
+            matched = {snapshot.ids[row] for row in snapshot.rows_of(bitmap) if snapshot._salary_check(bounds)(row)}
+            expected = set(Job.objects.filter(salary.salary_overlap_q(low, None)).values_list('id', flat=True))
+            self.assertEqual(matched, expected)
+        self.assertEqual(CatalogSnapshot([]).page((0, None), [('created_at', True), ('id', False)], None, False, 5), [])
+
+
+FEED_CSV = """external_id,title,company,location,category,salary_display,description,skills,work_mode
+p-1,Python Developer,Infosys,"Bengaluru, Karnataka",it,₹8-12 LPA,Build Django APIs.,Python|Django,remote
+p-2,Data Analyst,Wipro,Pune,it,₹5-8 LPA,Dashboards in Power BI.,"SQL, Excel",office
+p-3,Broken Row,Acme,Pune,astrology,₹1 LPA,Nope.,,office
+,No Id,Acme,Pune,it,₹1 LPA,Nope.,,office
+"""
+
+
+@override_settings(CACHES=LOCMEM_CACHE)
+class JobIngestTest(APITestCase):
+    """Test the streaming bulk ingest command and endpoint"""
+
+    def ingest_csv(self, text, **options):
+        with tempfile.NamedTemporaryFile('w', suffix='.csv', delete=False, encoding='utf-8') as handle:
+            handle.write(text)
+        self.addCleanup(os.remove, handle.name)
+        out, err = StringIO(), StringIO()
+        call_command('ingest_jobs', handle.name, source='partner', stdout=out, stderr=err, **options)
+        return out.getvalue(), err.getvalue()
+
+    def test_command_upserts_and_indexes(self):
+        out, err = self.ingest_csv(FEED_CSV, batch_size=2)
+        self.assertIn('4 rows', out)
+        self.assertIn('2 created, 0 updated, 2 invalid', out)
+        self.assertIn('row 3 [p-3]: category', err)
+        self.assertIn('row 4 []: external_id', err)
+
+        job = Job.objects.get(source='partner', external_id='p-1')
+        self.assertEqual((job.city, job.annual_salary_max, job.work_mode), ('Bengaluru', 1200000, 'remote'))
+        self.assertEqual(job.skills, ['Python', 'Django'])
+        self.assertTrue(JobSkill.objects.filter(job=job, tag__name='django').exists())
+        self.assertEqual(stats.get_job_stats()['total_jobs'], 2)
+        response = self.client.get('/api/jobs/', {'keyword': 'power bi'})
+        self.assertEqual([row['id'] for row in response.data['results']],
+                         [Job.objects.get(external_id='p-2').id])
+
+        out, _ = self.ingest_csv(FEED_CSV.replace('Build Django APIs.', 'Build FastAPI services.'))
+        self.assertIn('0 created, 2 updated', out)
+        self.assertEqual(Job.objects.filter(source='partner').count(), 2)
+        self.assertEqual(Job.objects.get(external_id='p-1').description, 'Build FastAPI services.')
+
+    def test_duplicate_keys_in_batch_last_wins(self):
+        records = [
+            {'external_id': 'x', 'title': 'First', 'company': 'A', 'location': 'Pune', 'category': 'it',
+             'salary_display': '₹4-7 LPA', 'description': 'One', 'skills': ['Go']},
+            {'external_id': 'x', 'title': 'Second', 'company': 'A', 'location': 'Pune', 'category': 'it',
+             'salary_display': '₹4-7 LPA', 'description': 'Two', 'skills': ['Go']},
+        ]
+        report = ingest(records, 'partner')
+        self.assertEqual((report.created, report.updated), (1, 0))
+        self.assertEqual(Job.objects.get(external_id='x').title, 'Second')
+
+    def test_endpoint_requires_admin(self):
+        url = '/api/jobs/ingest/?source=partner&feed_format=jsonl'
+        self.assertIn(self.client.post(url, '{}', content_type='application/x-ndjson').status_code, (401, 403))
+
+    def test_endpoint_streams_jsonl_and_xml(self):
+        admin = get_user_model().objects.create_superuser(
+            email='admin@example.com', username='admin', first_name='A', last_name='B', password='pw',
+        )
+        self.client.force_authenticate(admin)
+        lines = '\n'.join([
+            '{"external_id": 1, "title": "QA Engineer", "company": "Zoho", "location": "Chennai", "category": "it",'
+            ' "salary_display": "₹6 LPA", "description": "Test things", "skills": ["Selenium"]}',
+            '{"external_id": 2, "title": "Nurse", "company": "Apollo", "location": "Delhi", "category": "healthcare",'
+            ' "salary_display": "₹3 LPA", "description": "Care", "skills": "Care", "is_active": "maybe"}',
+        ])
+        response = self.client.post('/api/jobs/ingest/?source=feed', lines, content_type='application/x-ndjson')
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual((response.data['created'], response.data['invalid']), (1, 1))
+        self.assertEqual(response.data['errors'][0]['errors'][0]['row'], 2)
+        self.assertGreater(response.data['rows_per_second'], 0)
+
+        xml = (
+            '<?xml version="1.0"?><jobs><job><external_id>1</external_id><title>Senior QA Engineer</title>'
+            '<company>Zoho</company><location>Chennai</location><category>it</category>'
+            '<salary_display>₹9 LPA</salary_display><description>Lead testing</description>'
+            '<skills><skill>Selenium</skill><skill>Java</skill></skills></job></jobs>'
+        ).encode()
+        upload = SimpleUploadedFile('feed.xml', xml, content_type='application/xml')
+        response = self.client.post('/api/jobs/ingest/', {'file': upload, 'source': 'feed'}, format='multipart')
+        self.assertEqual((response.data['created'], response.data['updated']), (0, 1))
+        self.assertEqual(Job.objects.get(source='feed', external_id='1').skills, ['Selenium', 'Java'])
+
+        evil = b'<?xml version="1.0"?><!DOCTYPE jobs [<!ENTITY a "aaaa">]><jobs></jobs>'
+        response = self.client.post('/api/jobs/ingest/?source=feed&feed_format=xml', evil, content_type='application/xml')
+        self.assertEqual(response.status_code, 400)
+        self.assertIn('DOCTYPE', response.data['feed_error'])
+
+
+PAYMENTS_DESCRIPTION = (
+    'We are hiring a backend engineer to design, build and operate the payment APIs that power checkout '
+    'for millions of customers. You will work with Python, Django and PostgreSQL, own services end to end, '
+    'review code, mentor junior engineers and take part in the on-call rotation. Experience with message '
+    'queues, caching and cloud infrastructure is a plus. We offer flexible hours, health insurance and a '
+    'learning budget.'
+)
+
+
+def payments_record(external_id, **overrides):
+    record = {
+        'external_id': external_id, 'title': 'Backend Engineer - Payments', 'company': 'Razorpay',
+        'location': 'Bengaluru', 'category': 'it', 'salary_display': '₹20-30 LPA',
+        'description': PAYMENTS_DESCRIPTION.replace('millions of customers', 'millions of users')
+        .replace('a plus', 'nice to have'),
+        'skills': ['python', 'Django', 'Postgres'],
+    }
+    record.update(overrides)
+    return record
+
+
+@override_settings(CACHES=LOCMEM_CACHE)
+class JobDuplicateTest(APITestCase):
+    """Test near-duplicate fingerprints and how ingest handles duplicates"""
+
+    def setUp(self):
+        self.original = create_job(
+            title='Backend Engineer (Payments)', company='Razorpay', description=PAYMENTS_DESCRIPTION,
+            skills=['Python', 'Django', 'PostgreSQL'],
+        )
+
+    def signature(self, **fields):
+        job = Job(**{'title': self.original.title, 'description': PAYMENTS_DESCRIPTION,
+                     'skills': self.original.skills, **fields})
+        dedup.fingerprint_job(job)
+        return dedup.unpack_signature(job.fingerprint)
+
+    def test_fingerprint_similarity(self):
+        stored = dedup.unpack_signature(self.original.fingerprint)
+        bands = [getattr(self.original, field) for field in dedup.BAND_FIELDS]
+        self.assertEqual(tuple(bands), dedup.band_values(stored))
+
+        reworded = self.signature(**{key: payments_record('x')[key] for key in ('title', 'description', 'skills')})
+        self.assertGreaterEqual(dedup.similarity(stored, reworded), dedup.SIMILARITY_THRESHOLD)
+        other_role = self.signature(
+            title='Frontend Developer', skills=['React'],
+            description='Build user-friendly web applications using React.js and modern JavaScript.',
+        )
+        self.assertLess(dedup.similarity(stored, other_role), 0.3)
+        blank = Job(title='', description='', skills=[])
+        dedup.fingerprint_job(blank)
+        self.assertIsNone(blank.fingerprint)
+
+    def test_ingest_flags_duplicates(self):
+        report = ingest([
+            payments_record('a-1'),
+            payments_record('a-2', title='Data Analyst', skills=['SQL'], description='Dashboards in Power BI.'),
+            payments_record('a-3', title='Data Analyst', skills=['SQL'], description='Dashboards in Power BI!'),
+        ], 'aggregator')
+        self.assertEqual((report.created, report.flagged), (3, 2))
+
+        flagged = Job.objects.get(external_id='a-1')
+        self.assertEqual((flagged.duplicate_of_id, flagged.is_active), (self.original.id, False))
+        self.assertFalse(JobSearchToken.objects.filter(job=flagged).exists())
+        # A duplicate within the batch points at the earlier record
+        self.assertEqual(Job.objects.get(external_id='a-3').duplicate_of, Job.objects.get(external_id='a-2'))
+        self.assertEqual(stats.get_job_stats()['total_jobs'], 2)
+
+        # Re-sending an original updates it in place rather than matching itself
+        report = ingest([payments_record('a-2', title='Data Analyst', skills=['SQL'],
+                                         description='Dashboards in Power BI.')], 'aggregator')
+        self.assertEqual((report.updated, report.flagged), (1, 0))
+
+    def test_merge_and_off_policies(self):
+        report = ingest([payments_record('m-1')], 'aggregator', duplicates='merge')
+        self.assertEqual((report.created, report.merged), (0, 1))
+        self.assertFalse(Job.objects.filter(source='aggregator').exists())
+
+        report = ingest([payments_record('m-1')], 'aggregator', duplicates='off')
+        self.assertEqual((report.created, report.flagged), (1, 0))
+        self.assertTrue(Job.objects.get(external_id='m-1').is_active)
+
+        out = StringIO()
+        call_command('dedupe_jobs', stdout=out)
+        self.assertIn('flagged 1 near-duplicates', out.getvalue())
+        self.assertEqual(Job.objects.get(external_id='m-1').duplicate_of, self.original)
+        self.assertEqual(stats.get_job_stats()['total_jobs'], 1)
+
+
+@override_settings(JOB_EXPIRY_DAYS=60, JOB_ARCHIVE_AFTER_DAYS=30)
+class JobArchiveTest(APITestCase):
+    """Test job expiry, the archive_jobs command and the archive fallback on detail"""
+
+    def setUp(self):
+        self.now = timezone.now()
+        self.fresh = create_job(title='Fresh Role')
+        self.stale = create_job(title='Stale Role', created_at=self.now - timedelta(days=90))
+        self.past_deadline = create_job(title='Closed Role', expires_at=self.now - timedelta(hours=1))
+        self.extended = create_job(
+            title='Extended Role', created_at=self.now - timedelta(days=90), expires_at=self.now + timedelta(days=5),
+        )
+
+    def expire_long_ago(self, *jobs):
+        Job.objects.filter(pk__in=[job.pk for job in jobs]).update(
+            is_active=False, expired_at=self.now - timedelta(days=40),
+        )
+
+    def test_expire_jobs(self):
+        out = StringIO()
+        call_command('archive_jobs', '--expire-only', stdout=out)
+        self.assertIn('Closed 2 expired jobs and archived 0', out.getvalue())
+        self.assertEqual(
+            set(Job.objects.filter(is_active=False, expired_at__isnull=False).values_list('title', flat=True)),
+            {'Stale Role', 'Closed Role'},
+        )
+        self.assertEqual(stats.get_job_stats()['total_jobs'], 2)
+
+        # Expired jobs drop out of listings but their detail page stays up, closed
+        response = self.client.get('/api/jobs/')
+        self.assertEqual({job['title'] for job in response.data['results']}, {'Fresh Role', 'Extended Role'})
+        response = self.client.get(f'/api/jobs/{self.stale.pk}/')
+        self.assertEqual((response.status_code, response.data['is_active']), (200, False))
+        # ...unlike a job closed by hand
+        hidden = create_job(title='Withdrawn Role', is_active=False)
+        self.assertEqual(self.client.get(f'/api/jobs/{hidden.pk}/').status_code, 404)
+
+    def test_archive_jobs(self):
+        applied = create_job(title='Applied Role')
+        application = JobApplication.objects.create(
+            job=applied, full_name='Asha Rao', email='asha@example.com', phone='9999999999', resume='cv.pdf',
+        )
+        withdrawn = create_job(title='Withdrawn Role', is_active=False)
+        recently_expired = create_job(title='Recent Role', is_active=False, expired_at=self.now - timedelta(days=2))
+        self.expire_long_ago(self.stale, applied)
+
+        self.assertEqual(archive.archive_jobs(Job.objects.all(), batch_size=1, now=self.now), 1)
+        self.assertFalse(Job.objects.filter(pk=self.stale.pk).exists())
+        self.assertFalse(JobSearchToken.objects.filter(job_id=self.stale.pk).exists())
+        archived = ArchivedJob.objects.get(pk=self.stale.pk)
+        self.assertEqual((archived.title, archived.skills), ('Stale Role', self.stale.skills))
+        self.assertEqual(archived.created_at, self.stale.created_at)
+        # Jobs with applications, closed by hand, or not yet past the grace period stay put
+        self.assertEqual(Job.objects.filter(pk__in=[applied.pk, withdrawn.pk, recently_expired.pk]).count(), 3)
+        application.refresh_from_db()
+        self.assertEqual(application.job, applied)
+
+    def test_detail_falls_back_to_archive(self):
+        self.expire_long_ago(self.stale)
+        call_command('archive_jobs', stdout=StringIO())
+        for fields in ('', '?fields=id,title,is_active,posted_ago'):
+            response = self.client.get(f'/api/jobs/{self.stale.pk}/{fields}')
+            self.assertEqual(response.status_code, 200)
+            self.assertEqual((response.data['title'], response.data['is_active']), ('Stale Role', False))
+        self.assertEqual(self.client.get('/api/jobs/999999/').status_code, 404)
+
+        # Re-sending an expired feed job reopens it
+        feed_job = create_job(title='Feed Role', source='partner', external_id='p-1', expires_at=self.now)
+        archive.expire_jobs(Job.objects.all())
+        ingest([{**payments_record('p-1'), 'expires_at': (self.now + timedelta(days=30)).isoformat()}], 'partner')
+        feed_job.refresh_from_db()
+        self.assertEqual((feed_job.is_active, feed_job.expired_at), (True, None))
+
+
+class SavedSearchAlertTest(APITestCase):
+    """Test saved searches, the percolator index and job alerts"""
+
+    SEARCHES = [
+        {'category': 'it'},
+        {'category': 'it', 'location': 'Bengaluru', 'skills': 'python'},
+        {'location': 'remote'},
+        {'skills': 'React.js,JavaScript'},
+        {'skills': 'figma,django', 'skills_mode': 'any'},
+        {'skills': 'python,django,rest api', 'work_mode': 'office'},
+        {'keyword': 'backend django'},
+        {'min_salary': '1500000', 'job_type': 'full-time'},
+        {'max_salary': '500000'},
+        {'near': 'Mumbai', 'radius_km': '60'},
+        {'experience_level': 'senior', 'company_size': 'large'},
+    ]
+
+    def setUp(self):
+        self.user = get_user_model().objects.create_user(
+            email='asha@example.com', username='asha', first_name='Asha', last_name='Rao', password='pw',
+        )
+        self.jobs = [
+            create_job(),
+            create_job(title='Senior Backend Engineer', company='Amazon', location='Bangalore, India',
+                       experience_level='senior', company_size='large', salary_display='₹25-40 LPA'),
+            create_job(title='Frontend Developer', location='Remote', work_mode='remote',
+                       skills=['ReactJS', 'Javascript', 'CSS'], salary_display='₹4-7 LPA',
+                       description='Build web apps.'),
+            create_job(title='UI Designer', category='design', location='Navi Mumbai, India',
+                       skills=['Figma'], salary_display='₹3-5 LPA', job_type='contract',
+                       description='Design mobile screens.'),
+            create_job(title='Accountant', category='finance', location='Pune, India',
+                       skills=['Tally'], salary_display='Not disclosed', description='Close the books.'),
+        ]
+
+    def save_searches(self):
+        return [SavedSearch.objects.create(user=self.user, name=f'search {n}', params=params)
+                for n, params in enumerate(self.SEARCHES)]
+
+    def test_percolator_matches_filter_jobs(self):
+        saved = self.save_searches()
+        self.assertEqual(saved[1].params, {'category': 'it', 'location': 'bengaluru', 'skills': 'python'})
+        self.assertEqual(saved[6].params, {'q': 'backend django'})
+        found = {}
+        for job, search_id, user_id, name in alerts.find_matches(Job.objects.all()):
+            found.setdefault(search_id, set()).add(job.pk)
+        # Each saved search finds the same jobs the job list does for its filters
+        for saved_search in saved:
+            params = saved_search.params
+            queryset = filter_jobs(Job.objects.filter(is_active=True), params)
+            if params.get('q'):
+                queryset = search.search_jobs(queryset, params['q'])
+            expected = set(queryset.values_list('pk', flat=True))
+            self.assertTrue(expected, params)
+            self.assertEqual(found.get(saved_search.pk, set()), expected, params)
+
+    def run_alerts(self):
+        with self.assertLogs('jobs.alerts', 'WARNING'):
+            return tasks.Worker().run_pending()
+
+    def test_new_jobs_send_alerts(self):
+        Task.objects.all().delete()
+        it_search, remote_search = self.save_searches()[1:3]
+        job = create_job(title='Django Developer', location='Whitefield, Bengaluru',
+                         skills=[f'skill {n}' for n in range(30)] + ['Python'])
+        # Matched in the task worker, not on save; keys don't grow with the job's skills
+        self.assertIsNone(SavedSearch.objects.get(pk=it_search.pk).last_alerted_at)
+        self.assertLessEqual(len(alerts.JobFacts(job).keys()), 2 ** len(alerts.KEY_FIELDS))
+        self.assertEqual(self.run_alerts(), 1)
+        it_search.refresh_from_db()
+        remote_search.refresh_from_db()
+        self.assertIsNotNone(it_search.last_alerted_at)
+        self.assertIsNone(remote_search.last_alerted_at)
+
+        # Ingest alerts for the jobs a batch creates; flagged duplicates and updates send none
+        created = payments_record('r-1', location='Remote', skills=['Go'])
+        ingest([created], 'partner')
+        self.run_alerts()
+        remote_search.refresh_from_db()
+        self.assertIsNotNone(remote_search.last_alerted_at)
+        matched = {job.external_id for job, *_ in alerts.find_matches(Job.objects.filter(source='partner'))}
+        self.assertEqual(matched, {'r-1'})
+
+        ingest([created], 'partner')
+        self.assertFalse(Task.objects.exists())
+
+    def test_saved_search_api(self):
+        self.client.force_authenticate(self.user)
+        url = '/api/jobs/saved-searches/'
+        response = self.client.post(url, {
+            'name': 'Python in Bangalore',
+            'params': {'category': 'it', 'location': 'Bangalore', 'skills': ['Python', 'ReactJS'], 'keyword': 'Senior'},
+        }, format='json')
+        self.assertEqual(response.status_code, 201)
+        self.assertEqual(response.data['params'], {
+            'category': 'it', 'location': 'bengaluru', 'skills': 'python,react', 'q': 'senior',
+        })
+        saved = SavedSearch.objects.get(pk=response.data['id'])
+        self.assertEqual(saved.key_hash, alerts.key_hash('category=it&city=Bengaluru'))
+        self.assertEqual(saved.key_skill, 'python')
+
+        for params in ({'colour': 'red'}, {'category': 'astrology'}, {'location': 'all'}, ['it']):
+            response = self.client.post(url, {'params': params}, format='json')
+            self.assertEqual(response.status_code, 400, params)
+
+        other = get_user_model().objects.create_user(
+            email='ravi@example.com', username='ravi', first_name='Ravi', last_name='K', password='pw',
+        )
+        SavedSearch.objects.create(user=other, params={'category': 'hr'})
+        self.assertEqual([row['id'] for row in self.client.get(url).data], [saved.pk])
+        self.assertEqual(self.client.delete(f'{url}{saved.pk}/').status_code, 204)
+
+
+@override_settings(CACHES=LOCMEM_CACHE, JOB_RECOMMEND_REFRESH_SECONDS=0, JOB_RECOMMEND_BACKGROUND_REFRESH=False)
+class JobRecommendTest(APITestCase):
+    """Test the TF-IDF job recommender and /api/ai/job-matching/"""
+
+    def setUp(self):
+        from accounts.models import Education, Skill, WorkExperience
+
+        cache.clear()
+        self.user = get_user_model().objects.create_user(
+            email='meera@example.com', username='meera', first_name='Meera', last_name='S', password='pw',
+        )
+        Skill.objects.create(user=self.user, name='Python', level=5)
+        Skill.objects.create(user=self.user, name='Django', level=4)
+        Skill.objects.create(user=self.user, name='PostgreSQL', level=2)
+        WorkExperience.objects.create(user=self.user, title='Backend Developer', company='Zoho',
+                                      start_date='2021-01-01', description='Built REST APIs in Django.')
+        Education.objects.create(user=self.user, degree='B.Tech Computer Science', school='VIT', start_year=2016)
+        self.backend = create_job(title='Backend Developer', skills=['Python', 'Django', 'Postgres'],
+                                  requirements='Django REST APIs')
+        self.data = create_job(title='Data Analyst', skills=['Python', 'SQL', 'Excel'], requirements='Reporting')
+        self.frontend = create_job(title='Frontend Developer', skills=['React', 'CSS'], requirements='Web apps')
+        self.designer = create_job(title='UI Designer', skills=['Figma'], requirements='Mobile screens')
+        create_job(title='Python Developer', is_active=False)
+
+    def test_ranks_by_cosine_similarity(self):
+        matrix = recommend.TfidfMatrix(recommend.load_jobs())
+        self.assertEqual(len(matrix), 4)
+        query = matrix.vectorize(recommend.user_term_counts(self.user))
+        ranked = matrix.rank(query, limit=10)
+        self.assertEqual([pk for pk, _ in ranked][:3], [self.backend.pk, self.data.pk, self.frontend.pk])
+        self.assertNotIn(self.designer.pk, [pk for pk, _ in ranked])
+        # Rows and query are unit vectors: the score is their dot product over shared terms
+        weights = dict(query)
+        row = matrix.rows[self.backend.pk]
+        self.assertAlmostEqual(sum(weight * weight for weight in matrix.row_weights[row]), 1.0, places=5)
+        self.assertAlmostEqual(ranked[0][1], sum(weights.get(term_id, 0.0) * weight for term_id, weight in zip(
+            matrix.row_terms[row], matrix.row_weights[row])), places=6)
+        # Packed columns for every term rank the same as posting lists
+        packed = recommend.TfidfMatrix(recommend.load_jobs(), dense_df=1)
+        self.assertEqual(len(packed.columns), len(packed.terms))
+        self.assertEqual(packed.rank(packed.vectorize(recommend.user_term_counts(self.user)), limit=10), ranked)
+
+    def test_incremental_refresh(self):
+        recommender = recommend.JobRecommender()
+        self.assertEqual(recommender.refresh(force=True), 4)
+        # Some terms packed, some in posting lists
+        recommender.matrix = recommend.TfidfMatrix(recommend.load_jobs(), dense_df=2)
+        Job.objects.filter(pk=self.backend.pk).update(is_active=False)
+        self.designer.skills = ['Figma', 'Django']
+        self.designer.save()
+        create_job(title='Django Developer', skills=['Django', 'Python'], requirements='Django REST APIs')
+        self.assertEqual(recommender.refresh(), 2)
+        self.assertEqual((len(recommender.matrix), recommender.matrix.dead), (4, 2))
+        matches = recommender.recommend(recommend.user_term_counts(self.user))
+        self.assertEqual(matches[0][2], ['django', 'python'])
+        self.assertNotIn(self.backend.pk, [pk for pk, *_ in matches])
+        self.assertIn(self.designer.pk, [pk for pk, *_ in matches])
+        # Same order as a fresh build
+        fresh = recommend.TfidfMatrix(recommend.load_jobs())
+        expected = fresh.rank(fresh.vectorize(recommend.user_term_counts(self.user)))
+        self.assertEqual([pk for pk, *_ in matches], [pk for pk, _ in expected])
+
+    def test_job_matching_endpoint(self):
+        url = '/api/ai/job-matching/'
+        self.assertEqual(self.client.get(url).status_code, 401)
+        self.client.force_authenticate(self.user)
+        response = self.client.get(url, {'limit': 2})
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.data['total_analyzed'], 4)
+        first, second = response.data['matched_jobs']
+        self.assertEqual((first['id'], first['matched_skills']), (self.backend.pk, ['django', 'postgresql', 'python']))
+        self.assertGreater(first['ai_match_score'], second['ai_match_score'])
+        self.assertLessEqual(first['ai_match_score'], 100)
+
+
+class JobSimilarTest(APITestCase):
+    """Test the LSH-built similar-jobs table and /api/jobs/<id>/similar/"""
+
+    def setUp(self):
+        self.python = create_job()
+        self.senior = create_job(title='Senior Python Developer', company='Zoho', skills=['Python', 'Django', 'PostgreSQL'],
+                                 description='Design and build scalable backend systems with Django.')
+        self.django = create_job(title='Django Developer', company='TCS', skills=['Django', 'Python'],
+                                 description='Maintain Django apps and build REST APIs.')
+        self.frontend = create_job(title='Frontend Developer', skills=['React', 'CSS'],
+                                   description='Build web interfaces in React.', requirements='2+ years React.')
+        self.accountant = create_job(title='Accountant', category='finance', skills=['Tally'],
+                                     description='Close the books every month.', requirements='CA Inter. GST filings.')
+
+    def neighbors(self, job):
+        return list(SimilarJob.objects.filter(job=job).order_by('-score').values_list('similar_id', flat=True))
+
+    def test_neighbors_match_all_pairs(self):
+        self.assertEqual(similar.refresh_similar_jobs(full=True), (5, 5))
+        signatures = {
+            pk: dedup.unpack_signature(value) for pk, value in JobSimilarity.objects.values_list('job_id', 'signature')
+        }
+        # Pairs with Jaccard 0.3+ all come out of the band buckets, best first; weaker ones may not
+        for pk, signature in signatures.items():
+            scored = sorted(
+                ((dedup.similarity(signature, other), other_pk) for other_pk, other in signatures.items() if other_pk != pk),
+                reverse=True,
+            )
+            strong = [other_pk for score, other_pk in scored if score >= 0.3]
+            self.assertEqual(self.neighbors(pk)[:len(strong)], strong)
+            self.assertLessEqual(set(self.neighbors(pk)), {other_pk for score, other_pk in scored if score >= similar.MIN_SIMILARITY})
+        self.assertEqual(self.neighbors(self.python)[:2], [self.senior.pk, self.django.pk])
+        self.assertNotIn(self.accountant.pk, self.neighbors(self.python))
+
+    def test_incremental_refresh(self):
+        similar.refresh_similar_jobs()
+        self.assertEqual(similar.refresh_similar_jobs(), (0, 0))
+
+        Job.objects.filter(pk=self.django.pk).update(is_active=False)
+        self.frontend.title = 'Python Developer'
+        self.frontend.skills = ['Python', 'Django', 'REST API']
+        self.frontend.description = self.python.description
+        self.frontend.requirements = self.python.requirements
+        self.frontend.save()
+        signed, refreshed = similar.refresh_similar_jobs()
+        # The changed job, the jobs that listed it or the closed one, and its new neighbors
+        self.assertEqual(signed, 1)
+        self.assertEqual(refreshed, 3)
+        self.assertFalse(JobSimilarity.objects.filter(job=self.django).exists())
+        self.assertFalse(SimilarJob.objects.filter(similar=self.django).exists())
+        self.assertEqual(self.neighbors(self.python)[0], self.frontend.pk)
+
+        out = StringIO()
+        call_command('build_similar_jobs', '--full', stdout=out)
+        self.assertIn('Signed 4 jobs and refreshed 4', out.getvalue())
+
+    def test_similar_endpoint(self):
+        similar.refresh_similar_jobs()
+        Job.objects.filter(pk=self.senior.pk).update(is_active=False)
+        with self.assertNumQueries(1):
+            response = self.client.get(f'/api/jobs/{self.python.pk}/similar/', {'limit': 1})
+        self.assertEqual(response.status_code, 200)
+        [item] = response.data['results']
+        self.assertEqual((item['id'], item['title']), (self.django.pk, 'Django Developer'))
+        self.assertGreater(item['similarity'], similar.MIN_SIMILARITY)
+        self.assertNotIn('description', item)
+        self.assertEqual(self.client.get('/api/jobs/999999/similar/').status_code, 404)
+
+
+@override_settings(CACHES=LOCMEM_CACHE, JOB_EVENTS_BACKGROUND_FLUSH=False, JOB_TRENDING_HALF_LIFE_HOURS=24)
+class JobPopularityTest(APITestCase):
+    """Test buffered view/apply counting, decayed trending scores and /api/jobs/trending/"""
+
+    def setUp(self):
+        cache.clear()
+        popularity.job_events.take()
+        self.python = create_job()
+        self.react = create_job(title='React Developer', skills=['React'])
+        self.closed = create_job(title='Closed Job', is_active=False)
+
+    def popularity(self, job):
+        return JobPopularity.objects.filter(job=job).values_list('views', 'applications').first()
+
+    @override_settings(JOB_EVENTS_FLUSH_SECONDS=3600)
+    def test_events_buffered_until_flush(self):
+        for _ in range(3):
+            self.assertEqual(self.client.get(f'/api/jobs/{self.python.pk}/').status_code, 200)
+        self.client.get('/api/jobs/999999/')
+        with self.captureOnCommitCallbacks(execute=True):
+            JobApplication.objects.create(
+                job=self.python, full_name='Asha Rao', email='asha@example.com', phone='9876543210',
+                resume='applications/resumes/asha.pdf',
+            )
+        # Nothing is written per request
+        self.assertFalse(JobPopularity.objects.exists())
+
+        self.assertEqual(popularity.job_events.flush(), 1)
+        self.assertEqual(self.popularity(self.python), (3, 1))
+        row = JobPopularity.objects.get(job=self.python)
+        self.assertEqual(row.score, 3 * popularity.VIEW_WEIGHT + popularity.APPLY_WEIGHT)
+
+        # A later flush adds to the row, decaying the old score first
+        JobPopularity.objects.filter(job=self.python).update(score=8, scored_at=timezone.now() - timedelta(hours=24))
+        self.client.get(f'/api/jobs/{self.python.pk}/')
+        self.assertEqual(popularity.job_events.flush(), 1)
+        row = JobPopularity.objects.get(job=self.python)
+        self.assertEqual((row.views, row.applications), (4, 1))
+        self.assertAlmostEqual(row.score, 5.0, places=3)
+
+    @override_settings(JOB_EVENTS_FLUSH_SECONDS=3600)
+    def test_automated_views_not_counted(self):
+        for agent in ('Googlebot/2.1', 'Slackbot-LinkExpanding 1.0', 'UptimeRobot/2.0', 'curl/8.4.0'):
+            self.assertEqual(self.client.get(f'/api/jobs/{self.python.pk}/', HTTP_USER_AGENT=agent).status_code, 200)
+        self.assertEqual(popularity.job_events.take(), {})
+        self.client.get(f'/api/jobs/{self.python.pk}/', HTTP_USER_AGENT='Mozilla/5.0 (Windows NT 10.0; Win64; x64)')
+        self.assertEqual(popularity.job_events.take(), {self.python.pk: [1, 0]})
+
+    @override_settings(JOB_EVENTS_BACKGROUND_FLUSH=True, JOB_EVENTS_FLUSH_SECONDS=0.2)
+    def test_events_flushed_without_later_events(self):
+        buffer = popularity.EventBuffer()
+        flushed = []
+        with mock.patch.object(buffer, 'flush', side_effect=lambda *args, **kwargs: flushed.append(buffer.take())), \
+                mock.patch.object(connection, 'in_atomic_block', False), mock.patch('atexit.register') as at_exit:
+            buffer.add(self.python.pk, popularity.VIEW)
+            buffer.flush_thread.join(5)
+        # Flushed by the timer, with no second event to trigger it, and again at exit
+        self.assertEqual(flushed, [{self.python.pk: [1, 0]}])
+        self.assertIsNone(buffer.flush_thread)
+        self.assertEqual(at_exit.call_count, 1)
+
+    @override_settings(JOB_EVENTS_FLUSH_SECONDS=0)
+    def test_trending_ranks_by_decayed_score(self):
+        self.client.get(f'/api/jobs/{self.react.pk}/')
+        self.assertEqual(self.popularity(self.react), (1, 0))
+
+        now = timezone.now()
+        JobPopularity.objects.create(job=self.python, views=100, score=100, scored_at=now - timedelta(days=3))
+        JobPopularity.objects.filter(job=self.react).update(score=20, scored_at=now)
+        JobPopularity.objects.create(job=self.closed, views=1000, score=1000, scored_at=now)
+        out = StringIO()
+        call_command('update_trending_jobs', stdout=out)
+        self.assertIn('Ranked 2 trending jobs', out.getvalue())
+        # 100 views three half-lives ago count for less than 20 now; closed jobs never trend
+        ranked = list(TrendingJob.objects.values_list('job_id', 'rank'))
+        self.assertEqual(ranked, [(self.react.pk, 1), (self.python.pk, 2)])
+        self.assertAlmostEqual(TrendingJob.objects.get(job=self.python).score, 12.5, places=2)
+
+    def test_trending_endpoint(self):
+        now = timezone.now()
+        JobPopularity.objects.create(job=self.python, views=5, score=5, scored_at=now)
+        JobPopularity.objects.create(job=self.react, views=9, score=9, scored_at=now)
+        popularity.refresh_trending()
+
+        response = self.client.get('/api/jobs/trending/')
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual([item['id'] for item in response.data['results']], [self.react.pk, self.python.pk])
+        self.assertEqual(response.data['results'][0]['trending_score'], 9.0)
+        self.assertNotIn('description', response.data['results'][0])
+        with self.assertNumQueries(0):
+            self.assertEqual(len(self.client.get('/api/jobs/trending/', {'limit': 1}).data['results']), 1)
+
+        # Closing a job bumps the jobs version, so the cached list is re-read without it
+        self.react.is_active = False
+        self.react.save()
+        response = self.client.get('/api/jobs/trending/')
+        self.assertEqual([item['id'] for item in response.data['results']], [self.python.pk])
+
+
+@override_settings(CACHES=LOCMEM_CACHE, JOB_CACHE_TIMEOUT=0, JOB_EVENTS_ENABLED=False, DATABASE_REPLICA_BACKGROUND_CHECK=False)
+class ReadReplicaRoutingTest(APITransactionTestCase):
+    """Test replica reads, read-your-writes pinning and health fallback (core/db_router.py).
+
+    The replica tests need a second database that does not replicate, e.g.
+    DATABASE_REPLICA_URLS=sqlite:////tmp/replica.db DATABASE_REPLICA_MIGRATE=true
+    - a read served by it sees its own stale copy of the job.
+    """
+    databases = '__all__'
+
+    def setUp(self):
+        replica_health.reset()
+        self.job = create_job()
+        self.user = get_user_model().objects.create_user(
+            email='asha@example.com', username='asha', first_name='Asha', last_name='Rao', password='pw',
+        )
+        self.replica = settings.DATABASE_REPLICAS[0] if settings.DATABASE_REPLICAS else None
+        if self.replica:
+            Job.objects.using(self.replica).create(
+                pk=self.job.pk, title='Stale Title', company='Infosys', location='Bangalore, India',
+                category='it', job_type='full-time', experience_level='mid', work_mode='office',
+                salary_display='₹8-12 LPA', description='Old copy.',
+            )
+
+    def detail_title(self):
+        return self.client.get(f'/api/jobs/{self.job.pk}/').data['title']
+
+    @override_settings(DATABASE_REPLICAS=['default'])
+    def test_pin_cookie_set_after_writes(self):
+        # Reads and cache writes do not pin
+        self.client.get('/api/jobs/')
+        self.client.get(f'/api/jobs/{self.job.pk}/')
+        self.assertNotIn(PIN_COOKIE, self.client.cookies)
+
+        self.client.force_authenticate(self.user)
+        response = self.client.post('/api/jobs/saved-searches/', {'params': {'category': 'it'}}, format='json')
+        self.assertEqual(response.status_code, 201)
+        self.assertEqual(response.cookies[PIN_COOKIE]['max-age'], settings.DATABASE_REPLICA_PIN_SECONDS)
+
+    @skipUnless(settings.DATABASE_REPLICAS, 'needs DATABASE_REPLICA_URLS')
+    def test_reads_use_replica_until_client_writes(self):
+        self.assertEqual(self.detail_title(), 'Stale Title')
+        # Outside a request everything uses the primary
+        self.assertEqual(Job.objects.get(pk=self.job.pk).title, 'Python Developer')
+
+        self.client.force_authenticate(self.user)
+        self.client.post('/api/jobs/saved-searches/', {'params': {'category': 'it'}}, format='json')
+        self.assertEqual(self.detail_title(), 'Python Developer')
+        self.client.cookies.pop(PIN_COOKIE)
+        self.assertEqual(self.detail_title(), 'Stale Title')
+
+    @override_settings(DATABASE_REPLICAS=['replica_1'])
+    def test_primary_reads(self):
+        router = ReadReplicaRouter()
+        token = routing_state.set(RoutingState(replica=True))
+        try:
+            with mock.patch.object(replica_health, 'is_healthy', return_value=True):
+                self.assertEqual(router.db_for_read(Job), 'replica_1')
+                with primary_reads():
+                    self.assertEqual(router.db_for_read(Job), 'default')
+                self.assertEqual(router.db_for_read(Job), 'replica_1')
+        finally:
+            routing_state.reset(token)
+
+    @skipUnless(settings.DATABASE_REPLICAS, 'needs DATABASE_REPLICA_URLS')
+    @override_settings(JOB_CACHE_TIMEOUT=600)
+    def test_cached_responses_read_from_primary(self):
+        # The cache key has the primary's jobs version, so the rows must not be the replica's older copy
+        cache.clear()
+        response = self.client.get(f'/api/jobs/{self.job.pk}/')
+        self.assertEqual((response['X-Cache'], response.data['title']), ('MISS', 'Python Developer'))
+        self.assertEqual(self.detail_title(), 'Python Developer')
+        response = self.client.get('/api/jobs/')
+        self.assertEqual([item['title'] for item in response.data['results']], ['Python Developer'])
+
+    @skipUnless(settings.DATABASE_REPLICAS, 'needs DATABASE_REPLICA_URLS')
+    @override_settings(DATABASE_REPLICA_CHECK_SECONDS=0)
+    def test_unhealthy_replica_falls_back_to_primary(self):
+        with mock.patch.object(connections[self.replica], 'ensure_connection', side_effect=OperationalError('down')):
+            self.assertEqual(self.detail_title(), 'Python Developer')
+        self.assertEqual(self.detail_title(), 'Stale Title')
+
+    @override_settings(DATABASE_REPLICAS=['replica_1'], DATABASE_REPLICA_BACKGROUND_CHECK=True, DATABASE_REPLICA_MIGRATE=False)
+    def test_health_checked_off_the_request_thread(self):
+        health = ReplicaHealth()
+        started, release = threading.Event(), threading.Event()
+
+        def slow_check(alias):
+            started.set()
+            release.wait(5)
+            return True
+
+        with mock.patch.object(health, 'check', side_effect=slow_check) as check:
+            # Unknown counts as unhealthy; callers don't wait for the check
+            self.assertFalse(health.is_healthy('default'))
+            started.wait(5)
+            self.assertFalse(health.is_healthy('default'))
+            release.set()
+            for _ in range(100):
+                if health.is_healthy('default'):
+                    break
+                time.sleep(0.01)
+        self.assertTrue(health.is_healthy('default'))
+        self.assertEqual(check.call_count, 1)
+        # Replicas get their schema through replication
+        router = ReadReplicaRouter()
+        self.assertIs(router.allow_migrate('replica_1', 'jobs'), False)
+        self.assertIsNone(router.allow_migrate('default', 'jobs'))
+
+
+def use_temp_media(test):
+    """Store uploads of a test in a temporary MEDIA_ROOT and UPLOAD_TEMP_DIR"""
+    media = tempfile.mkdtemp()
+    test.addCleanup(shutil.rmtree, media, ignore_errors=True)
+    override = override_settings(MEDIA_ROOT=media, UPLOAD_TEMP_DIR=os.path.join(media, 'incoming'))
+    override.enable()
+    test.addCleanup(override.disable)
+
+
+def application_data(email, **overrides):
+    return {
+        'full_name': 'Asha Rao', 'email': email, 'phone': '9876543210',
+        'resume': SimpleUploadedFile('resume.pdf', b'%PDF-1.4', content_type='application/pdf'),
+        **overrides,
+    }
+
+
+@override_settings(CACHES=LOCMEM_CACHE, JOB_EVENTS_ENABLED=False)
+class JobApplicationSubmitTest(APITestCase):
+    """Test constraint-checked, idempotent application submits (jobs/applications.py)"""
+
+    def setUp(self):
+        use_temp_media(self)
+        self.job = create_job()
+
+    def submit(self, email, key=None, **overrides):
+        headers = {'HTTP_IDEMPOTENCY_KEY': key} if key else {}
+        return self.client.post(f'/api/jobs/{self.job.pk}/apply/', application_data(email, **overrides), **headers)
+
+    def test_duplicate_email_rejected_by_constraint(self):
+        # Job lookup, savepoint, insert, release - no duplicate pre-read
+        with self.assertNumQueries(4):
+            response = self.submit('Asha@Example.com')
+        self.assertEqual(response.status_code, 201)
+        self.assertEqual(JobApplication.objects.get().email, 'asha@example.com')
+
+        response = self.submit('  asha@EXAMPLE.com')
+        self.assertEqual(response.status_code, 400)
+        self.assertEqual(response.data, {'error': applications.DUPLICATE_ERROR})
+        response = self.client.post('/api/jobs/apply/', application_data('ASHA@example.com', job=self.job.pk))
+        self.assertEqual((response.status_code, response.data), (400, {'error': applications.DUPLICATE_ERROR}))
+        self.assertEqual(JobApplication.objects.count(), 1)
+
+        self.job.is_active = False
+        self.job.save()
+        self.assertEqual(self.submit('new@example.com').status_code, 404)
+
+    def test_idempotency_key_replays_response(self):
+        first = self.submit('asha@example.com', key='submit-1')
+        self.assertEqual(first.status_code, 201)
+        retry = self.submit('asha@example.com', key='submit-1')
+        self.assertEqual(retry.status_code, 201)
+        self.assertEqual(retry.data, first.data)
+        self.assertEqual(retry['Idempotent-Replayed'], 'true')
+        self.assertEqual(JobApplication.objects.count(), 1)
+        self.assertEqual(IdempotencyKey.objects.get().application_id, first.data['application_id'])
+
+        self.assertEqual(self.submit('other@example.com', key='submit-1').status_code, 422)
+        # Failed submits store nothing, so their key can be sent again
+        self.assertEqual(self.submit('ravi@example.com', key='submit-2', phone='').status_code, 400)
+        self.assertEqual(self.submit('ravi@example.com', key='submit-2').status_code, 201)
+        # Expired keys are forgotten
+        IdempotencyKey.objects.update(created_at=timezone.now() - applications.IDEMPOTENCY_KEY_TTL - timedelta(minutes=1))
+        response = self.submit('asha@example.com', key='submit-1')
+        self.assertEqual((response.status_code, response.data), (400, {'error': applications.DUPLICATE_ERROR}))
+
+    def test_expired_keys_purged(self):
+        self.submit('asha@example.com', key='submit-1')
+        self.submit('ravi@example.com', key='submit-2')
+        IdempotencyKey.objects.filter(application__email='asha@example.com').update(
+            created_at=timezone.now() - applications.IDEMPOTENCY_KEY_TTL - timedelta(minutes=1),
+        )
+        out = StringIO()
+        call_command('purge_idempotency_keys', stdout=out)
+        self.assertIn('Deleted 1 expired', out.getvalue())
+        self.assertEqual(list(IdempotencyKey.objects.values_list('application__email', flat=True)), ['ravi@example.com'])
+        self.assertEqual(applications.purge_idempotency_keys(), 0)
+
+
+@override_settings(CACHES=LOCMEM_CACHE, JOB_EVENTS_ENABLED=False)
+class JobApplicationRaceTest(APITransactionTestCase):
+    """Parallel submits of one application create exactly one row"""
+
+    def setUp(self):
+        use_temp_media(self)
+        self.job = create_job()
+
+    def submit_in_parallel(self, threads=8, key=None):
+        barrier = threading.Barrier(threads)
+        responses = []
+
+        def submit():
+            try:
+                # Test clients pick up each other's request exceptions, so errors come back as 500s
+                client = self.client_class(raise_request_exception=False)
+                headers = {'HTTP_IDEMPOTENCY_KEY': key} if key else {}
+                barrier.wait()
+                while True:
+                    response = client.post(
+                        f'/api/jobs/{self.job.pk}/apply/', application_data('asha@example.com'), **headers,
+                    )
+                    # SQLite's shared-cache test database reports a table lock instead of waiting; resend like a client
+                    if response.status_code != 500:
+                        break
+                    time.sleep(0.01)
+                responses.append(response)
+            finally:
+                connections.close_all()
+
+        pool = [threading.Thread(target=submit) for _ in range(threads)]
+        for thread in pool:
+            thread.start()
+        for thread in pool:
+            thread.join()
+        return responses
+
+    def test_parallel_submits_create_one_application(self):
+        codes = sorted(response.status_code for response in self.submit_in_parallel())
+        self.assertEqual(codes, [201] + [400] * 7)
+        self.assertEqual(JobApplication.objects.count(), 1)
+
+        JobApplication.objects.all().delete()
+        responses = self.submit_in_parallel(key='double-click')
+        self.assertEqual([response.status_code for response in responses], [201] * 8)
+        self.assertEqual(len({response.data['application_id'] for response in responses}), 1)
+        self.assertEqual(JobApplication.objects.count(), 1)
+
+
+task_calls = []
+
+
+@tasks.task
+def record_task(label='periodic', fail=False):
+    """Test task: records its label, raising afterwards if fail"""
+    task_calls.append(label)
+    if fail:
+        raise RuntimeError(f'{label} failed')
+
+
+@override_settings(PERIODIC_TASKS={})
+class TaskQueueTest(TestCase):
+    """Test the database task queue: priorities, scheduling, retries, leases and run_worker"""
+
+    def setUp(self):
+        task_calls.clear()
+        self.worker = tasks.Worker()
+
+    def test_runs_due_tasks_by_priority(self):
+        record_task('inline')
+        self.assertFalse(Task.objects.exists())
+        record_task.enqueue('low')
+        record_task.options(priority=5).enqueue('high')
+        record_task.options(run_at=timedelta(hours=1)).enqueue('later')
+
+        out = StringIO()
+        call_command('run_worker', '--once', stdout=out)
+        self.assertIn('stopped', out.getvalue())
+        self.assertEqual(task_calls, ['inline', 'high', 'low'])
+        # Finished tasks are deleted; the scheduled one waits for its time
+        self.assertEqual(list(Task.objects.values_list('kwargs', 'status')), [({}, Task.QUEUED)])
+        self.assertEqual(Task.objects.get().args, ['later'])
+
+    @override_settings(PERIODIC_TASKS={'jobs.tests.record_task': 3600, 'jobs.tests.missing_task': 60})
+    def test_periodic_tasks(self):
+        self.assertEqual(self.worker.schedule(), 1)
+        # Not enqueued again while queued; due at once when the worker starts
+        self.assertEqual(self.worker.schedule(), 0)
+        self.assertEqual(self.worker.run_pending(), 1)
+        self.assertEqual(task_calls, ['periodic'])
+
+        # Then an interval after the last run
+        self.assertEqual(self.worker.schedule(), 1)
+        self.assertEqual(self.worker.run_pending(), 0)
+        self.assertGreater(Task.objects.get().run_at, timezone.now() + timedelta(minutes=59))
+        # A restarted worker leaves the queued run alone
+        self.assertEqual(tasks.Worker().schedule(), 0)
+
+    def test_failures_retry_with_backoff(self):
+        queued = record_task.options(max_attempts=2).enqueue('flaky', fail=True)
+        with self.assertLogs('jobs.tasks', 'ERROR'):
+            self.assertEqual(self.worker.run_pending(), 1)
+        queued.refresh_from_db()
+        self.assertEqual((queued.status, queued.attempts), (Task.QUEUED, 1))
+        self.assertGreaterEqual(queued.run_at, timezone.now() + timedelta(seconds=tasks.RETRY_BASE_SECONDS // 2 - 1))
+        self.assertIn('flaky failed', queued.last_error)
+        # Not retried before its backoff is over
+        self.assertEqual(self.worker.run_pending(), 0)
+
+        Task.objects.update(run_at=timezone.now())
+        with self.assertLogs('jobs.tasks', 'ERROR'):
+            self.assertEqual(self.worker.run_pending(), 1)
+        queued.refresh_from_db()
+        self.assertEqual((queued.status, queued.attempts, queued.locked_by), (Task.FAILED, 2, ''))
+        self.assertEqual(task_calls, ['flaky', 'flaky'])
+
+        unknown = Task.objects.create(name='jobs.tests.no_such_task')
+        self.worker.run_pending()
+        unknown.refresh_from_db()
+        self.assertEqual((unknown.status, unknown.attempts), (Task.FAILED, 1))
+
+    def test_leases(self):
+        queued = record_task.enqueue('once')
+        other = tasks.Worker()
+        self.assertEqual(self.worker.claim(), [queued])
+        # A leased task is not claimed by another worker
+        self.assertEqual(other.claim(), [])
+
+        # The worker died: once the lease is over the task runs again, as its next attempt
+        Task.objects.update(locked_until=timezone.now() - timedelta(seconds=1))
+        self.assertEqual(other.run_pending(), 1)
+        self.assertEqual(task_calls, ['once'])
+        self.assertFalse(Task.objects.exists())
+
+        # A dead worker's last attempt fails the task
+        record_task.options(max_attempts=1).enqueue('last')
+        self.worker.claim()
+        Task.objects.update(locked_until=timezone.now() - timedelta(seconds=1))
+        self.assertEqual(other.run_pending(), 0)
+        self.assertEqual(Task.objects.get().status, Task.FAILED)
+
+    def test_password_reset_email_is_queued(self):
+        get_user_model().objects.create_user(username='asha', email='asha@example.com', password='secret123')
+        response = self.client.post('/api/accounts/forgot-password/', {'email': 'asha@example.com'})
+        self.assertEqual(response.status_code, 200)
+        queued = Task.objects.get()
+        self.assertEqual((queued.name, queued.priority), ('accounts.views.send_password_reset_email', 10))
+        # The task row holds a reference, not the email or its reset link
+        self.assertNotIn('token=', str(queued.args))
+        self.assertNotIn('asha@example.com', str(queued.args))
+
+        # Resend outages are retried; the send succeeds on the next attempt
+        with mock.patch.dict(os.environ, {'RESEND_API_KEY': 'test'}), mock.patch('accounts.views.requests.post') as post:
+            post.return_value = mock.Mock(status_code=503, **{'raise_for_status.side_effect': RuntimeError('503')})
+            with self.assertLogs('jobs.tasks', 'ERROR'):
+                self.worker.run_pending()
+            queued.refresh_from_db()
+            self.assertEqual((queued.status, queued.attempts), (Task.QUEUED, 1))
+
+            post.return_value = mock.Mock(status_code=200)
+            Task.objects.update(run_at=timezone.now())
+            self.assertEqual(self.worker.run_pending(), 1)
+        self.assertFalse(Task.objects.exists())
+        sent = post.call_args.kwargs['json']
+        self.assertEqual(sent['to'], ['asha@example.com'])
+        self.assertIn('reset-password.html?token=', sent['text'])
+
+
+@override_settings(CACHES=LOCMEM_CACHE, JOB_EVENTS_ENABLED=False)
+class ResumableUploadTest(APITestCase):
+    """Test chunked, resumable uploads (jobs/uploads.py) and attaching them to applications and profiles"""
+
+    def setUp(self):
+        use_temp_media(self)
+        self.job = create_job()
+        self.resume = b'%PDF-1.4 ' + bytes(range(256)) * 10
+
+    def start(self, filename='resume.pdf', size=None, purpose=Upload.RESUME):
+        response = self.client.post('/api/jobs/uploads/', {
+            'filename': filename, 'size': len(self.resume) if size is None else size, 'purpose': purpose,
+        })
+        return response
+
+    def put(self, upload_id, data, start, size=None):
+        return self.client.put(
+            f'/api/jobs/uploads/{upload_id}/', data, content_type='application/octet-stream',
+            HTTP_CONTENT_RANGE=f'bytes {start}-{start + len(data) - 1}/{size or len(self.resume)}',
+        )
+
+    def upload(self, content=None, filename='resume.pdf', purpose=Upload.RESUME):
+        """A finalized upload's id"""
+        content = self.resume if content is None else content
+        upload_id = self.start(filename, len(content), purpose).data['id']
+        self.assertEqual(self.put(upload_id, content, 0, len(content)).status_code, 200)
+        self.assertEqual(self.client.post(f'/api/jobs/uploads/{upload_id}/finalize/').status_code, 200)
+        return upload_id
+
+    def test_chunked_resumable_upload(self):
+        response = self.start()
+        self.assertEqual(response.status_code, 201)
+        upload_id = response.data['id']
+        self.assertEqual((response.data['offset'], response.data['status']), (0, Upload.OPEN))
+
+        self.assertEqual(self.put(upload_id, self.resume[:1000], 0).data['offset'], 1000)
+        self.assertEqual(self.put(upload_id, self.resume[1000:2000], 1000).data['offset'], 2000)
+        # A resent chunk is not appended again; a chunk past the offset is refused with the offset to resume from
+        self.assertEqual(self.put(upload_id, self.resume[1000:2000], 1000).data['offset'], 2000)
+        response = self.put(upload_id, self.resume[2100:], 2100)
+        self.assertEqual((response.status_code, response.data['offset']), (409, 2000))
+        # A chunk cut short by a dropped connection is discarded
+        response = self.client.put(
+            f'/api/jobs/uploads/{upload_id}/', self.resume[2000:2100], content_type='application/octet-stream',
+            HTTP_CONTENT_RANGE=f'bytes 2000-2299/{len(self.resume)}',
+        )
+        self.assertEqual((response.status_code, response.data['offset']), (400, 2000))
+        self.assertEqual(self.client.get(f'/api/jobs/uploads/{upload_id}/').data['offset'], 2000)
+
+        response = self.client.post(f'/api/jobs/uploads/{upload_id}/finalize/')
+        self.assertEqual(response.status_code, 409)
+        # Another worker (no running hash) overlapping what it already has
+        uploads.upload_hashes.hashes.clear()
+        self.assertEqual(self.put(upload_id, self.resume[1500:], 1500).data['offset'], len(self.resume))
+        response = self.client.post(f'/api/jobs/uploads/{upload_id}/finalize/', {'sha256': '0' * 64})
+        self.assertEqual(response.status_code, 422)
+        digest = hashlib.sha256(self.resume).hexdigest()
+        response = self.client.post(f'/api/jobs/uploads/{upload_id}/finalize/', {'sha256': digest})
+        self.assertEqual((response.data['status'], response.data['sha256']), (Upload.COMPLETE, digest))
+        with open(uploads.part_path(Upload.objects.get()), 'rb') as part:
+            self.assertEqual(part.read(), self.resume)
+        self.assertEqual(self.put(upload_id, self.resume[:10], 0).status_code, 409)
+
+        self.assertEqual(self.start(filename='resume.exe').status_code, 400)
+        self.assertEqual(self.start(size=50 * 1024 * 1024).status_code, 400)
+
+    def test_apply_with_upload(self):
+        upload_id = self.upload()
+        data = {'full_name': 'Asha Rao', 'email': 'asha@example.com', 'phone': '9876543210', 'resume_upload': upload_id}
+        with self.captureOnCommitCallbacks(execute=True):
+            response = self.client.post(f'/api/jobs/{self.job.pk}/apply/', data)
+        self.assertEqual(response.status_code, 201)
+        application = JobApplication.objects.get()
+        self.assertTrue(application.resume.name.startswith('applications/resumes/resume'))
+        with application.resume.open('rb') as resume:
+            self.assertEqual(resume.read(), self.resume)
+        upload = Upload.objects.get()
+        self.assertEqual(upload.status, Upload.USED)
+        self.assertFalse(os.path.exists(uploads.part_path(upload)))
+
+        # An upload is used once; an application needs a file or an upload
+        response = self.client.post(f'/api/jobs/{self.job.pk}/apply/', {**data, 'email': 'ravi@example.com'})
+        self.assertIn('resume_upload', response.data['errors'])
+        del data['resume_upload']
+        response = self.client.post('/api/jobs/apply/', {**data, 'job': self.job.pk, 'email': 'ravi@example.com'})
+        self.assertEqual(response.status_code, 400)
+        self.assertIn('resume', response.data)
+
+    def test_profile_uploads(self):
+        user = get_user_model().objects.create_user(
+            email='asha@example.com', username='asha', first_name='Asha', last_name='Rao', password='pw',
+        )
+        other = get_user_model().objects.create_user(
+            email='ravi@example.com', username='ravi', first_name='Ravi', last_name='K', password='pw',
+        )
+        self.client.force_authenticate(user)
+        image = io.BytesIO()
+        from PIL import Image
+        Image.new('RGB', (4, 4), 'red').save(image, 'PNG')
+        picture_id = self.upload(image.getvalue(), 'me.png', Upload.PROFILE_PICTURE)
+        resume_id = self.upload()
+        response = self.client.patch(
+            '/api/accounts/profile/', {'profile_picture_upload': picture_id, 'resume_file_upload': resume_id},
+        )
+        self.assertEqual(response.status_code, 200)
+        user.refresh_from_db()
+        self.assertTrue(user.profile_picture.name.startswith('profile_pictures/me'))
+        self.assertTrue(user.resume_file.name.startswith('resumes/resume'))
+
+        # Not an image
+        upload_id = self.start('fake.png', 100, Upload.PROFILE_PICTURE).data['id']
+        self.put(upload_id, b'x' * 100, 0, 100)
+        self.assertEqual(self.client.post(f'/api/jobs/uploads/{upload_id}/finalize/').status_code, 400)
+        # Other users cannot see or use a user's upload
+        mine = self.upload()
+        self.client.force_authenticate(other)
+        self.assertEqual(self.client.get(f'/api/jobs/uploads/{mine}/').status_code, 404)
+        self.assertEqual(self.client.patch('/api/accounts/profile/', {'resume_file_upload': mine}).status_code, 400)
+
+        Upload.objects.update(expires_at=timezone.now())
+        out = StringIO()
+        call_command('purge_uploads', stdout=out)
+        self.assertIn('Deleted 4 expired uploads', out.getvalue())
+        self.assertEqual(os.listdir(uploads.temp_dir()), [])
+
+
+@override_settings(DIRECT_UPLOAD_BACKEND='local')
+class DirectUploadTest(APITestCase):
+    """Test direct-to-storage uploads (jobs/direct_uploads.py) through the local stand-in"""
+
+    def setUp(self):
+        use_temp_media(self)
+        self.job = create_job()
+        self.resume = b'%PDF-1.4 ' + bytes(range(256)) * 10
+
+    def start(self, filename='resume.pdf', size=None, purpose=Upload.RESUME):
+        return self.client.post('/api/jobs/uploads/direct/', {
+            'filename': filename, 'size': len(self.resume) if size is None else size, 'purpose': purpose,
+        })
+
+    def send(self, form, content, filename='resume.pdf'):
+        """POST the file to the signed form's URL, like a browser would"""
+        self.assertEqual(form['url'], 'http://testserver/api/jobs/uploads/direct/local/')
+        return self.client.post(form['url'], {**form['fields'], 'file': SimpleUploadedFile(filename, content)})
+
+    def test_direct_upload_and_apply(self):
+        response = self.start()
+        self.assertEqual(response.status_code, 201)
+        upload_id, form = response.data['id'], response.data['upload']
+        self.assertTrue(response.data['direct'])
+        self.assertTrue(form['fields']['public_id'].startswith('uploads/resumes/resume_'))
+        stored = self.send(form, self.resume)
+        self.assertEqual(stored.status_code, 200)
+        # Not finalized yet: it cannot be attached
+        data = {'full_name': 'Asha Rao', 'email': 'asha@example.com', 'phone': '9876543210', 'resume_upload': upload_id}
+        self.assertEqual(self.client.post(f'/api/jobs/{self.job.pk}/apply/', data).status_code, 400)
+
+        response = self.client.post(f'/api/jobs/uploads/{upload_id}/finalize/', stored.data, format='json')
+        self.assertEqual((response.status_code, response.data['status']), (200, Upload.COMPLETE))
+        response = self.client.post(f'/api/jobs/{self.job.pk}/apply/', data)
+        self.assertEqual(response.status_code, 201)
+        # The application points at the stored file: nothing was copied
+        application = JobApplication.objects.get()
+        self.assertEqual(application.resume.name, stored.data['public_id'])
+        with application.resume.open('rb') as resume:
+            self.assertEqual(resume.read(), self.resume)
+        self.assertEqual(Upload.objects.get().status, Upload.USED)
+        self.assertEqual(os.listdir(settings.MEDIA_ROOT), ['uploads'])
+
+    def test_signatures_are_checked(self):
+        response = self.start()
+        upload_id, form = response.data['id'], response.data['upload']
+        # Chunks go to the storage, not the app
+        response = self.client.put(
+            f'/api/jobs/uploads/{upload_id}/', self.resume, content_type='application/octet-stream',
+            HTTP_CONTENT_RANGE=f'bytes 0-{len(self.resume) - 1}/{len(self.resume)}',
+        )
+        self.assertEqual(response.status_code, 409)
+        # The client cannot pick its own name, nor reuse a stale form
+        tampered = {**form, 'fields': {**form['fields'], 'public_id': 'profile_pictures/admin.pdf'}}
+        self.assertEqual(self.send(tampered, self.resume).status_code, 401)
+        stale = self.start('old.pdf', 10)
+        backend = direct_uploads.LocalBackend()
+        stale_fields = backend.signed_form(stale.data['upload']['fields']['public_id'], time.time() - 2 * 3600)
+        self.assertEqual(self.send({**form, 'fields': stale_fields}, b'x' * 10).status_code, 401)
+
+        stored = self.send(form, self.resume)
+        self.assertEqual(self.send(form, self.resume).status_code, 409)
+        # A response that was not signed by the storage is refused
+        forged = {**stored.data, 'signature': '0' * 40}
+        self.assertEqual(self.client.post(f'/api/jobs/uploads/{upload_id}/finalize/', forged, format='json').status_code, 422)
+        self.assertEqual(self.client.post(f'/api/jobs/uploads/{upload_id}/finalize/', stored.data, format='json').status_code, 200)
+
+        # A "picture" that is not an image is deleted at finalize
+        response = self.start('me.png', 100, Upload.PROFILE_PICTURE)
+        stored = self.send(response.data['upload'], b'x' * 100, 'me.png')
+        finalized = self.client.post(f"/api/jobs/uploads/{response.data['id']}/finalize/", stored.data, format='json')
+        self.assertEqual(finalized.status_code, 422)
+        self.assertFalse(Upload.objects.filter(pk=response.data['id']).exists())
+        self.assertFalse(os.path.exists(os.path.join(settings.MEDIA_ROOT, stored.data['public_id'])))
+
+        # Expired, never attached: purged with its stored file
+        Upload.objects.update(expires_at=timezone.now())
+        call_command('purge_uploads', stdout=StringIO())
+        self.assertEqual(os.listdir(os.path.join(settings.MEDIA_ROOT, 'uploads', 'resumes')), [])
+
+    @override_settings(
+        DIRECT_UPLOAD_BACKEND='cloudinary',
+        CLOUDINARY_STORAGE={'CLOUD_NAME': 'demo', 'API_KEY': '1234', 'API_SECRET': 'abcd'},
+    )
+    def test_cloudinary_form(self):
+        import cloudinary.utils
+
+        response = self.start()
+        form = response.data['upload']
+        self.assertEqual(form['url'], 'https://api.cloudinary.com/v1_1/demo/image/upload')
+        fields = form['fields']
+        self.assertTrue(fields['public_id'].startswith('media/uploads/resumes/resume_'))
+        signed = {key: value for key, value in fields.items() if key not in ('api_key', 'signature')}
+        self.assertEqual(fields['signature'], cloudinary.utils.api_sign_request(signed, 'abcd'))
+        self.assertEqual(fields['api_key'], '1234')
+        # The stand-in only serves the local backend
+        self.assertEqual(self.client.post('/api/jobs/uploads/direct/local/', fields).status_code, 403)
+
+
+class MediaDownloadTest(APITestCase):
+    """Test protected resume downloads (jobs/downloads.py): permissions, ranges, conditional requests, proxy hand-off"""
+
+    def setUp(self):
+        use_temp_media(self)
+        User = get_user_model()
+        self.applicant = User.objects.create_user(
+            email='asha@example.com', username='asha', first_name='Asha', last_name='Rao', password='pw',
+        )
+        self.other = User.objects.create_user(
+            email='ravi@example.com', username='ravi', first_name='Ravi', last_name='K', password='pw',
+        )
+        self.hr = User.objects.create_user(
+            email='hr@example.com', username='hr', first_name='H', last_name='R', password='pw', is_staff=True,
+        )
+        self.content = b'%PDF-1.4 ' + bytes(range(256)) * 4
+        self.application = JobApplication.objects.create(
+            job=create_job(), user=self.applicant, full_name='Asha Rao', email='asha@example.com', phone='9876543210',
+            resume=SimpleUploadedFile('resume.pdf', self.content),
+        )
+        self.url = f'/api/jobs/files/{self.application.resume.name}'
+
+    def test_owner_and_staff_only(self):
+        self.assertEqual(self.client.get(self.url).status_code, 401)
+        self.client.force_authenticate(self.other)
+        self.assertEqual(self.client.get(self.url).status_code, 404)
+        for user in (self.applicant, self.hr):
+            self.client.force_authenticate(user)
+            response = self.client.get(self.url)
+            self.assertEqual(response.status_code, 200)
+            self.assertEqual(b''.join(response.streaming_content), self.content)
+            self.assertEqual(response['Content-Type'], 'application/pdf')
+        # Profile files too; nothing outside the records
+        self.other.resume_file = SimpleUploadedFile('cv.pdf', b'%PDF-1.4')
+        self.other.save()
+        self.assertEqual(self.client.get(f'/api/jobs/files/{self.other.resume_file.name}').status_code, 200)
+        self.assertEqual(self.client.get('/api/jobs/files/../../etc/passwd').status_code, 404)
+
+    def test_ranges_and_conditional_requests(self):
+        self.client.force_authenticate(self.applicant)
+        response = self.client.get(self.url)
+        etag, size = response['ETag'], len(self.content)
+        self.assertEqual(response['Accept-Ranges'], 'bytes')
+        self.assertIn('private', response['Cache-Control'])
+
+        response = self.client.get(self.url, HTTP_RANGE='bytes=10-19')
+        self.assertEqual((response.status_code, response['Content-Range']), (206, f'bytes 10-19/{size}'))
+        self.assertEqual(b''.join(response.streaming_content), self.content[10:20])
+        response = self.client.get(self.url, HTTP_RANGE='bytes=-5')
+        self.assertEqual(b''.join(response.streaming_content), self.content[-5:])
+        response = self.client.get(self.url, HTTP_RANGE=f'bytes={size - 3}-')
+        self.assertEqual(b''.join(response.streaming_content), self.content[-3:])
+        self.assertEqual(self.client.get(self.url, HTTP_RANGE=f'bytes={size}-').status_code, 416)
+        # A range of another version of the file gets the whole file
+        response = self.client.get(self.url, HTTP_RANGE='bytes=10-19', HTTP_IF_RANGE='"stale"')
+        self.assertEqual(response.status_code, 200)
+        response = self.client.get(self.url, HTTP_RANGE='bytes=10-19', HTTP_IF_RANGE=etag)
+        self.assertEqual(response.status_code, 206)
+
+        self.assertEqual(self.client.get(self.url, HTTP_IF_NONE_MATCH=etag).status_code, 304)
+        response = self.client.get(self.url, HTTP_IF_MODIFIED_SINCE=response['Last-Modified'])
+        self.assertEqual(response.status_code, 304)
+
+    def test_proxy_hand_off(self):
+        self.client.force_authenticate(self.hr)
+        with override_settings(PROTECTED_MEDIA_SERVER='nginx'):
+            response = self.client.get(self.url)
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response['X-Accel-Redirect'], f'/protected-media/{self.application.resume.name}')
+        self.assertEqual((response.content, response['Content-Type']), (b'', 'application/pdf'))
+        with override_settings(PROTECTED_MEDIA_SERVER='sendfile'):
+            response = self.client.get(self.url)
+        self.assertEqual(response['X-Sendfile'], self.application.resume.path)
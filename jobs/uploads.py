@@ -0,0 +1,306 @@
+"""
+SkillConnect - Resumable Uploads
+Chunked uploads of resumes and profile pictures, behind /api/jobs/uploads/.
+
+A client creates an upload (file name, size, purpose), PUTs the file in
+chunks with Content-Range headers and finalizes it; the upload id is then
+sent as `resume_upload` when applying, or as `resume_file_upload` /
+`profile_picture_upload` to the profile. A dropped connection costs only
+the chunk in flight: GET the upload for its offset and carry on from there.
+
+Each chunk is streamed to a spool file, then appended to the upload's part
+file in UPLOAD_TEMP_DIR (which every worker must share). The append runs
+under the conditional UPDATE that moves the offset, so a chunk sent twice
+is appended once. The file's SHA-256 is updated as chunks are appended; a
+worker that did not see the earlier chunks rehashes the part file first.
+Nothing holds more than BLOCK_SIZE bytes of a file in memory. Attaching a
+finalized upload copies it to the field's storage and marks it used in the
+transaction that saves the field.
+"""
+
+import hashlib
+import os
+import re
+import tempfile
+import threading
+import time
+from collections import OrderedDict
+from contextlib import contextmanager
+from datetime import timedelta
+
+from django.conf import settings
+from django.core.files import File
+from django.db import transaction
+from django.utils import timezone
+
+from .tasks import task
+
+BLOCK_SIZE = 64 * 1024
+# Suggested to clients; chunks may be smaller, but not larger than MAX_CHUNK_SIZE
+CHUNK_SIZE = 1024 * 1024
+MAX_CHUNK_SIZE = 8 * 1024 * 1024
+UPLOAD_EXPIRY = timedelta(hours=24)
+
+# Purpose -> (allowed extensions, max size in bytes)
+PURPOSES = {
+    'resume': (('.pdf', '.doc', '.docx'), 10 * 1024 * 1024),
+    'profile_picture': (('.jpg', '.jpeg', '.png', '.gif', '.webp'), 5 * 1024 * 1024),
+}
+
+CONTENT_RANGE_RE = re.compile(r'^bytes (\d+)-(\d+)/(\d+|\*)$')
+
+
+class UploadError(Exception):
+    """An upload request that cannot be served; offset is included in the error response when set"""
+
+    def __init__(self, message, status_code=400, offset=None):
+        super().__init__(message)
+        self.status_code = status_code
+        self.offset = offset
+
+
+def temp_dir():
+    path = getattr(settings, 'UPLOAD_TEMP_DIR', os.path.join(tempfile.gettempdir(), 'skillconnect-uploads'))
+    os.makedirs(path, exist_ok=True)
+    return path
+
+
+def part_path(upload):
+    return os.path.join(temp_dir(), f'{upload.pk}.part')
+
+
+def parse_content_range(header, size):
+    """(start, end) byte offsets - end exclusive - of a `Content-Range: bytes start-last/size` header"""
+    match = CONTENT_RANGE_RE.match((header or '').strip())
+    if not match:
+        raise UploadError('Send each chunk with a "Content-Range: bytes start-end/size" header')
+    start, last, total = match.groups()
+    start, end = int(start), int(last) + 1
+    if total != '*' and int(total) != size:
+        raise UploadError(f'Content-Range size {total} does not match the upload size {size}')
+    if end <= start or end > size:
+        raise UploadError(f'Content-Range {start}-{last} is outside the upload (0-{size - 1})')
+    if end - start > MAX_CHUNK_SIZE:
+        raise UploadError(f'Chunks may be at most {MAX_CHUNK_SIZE} bytes')
+    return start, end
+
+
+class HashCache:
+    """This worker's running SHA-256 of recent uploads: {upload id: (offset hashed to, hash)}"""
+
+    def __init__(self, size=256):
+        self.size = size
+        self.hashes = OrderedDict()
+        self.lock = threading.Lock()
+
+    def hash_to(self, upload, offset):
+        """A hash of the upload's first offset bytes - continued from the cache, or read back from the part file"""
+        with self.lock:
+            cached = self.hashes.get(upload.pk)
+        if cached is not None and cached[0] == offset:
+            return cached[1].copy()
+        digest = hashlib.sha256()
+        with open(part_path(upload), 'rb') as part:
+            remaining = offset
+            while remaining:
+                block = part.read(min(BLOCK_SIZE, remaining))
+                if not block:
+                    raise UploadError('The upload\'s received data is missing; start a new upload', status_code=410)
+                digest.update(block)
+                remaining -= len(block)
+        return digest
+
+    def store(self, upload, offset, digest):
+        with self.lock:
+            self.hashes[upload.pk] = (offset, digest)
+            self.hashes.move_to_end(upload.pk)
+            while len(self.hashes) > self.size:
+                self.hashes.popitem(last=False)
+
+    def forget(self, upload):
+        with self.lock:
+            self.hashes.pop(upload.pk, None)
+
+
+upload_hashes = HashCache()
+
+
+def clean_file(filename, size, purpose):
+    """The base name of a file that may be uploaded for purpose; raises UploadError if it may not"""
+    if purpose not in PURPOSES:
+        raise UploadError(f"purpose must be one of {', '.join(PURPOSES)}")
+    extensions, max_size = PURPOSES[purpose]
+    filename = os.path.basename((filename or '').strip())[:255]
+    if not filename.lower().endswith(extensions):
+        raise UploadError(f"A {purpose.replace('_', ' ')} must be a {', '.join(extensions)} file")
+    if not 0 < size <= max_size:
+        raise UploadError(f'size must be between 1 and {max_size} bytes')
+    return filename
+
+
+def create_upload(user, filename, size, purpose, content_type=''):
+    """Start an upload; its part file is created empty"""
+    from .models import Upload
+
+    filename = clean_file(filename, size, purpose)
+    now = timezone.now()
+    upload = Upload.objects.create(
+        user=user, purpose=purpose, filename=filename, content_type=(content_type or '')[:100], size=size,
+        created_at=now, expires_at=now + UPLOAD_EXPIRY,
+    )
+    open(part_path(upload), 'wb').close()
+    return upload
+
+
+def check_open(upload):
+    if upload.expires_at <= timezone.now():
+        raise UploadError('This upload has expired; start a new one', status_code=410)
+    if upload.status != upload.OPEN:
+        raise UploadError('This upload is already finalized', status_code=409)
+
+
+def receive_chunk(upload, stream, start, end):
+    """Append bytes start..end of the file, read from stream; returns the new offset.
+
+    Bytes the upload already has are skipped, so a resent chunk is harmless;
+    a chunk starting past the offset is refused with the offset to resume from.
+    """
+    from .models import Upload
+
+    check_open(upload)
+    if upload.stored_name:
+        raise UploadError('Direct uploads are sent to their storage URL, not in chunks', status_code=409)
+    if end <= upload.offset:
+        return upload.offset
+    if start > upload.offset:
+        raise UploadError('Chunk does not start at the upload offset', status_code=409, offset=upload.offset)
+    with tempfile.NamedTemporaryFile(dir=temp_dir(), suffix='.chunk') as spool:
+        received = 0
+        while received < end - start:
+            block = stream.read(min(BLOCK_SIZE, end - start - received))
+            if not block:
+                break
+            spool.write(block)
+            received += len(block)
+        if received != end - start or stream.read(1):
+            raise UploadError(
+                f'Received {received} bytes; the Content-Range announced {end - start}', offset=upload.offset,
+            )
+        spool.flush()
+
+        uploads = Upload.objects.filter(pk=upload.pk, status=Upload.OPEN)
+        while True:
+            offset = uploads.values_list('offset', flat=True).first()
+            if offset is None:
+                raise UploadError('This upload is already finalized', status_code=409)
+            if end <= offset:
+                return offset
+            if start > offset:
+                raise UploadError('Chunk does not start at the upload offset', status_code=409, offset=offset)
+            upload.offset = offset
+            digest = upload_hashes.hash_to(upload, offset)
+            with transaction.atomic():
+                # Holds the row (the database, on SQLite) until commit: appends to one upload run one at a time
+                if not uploads.filter(offset=offset).update(offset=end):
+                    continue
+                with open(part_path(upload), 'r+b') as part:
+                    # Drops bytes left by an append whose transaction did not commit
+                    part.truncate(offset)
+                    part.seek(offset)
+                    spool.seek(offset - start)
+                    while block := spool.read(BLOCK_SIZE):
+                        part.write(block)
+                        digest.update(block)
+            upload_hashes.store(upload, end, digest)
+            upload.offset = end
+            return end
+
+
+def finalize_upload(upload, sha256=None):
+    """Check a fully received upload (and the client's SHA-256, if sent) and mark it complete"""
+    from .models import Upload
+
+    if upload.status != Upload.OPEN:
+        return upload
+    check_open(upload)
+    if upload.stored_name:
+        raise UploadError('Finalize a direct upload with the storage response', status_code=409)
+    if upload.offset != upload.size:
+        raise UploadError(
+            f'Upload incomplete: {upload.offset} of {upload.size} bytes received', status_code=409, offset=upload.offset,
+        )
+    digest = upload_hashes.hash_to(upload, upload.size).hexdigest()
+    if sha256 and sha256.strip().lower() != digest:
+        raise UploadError(f'SHA-256 mismatch: received data hashes to {digest}', status_code=422)
+    if upload.purpose == Upload.PROFILE_PICTURE:
+        check_image(part_path(upload))
+    Upload.objects.filter(pk=upload.pk, status=Upload.OPEN).update(status=Upload.COMPLETE, sha256=digest)
+    upload_hashes.forget(upload)
+    upload.refresh_from_db()
+    return upload
+
+
+def check_image(file):
+    """Raise UploadError unless file (a path or file object) is a readable image"""
+    from PIL import Image
+
+    try:
+        with Image.open(file) as image:
+            image.verify()
+    except Exception:
+        raise UploadError('Upload a valid image. The file you uploaded was either not an image or a corrupted image.')
+
+
+@contextmanager
+def use_upload(upload):
+    """Mark a finalized upload used and yield it as a File (or stored name) to assign to a FileField.
+
+    Call inside the transaction that saves the field: if it rolls back, the
+    upload can be used again. The part file is deleted after commit.
+    """
+    from .models import Upload
+
+    if not Upload.objects.filter(pk=upload.pk, status=Upload.COMPLETE).update(status=Upload.USED):
+        raise UploadError('This upload was already used', status_code=409)
+    if upload.stored_name:
+        # Already in media storage (jobs/direct_uploads.py): the field takes its name, nothing is copied
+        yield upload.stored_name
+        return
+    path = part_path(upload)
+    with open(path, 'rb') as part:
+        yield File(part, name=upload.filename)
+    transaction.on_commit(lambda: remove(path))
+
+
+def remove(path):
+    try:
+        os.remove(path)
+    except FileNotFoundError:
+        pass
+
+
+@task(max_attempts=3)
+def purge_uploads(now=None):
+    """Delete expired uploads with their part files (or unattached stored files), and spool files left by killed workers.
+
+    Returns the number of uploads deleted.
+    """
+    from .models import Upload
+
+    from .direct_uploads import delete_stored
+
+    now = now or timezone.now()
+    expired = list(Upload.objects.filter(expires_at__lte=now).values_list('pk', 'status', 'stored_name'))
+    for pk, status, stored_name in expired:
+        if not stored_name:
+            remove(os.path.join(temp_dir(), f'{pk}.part'))
+        elif status != Upload.USED:
+            # Sent straight to storage but never attached
+            delete_stored(stored_name)
+    Upload.objects.filter(pk__in=[pk for pk, _, _ in expired]).delete()
+    cutoff = time.time() - UPLOAD_EXPIRY.total_seconds()
+    with os.scandir(temp_dir()) as entries:
+        for entry in entries:
+            if entry.name.endswith('.chunk') and entry.stat().st_mtime < cutoff:
+                remove(entry.path)
+    return len(expired)
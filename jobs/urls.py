@@ -4,8 +4,27 @@ from . import views
 urlpatterns = [
     path('', views.JobListView.as_view(), name='job-list'),
     path('<int:pk>/', views.JobDetailView.as_view(), name='job-detail'),
+    path('<int:pk>/similar/', views.job_similar, name='job-similar'),
     path('categories/', views.job_categories, name='job-categories'),
     path('stats/', views.job_stats, name='job-stats'),
+    path('facets/', views.job_facets, name='job-facets'),
+    path('suggest/', views.job_suggest, name='job-suggest'),
+    path('trending/', views.job_trending, name='job-trending'),
+    path('ingest/', views.ingest_jobs, name='job-ingest'),
+    
+    # Saved searches (job alerts)
+    path('saved-searches/', views.SavedSearchListView.as_view(), name='saved-searches'),
+    path('saved-searches/<int:pk>/', views.SavedSearchDetailView.as_view(), name='saved-search-detail'),
+    
+    # Resumable uploads (resumes, profile pictures)
+    path('uploads/', views.upload_create, name='upload-create'),
+    path('uploads/direct/', views.upload_direct_create, name='upload-direct-create'),
+    path('uploads/direct/local/', views.upload_direct_local, name='upload-direct-local'),
+    path('uploads/<uuid:pk>/', views.upload_detail, name='upload-detail'),
+    path('uploads/<uuid:pk>/finalize/', views.upload_finalize, name='upload-finalize'),
+    
+    # Protected media: resumes and profile files, by their name under MEDIA_URL
+    path('files/<path:name>', views.media_download, name='media-download'),
     
     # Job Applications
     path('apply/', views.JobApplicationCreateView.as_view(), name='job-apply'),
@@ -1,106 +1,403 @@
-from rest_framework import generics, filters, status
-from rest_framework.decorators import api_view
+from rest_framework import generics, status
+from rest_framework.decorators import api_view, permission_classes
 from rest_framework.response import Response
-from rest_framework.permissions import IsAuthenticated
+from rest_framework.permissions import IsAdminUser, IsAuthenticated
+from rest_framework.exceptions import ValidationError
 from django.db.models import Q
-from .models import Job, JobApplication
-from .serializers import JobSerializer, JobApplicationSerializer, JobApplicationCreateSerializer
+from django.db.models.functions import Substr
+from django.http import Http404
+from .models import Job, JobApplication, SavedSearch, Upload
+from .serializers import (
+    JobSerializer, JobListSerializer, JobApplicationSerializer, JobApplicationCreateSerializer, SavedSearchSerializer,
+    JOB_CARD_FIELDS, JOB_SUMMARY_LENGTH,
+)
+from core.db_router import primary_reads
+from core.performance import CacheManager
+from .applications import save_application
+from .archive import get_archived_job
+from .catalog import job_catalog
+from .cache import cache_timeout, detail_cache_key, get_jobs_version, facets_cache_key, listing_cache_key
+from .dedup import DUPLICATE_POLICIES
+from .ingest import FeedError, detect_format, ingest, read_feed
+from .filters import JobSearchFilter, JobOrderingFilter, filter_jobs, get_search_query
+from .facets import facet_counts
+from .pagination import KeysetCursorPagination
+from .popularity import DEFAULT_LIMIT as TRENDING_DEFAULT_LIMIT, TRENDING_SIZE, VIEW, is_automated, record_event, trending_jobs
+from .search import search_jobs
+from .similar import NEIGHBORS, similar_jobs
+from .stats import get_job_stats
+from .suggest import DEFAULT_LIMIT, MAX_LIMIT, suggest
+from .downloads import can_download, serve_file
+from .direct_uploads import LocalBackend, create_direct_upload, direct_backend, finalize_direct_upload
+from .uploads import CHUNK_SIZE, UploadError, create_upload, finalize_upload, parse_content_range, receive_chunk
 
-class JobListView(generics.ListAPIView):
-    serializer_class = JobSerializer
-    filter_backends = [filters.SearchFilter, filters.OrderingFilter]
-    search_fields = ['title', 'company', 'description']
-    ordering_fields = ['created_at', 'title', 'company', 'min_salary']
+class JobFieldsMixin:
+    """Sparse fieldsets: ?fields=a,b serializes and fetches only those fields"""
+    default_fields = None  # None means every serializer field
+    fetch_columns = ('id',)  # always loaded, e.g. for ordering/pagination
+    
+    def get_requested_fields(self):
+        raw = self.request.query_params.get('fields', '')
+        fields = sorted({name.strip() for name in raw.split(',') if name.strip()})
+        if not fields:
+            return self.default_fields
+        unknown = set(fields) - set(self.get_serializer_class().Meta.fields)
+        if unknown:
+            raise ValidationError({'fields': [f"Unknown field(s): {', '.join(sorted(unknown))}"]})
+        return fields
+    
+    def get_serializer(self, *args, **kwargs):
+        kwargs.setdefault('fields', self.get_requested_fields())
+        return super().get_serializer(*args, **kwargs)
+    
+    def project(self, queryset):
+        """Load only the columns the response needs"""
+        fields = self.get_requested_fields() or self.get_serializer_class().Meta.fields
+        concrete = {field.name for field in Job._meta.concrete_fields}
+        columns = set(self.fetch_columns) | (set(fields) & concrete)
+        if 'posted_ago' in fields:
+            columns.add('created_at')
+        queryset = queryset.only(*columns)
+        if 'summary' in fields:
+            queryset = queryset.annotate(summary=Substr('description', 1, JOB_SUMMARY_LENGTH))
+        return queryset
+
+class JobListView(JobFieldsMixin, generics.ListAPIView):
+    serializer_class = JobListSerializer
+    pagination_class = KeysetCursorPagination
+    # Free-text search (?keyword= / ?search=) uses the job search index
+    filter_backends = [JobSearchFilter, JobOrderingFilter]
+    ordering_fields = ['created_at', 'title', 'company', 'min_salary', 'annual_salary_min', 'annual_salary_max']
     ordering = ['-created_at']
+    # Job cards only - full text stays in the database unless ?fields= asks for it
+    default_fields = JOB_CARD_FIELDS + ['summary']
+    fetch_columns = ['id'] + ordering_fields
+    
     def get_queryset(self):
-        queryset = Job.objects.filter(is_active=True)
-        
-        # Category filtering
-        category = self.request.query_params.get('category')
-        if category and category != '':
-            queryset = queryset.filter(category=category)
-        
-        # Job type filtering
-        job_type = self.request.query_params.get('job_type')
-        if job_type:
-            queryset = queryset.filter(job_type=job_type)
-            
-        # Experience level filtering
-        experience_level = self.request.query_params.get('experience_level')
-        if experience_level:
-            queryset = queryset.filter(experience_level=experience_level)
-            
-        # Work mode filtering
-        work_mode = self.request.query_params.get('work_mode')
-        if work_mode:
-            queryset = queryset.filter(work_mode=work_mode)
-        
-        # Custom filtering for salary range
-        min_salary = self.request.query_params.get('min_salary')
-        max_salary = self.request.query_params.get('max_salary')
-        
-        if min_salary:
-            queryset = queryset.filter(min_salary__gte=min_salary)
-        if max_salary:
-            queryset = queryset.filter(max_salary__lte=max_salary)
-            
-        # Custom search for keywords
-        keyword = self.request.query_params.get('keyword')
-        if keyword:
-            queryset = queryset.filter(
-                Q(title__icontains=keyword) |
-                Q(company__icontains=keyword) |
-                Q(description__icontains=keyword)
-            )
-            
-        # Location filtering
-        location = self.request.query_params.get('location')
-        if location and location.lower() != 'all':
-            queryset = queryset.filter(location__icontains=location)
-            
-        return queryset
+        queryset = filter_jobs(Job.objects.filter(is_active=True), self.request.query_params)
+        return self.project(queryset)
+
+    def paginate_queryset(self, queryset):
+        # Filtered/sorted pages come from the in-memory catalog when it can answer them
+        page = self.paginator.paginate_catalog(job_catalog, queryset, self.request, view=self)
+        if page is not None:
+            return page
+        return super().paginate_queryset(queryset)
+
+    def list(self, request, *args, **kwargs):
+        # Cached per canonical query string, invalidated by the jobs version
+        timeout = cache_timeout()
+        if not timeout:
+            return super().list(request, *args, **kwargs)
+        cache_key = listing_cache_key(request, self.paginator)
+        data = CacheManager.get_job_listings(cache_key)
+        CacheManager.record_access('job_listings', data is not None)
+        if data is not None:
+            return Response(data, headers={'X-Cache': 'HIT'})
+        # Cached under the version read from the primary, so read the rows there too
+        with primary_reads():
+            response = super().list(request, *args, **kwargs)
+        CacheManager.set_job_listings(cache_key, response.data, timeout=timeout)
+        response['X-Cache'] = 'MISS'
+        return response
 
-class JobDetailView(generics.RetrieveAPIView):
-    queryset = Job.objects.filter(is_active=True)
+class JobDetailView(JobFieldsMixin, generics.RetrieveAPIView):
     serializer_class = JobSerializer
 
+    def get_queryset(self):
+        # Expired jobs stay viewable (as closed) - first here, then from the archive
+        return self.project(Job.objects.filter(Q(is_active=True) | Q(expired_at__isnull=False)))
+
+    def get_object(self):
+        try:
+            return super().get_object()
+        except Http404:
+            archived = get_archived_job(self.kwargs['pk'])
+            if archived is None:
+                raise
+            return archived
+
+    def retrieve(self, request, *args, **kwargs):
+        response = self.cached_retrieve(request, *args, **kwargs)
+        # Counted in memory and written out in batches (jobs/popularity.py)
+        if not is_automated(request):
+            record_event(kwargs['pk'], VIEW)
+        return response
+
+    def cached_retrieve(self, request, *args, **kwargs):
+        timeout = cache_timeout()
+        if not timeout:
+            return super().retrieve(request, *args, **kwargs)
+        cache_key = detail_cache_key(kwargs['pk'], self.get_requested_fields())
+        data = CacheManager.get_job_detail(cache_key)
+        CacheManager.record_access('job_detail', data is not None)
+        if data is not None:
+            return Response(data, headers={'X-Cache': 'HIT'})
+        with primary_reads():
+            response = super().retrieve(request, *args, **kwargs)
+        CacheManager.set_job_detail(cache_key, response.data, timeout=timeout)
+        response['X-Cache'] = 'MISS'
+        return response
+
 @api_view(['GET'])
 def job_categories(request):
     """Get all available job categories"""
     categories = [{'value': choice[0], 'label': choice[1]} for choice in Job.CATEGORY_CHOICES]
     return Response(categories)
 
+def count_facets(request):
+    queryset = filter_jobs(Job.objects.filter(is_active=True), request.query_params)
+    query = get_search_query(request)
+    if query:
+        queryset = search_jobs(queryset, query)
+    return facet_counts(queryset)
+
+@api_view(['GET'])
+def job_facets(request):
+    """Counts per category/job_type/experience_level/work_mode/company_size for the current filters"""
+    # Cached like the listings, for JOB_CACHE_TIMEOUT (0 turns it off)
+    timeout = cache_timeout()
+    if not timeout:
+        return Response(count_facets(request))
+    filters_hash = facets_cache_key(request)
+    data = CacheManager.get_job_facets(filters_hash)
+    CacheManager.record_access('job_facets', data is not None)
+    if data is None:
+        with primary_reads():
+            data = count_facets(request)
+        CacheManager.set_job_facets(filters_hash, data, timeout=timeout)
+    return Response(data)
+
+@api_view(['GET'])
+def job_suggest(request):
+    """Typeahead suggestions: titles, skills, companies and cities for ?q="""
+    query = request.query_params.get('q', '')
+    try:
+        limit = min(max(int(request.query_params.get('limit', DEFAULT_LIMIT)), 1), MAX_LIMIT)
+    except ValueError:
+        limit = DEFAULT_LIMIT
+    return Response({'query': query, 'suggestions': suggest(query, limit)})
+
+@api_view(['GET'])
+def job_similar(request, pk):
+    """Open jobs most like this one - the precomputed list from jobs/similar.py"""
+    try:
+        limit = min(max(int(request.query_params.get('limit', NEIGHBORS)), 1), NEIGHBORS)
+    except ValueError:
+        limit = NEIGHBORS
+    concrete = {field.name for field in Job._meta.concrete_fields}
+    links = list(similar_jobs(pk, [name for name in JOB_CARD_FIELDS if name in concrete], limit))
+    if not links and not Job.objects.filter(pk=pk).exists():
+        raise Http404
+    results = JobListSerializer([link.similar for link in links], many=True, fields=JOB_CARD_FIELDS).data
+    for item, link in zip(results, links):
+        item['similarity'] = round(link.score, 3)
+    return Response({'job': pk, 'results': results})
+
+@api_view(['GET'])
+def job_trending(request):
+    """Open jobs with the most recent views and applications - the TrendingJob table from jobs/popularity.py"""
+    try:
+        limit = min(max(int(request.query_params.get('limit', TRENDING_DEFAULT_LIMIT)), 1), TRENDING_SIZE)
+    except ValueError:
+        limit = TRENDING_DEFAULT_LIMIT
+    # Cached whole, and only for the jobs version it was read at, so closed jobs drop out with the next read
+    version = get_jobs_version()
+    cached = CacheManager.get_popular_jobs()
+    data = cached['results'] if cached and cached['version'] == version else None
+    CacheManager.record_access('popular_jobs', data is not None)
+    if data is None:
+        concrete = {field.name for field in Job._meta.concrete_fields}
+        rows = list(trending_jobs([name for name in JOB_CARD_FIELDS if name in concrete]))
+        data = JobListSerializer([row.job for row in rows], many=True, fields=JOB_CARD_FIELDS).data
+        for item, row in zip(data, rows):
+            item['trending_score'] = round(row.score, 3)
+        CacheManager.set_popular_jobs({'version': version, 'results': data}, timeout=cache_timeout())
+    return Response({'results': data[:limit]})
+
 @api_view(['GET'])
 def job_stats(request):
-    """Get job statistics"""
-    total_jobs = Job.objects.filter(is_active=True).count()
-    categories_count = Job.objects.filter(is_active=True).values('category').distinct().count()
-    companies_count = Job.objects.filter(is_active=True).values('company').distinct().count()
-    
-    return Response({
-        'total_jobs': total_jobs,
-        'categories': categories_count,
-        'companies': companies_count
-    })
+    """Get job statistics - one row from the stats rollup (jobs/stats.py)"""
+    return Response(get_job_stats())
+
+@api_view(['POST'])
+@permission_classes([IsAdminUser])
+def ingest_jobs(request):
+    """Bulk upsert a partner feed: multipart `file`, or the raw CSV/JSONL/XML body.
+
+    ?source= names the feed (jobs upsert on source + external_id);
+    ?feed_format=csv|jsonl|xml overrides detection from the file name /
+    Content-Type (?format= is taken by DRF's renderer override);
+    ?duplicates=flag|merge|off picks what happens to near-duplicate postings.
+    """
+    if request.content_type.startswith('multipart/form-data'):
+        upload = request.FILES.get('file')
+        if upload is None:
+            return Response({'error': 'Upload the feed as `file`'}, status=status.HTTP_400_BAD_REQUEST)
+        stream, name = upload, upload.name
+        params = request.data
+    else:
+        stream, name = request.stream, ''
+        params = request.query_params
+    source = (request.query_params.get('source') or params.get('source') or '').strip()
+    feed_format = (
+        request.query_params.get('feed_format') or params.get('feed_format') or detect_format(name, request.content_type)
+    )
+    duplicates = request.query_params.get('duplicates') or params.get('duplicates') or 'flag'
+    if not source:
+        return Response({'error': 'source is required'}, status=status.HTTP_400_BAD_REQUEST)
+    if duplicates not in DUPLICATE_POLICIES:
+        return Response(
+            {'error': f"duplicates must be one of {', '.join(DUPLICATE_POLICIES)}"}, status=status.HTTP_400_BAD_REQUEST,
+        )
+    if not feed_format or stream is None:
+        return Response({'error': 'Send a CSV, JSONL or XML feed (or pass ?feed_format=)'}, status=status.HTTP_400_BAD_REQUEST)
+    try:
+        records = read_feed(stream, feed_format)
+    except FeedError as exc:
+        return Response({'error': str(exc)}, status=status.HTTP_400_BAD_REQUEST)
+    report = ingest(records, source[:50], duplicates=duplicates)
+    # Rows before an unreadable part of the feed are kept; the report says where it stopped
+    return Response(report.as_dict(), status=status.HTTP_400_BAD_REQUEST if report.feed_error else status.HTTP_200_OK)
+
+def upload_state(upload):
+    return {
+        'id': upload.pk,
+        'filename': upload.filename,
+        'purpose': upload.purpose,
+        'size': upload.size,
+        'offset': upload.offset,
+        'status': upload.status,
+        'sha256': upload.sha256 or None,
+        'chunk_size': CHUNK_SIZE,
+        'direct': bool(upload.stored_name),
+        'expires_at': upload.expires_at,
+    }
+
+def upload_error(exc):
+    data = {'error': str(exc)}
+    if exc.offset is not None:
+        data['offset'] = exc.offset
+    return Response(data, status=exc.status_code)
+
+def get_upload(request, pk):
+    """The upload, if the requester made it (guest uploads are reachable by id alone)"""
+    upload = Upload.objects.filter(pk=pk).first()
+    if upload is None or (upload.user_id is not None and upload.user_id != request.user.pk):
+        raise Http404
+    return upload
+
+@api_view(['POST'])
+def upload_create(request):
+    """Start a resumable upload: {filename, size, purpose: resume|profile_picture}.
+
+    Then PUT the file in chunks to /api/jobs/uploads/<id>/ (Content-Range:
+    bytes start-end/size), and POST /finalize/ - see jobs/uploads.py.
+    """
+    try:
+        size = int(request.data.get('size', 0))
+    except (TypeError, ValueError):
+        size = 0
+    try:
+        upload = create_upload(
+            request.user if request.user.is_authenticated else None, request.data.get('filename'), size,
+            request.data.get('purpose'), request.data.get('content_type', ''),
+        )
+    except UploadError as exc:
+        return upload_error(exc)
+    return Response(upload_state(upload), status=status.HTTP_201_CREATED)
+
+@api_view(['POST'])
+def upload_direct_create(request):
+    """Start a direct upload: {filename, size, purpose}; the file goes straight to storage.
+
+    POST the returned `upload.fields` plus the file (as `file`) to
+    `upload.url`, then POST the storage's JSON response to /finalize/ - see
+    jobs/direct_uploads.py.
+    """
+    try:
+        size = int(request.data.get('size', 0))
+    except (TypeError, ValueError):
+        size = 0
+    try:
+        upload, form = create_direct_upload(
+            request, request.data.get('filename'), size, request.data.get('purpose'),
+            request.data.get('content_type', ''),
+        )
+    except UploadError as exc:
+        return upload_error(exc)
+    data = upload_state(upload)
+    data['upload'] = {'url': form['url'], 'method': 'POST', 'fields': form['fields'], 'file_field': 'file'}
+    return Response(data, status=status.HTTP_201_CREATED)
+
+@api_view(['POST'])
+def upload_direct_local(request):
+    """The local storage stand-in's upload endpoint (DIRECT_UPLOAD_BACKEND = 'local')"""
+    backend = direct_backend()
+    if not isinstance(backend, LocalBackend):
+        return Response({'error': 'Direct uploads go to the media storage'}, status=status.HTTP_403_FORBIDDEN)
+    try:
+        return Response(backend.receive(request.data, request.FILES.get('file')))
+    except UploadError as exc:
+        return upload_error(exc)
+
+@api_view(['GET', 'PUT'])
+def upload_detail(request, pk):
+    """GET: the upload's offset, to resume from. PUT: one chunk as the raw body, with a Content-Range header."""
+    upload = get_upload(request, pk)
+    if request.method == 'PUT':
+        try:
+            start, end = parse_content_range(request.headers.get('Content-Range'), upload.size)
+            if request.stream is None:
+                raise UploadError('Send the chunk as the request body')
+            receive_chunk(upload, request.stream, start, end)
+        except UploadError as exc:
+            return upload_error(exc)
+    return Response(upload_state(upload))
+
+@api_view(['POST'])
+def upload_finalize(request, pk):
+    """Complete a fully sent upload; pass {sha256} to have the received file checked.
+
+    A direct upload is completed with the storage's response instead.
+    """
+    upload = get_upload(request, pk)
+    try:
+        if upload.stored_name:
+            upload = finalize_direct_upload(upload, request.data)
+        else:
+            upload = finalize_upload(upload, request.data.get('sha256'))
+    except UploadError as exc:
+        return upload_error(exc)
+    return Response(upload_state(upload))
+
+@api_view(['GET'])
+@permission_classes([IsAuthenticated])
+def media_download(request, name):
+    """A resume or profile file, for its owner or staff - handed to the proxy when one is set up (jobs/downloads.py)"""
+    # Someone else's file is "not found" too: no hint that it exists
+    if not can_download(request.user, name):
+        raise Http404
+    return serve_file(request, name)
 
 # Job Application Views
 class JobApplicationCreateView(generics.CreateAPIView):
     serializer_class = JobApplicationCreateSerializer
     # No authentication required - guest applications allowed
     
-    def perform_create(self, serializer):
-        # Only set user if authenticated
-        if self.request.user.is_authenticated:
-            serializer.save(user=self.request.user)
-        else:
-            serializer.save()
+    def create(self, request, *args, **kwargs):
+        # One transaction, duplicates caught by the (job, email) constraint, Idempotency-Key replayed
+        serializer = self.get_serializer(data=request.data)
+        serializer.is_valid(raise_exception=True)
+        return save_application(request, serializer, lambda application: serializer.data)
 
 class JobApplicationListView(generics.ListAPIView):
     serializer_class = JobApplicationSerializer
     permission_classes = [IsAuthenticated]
     
     def get_queryset(self):
-        return JobApplication.objects.filter(user=self.request.user)
+        # Newest first - served by the (user, -applied_at) index
+        return JobApplication.objects.filter(user=self.request.user).order_by('-applied_at')
 
 class JobApplicationDetailView(generics.RetrieveAPIView):
     serializer_class = JobApplicationSerializer
@@ -109,46 +406,50 @@ class JobApplicationDetailView(generics.RetrieveAPIView):
     def get_queryset(self):
         return JobApplication.objects.filter(user=self.request.user)
 
-@api_view(['POST'])
-def apply_to_job(request, job_id):
-    """Apply to a specific job"""
-    try:
-        job = Job.objects.get(id=job_id, is_active=True)
-    except Job.DoesNotExist:
-        return Response({'error': 'Job not found'}, status=status.HTTP_404_NOT_FOUND)
+class SavedSearchListView(generics.ListCreateAPIView):
+    """The user's saved searches; new jobs matching one are sent as job alerts"""
+    serializer_class = SavedSearchSerializer
+    permission_classes = [IsAuthenticated]
     
-    # Check for duplicate application by email
-    email = request.data.get('email')
-    if email:
-        existing_application = JobApplication.objects.filter(
-            job=job, email=email
-        ).first()
-        
-        if existing_application:
-            return Response({
-                'error': 'An application with this email already exists for this job'
-            }, status=status.HTTP_400_BAD_REQUEST)
+    def get_queryset(self):
+        return SavedSearch.objects.filter(user=self.request.user).order_by('-created_at')
     
-    # Create application
-    data = request.data.copy()
+    def perform_create(self, serializer):
+        serializer.save(user=self.request.user)
+
+class SavedSearchDetailView(generics.RetrieveUpdateDestroyAPIView):
+    serializer_class = SavedSearchSerializer
+    permission_classes = [IsAuthenticated]
+    
+    def get_queryset(self):
+        return SavedSearch.objects.filter(user=self.request.user)
+
+@api_view(['POST'])
+def apply_to_job(request, job_id):
+    """Apply to a specific job.
+
+    One transaction: duplicates are caught by the (job, email) constraint,
+    and a retry sent with the same Idempotency-Key header gets the first
+    response again (jobs/applications.py).
+    """
+    # Not request.data.copy(): that deep-copies uploaded files, and one spooled to disk cannot be copied
+    data = request.data.dict() if hasattr(request.data, 'dict') else dict(request.data)
     data['job'] = job_id
     
-    serializer = JobApplicationCreateSerializer(data=data)
-    if serializer.is_valid():
-        # Link application to user if authenticated
-        if request.user.is_authenticated:
-            application = serializer.save(user=request.user)
-        else:
-            application = serializer.save()
+    serializer = JobApplicationCreateSerializer(data=data, context={'request': request})
+    if not serializer.is_valid():
+        # The job field only accepts open jobs
+        if 'job' in serializer.errors:
+            return Response({'error': 'Job not found'}, status=status.HTTP_404_NOT_FOUND)
         return Response({
-            'success': True,
-            'message': 'Application submitted successfully!',
-            'application_id': application.id,
-            'job_title': job.title,
-            'company': job.company
-        }, status=status.HTTP_201_CREATED)
+            'success': False,
+            'errors': serializer.errors
+        }, status=status.HTTP_400_BAD_REQUEST)
     
-    return Response({
-        'success': False,
-        'errors': serializer.errors
-    }, status=status.HTTP_400_BAD_REQUEST)
+    return save_application(request, serializer, lambda application: {
+        'success': True,
+        'message': 'Application submitted successfully!',
+        'application_id': application.id,
+        'job_title': application.job.title,
+        'company': application.job.company
+    })
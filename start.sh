@@ -5,6 +5,8 @@ set -o errexit
 
 echo "🔄 Running database migrations..."
 python manage.py migrate --no-input
+# The cache table backs the job response cache and jobs version (jobs/cache.py)
+python manage.py createcachetable
 
 echo "👤 Creating admin user (if not exists)..."
 python create_admin.py || echo "Admin already exists"
@@ -12,6 +14,10 @@ python create_admin.py || echo "Admin already exists"
 echo "💼 Adding sample jobs (if not exists)..."
 python add_jobs.py || echo "Jobs already exist"
 
+# The background task worker (queued emails, alerts and PERIODIC_TASKS,
+# jobs/tasks.py) is its own process - the `worker` component in do-app.yaml
+# and the Procfile - so the platform restarts it when it crashes
+
 echo "🚀 Starting Gunicorn server..."
 # Use PORT env var from DigitalOcean (defaults to 8080)
 PORT=${PORT:-8080}
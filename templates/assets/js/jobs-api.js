@@ -0,0 +1,56 @@
+// Shared helpers for pages that read the SkillConnect jobs API
+
+// /api/jobs/ is cursor-paginated ({next, previous, results}): follow `next`
+// until it is null and return every job. Pages of 100 keep the round trips down.
+async function fetchAllJobs(url, options = {}) {
+    const pageUrl = new URL(url, window.location.href);
+    if (!pageUrl.searchParams.has('page_size')) {
+        pageUrl.searchParams.set('page_size', '100');
+    }
+    const jobs = [];
+    let next = pageUrl.toString();
+    while (next) {
+        const response = await fetch(next, options);
+        if (!response.ok) {
+            throw new Error(`Failed to fetch jobs (${response.status})`);
+        }
+        const data = await response.json();
+        if (Array.isArray(data)) {
+            return jobs.concat(data); // Unpaginated response
+        }
+        jobs.push(...data.results);
+        next = data.next;
+    }
+    return jobs;
+}
+
+// Typeahead: fill a <datalist> from /api/jobs/suggest/ as the user types
+function attachSuggestions(inputId, listId, apiBaseUrl) {
+    const input = document.getElementById(inputId);
+    const list = document.getElementById(listId);
+    if (!input || !list) return;
+    let timer = null;
+    let controller = null;
+    input.addEventListener('input', () => {
+        clearTimeout(timer);
+        const q = input.value.trim();
+        if (q.length < 2) { list.replaceChildren(); return; }
+        timer = setTimeout(async () => {
+            if (controller) controller.abort();
+            controller = new AbortController();
+            try {
+                const response = await fetch(`${apiBaseUrl}/jobs/suggest/?q=${encodeURIComponent(q)}`, { signal: controller.signal });
+                if (!response.ok) return;
+                const data = await response.json();
+                list.replaceChildren(...data.suggestions.map(item => {
+                    const option = document.createElement('option');
+                    option.value = item.text;
+                    option.label = `${item.type} · ${item.count} jobs`;
+                    return option;
+                }));
+            } catch (error) {
+                // Aborted by a newer keystroke or offline - keep the old list
+            }
+        }, 150);
+    });
+}